@@ -1,13 +1,42 @@
 """FastAPI application setup."""
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, Request
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 
+from ..core.config.settings import settings as vector_store_settings
+from ..core.http_client import get_http_clients
+from ..core.maintenance import get_index_maintainer
+from ..core.vector_store import prewarm_collections
+from ..utils.tracing import TracingMiddleware, shutdown_tracing
 from .routes import router
+from .services.admission import AdmissionRejected
+from .services.graph_service import close_checkpointed_graph
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Prewarm the vector store indexes before serving requests and schedule
+    index maintenance, if enabled, and stop maintenance and close the
+    conversation checkpointer, OpenAI connections and trace file on shutdown."""
+    if vector_store_settings.PREWARM_ON_STARTUP:
+        await run_in_threadpool(prewarm_collections)
+    if vector_store_settings.MAINTENANCE_INTERVAL_SECONDS > 0:
+        get_index_maintainer().start_schedule()
+    yield
+    await run_in_threadpool(get_index_maintainer().stop)
+    await close_checkpointed_graph()
+    await get_http_clients().aclose()
+    shutdown_tracing()
+
 
 app = FastAPI(
     title="AdriaCB Galtea",
     description="RAG application with FastAPI",
-    version="0.1.0"
+    version="0.1.0",
+    lifespan=lifespan
 )
 
 # Configure CORS
@@ -19,5 +48,17 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Time each request and its stages (see utils.tracing)
+app.add_middleware(TracingMiddleware)
+
+@app.exception_handler(AdmissionRejected)
+async def admission_rejected_handler(request: Request, exc: AdmissionRejected) -> JSONResponse:
+    """Answer shed requests with 429/503 and a Retry-After header."""
+    return JSONResponse(
+        status_code=exc.status_code,
+        content={"detail": exc.reason},
+        headers={"Retry-After": str(exc.retry_after)}
+    )
+
 # Include API routes
 app.include_router(router, prefix="/api/v1") 
\ No newline at end of file
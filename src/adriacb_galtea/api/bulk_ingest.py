@@ -0,0 +1,348 @@
+"""Resumable, parallel bulk ingestion of local documents.
+
+Ingests a directory tree or a manifest file directly from disk through the
+InjectionService, without the HTTP upload and temp-file copy, several
+documents at a time. Each finished document is appended to a checkpoint
+file (JSON lines), so an interrupted run started again with the same
+checkpoint resumes where it stopped; documents whose content is already
+ingested in the collection (same SHA-256, under any doc_id) are skipped.
+
+A manifest lists one document per line: either a path, or a JSON object
+with a "path" and optional "doc_id". Document IDs default to the path
+relative to the ingested directory (or the path as given for a file, or as
+listed in the manifest).
+
+Usage:
+    python -m adriacb_galtea.api.bulk_ingest <dir-or-file>... [--manifest FILE]
+        [--collection NAME] [--workers N] [--checkpoint FILE] [--pattern "*.pdf"]
+"""
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set, TextIO, Tuple
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from contextlib import contextmanager
+from pathlib import Path
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+
+from tqdm import tqdm
+
+from ..core.document_registry import hash_file
+from ..utils.logging import get_logger
+from .services.injection_service import InjectionService
+
+logger = get_logger(__name__)
+
+
+def iter_directory(root: Path, patterns: List[str]) -> Iterator[Dict[str, str]]:
+    """List the documents of a directory tree, in a stable order.
+
+    Args:
+        root: Directory to walk
+        patterns: Filename glob patterns (e.g. "*.pdf")
+
+    Yields:
+        Entries with the path and a doc_id relative to the directory
+    """
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames.sort()
+        for filename in sorted(filenames):
+            path = Path(dirpath) / filename
+            if any(path.match(pattern) for pattern in patterns):
+                yield {"path": str(path), "doc_id": path.relative_to(root).as_posix()}
+
+
+def iter_paths(paths: Iterable[Path], patterns: List[str]) -> Iterator[Dict[str, str]]:
+    """List the documents of the directories and files given on the command line.
+
+    Args:
+        paths: Directories (walked recursively) or files
+        patterns: Filename glob patterns for directories
+
+    Yields:
+        Entries with the path and doc_id: relative to its directory, or the
+        path as given for a file, so same-named files in different
+        directories do not share an ID
+    """
+    for path in paths:
+        if path.is_dir():
+            yield from iter_directory(path, patterns)
+        else:
+            yield {"path": str(path), "doc_id": path.as_posix()}
+
+
+def iter_manifest(lines: Iterable[str], base: Optional[Path] = None) -> Iterator[Dict[str, str]]:
+    """Parse manifest lines (paths or JSON objects) into entries.
+
+    Args:
+        lines: Manifest lines; blank lines and lines starting with # are ignored
+        base: Directory relative paths are resolved against
+
+    Yields:
+        Entries with the path and doc_id
+    """
+    for line in lines:
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        entry = json.loads(line) if line.startswith("{") else {"path": line}
+        path = Path(entry["path"])
+        if base is not None and not path.is_absolute():
+            path = base / path
+        yield {"path": str(path), "doc_id": entry.get("doc_id") or entry["path"]}
+
+
+class Checkpoint:
+    """Append-only JSON lines record of the documents already processed."""
+
+    def __init__(self, path: Optional[Path]):
+        """Load a checkpoint file, if it exists.
+
+        Args:
+            path: Checkpoint file, or None to run without one
+        """
+        self.path = Path(path) if path else None
+        self.done: Set[str] = set()
+        self._file: Optional[TextIO] = None
+        self._truncated = False
+        if self.path is not None and self.path.exists():
+            with open(self.path, encoding="utf-8") as f:
+                for line in f:
+                    self._truncated = not line.endswith("\n")
+                    try:
+                        record = json.loads(line)
+                    except json.JSONDecodeError:
+                        # A run killed mid-write leaves a truncated last line
+                        continue
+                    if record.get("status") != "failed":
+                        self.done.add(record["doc_id"])
+
+    def record(self, result: Dict[str, Any]) -> None:
+        """Append the result of one document and flush it to disk."""
+        if self.path is None:
+            return
+        if self._file is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._file = open(self.path, "a", encoding="utf-8")
+            if self._truncated:
+                self._file.write("\n")
+        self._file.write(json.dumps(result) + "\n")
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def close(self) -> None:
+        """Close the checkpoint file."""
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+class BulkIngester:
+    """Ingest many local documents in parallel through an InjectionService."""
+
+    def __init__(
+        self,
+        service: InjectionService,
+        workers: int = 4,
+        checkpoint: Optional[Checkpoint] = None,
+        max_chunks: Optional[int] = None
+    ):
+        """Initialize the ingester.
+
+        Args:
+            service: Injection service of the target collection
+            workers: Documents ingested concurrently
+            checkpoint: Checkpoint of the run. Defaults to none.
+            max_chunks: Optional maximum number of chunks stored per document
+        """
+        self.service = service
+        self.workers = max(1, workers)
+        self.checkpoint = checkpoint or Checkpoint(None)
+        self.max_chunks = max_chunks
+        self.counts = {"ingested": 0, "unchanged": 0, "duplicate": 0, "resumed": 0, "failed": 0}
+        self.chunks = 0
+        self.bytes = 0
+        self.started = time.perf_counter()
+        self._hash_locks: Dict[str, Tuple[threading.Lock, int]] = {}
+        self._hash_locks_lock = threading.Lock()
+
+    @contextmanager
+    def _content_lock(self, content_hash: str) -> Iterator[None]:
+        """Hold the lock of one content hash, so identical files are ingested one at a time."""
+        with self._hash_locks_lock:
+            lock, users = self._hash_locks.get(content_hash, (threading.Lock(), 0))
+            self._hash_locks[content_hash] = (lock, users + 1)
+        try:
+            with lock:
+                yield
+        finally:
+            with self._hash_locks_lock:
+                lock, users = self._hash_locks[content_hash]
+                if users == 1:
+                    del self._hash_locks[content_hash]
+                else:
+                    self._hash_locks[content_hash] = (lock, users - 1)
+
+    def ingest_one(self, entry: Dict[str, str]) -> Dict[str, Any]:
+        """Ingest one document, skipping content already in the collection.
+
+        Each document is written with its own writer, so its chunks are
+        stored before it is registered and checkpointed. The duplicate check
+        and the ingestion hold the lock of the content hash, so two copies
+        in flight at once are not both ingested.
+
+        Args:
+            entry: Entry with the path and doc_id
+
+        Returns:
+            Result with the doc_id, path, status, chunks, bytes and seconds
+        """
+        started = time.perf_counter()
+        path, doc_id = entry["path"], entry["doc_id"]
+        result: Dict[str, Any] = {"doc_id": doc_id, "path": path, "chunks": 0}
+        try:
+            result["bytes"] = os.path.getsize(path)
+            content_hash = hash_file(path)
+            with self._content_lock(content_hash):
+                existing = self.service.registry.find_by_hash(
+                    content_hash,
+                    collection=self.service.vector_store.collection_name
+                )
+                if existing is not None and existing["doc_id"] != doc_id:
+                    result.update(status="duplicate", duplicate_of=existing["doc_id"])
+                else:
+                    injected = self.service.inject_document(
+                        path,
+                        max_chunks=self.max_chunks,
+                        doc_id=doc_id,
+                        source=doc_id
+                    )
+                    if not injected["success"]:
+                        result.update(status="failed", error=injected["message"])
+                    elif injected.get("skipped"):
+                        result["status"] = "unchanged"
+                    else:
+                        result.update(status="ingested", chunks=injected["chunks_processed"])
+        except Exception as e:
+            result.update(status="failed", error=str(e))
+        result["seconds"] = round(time.perf_counter() - started, 3)
+        return result
+
+    def run(self, entries: Iterable[Dict[str, str]], total: Optional[int] = None) -> Dict[str, Any]:
+        """Ingest documents, keeping at most two per worker in flight.
+
+        Args:
+            entries: Entries with the path and doc_id of each document
+            total: Number of entries, for the progress bar
+
+        Returns:
+            Summary with the document counts by status, chunks, bytes, elapsed
+            seconds and throughput
+
+        Raises:
+            KeyboardInterrupt: After the documents in flight have finished and
+                been checkpointed
+        """
+        self.started = time.perf_counter()
+        pending: Set[Future] = set()
+        progress = tqdm(total=total, unit="doc", desc="Ingesting")
+        executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="bulk-ingest")
+        try:
+            for entry in entries:
+                if entry["doc_id"] in self.checkpoint.done:
+                    self.counts["resumed"] += 1
+                    progress.update()
+                    continue
+                if len(pending) >= 2 * self.workers:
+                    pending = self._collect(pending, progress)
+                pending.add(executor.submit(self.ingest_one, entry))
+            while pending:
+                pending = self._collect(pending, progress)
+        except KeyboardInterrupt:
+            logger.warning("bulk_ingest_interrupted", in_flight=len(pending))
+            for future in pending:
+                future.cancel()
+            pending = {future for future in pending if not future.cancelled()}
+            while pending:
+                pending = self._collect(pending, progress)
+            raise
+        finally:
+            executor.shutdown(wait=True, cancel_futures=True)
+            progress.close()
+            self.checkpoint.close()
+        return self.summary()
+
+    def _collect(self, pending: Set[Future], progress: tqdm) -> Set[Future]:
+        """Record the documents that finished, returning those still running."""
+        finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+        for future in finished:
+            result = future.result()
+            self.counts[result["status"]] += 1
+            self.chunks += result["chunks"]
+            self.bytes += result.get("bytes", 0) if result["status"] == "ingested" else 0
+            self.checkpoint.record(result)
+            if result["status"] == "failed":
+                logger.error("bulk_ingest_failed", doc_id=result["doc_id"], error=result.get("error"))
+            progress.set_postfix(chunks=self.chunks, failed=self.counts["failed"], refresh=False)
+            progress.update()
+        return pending
+
+    def summary(self) -> Dict[str, Any]:
+        """Summarize the run so far.
+
+        Returns:
+            Dictionary with the document counts by status, chunks and bytes
+            ingested, elapsed seconds and throughput
+        """
+        seconds = time.perf_counter() - self.started
+        return {
+            "collection": self.service.vector_store.collection_name,
+            "documents": dict(self.counts),
+            "chunks": self.chunks,
+            "bytes": self.bytes,
+            "seconds": round(seconds, 3),
+            "documents_per_second": round(self.counts["ingested"] / seconds, 3) if seconds else None,
+            "chunks_per_second": round(self.chunks / seconds, 2) if seconds else None,
+            "megabytes_per_second": round(self.bytes / seconds / 1e6, 3) if seconds else None,
+        }
+
+
+def main() -> None:
+    """Ingest a directory tree or a manifest from the command line."""
+    parser = argparse.ArgumentParser(description="Resumable, parallel bulk ingestion of local documents")
+    parser.add_argument("paths", nargs="*", help="Directories (walked recursively) or files to ingest")
+    parser.add_argument("--manifest", help="File listing one document per line (path or JSON object)")
+    parser.add_argument("--collection", help="Collection to ingest into (defaults to the default collection)")
+    parser.add_argument("--workers", type=int, default=4, help="Documents ingested concurrently")
+    parser.add_argument("--checkpoint", help="Checkpoint file; an interrupted run resumes from it")
+    parser.add_argument("--pattern", action="append", help="Filename glob for directories (default: *.pdf)")
+    parser.add_argument("--max-chunks", type=int, help="Maximum chunks stored per document")
+    args = parser.parse_args()
+    if not args.paths and not args.manifest:
+        parser.error("Give at least one path or --manifest")
+
+    entries = list(iter_paths(map(Path, args.paths), args.pattern or ["*.pdf"]))
+    if args.manifest:
+        with open(args.manifest, encoding="utf-8") as f:
+            entries.extend(iter_manifest(f, base=Path(args.manifest).parent))
+
+    ingester = BulkIngester(
+        InjectionService(args.collection),
+        workers=args.workers,
+        checkpoint=Checkpoint(args.checkpoint),
+        max_chunks=args.max_chunks
+    )
+    try:
+        summary = ingester.run(entries, total=len(entries))
+    except KeyboardInterrupt:
+        print(json.dumps(ingester.summary(), indent=2))
+        sys.exit(130)
+    print(json.dumps(summary, indent=2))
+    if summary["documents"]["failed"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
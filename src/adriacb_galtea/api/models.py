@@ -9,8 +9,10 @@ class Query(BaseModel):
 
 
 class Ingest(BaseModel):
-    """Ingest model."""
-    pdf_path: str
+    """Ingest model: server-side paths or glob patterns under the allowed roots."""
+    pdf_path: Optional[str] = None
+    paths: List[str] = []
+    max_chunks: Optional[int] = None
 
 
 class Response(BaseModel):
@@ -46,4 +48,20 @@ class DocumentDeletionResponse(BaseModel):
     """Response model for document deletion."""
     doc_id: str
     status: str = "success"
-    deleted: bool 
\ No newline at end of file
+    deleted: bool 
+
+
+class DocumentRecord(BaseModel):
+    """Registry record of an ingested document."""
+    doc_id: str
+    collection: str
+    source: str
+    content_hash: str
+    chunk_count: int
+    ingested_at: float
+
+
+class DocumentListResponse(BaseModel):
+    """Response model for listing ingested documents."""
+    documents: List[DocumentRecord]
+    total: int
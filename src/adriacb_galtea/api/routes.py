@@ -1,22 +1,38 @@
 """API routes for the RAG application."""
-from fastapi import APIRouter, UploadFile, File, Depends, HTTPException
-from fastapi.responses import StreamingResponse
+from fastapi import APIRouter, UploadFile, File, Depends, Header, HTTPException, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import PlainTextResponse, StreamingResponse
 from pydantic import BaseModel
+import asyncio
 import json
-from typing import List
+import secrets
+from typing import AsyncIterator, List, Optional
 
 
 from ..core.graph import create_graph
 from ..core.langfuse_service import get_langfuse_callback
 from ..config.settings import settings
 from ..utils.logging import get_logger
+from ..utils.tracing import span
 from .models import (
+    Ingest,
     QueryRequest,
-    DocumentDeletionResponse
+    DocumentDeletionResponse,
+    DocumentListResponse
 )
-from .services.injection_service import InjectionService
-from .services.graph_service import graph
-from ..core.vector_store import ChromaVectorStore, get_vector_store
+from .services.injection_service import InjectionService, PathNotAllowed
+from .services.coalescing import get_query_coalescer
+from .services.admission import get_admission_controller
+from .services.batch_query import QueryBatch, get_query_batch_registry
+from .services.graph_service import graph, get_checkpointed_graph
+from .services.profiler import Profile, ProfilerBusy, get_profiler
+from ..core.vector_store import ChromaVectorStore, CollectionNotFound, get_collection
+from ..core.http_client import get_http_clients
+from ..core.prefetch import RetrievalPrefetch, get_prefetch_stats
+from ..core.dedup import get_dedup_stats
+from ..core.document_registry import get_document_registry
+from ..core.maintenance import MaintenanceBusy, get_index_maintainer
+from ..core.reindex import ReindexError, get_reindexer
 
 logger = get_logger(__name__)
 router = APIRouter()
@@ -25,111 +41,753 @@ router = APIRouter()
 class QueryRequest(BaseModel):
     """Request model for query endpoint."""
     query: str
+    search_ef: Optional[int] = None
+    collection: Optional[str] = None
+    collections: Optional[List[str]] = None
+    thread_id: Optional[str] = None
 
-async def stream_response(graph, query: str):
+class BatchQueryRequest(BaseModel):
+    """Request model for the batch query endpoint."""
+    questions: List[str]
+    concurrency: Optional[int] = None
+    search_ef: Optional[int] = None
+    collection: Optional[str] = None
+    collections: Optional[List[str]] = None
+
+class ReindexRequest(BaseModel):
+    """Request model for the reindex endpoint."""
+    embedding_dimensions: Optional[int] = None
+    reembed: bool = False
+    max_chunks_per_second: Optional[float] = None
+    auto_swap: bool = False
+
+def check_admin_token(token: Optional[str]) -> None:
+    """Reject a request whose X-Admin-Token does not match settings.ADMIN_TOKEN."""
+    if not settings.ADMIN_TOKEN:
+        raise HTTPException(status_code=403, detail="Admin endpoints are disabled: ADMIN_TOKEN is not set")
+    if token is None or not secrets.compare_digest(token.encode(), settings.ADMIN_TOKEN.encode()):
+        raise HTTPException(status_code=401, detail="Invalid admin token")
+
+async def require_admin(x_admin_token: Optional[str] = Header(None)) -> None:
+    """Dependency restricting an endpoint to holders of the admin token."""
+    check_admin_token(x_admin_token)
+
+def start_request_profile(enabled: bool, token: Optional[str], label: str) -> Optional[Profile]:
+    """Start profiling a request if its profile flag is set (admin only)."""
+    if not enabled:
+        return None
+    check_admin_token(token)
+    try:
+        return get_profiler().start(label=label)
+    except ProfilerBusy as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
+async def stop_request_profile(profile: Optional[Profile]) -> None:
+    """Stop a request's profile, unless it already timed out and was replaced."""
+    profiler = get_profiler()
+    if profile is not None and profiler.active is profile:
+        await run_in_threadpool(profiler.stop)
+
+async def profiled(events: AsyncIterator[str], profile: Optional[Profile]) -> AsyncIterator[str]:
+    """Stop a request's profile once its streamed response ends."""
+    try:
+        async for event in events:
+            yield event
+    finally:
+        await stop_request_profile(profile)
+
+async def stream_response(
+    graph,
+    query: str,
+    collection: Optional[str] = None,
+    collections: Optional[List[str]] = None,
+    thread_id: Optional[str] = None
+):
     """Stream the response from the graph."""
+    prefetch = None
     try:
         # Get Langfuse callback handler
         langfuse_handler = get_langfuse_callback(settings)
+        config = {"callbacks": [langfuse_handler]} if langfuse_handler else {}
+        configurable = {
+            key: value
+            for key, value in (
+                ("collection", collection),
+                ("collections", collections),
+                ("thread_id", thread_id)
+            )
+            if value is not None
+        }
+        if settings.PREFETCH_ENABLED:
+            # Search for the question while the agent's first model call runs
+            prefetch = RetrievalPrefetch(
+                query,
+                collection=collection,
+                collections=collections
+            ).start()
+            configurable["prefetch"] = prefetch
+        if configurable:
+            config["configurable"] = configurable
         
         # Stream the response with Langfuse monitoring
         async for chunk in graph.astream(
             {"messages": [("user", query)]},
-            config={"callbacks": [langfuse_handler]} if langfuse_handler else {}
+            config=config
         ):
-            if "messages" in chunk and chunk["messages"]:
-                last_message = chunk["messages"][-1]
-                if hasattr(last_message, "content"):
-                    yield f"data: {json.dumps({'answer': last_message.content, 'sources': chunk.get('sources', [])})}\n\n"
+            # Each chunk maps the node that ran to its state update; only the
+            # agent's answers are streamed (not tool outputs or history trimming)
+            for node, update in chunk.items():
+                if node != "agent" or not update or not update.get("messages"):
+                    continue
+                last_message = update["messages"][-1]
+                if getattr(last_message, "content", None):
+                    sources = update.get("sources", [])
+                    with span("sse.serialize", sources=len(sources)) as serialize_span:
+                        event = f"data: {json.dumps({'answer': last_message.content, 'sources': sources})}\n\n"
+                        serialize_span.set_attribute("bytes", len(event))
+                    yield event
     except Exception as e:
         logger.error("Error streaming response", exc_info=e)
         yield f"data: {json.dumps({'error': str(e)})}\n\n"
+    finally:
+        if prefetch is not None:
+            prefetch.finish()
+
+async def check_collections(
+    collection: Optional[str],
+    collections: Optional[List[str]],
+    search_ef: Optional[int] = None
+) -> None:
+    """Check that the collections a query names exist, before its graph run starts.
+    
+    search_ef cannot be chosen per query: Chroma reads it when a process
+    loads a collection's index, so a query giving one is rejected rather
+    than searched at the collection's setting.
+    """
+    if search_ef is not None:
+        raise HTTPException(
+            status_code=400,
+            detail="search_ef is a per-collection setting and cannot be set per query"
+        )
+    names = [name for name in [collection, *(collections or [])] if name is not None]
+    try:
+        for name in dict.fromkeys(names or [None]):
+            await run_in_threadpool(get_collection, name)
+    except CollectionNotFound as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
 @router.post("/query")
-async def query(request: QueryRequest):
+async def query(
+    request: QueryRequest,
+    profile: bool = False,
+    x_request_timeout: Optional[float] = Header(None),
+    x_admin_token: Optional[str] = Header(None)
+):
     """Process a query using the RAG system with streaming response.
     
+    The search is restricted to request.collection (the default collection
+    if not given), or fans out across request.collections and merges their
+    top-k.
+    
+    With a thread_id the conversation is checkpointed and continued on the
+    next request with the same thread_id; its history is trimmed to a fixed
+    token budget before each model call.
+    
+    Concurrent identical queries without a thread_id share one graph run
+    and receive the same streamed events (see QueryCoalescer).
+    
+    A graph run holds a "query" admission slot until it ends, even if its
+    clients disconnect; queries joining a run in flight take no slot, and
+    queries that cannot start in time are rejected with 429/503.
+    
+    With profile=true (admin only), the worker is sampled until the stream
+    ends and the profile ID is returned in the X-Profile-Id header.
+    
     Args:
         request: Query request containing the user's question
+        profile: Whether to profile the request
+        x_request_timeout: Optional maximum seconds to wait for a slot
+        x_admin_token: Admin token, required to profile the request
         
     Returns:
         StreamingResponse with answer and sources
     """
+    await check_collections(request.collection, request.collections, request.search_ef)
+    if profile:
+        check_admin_token(x_admin_token)
+    
+    coalescer = get_query_coalescer()
+    key = None
+    if not request.thread_id and settings.COALESCE_ENABLED:
+        key = coalescer.key(
+            request.query,
+            collection=request.collection,
+            collections=request.collections
+        )
+    
+    # Requests joining an in-flight run cost no graph run, so they skip
+    # admission; the run that does run the graph holds the slot until it ends
+    admission = get_admission_controller()
+    run = coalescer.join(key) if key is not None else None
+    acquired_at = None
+    if run is None:
+        acquired_at = await admission.acquire("query", x_request_timeout)
+        # An identical run may have started while this request waited
+        run = coalescer.join(key) if key is not None else None
+        if run is not None:
+            await admission.release("query", acquired_at)
+            acquired_at = None
+    
+    request_profile = None
     try:
+        request_profile = start_request_profile(profile, x_admin_token, "POST /query")
+        if run is None:
+            run_graph = await get_checkpointed_graph() if request.thread_id else graph
+            
+            def run_factory():
+                return stream_response(
+                    run_graph,
+                    request.query,
+                    collection=request.collection,
+                    collections=request.collections,
+                    thread_id=request.thread_id
+                )
+            
+            # The graph runs in a background task that owns the slot, so the
+            # slot is released when the run ends even if the client leaves
+            # before reading the response
+            slot_acquired_at = acquired_at
+            run = coalescer.start(
+                key,
+                run_factory,
+                on_done=lambda: admission.release("query", slot_acquired_at)
+            )
+            acquired_at = None
+        
+        events = run.subscribe()
+        if request_profile is None:
+            return StreamingResponse(events, media_type="text/event-stream")
         return StreamingResponse(
-            stream_response(graph, request.query),
-            media_type="text/event-stream"
+            profiled(events, request_profile),
+            media_type="text/event-stream",
+            headers={"X-Profile-Id": request_profile.id}
         )
     except Exception as e:
+        if acquired_at is not None:
+            await admission.release("query", acquired_at)
+        await stop_request_profile(request_profile)
+        if isinstance(e, HTTPException):
+            raise
         logger.error("Error processing query", exc_info=e)
         raise HTTPException(status_code=500, detail=str(e))
 
-def get_vector_store() -> ChromaVectorStore:
-    """Get the vector store instance."""
-    return get_vector_store()
+@router.post("/query/batch")
+async def query_batch(
+    request: BatchQueryRequest,
+    x_request_timeout: Optional[float] = Header(None)
+):
+    """Answer many questions with concurrent graph runs, streaming NDJSON results.
+    
+    All questions are embedded up front in one batched call; at most
+    request.concurrency (QUERY_BATCH_CONCURRENCY by default) graph runs
+    are in flight at once. One line is streamed per question as it
+    completes, with its index, answer, sources, token usage and timings
+    (or an error), followed by a summary line with "done": true.
+    
+    The whole batch holds one "batch" admission slot. The batch ID is
+    returned in the X-Batch-Id header; the batch is cancelled with
+    DELETE /query/batch/{batch_id} or when the client disconnects.
+    
+    Args:
+        request: Questions and retrieval parameters
+        x_request_timeout: Optional maximum seconds to wait for a slot
+        
+    Returns:
+        StreamingResponse of NDJSON lines
+    """
+    await check_collections(request.collection, request.collections, request.search_ef)
+    if not request.questions:
+        raise HTTPException(status_code=400, detail="No questions given")
+    if len(request.questions) > settings.QUERY_BATCH_MAX_QUESTIONS:
+        raise HTTPException(
+            status_code=413,
+            detail=f"At most {settings.QUERY_BATCH_MAX_QUESTIONS} questions per batch"
+        )
+    if request.concurrency is not None and request.concurrency < 1:
+        raise HTTPException(status_code=400, detail="concurrency must be at least 1")
+    concurrency = min(
+        request.concurrency or settings.QUERY_BATCH_CONCURRENCY,
+        settings.QUERY_BATCH_MAX_CONCURRENCY
+    )
+    
+    admission = get_admission_controller()
+    acquired_at = await admission.acquire("batch", x_request_timeout)
+    batch = QueryBatch(
+        graph,
+        request.questions,
+        concurrency,
+        collection=request.collection,
+        collections=request.collections
+    )
+    events = admission.hold("batch", acquired_at, get_query_batch_registry().stream(batch))
+    return StreamingResponse(
+        events,
+        media_type="application/x-ndjson",
+        headers={"X-Batch-Id": batch.id}
+    )
+
+@router.get("/query/batch/{batch_id}")
+async def query_batch_status(batch_id: str) -> dict:
+    """Get the progress of a running batch."""
+    batch = get_query_batch_registry().get(batch_id)
+    if batch is None:
+        raise HTTPException(status_code=404, detail=f"No running batch {batch_id!r}")
+    return batch.stats()
+
+@router.delete("/query/batch/{batch_id}")
+async def cancel_query_batch(batch_id: str) -> dict:
+    """Cancel a running batch.
+    
+    No further questions are started and the graph runs in flight are
+    cancelled; the batch's stream ends with its summary line.
+    
+    Args:
+        batch_id: ID returned in the X-Batch-Id header
+        
+    Returns:
+        Progress of the batch at cancellation
+    """
+    batch = get_query_batch_registry().get(batch_id)
+    if batch is None:
+        raise HTTPException(status_code=404, detail=f"No running batch {batch_id!r}")
+    batch.cancel()
+    return batch.stats()
+
+def get_vector_store(collection: Optional[str] = None) -> ChromaVectorStore:
+    """Get the vector store of an existing collection, rejecting invalid and unknown names."""
+    try:
+        return get_collection(collection)
+    except CollectionNotFound as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
-def get_injection_service() -> InjectionService:
-    """Get the injection service instance."""
-    return InjectionService()
+def get_injection_service(collection: Optional[str] = None) -> InjectionService:
+    """Get the injection service for the collection given as query parameter."""
+    try:
+        return InjectionService(collection)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+def get_existing_injection_service(collection: Optional[str] = None) -> InjectionService:
+    """Get the injection service of an existing collection, without creating it."""
+    try:
+        return InjectionService(collection, create=False)
+    except CollectionNotFound as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
 @router.post("/inject")
 async def inject_document(
+    response: Response,
     file: UploadFile = File(...),
-    service: InjectionService = Depends(get_injection_service)
+    service: InjectionService = Depends(get_injection_service),
+    profile: bool = False,
+    x_request_timeout: Optional[float] = Header(None),
+    x_admin_token: Optional[str] = Header(None)
 ) -> dict:
     """Inject a document into the vector store.
     
+    The injection holds an "ingest" admission slot; ingestion only starts
+    while no query is waiting for a slot.
+    
+    With profile=true (admin only), the worker is sampled while the document
+    is ingested and the profile ID is returned in the X-Profile-Id header.
+    
     Args:
+        response: Response, carrying the X-Profile-Id header
         file: The document file to inject
         service: Injection service instance
+        profile: Whether to profile the request
+        x_request_timeout: Optional maximum seconds to wait for a slot
+        x_admin_token: Admin token, required to profile the request
         
     Returns:
         Dictionary containing injection status
     """
-    try:
-        # Save file temporarily
-        import tempfile
-        import os
-        with tempfile.NamedTemporaryFile(delete=False) as temp_file:
-            content = await file.read()
-            temp_file.write(content)
-            temp_file.flush()
-            temp_path = temp_file.name
-
+    if profile:
+        check_admin_token(x_admin_token)
+    async with get_admission_controller().slot("ingest", x_request_timeout):
+        request_profile = start_request_profile(profile, x_admin_token, "POST /inject")
+        if request_profile is not None:
+            response.headers["X-Profile-Id"] = request_profile.id
         try:
-            # Process and inject the document
-            result = service.inject_document(temp_path)
-            return result
+            # Save file temporarily
+            import tempfile
+            import os
+            with span("upload.write", filename=file.filename) as upload_span:
+                with tempfile.NamedTemporaryFile(delete=False) as temp_file:
+                    content = await file.read()
+                    temp_file.write(content)
+                    temp_file.flush()
+                    temp_path = temp_file.name
+                upload_span.set_attribute("bytes", len(content))
+
+            try:
+                # Process and inject the document off the event loop
+                result = await run_in_threadpool(service.inject_document, temp_path, source=file.filename)
+                return result
+            finally:
+                # Clean up temporary file
+                os.unlink(temp_path)
+                
+        except Exception as e:
+            logger.error("Error injecting document", exc_info=e)
+            raise HTTPException(status_code=500, detail=str(e))
         finally:
-            # Clean up temporary file
-            os.unlink(temp_path)
-            
-    except Exception as e:
-        logger.error("Error injecting document", exc_info=e)
-        raise HTTPException(status_code=500, detail=str(e))
+            await stop_request_profile(request_profile)
 
 @router.post("/inject/batch")
 async def inject_documents(
     files: List[UploadFile] = File(...),
-    service: InjectionService = Depends(get_injection_service)
+    service: InjectionService = Depends(get_injection_service),
+    x_request_timeout: Optional[float] = Header(None)
 ) -> List[dict]:
     """Inject multiple documents into the vector store.
     
+    The whole batch holds one "ingest" admission slot.
+    
     Args:
         files: List of document files to inject
         service: Injection service instance
+        x_request_timeout: Optional maximum seconds to wait for a slot
         
     Returns:
         List of injection results
     """
-    return await service.inject_documents(files)
+    async with get_admission_controller().slot("ingest", x_request_timeout):
+        return await service.inject_documents(files)
+
+@router.post("/inject/paths")
+async def inject_paths(
+    request: Ingest,
+    service: InjectionService = Depends(get_injection_service),
+    x_request_timeout: Optional[float] = Header(None)
+) -> List[dict]:
+    """Inject documents that already live on a server-side volume, in place.
+    
+    Paths and glob patterns must resolve under INGEST_ALLOWED_ROOTS. The
+    whole request holds one "ingest" admission slot.
+    
+    Args:
+        request: Paths or glob patterns (pdf_path is accepted as a single path)
+        service: Injection service instance
+        x_request_timeout: Optional maximum seconds to wait for a slot
+        
+    Returns:
+        List of injection results, one per file
+    """
+    patterns = request.paths + ([request.pdf_path] if request.pdf_path else [])
+    if not patterns:
+        raise HTTPException(status_code=400, detail="No paths given")
+    async with get_admission_controller().slot("ingest", x_request_timeout):
+        try:
+            return await service.inject_paths(patterns, max_chunks=request.max_chunks)
+        except PathNotAllowed as e:
+            raise HTTPException(status_code=403, detail=str(e))
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+@router.get("/metrics")
+async def metrics() -> dict:
+    """Get service metrics.
+    
+    Returns:
+        Query coalescing, admission control, OpenAI connection pool,
+        retrieval prefetch, near-duplicate detection and batch query counters
+    """
+    return {
+        "coalescing": get_query_coalescer().stats(),
+        "admission": get_admission_controller().stats(),
+        "query_batches": get_query_batch_registry().stats(),
+        "openai_http": get_http_clients().stats(),
+        "prefetch": get_prefetch_stats().stats(),
+        "dedup": get_dedup_stats().stats()
+    }
+
+def render_profile(profile: Profile, format: str, include_idle: bool):
+    """Render a profile as collapsed stacks (text) or JSON with its metadata."""
+    collapsed = profile.collapsed(include_idle=include_idle)
+    if format == "json":
+        return {**profile.summary(), "collapsed": collapsed}
+    return PlainTextResponse(collapsed, headers={"X-Profile-Id": profile.id})
+
+@router.post("/admin/profile", dependencies=[Depends(require_admin)])
+async def run_profile(
+    seconds: float = 10.0,
+    interval_ms: Optional[float] = None,
+    include_idle: bool = False,
+    format: str = "collapsed"
+):
+    """Sample the stacks of every thread of this worker for a few seconds.
+    
+    Only one profile runs at a time per worker; the duration is capped by
+    PROFILER_MAX_SECONDS. Requires the X-Admin-Token header.
+    
+    Args:
+        seconds: How long to sample
+        interval_ms: Milliseconds between samples. Defaults to PROFILER_INTERVAL_MS.
+        include_idle: Whether to keep the stacks of threads waiting idle
+        format: "collapsed" (flamegraph.pl/speedscope input) or "json"
+    
+    Returns:
+        The profile as collapsed stacks, or as JSON with its metadata
+    """
+    if format not in ("collapsed", "json"):
+        raise HTTPException(status_code=400, detail=f"Invalid format {format!r}")
+    profiler = get_profiler()
+    try:
+        profile = profiler.start(seconds=seconds, interval_ms=interval_ms, label="POST /admin/profile")
+    except ProfilerBusy as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    try:
+        await asyncio.sleep(min(seconds, settings.PROFILER_MAX_SECONDS))
+    finally:
+        await stop_request_profile(profile)
+    return render_profile(profile, format, include_idle)
+
+@router.get("/admin/profiles", dependencies=[Depends(require_admin)])
+async def list_profiles() -> List[dict]:
+    """List the finished profiles kept by this worker, newest first.
+    
+    Returns:
+        Profile summaries
+    """
+    return get_profiler().list()
+
+@router.get("/admin/profiles/{profile_id}", dependencies=[Depends(require_admin)])
+async def get_profile(profile_id: str, include_idle: bool = False, format: str = "collapsed"):
+    """Get a finished profile, such as one of a profiled /query or /inject.
+    
+    Args:
+        profile_id: Profile ID (the X-Profile-Id response header)
+        include_idle: Whether to keep the stacks of threads waiting idle
+        format: "collapsed" or "json"
+    
+    Returns:
+        The profile as collapsed stacks, or as JSON with its metadata
+    """
+    profile = get_profiler().get(profile_id)
+    if profile is None:
+        raise HTTPException(status_code=404, detail=f"Profile {profile_id!r} not found or still running")
+    return render_profile(profile, format, include_idle)
+
+@router.get("/collections/stats")
+async def collection_stats(collection: Optional[str] = None) -> dict:
+    """Get statistics about a collection and its HNSW index.
+    
+    Args:
+        collection: Collection name. Defaults to the default collection.
+    
+    Returns:
+        Collection count, dimensions, HNSW parameters in effect and index size
+    """
+    return await run_in_threadpool(get_vector_store(collection).get_stats)
+
+@router.get("/collections/duplicates")
+async def collection_duplicates(collection: Optional[str] = None) -> dict:
+    """Report the near-duplicate index of a collection.
+    
+    Args:
+        collection: Collection name. Defaults to the default collection.
+    
+    Returns:
+        Indexed chunks, linked duplicate chunks and their bytes
+    """
+    store = get_vector_store(collection)
+    return await run_in_threadpool(get_document_registry().duplicate_stats, store.collection_name)
+
+@router.get("/collections/health")
+async def collection_health(collection: Optional[str] = None) -> dict:
+    """Report deleted index entries, index size and database free space.
+    
+    Args:
+        collection: Collection name or alias. Defaults to every collection.
+    
+    Returns:
+        Storage health, the health of each collection and the last compaction runs
+    """
+    try:
+        return await run_in_threadpool(get_index_maintainer().health, [collection] if collection else None)
+    except CollectionNotFound as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.post("/collections/{alias}/compact", status_code=202, dependencies=[Depends(require_admin)])
+async def compact_collection(alias: str, force: bool = False, full_vacuum: bool = False) -> dict:
+    """Rebuild a collection's index without deleted entries, in the background.
+    
+    Queries keep using the current collection until the rebuilt one is
+    swapped in; the database is then vacuumed. Progress is reported by
+    GET /collections/{alias}/reindex and the result by GET /collections/health.
+    
+    Args:
+        alias: Alias (or collection name) to compact
+        force: Whether to rebuild even if the collection does not need it
+        full_vacuum: Whether to allow a blocking full VACUUM to enable incremental vacuum
+    
+    Returns:
+        The alias and its health before compaction
+    """
+    maintainer = get_index_maintainer()
+    try:
+        health = await run_in_threadpool(maintainer.health, [alias])
+        maintainer.start_compaction(alias, force=force, full_vacuum=full_vacuum)
+    except MaintenanceBusy as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except CollectionNotFound as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"alias": alias, "before": health["collections"][0], "storage": health["storage"]}
+
+@router.post("/collections/{alias}/reindex", status_code=202, dependencies=[Depends(require_admin)])
+async def start_reindex(alias: str, request: ReindexRequest) -> dict:
+    """Rebuild a collection into a new one in the background, behind an alias.
+    
+    Writes to the alias are applied to both collections until the alias is
+    switched and the reindex is finalized.
+    
+    Args:
+        alias: Alias (or collection name) to reindex
+        request: New embedding dimension, re-embedding, copy rate and auto swap
+    
+    Returns:
+        Progress of the reindex job
+    """
+    try:
+        job = await run_in_threadpool(
+            get_reindexer().start,
+            alias,
+            embedding_dimensions=request.embedding_dimensions,
+            reembed=request.reembed,
+            max_chunks_per_second=request.max_chunks_per_second,
+            auto_swap=request.auto_swap
+        )
+    except ReindexError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except CollectionNotFound as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return job.stats()
+
+@router.get("/collections/{alias}/reindex")
+async def reindex_status(alias: str) -> dict:
+    """Get an alias and the progress of its last reindex.
+    
+    Args:
+        alias: Alias name
+    
+    Returns:
+        Alias record and reindex job progress
+    """
+    return get_reindexer().status(alias)
+
+@router.delete("/collections/{alias}/reindex", dependencies=[Depends(require_admin)])
+async def cancel_reindex(alias: str) -> dict:
+    """Cancel a running reindex; the alias keeps its current collection.
+    
+    Args:
+        alias: Alias name
+    
+    Returns:
+        Progress of the cancelled job
+    """
+    job = get_reindexer().jobs.get(alias)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"No reindex of {alias!r}")
+    job.cancel()
+    await run_in_threadpool(job.join)
+    return job.stats()
+
+@router.post("/collections/{alias}/swap", dependencies=[Depends(require_admin)])
+async def swap_alias(alias: str) -> dict:
+    """Switch an alias to the collection built by its reindex.
+    
+    Args:
+        alias: Alias name
+    
+    Returns:
+        The new alias record
+    """
+    try:
+        return await run_in_threadpool(get_reindexer().swap, alias)
+    except ReindexError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
+@router.post("/collections/{alias}/rollback", dependencies=[Depends(require_admin)])
+async def rollback_alias(alias: str) -> dict:
+    """Switch an alias back to its previous collection.
+    
+    Args:
+        alias: Alias name
+    
+    Returns:
+        The new alias record
+    """
+    try:
+        return await run_in_threadpool(get_reindexer().rollback, alias)
+    except ReindexError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
+@router.post("/collections/{alias}/finalize", dependencies=[Depends(require_admin)])
+async def finalize_alias(alias: str, drop_previous: bool = False) -> dict:
+    """Stop mirroring writes to an alias's previous collection.
+    
+    Args:
+        alias: Alias name
+        drop_previous: Whether to delete the previous collection
+    
+    Returns:
+        The alias record and the dropped collection, if any
+    """
+    try:
+        return await run_in_threadpool(get_reindexer().finalize, alias, drop_previous)
+    except ReindexError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
+@router.get("/documents", response_model=DocumentListResponse)
+async def list_documents(
+    limit: int = 100,
+    offset: int = 0,
+    service: InjectionService = Depends(get_existing_injection_service)
+):
+    """List the documents ingested into the vector store.
+    
+    Args:
+        limit: Maximum number of documents to return
+        offset: Number of documents to skip
+        service: Injection service instance
+        
+    Returns:
+        Registered documents, most recently ingested first
+    """
+    return DocumentListResponse(
+        documents=service.list_documents(limit=limit, offset=offset),
+        total=service.registry.count(collection=service.vector_store.collection_name)
+    )
 
-@router.delete("/documents/{doc_id}", response_model=DocumentDeletionResponse)
+@router.delete("/documents/{doc_id:path}", response_model=DocumentDeletionResponse)
 async def delete_document(
     doc_id: str,
-    service: InjectionService = Depends(get_injection_service)
+    service: InjectionService = Depends(get_existing_injection_service)
 ):
-    """Delete a document from the vector store.
+    """Delete a document and all of its chunks from the vector store.
     
     Args:
         doc_id: ID of the document to delete
@@ -138,5 +796,9 @@ async def delete_document(
     Returns:
         Deletion status
     """
-    success = await service.delete_document(doc_id)
-    return DocumentDeletionResponse(success=success) 
\ No newline at end of file
+    deleted = await service.delete_document(doc_id)
+    return DocumentDeletionResponse(
+        doc_id=doc_id,
+        status="success" if deleted else "not_found",
+        deleted=deleted
+    ) 
\ No newline at end of file
@@ -1,4 +1,7 @@
 """API services package."""
 from .injection_service import InjectionService
+from .ingestion_pipeline import IngestionPipeline
+from .coalescing import QueryCoalescer
+from .admission import AdmissionController, AdmissionRejected
 
-__all__ = ["InjectionService"] 
\ No newline at end of file
+__all__ = ["InjectionService", "IngestionPipeline", "QueryCoalescer", "AdmissionController", "AdmissionRejected"]
\ No newline at end of file
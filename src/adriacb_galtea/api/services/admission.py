@@ -0,0 +1,265 @@
+"""Admission control and load shedding per endpoint class."""
+from typing import Any, AsyncIterator, ClassVar, Dict, Optional
+from contextlib import asynccontextmanager
+import asyncio
+import math
+import time
+
+from ...config.settings import settings
+from ...utils.logging import get_logger
+
+logger = get_logger(__name__)
+
+
+class AdmissionRejected(Exception):
+    """Raised when a request cannot start in time and is shed."""
+
+    def __init__(self, endpoint_class: str, status_code: int, retry_after: int, reason: str):
+        """Initialize the rejection.
+
+        Args:
+            endpoint_class: Endpoint class the request belongs to
+            status_code: 429 when the wait queue is full, 503 when the deadline passed
+            retry_after: Suggested seconds before retrying
+            reason: Human readable reason
+        """
+        super().__init__(reason)
+        self.endpoint_class = endpoint_class
+        self.status_code = status_code
+        self.retry_after = retry_after
+        self.reason = reason
+
+
+class EndpointClass:
+    """Concurrency limit, wait queue and counters of one endpoint class."""
+
+    def __init__(self, name: str, limit: int, queue_size: int, timeout: float, priority: int):
+        """Initialize the endpoint class.
+
+        Args:
+            name: Class name (e.g. "query", "ingest")
+            limit: Maximum number of requests running at once
+            queue_size: Maximum number of requests waiting for a slot
+            timeout: Maximum seconds a request may wait for a slot
+            priority: Higher priority classes start first when both are waiting
+        """
+        self.name = name
+        self.limit = max(1, limit)
+        self.queue_size = queue_size
+        self.timeout = timeout
+        self.priority = priority
+        self.active = 0
+        self.waiting = 0
+        self.admitted = 0
+        self.rejected_queue_full = 0
+        self.rejected_deadline = 0
+        # Exponentially weighted average of how long a request holds its slot
+        self.mean_service_seconds = 1.0
+
+    def retry_after(self) -> int:
+        """Estimate when a slot will be free for a new request, in seconds."""
+        backlog = (self.waiting + 1) / self.limit
+        return max(1, math.ceil(backlog * self.mean_service_seconds))
+
+    def stats(self) -> Dict[str, Any]:
+        """Get the counters of the class."""
+        return {
+            "limit": self.limit,
+            "queue_size": self.queue_size,
+            "timeout_seconds": self.timeout,
+            "active": self.active,
+            "waiting": self.waiting,
+            "admitted": self.admitted,
+            "rejected_queue_full": self.rejected_queue_full,
+            "rejected_deadline": self.rejected_deadline,
+            "mean_service_seconds": round(self.mean_service_seconds, 3),
+        }
+
+
+class AdmissionController:
+    """Per endpoint class concurrency limits with bounded, prioritised queues.
+
+    A request waits for a slot of its class in a bounded queue. It is
+    rejected with 429 when the queue is full and with 503 when it cannot
+    start before its deadline, so overload is shed early instead of every
+    request timing out. A class only starts requests while no higher
+    priority class has requests waiting, which keeps interactive queries
+    ahead of ingestion and batch queries.
+    """
+
+    _instance: ClassVar[Optional["AdmissionController"]] = None
+
+    @classmethod
+    def get_instance(cls) -> "AdmissionController":
+        """Get the singleton instance of the controller.
+
+        Returns:
+            Admission controller instance
+        """
+        if cls._instance is None:
+            cls._instance = cls([
+                EndpointClass(
+                    "query",
+                    settings.ADMISSION_QUERY_CONCURRENCY,
+                    settings.ADMISSION_QUERY_QUEUE_SIZE,
+                    settings.ADMISSION_QUERY_TIMEOUT_SECONDS,
+                    priority=1
+                ),
+                EndpointClass(
+                    "ingest",
+                    settings.ADMISSION_INGEST_CONCURRENCY,
+                    settings.ADMISSION_INGEST_QUEUE_SIZE,
+                    settings.ADMISSION_INGEST_TIMEOUT_SECONDS,
+                    priority=0
+                ),
+                EndpointClass(
+                    "batch",
+                    settings.ADMISSION_BATCH_CONCURRENCY,
+                    settings.ADMISSION_BATCH_QUEUE_SIZE,
+                    settings.ADMISSION_BATCH_TIMEOUT_SECONDS,
+                    priority=0
+                ),
+            ])
+        return cls._instance
+
+    def __init__(self, classes: list):
+        """Initialize the controller.
+
+        Args:
+            classes: Endpoint classes to control
+        """
+        self.classes: Dict[str, EndpointClass] = {endpoint.name: endpoint for endpoint in classes}
+        self._changed: Optional[asyncio.Condition] = None
+
+    @property
+    def changed(self) -> asyncio.Condition:
+        """Condition notified whenever a slot is released or a waiter leaves."""
+        if self._changed is None:
+            self._changed = asyncio.Condition()
+        return self._changed
+
+    def _can_start(self, endpoint: EndpointClass) -> bool:
+        """Whether a waiting request of a class may take a slot now."""
+        if endpoint.active >= endpoint.limit:
+            return False
+        return not any(
+            other.waiting for other in self.classes.values()
+            if other.priority > endpoint.priority
+        )
+
+    async def acquire(self, name: str, timeout: Optional[float] = None) -> float:
+        """Wait for a slot of an endpoint class.
+
+        Args:
+            name: Endpoint class name
+            timeout: Optional per-request deadline in seconds, capped by the class timeout
+
+        Returns:
+            Time at which the slot was acquired (pass it to release())
+
+        Raises:
+            AdmissionRejected: If the queue is full or the deadline passes
+        """
+        endpoint = self.classes[name]
+        timeout = endpoint.timeout if timeout is None else min(timeout, endpoint.timeout)
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+
+        async with self.changed:
+            if self._can_start(endpoint) and not endpoint.waiting:
+                return self._admit(endpoint)
+            if endpoint.waiting >= endpoint.queue_size:
+                endpoint.rejected_queue_full += 1
+                logger.warning("admission_rejected", endpoint_class=name, reason="queue_full", waiting=endpoint.waiting)
+                raise AdmissionRejected(name, 429, endpoint.retry_after(), f"Too many {name} requests waiting")
+
+            endpoint.waiting += 1
+            try:
+                while not self._can_start(endpoint):
+                    remaining = deadline - loop.time()
+                    if remaining <= 0:
+                        endpoint.rejected_deadline += 1
+                        logger.warning("admission_rejected", endpoint_class=name, reason="deadline", waiting=endpoint.waiting)
+                        raise AdmissionRejected(
+                            name, 503, endpoint.retry_after(), f"No {name} capacity within {timeout:g}s"
+                        )
+                    try:
+                        await asyncio.wait_for(self.changed.wait(), remaining)
+                    except asyncio.TimeoutError:
+                        pass
+            finally:
+                endpoint.waiting -= 1
+                # Lower priority classes may be able to start now
+                self.changed.notify_all()
+            return self._admit(endpoint)
+
+    def _admit(self, endpoint: EndpointClass) -> float:
+        """Take a slot of a class."""
+        endpoint.active += 1
+        endpoint.admitted += 1
+        return time.monotonic()
+
+    async def release(self, name: str, acquired_at: float) -> None:
+        """Release a slot of an endpoint class.
+
+        Args:
+            name: Endpoint class name
+            acquired_at: Value returned by acquire()
+        """
+        endpoint = self.classes[name]
+        held = time.monotonic() - acquired_at
+        async with self.changed:
+            endpoint.active -= 1
+            endpoint.mean_service_seconds = 0.8 * endpoint.mean_service_seconds + 0.2 * held
+            self.changed.notify_all()
+
+    @asynccontextmanager
+    async def slot(self, name: str, timeout: Optional[float] = None) -> AsyncIterator[None]:
+        """Hold a slot of an endpoint class for the duration of a block.
+
+        Args:
+            name: Endpoint class name
+            timeout: Optional per-request deadline in seconds
+
+        Raises:
+            AdmissionRejected: If the request cannot start in time
+        """
+        acquired_at = await self.acquire(name, timeout)
+        try:
+            yield
+        finally:
+            await self.release(name, acquired_at)
+
+    async def hold(self, name: str, acquired_at: float, events: AsyncIterator[str]) -> AsyncIterator[str]:
+        """Stream events while holding an already acquired slot, releasing it at the end.
+
+        Args:
+            name: Endpoint class name
+            acquired_at: Value returned by acquire()
+            events: Event stream to forward
+
+        Yields:
+            The forwarded events
+        """
+        try:
+            async for event in events:
+                yield event
+        finally:
+            await self.release(name, acquired_at)
+
+    def stats(self) -> Dict[str, Any]:
+        """Get admission metrics.
+
+        Returns:
+            Counters of each endpoint class
+        """
+        return {name: endpoint.stats() for name, endpoint in self.classes.items()}
+
+
+def get_admission_controller() -> AdmissionController:
+    """Get the admission controller instance.
+
+    Returns:
+        Admission controller instance
+    """
+    return AdmissionController.get_instance()
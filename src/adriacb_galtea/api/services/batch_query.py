@@ -0,0 +1,291 @@
+"""Batch execution of many questions with bounded concurrency."""
+from typing import Any, AsyncIterator, ClassVar, Dict, List, Optional
+import asyncio
+import json
+import time
+import uuid
+
+from fastapi.concurrency import run_in_threadpool
+from langchain_core.messages import AIMessage, ToolMessage
+
+from ...config.settings import settings
+from ...core.langfuse_service import get_langfuse_callback
+from ...core.prefetch import RetrievalPrefetch, embed_queries
+from ...utils.logging import get_logger
+
+logger = get_logger(__name__)
+
+
+def message_sources(messages: List[Any]) -> List[Dict[str, Any]]:
+    """Get the metadata and score of the documents retrieved during a graph run.
+
+    Args:
+        messages: Messages of the run's final state
+
+    Returns:
+        Sources in retrieval order
+    """
+    sources = []
+    for message in messages:
+        if not isinstance(message, ToolMessage):
+            continue
+        try:
+            results = json.loads(message.content) if isinstance(message.content, str) else message.content
+        except ValueError:
+            continue
+        for result in results if isinstance(results, list) else []:
+            if isinstance(result, dict) and "metadata" in result:
+                sources.append({"metadata": result["metadata"], "score": result.get("score")})
+    return sources
+
+
+def message_usage(messages: List[Any]) -> Dict[str, int]:
+    """Sum the token usage of the model calls of a graph run."""
+    usage = {"model_calls": 0, "input_tokens": 0, "output_tokens": 0}
+    for message in messages:
+        if isinstance(message, AIMessage):
+            usage["model_calls"] += 1
+            metadata = message.usage_metadata or {}
+            usage["input_tokens"] += metadata.get("input_tokens", 0)
+            usage["output_tokens"] += metadata.get("output_tokens", 0)
+    return usage
+
+
+class QueryBatch:
+    """Many questions answered by concurrent graph runs, reported as they complete.
+
+    All questions are embedded up front in one call per embedding dimension;
+    each graph run then gets a retrieval prefetch holding its question's
+    embedding, so the retrieval tool does not embed again when its query is
+    close to the question. At most `concurrency` graph runs are in flight at
+    once, so the batch is paced by the model's rate limit rather than by
+    one HTTP request per question.
+    """
+
+    def __init__(
+        self,
+        graph,
+        questions: List[str],
+        concurrency: int,
+        collection: Optional[str] = None,
+        collections: Optional[List[str]] = None
+    ):
+        """Initialize the batch; iterate run() to execute it.
+
+        Args:
+            graph: Graph answering each question
+            questions: Questions to answer
+            concurrency: Maximum number of graph runs in flight
+            collection: Collection to search
+            collections: Collections to fan out across
+        """
+        self.id = uuid.uuid4().hex
+        self.graph = graph
+        self.questions = questions
+        self.concurrency = max(1, min(concurrency, len(questions) or 1))
+        self.collection = collection
+        self.collections = collections
+        self.completed = 0
+        self.failed = 0
+        self.in_flight = 0
+        self.cancelled = False
+        self._started: Optional[float] = None
+        self._workers: List[asyncio.Task] = []
+
+    def _elapsed_ms(self, since: float) -> float:
+        return round(1000 * (time.perf_counter() - since), 1)
+
+    async def _answer(self, index: int, question: str, query_embeddings: Optional[Dict[int, List[float]]]) -> Dict[str, Any]:
+        """Run the graph for one question and build its result line."""
+        started_ms = self._elapsed_ms(self._started)
+        run_started = time.perf_counter()
+        langfuse_handler = get_langfuse_callback(settings)
+        config: Dict[str, Any] = {"callbacks": [langfuse_handler]} if langfuse_handler else {}
+        configurable = {
+            key: value
+            for key, value in (
+                ("collection", self.collection),
+                ("collections", self.collections)
+            )
+            if value is not None
+        }
+        prefetch = None
+        if query_embeddings:
+            # The search costs no embedding call, so it is always worth starting
+            prefetch = RetrievalPrefetch(
+                question,
+                collection=self.collection,
+                collections=self.collections,
+                query_embeddings=query_embeddings
+            ).start()
+            configurable["prefetch"] = prefetch
+        if configurable:
+            config["configurable"] = configurable
+
+        result: Dict[str, Any] = {"index": index, "question": question}
+        try:
+            state = await self.graph.ainvoke({"messages": [("user", question)]}, config=config)
+            messages = state["messages"]
+            result["answer"] = messages[-1].content
+            result["sources"] = message_sources(messages)
+            result["usage"] = message_usage(messages)
+            self.completed += 1
+        except Exception as e:
+            logger.error("batch_question_failed", batch_id=self.id, index=index, error=str(e))
+            result["error"] = str(e)
+            self.failed += 1
+        finally:
+            if prefetch is not None:
+                prefetch.finish()
+        result["timings"] = {"started_ms": started_ms, "run_ms": self._elapsed_ms(run_started)}
+        return result
+
+    async def _work(self, pending, embeddings: List[Optional[Dict[int, List[float]]]], results: asyncio.Queue) -> None:
+        """Answer questions from the shared iterator until none are left."""
+        for index, question in pending:
+            if self.cancelled:
+                return
+            self.in_flight += 1
+            try:
+                result = await self._answer(index, question, embeddings[index])
+            finally:
+                self.in_flight -= 1
+            await results.put(result)
+
+    async def run(self) -> AsyncIterator[str]:
+        """Answer the questions, yielding one NDJSON line per question as it completes.
+
+        The last line is a summary of the batch. Leaving the iteration early
+        (e.g. when the client disconnects) cancels the graph runs in flight.
+
+        Yields:
+            NDJSON lines
+        """
+        self._started = time.perf_counter()
+        try:
+            embeddings = await run_in_threadpool(
+                embed_queries, self.questions, self.collection, self.collections
+            )
+        except Exception as e:
+            # Each retrieval embeds its own query instead
+            logger.warning("batch_embedding_failed", batch_id=self.id, error=str(e))
+            embeddings = [None] * len(self.questions)
+        embedding_ms = self._elapsed_ms(self._started)
+        logger.info("batch_started", batch_id=self.id, questions=len(self.questions), concurrency=self.concurrency)
+
+        results: asyncio.Queue = asyncio.Queue()
+        pending = iter(enumerate(self.questions))
+        self._workers = [
+            asyncio.create_task(self._work(pending, embeddings, results))
+            for _ in range(self.concurrency)
+        ]
+        workers = asyncio.gather(*self._workers, return_exceptions=True)
+        getter = None
+        try:
+            while True:
+                getter = asyncio.ensure_future(results.get())
+                await asyncio.wait([getter, workers], return_when=asyncio.FIRST_COMPLETED)
+                if getter.done():
+                    result = getter.result()
+                else:
+                    # All workers are done; only results already queued are left
+                    getter.cancel()
+                    if results.empty():
+                        break
+                    result = results.get_nowait()
+                yield json.dumps(result) + "\n"
+            yield json.dumps(self.summary(embedding_ms)) + "\n"
+        finally:
+            if getter is not None:
+                getter.cancel()
+            for worker in self._workers:
+                worker.cancel()
+            await asyncio.gather(*self._workers, return_exceptions=True)
+            logger.info("batch_finished", **self.stats())
+
+    def cancel(self) -> None:
+        """Stop starting questions and cancel the graph runs in flight."""
+        self.cancelled = True
+        for worker in self._workers:
+            worker.cancel()
+
+    def stats(self) -> Dict[str, Any]:
+        """Get the progress of the batch."""
+        return {
+            "batch_id": self.id,
+            "questions": len(self.questions),
+            "concurrency": self.concurrency,
+            "completed": self.completed,
+            "failed": self.failed,
+            "in_flight": self.in_flight,
+            "cancelled": self.cancelled,
+        }
+
+    def summary(self, embedding_ms: float) -> Dict[str, Any]:
+        """Build the final line of the batch."""
+        seconds = time.perf_counter() - self._started
+        return {
+            **self.stats(),
+            "done": True,
+            "not_run": len(self.questions) - self.completed - self.failed,
+            "embedding_ms": embedding_ms,
+            "seconds": round(seconds, 3),
+            "questions_per_second": round((self.completed + self.failed) / seconds, 3) if seconds else 0.0,
+        }
+
+
+class QueryBatchRegistry:
+    """Running batches by ID, so they can be inspected and cancelled."""
+
+    _instance: ClassVar[Optional["QueryBatchRegistry"]] = None
+
+    @classmethod
+    def get_instance(cls) -> "QueryBatchRegistry":
+        """Get the singleton instance of the registry.
+
+        Returns:
+            Query batch registry instance
+        """
+        if cls._instance is None:
+            cls._instance = cls()
+        return cls._instance
+
+    def __init__(self):
+        """Initialize the registry."""
+        self.batches: Dict[str, QueryBatch] = {}
+
+    def get(self, batch_id: str) -> Optional[QueryBatch]:
+        """Get a running batch by ID."""
+        return self.batches.get(batch_id)
+
+    def stream(self, batch: QueryBatch) -> AsyncIterator[str]:
+        """Register a batch and get its NDJSON lines; it is unregistered when they end."""
+        self.batches[batch.id] = batch
+        return self._run(batch)
+
+    async def _run(self, batch: QueryBatch) -> AsyncIterator[str]:
+        try:
+            async for line in batch.run():
+                yield line
+        finally:
+            self.batches.pop(batch.id, None)
+
+    def stats(self) -> Dict[str, Any]:
+        """Get batch metrics.
+
+        Returns:
+            Number of running batches and their questions in flight
+        """
+        return {
+            "running": len(self.batches),
+            "in_flight": sum(batch.in_flight for batch in self.batches.values()),
+        }
+
+
+def get_query_batch_registry() -> QueryBatchRegistry:
+    """Get the query batch registry instance.
+
+    Returns:
+        Query batch registry instance
+    """
+    return QueryBatchRegistry.get_instance()
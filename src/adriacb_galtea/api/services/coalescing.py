@@ -0,0 +1,235 @@
+"""Single-flight coalescing of identical /query requests."""
+from typing import Any, AsyncIterator, Awaitable, Callable, ClassVar, Dict, List, Optional
+import asyncio
+import json
+import re
+import time
+
+from ...config.settings import settings
+from ...utils.logging import get_logger
+
+logger = get_logger(__name__)
+
+
+class InFlightRun:
+    """One graph run whose streamed events are shared by all its requests."""
+
+    def __init__(self, key: Optional[str]):
+        """Initialize the run.
+
+        Args:
+            key: Coalescing key of the run, None for a run that is not shared
+        """
+        self.key = key
+        self.events: List[str] = []
+        self.done = False
+        self.started_at = time.monotonic()
+        self.finished_at: Optional[float] = None
+        self.subscribers = 1
+        self.changed = asyncio.Condition()
+
+    async def produce(
+        self,
+        events: AsyncIterator[str],
+        on_done: Optional[Callable[[], Awaitable[None]]] = None
+    ) -> None:
+        """Record the events of the run and wake up its subscribers.
+
+        Args:
+            events: SSE event stream of the run
+            on_done: Called once the run has finished, whether or not anyone
+                is still subscribed (e.g. to release its admission slot)
+        """
+        try:
+            async for event in events:
+                async with self.changed:
+                    self.events.append(event)
+                    self.changed.notify_all()
+        except Exception as e:
+            logger.error("coalesced_run_failed", key=self.key, error=str(e))
+            async with self.changed:
+                self.events.append(f"data: {json.dumps({'error': str(e)})}\n\n")
+        finally:
+            async with self.changed:
+                self.done = True
+                self.finished_at = time.monotonic()
+                self.changed.notify_all()
+            if on_done is not None:
+                await on_done()
+
+    async def subscribe(self) -> AsyncIterator[str]:
+        """Yield every event of the run, from the first one, as it is produced."""
+        position = 0
+        while True:
+            async with self.changed:
+                while position >= len(self.events) and not self.done:
+                    await self.changed.wait()
+                pending = self.events[position:]
+                done = self.done
+            for event in pending:
+                yield event
+            position += len(pending)
+            if done and position >= len(self.events):
+                return
+
+
+class QueryCoalescer:
+    """Attach concurrent identical queries to one in-flight graph run.
+
+    Requests are identical when their normalised question (case-folded,
+    whitespace collapsed) and retrieval parameters match. The first request
+    starts the run in a background task, so it completes even if that
+    client disconnects; every request, including later ones, receives all
+    of the run's SSE events from the start. A finished run keeps accepting
+    identical requests for window_seconds. Runs that must not be shared
+    (key None) are run the same way, without being offered to others.
+    """
+
+    _instance: ClassVar[Optional["QueryCoalescer"]] = None
+
+    @classmethod
+    def get_instance(cls) -> "QueryCoalescer":
+        """Get the singleton instance of the coalescer.
+
+        Returns:
+            Query coalescer instance
+        """
+        if cls._instance is None:
+            cls._instance = cls(settings.COALESCE_WINDOW_SECONDS)
+        return cls._instance
+
+    def __init__(self, window_seconds: float = 0.0):
+        """Initialize the coalescer.
+
+        Args:
+            window_seconds: How long a finished run keeps serving identical requests
+        """
+        self.window_seconds = window_seconds
+        self._runs: Dict[str, InFlightRun] = {}
+        self._tasks: set = set()
+        self.requests = 0
+        self.runs = 0
+        self.coalesced = 0
+
+    @staticmethod
+    def key(query: str, **params: Any) -> str:
+        """Build the coalescing key of a query.
+
+        Args:
+            query: User question
+            **params: Parameters that change the answer (collection, collections, ...)
+
+        Returns:
+            Key shared by identical requests
+        """
+        normalized = re.sub(r"\s+", " ", query).strip().casefold()
+        return json.dumps([normalized, {k: v for k, v in sorted(params.items()) if v is not None}])
+
+    def _joinable(self, run: Optional[InFlightRun]) -> bool:
+        """Whether a new request can attach to a run."""
+        if run is None:
+            return False
+        if not run.done:
+            return True
+        return time.monotonic() - run.finished_at <= self.window_seconds
+
+    def join(self, key: str) -> Optional[InFlightRun]:
+        """Attach a request to the run of a key, if there is one to join.
+
+        Args:
+            key: Coalescing key (see key())
+
+        Returns:
+            The joined run, or None if the request must start its own
+        """
+        run = self._runs.get(key)
+        if not self._joinable(run):
+            return None
+        self.requests += 1
+        run.subscribers += 1
+        self.coalesced += 1
+        logger.info("query_coalesced", subscribers=run.subscribers, age_seconds=round(time.monotonic() - run.started_at, 3))
+        return run
+
+    def start(
+        self,
+        key: Optional[str],
+        run_factory: Callable[[], AsyncIterator[str]],
+        on_done: Optional[Callable[[], Awaitable[None]]] = None
+    ) -> InFlightRun:
+        """Start a run in a background task.
+
+        The task owns the run: it runs to the end even if no request is
+        subscribed, or none ever starts reading, and then calls on_done.
+
+        Args:
+            key: Coalescing key (see key()), or None for a run not offered to others
+            run_factory: Starts a new run, returning its SSE event stream
+            on_done: Called once the run has finished
+
+        Returns:
+            The started run; stream its events with subscribe()
+        """
+        run = InFlightRun(key)
+        if key is not None:
+            self._runs[key] = run
+            self.requests += 1
+            self.runs += 1
+        task = asyncio.create_task(run.produce(run_factory(), on_done))
+        self._tasks.add(task)
+        task.add_done_callback(lambda task, run=run: self._finished(task, run))
+        return run
+
+    async def stream(self, key: str, run_factory: Callable[[], AsyncIterator[str]]) -> AsyncIterator[str]:
+        """Stream the events of the run for a key, starting it if needed.
+
+        Args:
+            key: Coalescing key (see key())
+            run_factory: Starts a new run, returning its SSE event stream
+
+        Yields:
+            SSE events of the run
+        """
+        run = self.join(key) or self.start(key, run_factory)
+        async for event in run.subscribe():
+            yield event
+
+    def _finished(self, task: asyncio.Task, run: InFlightRun) -> None:
+        """Forget a run once its coalescing window has passed."""
+        self._tasks.discard(task)
+        if run.key is None:
+            return
+
+        def forget() -> None:
+            if self._runs.get(run.key) is run:
+                del self._runs[run.key]
+
+        if self.window_seconds > 0:
+            asyncio.get_running_loop().call_later(self.window_seconds, forget)
+        else:
+            forget()
+
+    def stats(self) -> Dict[str, Any]:
+        """Get coalescing metrics.
+
+        Returns:
+            Dictionary with the number of requests, graph runs, deduplicated
+            requests, runs in flight and the share of deduplicated requests
+        """
+        return {
+            "requests": self.requests,
+            "runs": self.runs,
+            "coalesced": self.coalesced,
+            "in_flight": sum(1 for run in self._runs.values() if not run.done),
+            "coalesced_ratio": round(self.coalesced / self.requests, 4) if self.requests else 0.0,
+            "window_seconds": self.window_seconds,
+        }
+
+
+def get_query_coalescer() -> QueryCoalescer:
+    """Get the query coalescer instance.
+
+    Returns:
+        Query coalescer instance
+    """
+    return QueryCoalescer.get_instance()
@@ -1,3 +1,45 @@
-# Get the graph instance
+"""Graph instances served by the API and LangGraph."""
+from typing import Optional
+from pathlib import Path
+import asyncio
+
+import aiosqlite
+from langgraph.checkpoint.sqlite.aio import AsyncSqliteSaver
+
+from adriacb_galtea.config.settings import settings
 from adriacb_galtea.core.graph import create_graph
-graph = create_graph()
\ No newline at end of file
+
+# Stateless graph, also exposed in langgraph.json (LangGraph provides its own persistence)
+graph = create_graph()
+
+_checkpointed_graph = None
+_checkpointed_graph_lock: Optional[asyncio.Lock] = None
+
+
+async def get_checkpointed_graph():
+    """Get the graph persisting conversations in a local SQLite checkpointer.
+    
+    Conversations are keyed by the thread_id of the run configuration.
+    
+    Returns:
+        Graph with a SQLite checkpointer
+    """
+    global _checkpointed_graph, _checkpointed_graph_lock
+    if _checkpointed_graph_lock is None:
+        _checkpointed_graph_lock = asyncio.Lock()
+    async with _checkpointed_graph_lock:
+        if _checkpointed_graph is None:
+            path = Path(settings.CHECKPOINT_DB_PATH)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            checkpointer = AsyncSqliteSaver(await aiosqlite.connect(str(path)))
+            await checkpointer.setup()
+            _checkpointed_graph = create_graph(checkpointer=checkpointer)
+    return _checkpointed_graph
+
+
+async def close_checkpointed_graph() -> None:
+    """Close the checkpointer connection of the checkpointed graph, if open."""
+    global _checkpointed_graph
+    if _checkpointed_graph is not None:
+        await _checkpointed_graph.checkpointer.conn.close()
+        _checkpointed_graph = None
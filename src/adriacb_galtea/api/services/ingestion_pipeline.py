@@ -0,0 +1,293 @@
+"""Streaming ingestion pipeline: convert → split → embed → upsert."""
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional
+from itertools import batched, islice
+import queue
+import threading
+import time
+
+from ...core.document_processor import DoclingProcessor, ChunkStats
+from ...config.settings import settings
+from ...utils.logging import get_logger
+from ...utils.tracing import bind_context, span
+
+logger = get_logger(__name__)
+
+# Sentinel closing a queue between two stages
+_DONE = object()
+
+
+class PipelineCancelled(Exception):
+    """Raised inside a stage when another stage has failed."""
+
+
+class StageStats:
+    """Throughput counters for one pipeline stage."""
+
+    def __init__(self, name: str):
+        """Initialize the counters.
+
+        Args:
+            name: Stage name
+        """
+        self.name = name
+        self.items = 0
+        self.wall_seconds = 0.0
+        self.blocked_seconds = 0.0
+
+    @property
+    def busy_seconds(self) -> float:
+        """Time spent working, i.e. not waiting on a neighbouring stage."""
+        return max(0.0, self.wall_seconds - self.blocked_seconds)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Serialize the counters.
+
+        Returns:
+            Dictionary with items, busy/blocked seconds and items per busy second
+        """
+        busy = self.busy_seconds
+        return {
+            "items": self.items,
+            "busy_seconds": round(busy, 3),
+            "blocked_seconds": round(self.blocked_seconds, 3),
+            "items_per_second": round(self.items / busy, 2) if busy else None
+        }
+
+
+class IngestionPipeline:
+    """Staged streaming ingestion of one document.
+
+    Conversion, chunking, embedding and upsert run in their own threads and
+    are connected by bounded queues, so CPU-bound stages (Docling, splitting)
+    overlap with network-bound ones (embedding, vector store writes). A full
+    queue blocks its producer, which caps the memory held in flight at
+    roughly queue_size batches per stage regardless of document size.
+    """
+
+    STAGES = ("convert", "split", "embed", "upsert")
+
+    def __init__(
+        self,
+        processor: DoclingProcessor,
+        embeddings: Any,
+        vector_store: Any,
+        batch_size: Optional[int] = None,
+        queue_size: Optional[int] = None
+    ):
+        """Initialize the pipeline.
+
+        Args:
+            processor: Processor used to convert and split the document
+            embeddings: Embedding model with an embed_documents method
+            vector_store: Vector store providing batched writers (see ChromaVectorStore.writer)
+            batch_size: Chunks per embedding/upsert batch. Defaults to settings.INGEST_BATCH_SIZE.
+            queue_size: Capacity of each inter-stage queue. Defaults to settings.INGEST_QUEUE_SIZE.
+        """
+        self.processor = processor
+        self.embeddings = embeddings
+        self.vector_store = vector_store
+        self.batch_size = batch_size or settings.INGEST_BATCH_SIZE
+        self.queue_size = queue_size or settings.INGEST_QUEUE_SIZE
+
+    def run(
+        self,
+        file_path: str,
+        metadata: Dict[str, Any],
+        prepare_batch: Callable[[List[Dict[str, Any]], int], List[Dict[str, Any]]],
+        max_chunks: Optional[int] = None,
+        writer: Optional[Any] = None
+    ) -> Dict[str, Any]:
+        """Ingest one document.
+
+        Args:
+            file_path: Path to the document
+            metadata: Document metadata copied into every chunk
+            prepare_batch: Turns a batch of raw chunks and the index of its first
+                chunk into documents ready for storage (with ids). It may drop
+                chunks (e.g. near-duplicates); an emptied batch is not embedded.
+            max_chunks: Optional maximum number of chunks to store
+            writer: Optional shared vector store writer, so upserts of several
+                documents are grouped into the same batches. The caller is then
+                responsible for flushing it; otherwise a writer is created and
+                closed for this document.
+
+        Returns:
+            Dictionary containing:
+            - chunks_processed: Number of chunks stored
+            - chunk_stats: Token-size distribution of the stored chunks
+            - stages: Per-stage throughput counters
+            - bottleneck: Stage with the most busy time
+            - write: Vector store write statistics (chunks per second)
+
+        Raises:
+            Exception: The first error raised by any stage
+        """
+        stats = {name: StageStats(name) for name in self.STAGES}
+        chunk_stats = ChunkStats()
+        segments: queue.Queue = queue.Queue(maxsize=self.queue_size)
+        batches: queue.Queue = queue.Queue(maxsize=self.queue_size)
+        embedded: queue.Queue = queue.Queue(maxsize=self.queue_size)
+        stop = threading.Event()
+        # Stops conversion only: set on errors and when split needs no more segments
+        stop_convert = threading.Event()
+        errors: List[BaseException] = []
+        owns_writer = writer is None
+        if owns_writer:
+            writer = self.vector_store.writer()
+
+        def convert() -> None:
+            markdown = self.processor.iter_markdown(file_path)
+            try:
+                for segment in markdown:
+                    stats["convert"].items += 1
+                    self._put(segments, segment, stats["convert"], stop_convert)
+            finally:
+                close = getattr(markdown, "close", None)
+                if close is not None:
+                    close()
+
+        def split() -> None:
+            chunks: Iterable[Dict[str, Any]] = self.processor.iter_chunks(
+                self._drain(segments, stats["split"], stop), metadata, chunk_stats
+            )
+            if max_chunks is not None:
+                chunks = islice(chunks, max_chunks)
+            offset = 0
+            for batch in batched(chunks, self.batch_size):
+                documents = prepare_batch(list(batch), offset)
+                offset += len(batch)
+                if not documents:
+                    continue
+                stats["split"].items += len(documents)
+                self._put(batches, documents, stats["split"], stop)
+            # max_chunks may end the chunks before the last segment: stop
+            # conversion and unblock it if it waits on the full queue
+            stop_convert.set()
+            self._discard(segments)
+
+        def embed() -> None:
+            for documents in self._drain(batches, stats["embed"], stop):
+                texts = [doc["content"] for doc in documents]
+                with span("embedding.batch", chunks=len(texts), bytes=sum(len(text.encode("utf-8")) for text in texts)):
+                    vectors = self.embeddings.embed_documents(texts)
+                stats["embed"].items += len(documents)
+                self._put(embedded, (documents, vectors), stats["embed"], stop)
+
+        def upsert() -> None:
+            for documents, vectors in self._drain(embedded, stats["upsert"], stop):
+                writer.add(documents, embeddings=vectors)
+                stats["upsert"].items += len(documents)
+            if owns_writer:
+                writer.close()
+
+        def stage(
+            name: str,
+            target: Callable[[], None],
+            output: Optional[queue.Queue],
+            stage_stop: threading.Event
+        ) -> None:
+            started = time.perf_counter()
+            with span(f"ingest.{name}") as stage_span:
+                try:
+                    target()
+                    if output is not None:
+                        self._put(output, _DONE, stats[name], stage_stop)
+                except PipelineCancelled:
+                    stage_span.set_attribute("cancelled", True)
+                except BaseException as e:
+                    logger.error("pipeline_stage_failed", stage=name, error=str(e))
+                    stage_span.record_exception(e)
+                    errors.append(e)
+                    stop.set()
+                    stop_convert.set()
+                finally:
+                    stats[name].wall_seconds = time.perf_counter() - started
+                    stage_span.set_attribute("items", stats[name].items)
+                    stage_span.set_attribute("busy_seconds", round(stats[name].busy_seconds, 3))
+                    stage_span.set_attribute("blocked_seconds", round(stats[name].blocked_seconds, 3))
+
+        threads = [
+            threading.Thread(
+                target=bind_context(stage),
+                args=(name, target, output, stage_stop),
+                name=f"ingest-{name}",
+                daemon=True
+            )
+            for name, target, output, stage_stop in (
+                ("convert", convert, segments, stop_convert),
+                ("split", split, batches, stop),
+                ("embed", embed, embedded, stop),
+                ("upsert", upsert, None, stop),
+            )
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        if errors:
+            raise errors[0]
+
+        stage_stats = {name: counters.to_dict() for name, counters in stats.items()}
+        bottleneck = max(stats.values(), key=lambda counters: counters.busy_seconds).name
+        logger.info("pipeline_stage_stats", file_path=file_path, bottleneck=bottleneck, **stage_stats)
+        return {
+            "chunks_processed": stats["upsert"].items,
+            "chunk_stats": chunk_stats.summary(),
+            "stages": stage_stats,
+            "bottleneck": bottleneck,
+            "write": writer.stats()
+        }
+
+    @staticmethod
+    def _put(output: queue.Queue, item: Any, stats: StageStats, stop: threading.Event) -> None:
+        """Put an item on a bounded queue, blocking while it is full.
+
+        Raises:
+            PipelineCancelled: If another stage failed while waiting
+        """
+        started = time.perf_counter()
+        try:
+            while True:
+                if stop.is_set():
+                    raise PipelineCancelled()
+                try:
+                    output.put(item, timeout=0.1)
+                    return
+                except queue.Full:
+                    continue
+        finally:
+            stats.blocked_seconds += time.perf_counter() - started
+
+    @staticmethod
+    def _discard(source: queue.Queue) -> None:
+        """Drop the items left on a queue."""
+        while True:
+            try:
+                source.get_nowait()
+            except queue.Empty:
+                return
+
+    @staticmethod
+    def _drain(source: queue.Queue, stats: StageStats, stop: threading.Event) -> Iterator[Any]:
+        """Yield items from a queue until its producer closes it.
+
+        Raises:
+            PipelineCancelled: If another stage failed while waiting
+        """
+        while True:
+            started = time.perf_counter()
+            try:
+                while True:
+                    if stop.is_set():
+                        raise PipelineCancelled()
+                    try:
+                        item = source.get(timeout=0.1)
+                        break
+                    except queue.Empty:
+                        continue
+            finally:
+                stats.blocked_seconds += time.perf_counter() - started
+            if item is _DONE:
+                return
+            yield item
@@ -1,36 +1,142 @@
 """Service for document injection into the vector store."""
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Iterable, Optional, Tuple
+import glob
 import logging
+import os
+import re
 from pathlib import Path
 from fastapi import UploadFile, HTTPException
+from fastapi.concurrency import run_in_threadpool
 
+from ...core.dedup import DocumentDeduplicator, restore_linked_duplicates
 from ...core.document_processor import DoclingProcessor
-from ...core.vector_store import ChromaVectorStore, get_vector_store
+from ...core.document_registry import get_document_registry, hash_file
+from ...core.vector_store import ChromaVectorStore, VectorStoreWriter, get_collection, get_vector_store
+from ...config.settings import settings
 from ...utils.logging import get_logger
+from ...utils.tracing import span
+from .ingestion_pipeline import IngestionPipeline
 
 logger = get_logger(__name__)
 
+
+class PathNotAllowed(ValueError):
+    """Raised when a server-side path is outside the allowed ingestion roots."""
+
+
+def get_allowed_roots() -> List[Path]:
+    """Directories server-side path ingestion may read from.
+    
+    Returns:
+        Resolved settings.INGEST_ALLOWED_ROOTS (empty if path ingestion is disabled)
+    """
+    return [Path(root.strip()).resolve() for root in settings.INGEST_ALLOWED_ROOTS.split(",") if root.strip()]
+
+
+def resolve_ingest_paths(
+    patterns: List[str],
+    roots: Optional[List[Path]] = None,
+    max_files: Optional[int] = None
+) -> Tuple[List[Tuple[str, str]], List[str]]:
+    """Expand server-side paths and glob patterns under the allowed roots.
+    
+    Relative patterns are resolved against the first root. The directory a
+    pattern starts from must lie under one of the roots, so nothing outside
+    them is listed, and every match is resolved (following symlinks) and
+    must lie under one of the roots too.
+    
+    Args:
+        patterns: File paths or glob patterns ("**" matches subdirectories)
+        roots: Allowed roots. Defaults to get_allowed_roots().
+        max_files: Maximum number of files. Defaults to settings.INGEST_PATH_MAX_FILES.
+        
+    Returns:
+        Tuple of (path, doc_id) pairs, with doc_id the path relative to its
+        root, and the patterns that matched no file
+        
+    Raises:
+        PathNotAllowed: If path ingestion is disabled or a path is outside the roots
+        ValueError: If the patterns match more than max_files files
+    """
+    roots = get_allowed_roots() if roots is None else roots
+    max_files = max_files or settings.INGEST_PATH_MAX_FILES
+    if not roots:
+        raise PathNotAllowed("Path ingestion is disabled: INGEST_ALLOWED_ROOTS is not set")
+    
+    files: Dict[str, str] = {}
+    unmatched = []
+    for pattern in patterns:
+        if not os.path.isabs(pattern):
+            pattern = str(roots[0] / pattern)
+        # Directory before the first wildcard
+        base = Path(re.split(r"[*?\[]", pattern, maxsplit=1)[0]).resolve()
+        if not glob.has_magic(pattern):
+            base = base.parent
+        if not any(base.is_relative_to(root) for root in roots):
+            raise PathNotAllowed(f"Path is outside the allowed roots: {pattern}")
+        matches = sorted(glob.glob(pattern, recursive=True))
+        matched = False
+        for match in matches:
+            path = Path(match).resolve()
+            root = next((root for root in roots if path.is_relative_to(root)), None)
+            if root is None:
+                raise PathNotAllowed(f"Path is outside the allowed roots: {match}")
+            if path.is_file():
+                files.setdefault(str(path), path.relative_to(root).as_posix())
+                matched = True
+        if not matched:
+            unmatched.append(pattern)
+        if len(files) > max_files:
+            raise ValueError(f"The paths match more than {max_files} files")
+    return list(files.items()), unmatched
+
+
 class InjectionService:
     """Service for injecting documents into the vector store."""
     
-    def __init__(self):
-        """Initialize the injection service."""
+    def __init__(self, collection: Optional[str] = None, create: bool = True):
+        """Initialize the injection service.
+        
+        Args:
+            collection: Collection (tenant or corpus) to inject into. Defaults
+                to settings.VECTOR_STORE_DEFAULT_COLLECTION.
+            create: Whether to create the collection if it does not exist;
+                services only listing or deleting documents pass False
+        
+        Raises:
+            CollectionNotFound: If create is False and the collection does not exist
+        """
         self.processor = DoclingProcessor()
-        self.vector_store = get_vector_store()
+        self.vector_store = get_vector_store(collection) if create else get_collection(collection)
+        self.registry = get_document_registry()
     
-    def _process_chunks(self, chunks: List[Dict[str, Any]], file_path: str) -> List[Dict[str, Any]]:
+    def _process_chunks(
+        self,
+        chunks: Iterable[Dict[str, Any]],
+        doc_id: str,
+        content_hash: str,
+        source: str,
+        start_index: int = 0
+    ) -> List[Dict[str, Any]]:
         """Process chunks before storage, including header metadata.
         
+        Chunk IDs combine the document ID, its content hash and the chunk
+        position, so a new version of a document never overwrites the chunks
+        of the version still being served.
+        
         Args:
-            chunks: List of chunks to process
-            file_path: Path to the source document
+            chunks: Chunks to process
+            doc_id: ID of the source document
+            content_hash: SHA-256 of the source document content
+            source: Original name of the source document
+            start_index: Position of the first chunk within the document
             
         Returns:
             List of processed chunks ready for storage
         """
         processed_chunks = []
         
-        for i, chunk in enumerate(chunks):
+        for i, chunk in enumerate(chunks, start=start_index):
             metadata = chunk.get("metadata", {}).copy()
             
             # Extract headers if present
@@ -39,11 +145,13 @@ class InjectionService:
             # Flatten headers into a single field for better searchability
             metadata["headers"] = " > ".join([v for k, v in sorted(headers.items()) if v])
             
-            # Add source file to metadata
-            metadata["source_file"] = file_path
+            # Add source document to metadata
+            metadata["source_file"] = source
+            metadata["doc_id"] = doc_id
+            metadata["content_hash"] = content_hash
             
             processed_chunk = {
-                "id": f"{str(hash(file_path))}_{i}",
+                "id": f"{doc_id}:{content_hash[:16]}:{i}",
                 "content": chunk["content"],
                 "metadata": metadata
             }
@@ -52,70 +160,153 @@ class InjectionService:
             
         return processed_chunks
     
-    def inject_document(self, file_path: str, max_chunks: int = 500) -> Dict[str, Any]:
+    def inject_document(
+        self,
+        file_path: str,
+        max_chunks: Optional[int] = None,
+        writer: Optional[VectorStoreWriter] = None,
+        doc_id: Optional[str] = None,
+        source: Optional[str] = None
+    ) -> Dict[str, Any]:
         """Inject a document into the vector store.
         
+        The document streams through an IngestionPipeline (convert, split,
+        embed and upsert overlap, connected by bounded queues), so large
+        documents are fully indexed with bounded memory and without building
+        one oversized embedding request.
+        
+        Documents are tracked in the document registry: re-ingesting an
+        unchanged document is skipped, and ingesting a changed one replaces
+        the previous version once the new chunks have been written.
+        
+        With settings.DEDUP_MODE set, near-duplicate chunks (of the document
+        itself or of the collection) are dropped before they are embedded.
+        When a changed document is replaced, its old chunks that other
+        documents' duplicates link to are first copied for those documents.
+        
         Args:
             file_path: Path to the document to inject
-            max_chunks: Maximum number of chunks to store
+            max_chunks: Optional maximum number of chunks to store (no limit by default)
+            writer: Optional shared vector store writer (see inject_documents)
+            doc_id: Document ID. Defaults to the source name.
+            source: Original name of the document (e.g. the uploaded filename).
+                Defaults to the resolved file path.
             
         Returns:
             Dictionary containing:
             - success: Whether the injection was successful
             - message: Status message
+            - doc_id: ID of the document
             - chunks_processed: Number of chunks processed
+            - chunk_stats: Token-size distribution of the stored chunks
+            - stages: Per-stage pipeline throughput counters
+            - bottleneck: Pipeline stage with the most busy time
+            - write: Vector store write statistics, including chunks_per_second
+            - dedup: Near-duplicate chunks skipped, bytes and embeddings saved
         """
-        try:
-            # Convert to absolute path if needed
-            file_path = str(Path(file_path).resolve())
-            
-            if not Path(file_path).exists():
+        with span("ingest.document", collection=self.vector_store.collection_name) as document_span:
+            try:
+                # Convert to absolute path if needed
+                file_path = str(Path(file_path).resolve())
+                
+                if not Path(file_path).exists():
+                    return {
+                        "success": False,
+                        "message": f"File not found: {file_path}",
+                        "chunks_processed": 0
+                    }
+                
+                source = source or file_path
+                doc_id = doc_id or source
+                collection = self.vector_store.collection_name
+                content_hash = hash_file(file_path)
+                document_span.set_attribute("doc_id", doc_id)
+                document_span.set_attribute("bytes", Path(file_path).stat().st_size)
+                
+                previous = self.registry.get(doc_id, collection=collection)
+                if previous and previous["content_hash"] == content_hash:
+                    logger.info("document_unchanged", doc_id=doc_id)
+                    document_span.set_attribute("skipped", True)
+                    return {
+                        "success": True,
+                        "message": "Document unchanged, skipped",
+                        "doc_id": doc_id,
+                        "chunks_processed": 0,
+                        "skipped": True
+                    }
+                
+                # Stream the document through the pipeline
+                logger.info("processing_document", file_path=file_path, doc_id=doc_id)
+                chunk_ids: List[str] = []
+                deduplicator = DocumentDeduplicator(doc_id, collection)
+                
+                def prepare_batch(chunks: List[Dict[str, Any]], offset: int) -> List[Dict[str, Any]]:
+                    with span("ingest.process_chunks", chunks=len(chunks), offset=offset):
+                        documents = self._process_chunks(chunks, doc_id, content_hash, source, start_index=offset)
+                    if deduplicator.enabled:
+                        with span("dedup.filter", chunks=len(documents)) as dedup_span:
+                            documents = deduplicator.filter(documents, position=offset)
+                            dedup_span.set_attribute("kept", len(documents))
+                    chunk_ids.extend(document["id"] for document in documents)
+                    return documents
+                
+                pipeline = IngestionPipeline(self.processor, self.vector_store.embeddings, self.vector_store)
+                result = pipeline.run(
+                    file_path,
+                    self.processor.get_metadata(file_path),
+                    prepare_batch=prepare_batch,
+                    max_chunks=max_chunks,
+                    writer=writer
+                )
+                logger.info("chunk_size_distribution", file_path=file_path, **result["chunk_stats"])
+                document_span.set_attribute("chunks", result["chunks_processed"])
+                document_span.set_attribute("bottleneck", result["bottleneck"])
+                
+                if deduplicator.enabled:
+                    result["dedup"] = deduplicator.report()
+                
+                if not result["chunks_processed"] and not deduplicator.duplicates:
+                    return {
+                        "success": False,
+                        "message": f"Failed to process document: {file_path}",
+                        "doc_id": doc_id,
+                        "chunks_processed": 0
+                    }
+                
+                # Register the document (and drop the old version) only once
+                # its chunks are written, not just buffered in a shared writer
+                if writer is not None:
+                    writer.flush()
+                if previous:
+                    restore_linked_duplicates(self.vector_store, doc_id, registry=self.registry)
+                    self.vector_store.delete_document(doc_id, keep_content_hash=content_hash)
+                    logger.info("document_replaced", doc_id=doc_id, previous_chunks=previous["chunk_count"])
+                self.registry.upsert(doc_id, source, content_hash, chunk_ids, collection=collection)
+                deduplicator.commit()
+                
                 return {
-                    "success": False,
-                    "message": f"File not found: {file_path}",
-                    "chunks_processed": 0
+                    "success": True,
+                    "message": "Document successfully injected",
+                    "doc_id": doc_id,
+                    **result
                 }
-            
-            # Process document
-            logger.info("processing_document", file_path=file_path)
-            result = self.processor.process_document(file_path)
-            
-            if not result:
+                
+            except Exception as e:
+                logger.error("error_injecting_document", error=str(e), exc_info=True)
+                document_span.record_exception(e)
                 return {
                     "success": False,
-                    "message": f"Failed to process document: {file_path}",
+                    "message": f"Error injecting document: {str(e)}",
                     "chunks_processed": 0
                 }
-            
-            # Process chunks
-            chunks = result.get("chunks", [])
-            if len(chunks) > max_chunks:
-                logger.warning("chunk_limit_reached", max_chunks=max_chunks, total_chunks=len(chunks))
-                chunks = chunks[:max_chunks]
-            
-            processed_chunks = self._process_chunks(chunks, file_path)
-            
-            # Store chunks
-            logger.info("storing_chunks", count=len(processed_chunks))
-            self.vector_store.add_documents(processed_chunks)
-            
-            return {
-                "success": True,
-                "message": "Document successfully injected",
-                "chunks_processed": len(processed_chunks)
-            }
-            
-        except Exception as e:
-            logger.error("error_injecting_document", error=str(e), exc_info=True)
-            return {
-                "success": False,
-                "message": f"Error injecting document: {str(e)}",
-                "chunks_processed": 0
-            }
     
     async def inject_documents(self, files: List[UploadFile]) -> List[dict]:
         """Inject multiple documents into the vector store.
         
+        All documents share one vector store writer, so a document's upserts
+        are batched together; the writer is flushed before each document is
+        registered.
+        
         Args:
             files: List of files to inject
             
@@ -123,20 +314,28 @@ class InjectionService:
             List of injection results
         """
         results = []
+        writer = self.vector_store.writer()
         for file in files:
             try:
                 # Save file temporarily
                 import tempfile
                 import os
-                with tempfile.NamedTemporaryFile(delete=False) as temp_file:
-                    content = await file.read()
-                    temp_file.write(content)
-                    temp_file.flush()
-                    temp_path = temp_file.name
+                with span("upload.write", filename=file.filename) as upload_span:
+                    with tempfile.NamedTemporaryFile(delete=False) as temp_file:
+                        content = await file.read()
+                        temp_file.write(content)
+                        temp_file.flush()
+                        temp_path = temp_file.name
+                    upload_span.set_attribute("bytes", len(content))
                 
                 try:
-                    # Process and inject the document
-                    result = self.inject_document(temp_path)
+                    # Process and inject the document off the event loop
+                    result = await run_in_threadpool(
+                        self.inject_document,
+                        temp_path,
+                        writer=writer,
+                        source=file.filename
+                    )
                     results.append(result)
                 finally:
                     # Clean up temporary file
@@ -149,21 +348,88 @@ class InjectionService:
                     "message": f"Failed to process {file.filename}: {str(e)}",
                     "chunks_processed": 0
                 })
-                
+        
+        write_stats = await run_in_threadpool(writer.close)
+        logger.info("batch_write_throughput", documents=len(files), **write_stats)
+        return results
+    
+    async def inject_paths(self, patterns: List[str], max_chunks: Optional[int] = None) -> List[dict]:
+        """Inject documents read in place from server-side paths.
+        
+        Files are read directly from the volume, without an upload or a
+        temporary copy. All documents share one vector store writer, as in
+        inject_documents.
+        
+        Args:
+            patterns: File paths or glob patterns under the allowed roots
+            max_chunks: Optional maximum number of chunks stored per document
+            
+        Returns:
+            List of injection results, one per file (with its path), plus a
+            failed result for every pattern that matched no file
+            
+        Raises:
+            PathNotAllowed: If path ingestion is disabled or a path is outside the roots
+            ValueError: If the patterns match too many files
+        """
+        files, unmatched = await run_in_threadpool(resolve_ingest_paths, patterns)
+        results = [
+            {"success": False, "path": pattern, "message": "No file matches the path", "chunks_processed": 0}
+            for pattern in unmatched
+        ]
+        writer = self.vector_store.writer()
+        for path, doc_id in files:
+            result = await run_in_threadpool(
+                self.inject_document,
+                path,
+                max_chunks=max_chunks,
+                writer=writer,
+                doc_id=doc_id,
+                source=path
+            )
+            results.append({"path": path, **result})
+        
+        write_stats = await run_in_threadpool(writer.close)
+        logger.info("path_write_throughput", documents=len(files), **write_stats)
         return results
     
     async def delete_document(self, doc_id: str) -> bool:
-        """Delete a document from the vector store.
+        """Delete a document and all of its chunks from the vector store.
+        
+        Chunks that other documents' near-duplicates link to are first
+        copied for those documents (see restore_linked_duplicates).
         
         Args:
             doc_id: ID of the document to delete
             
         Returns:
-            Whether the deletion was successful
+            Whether the document existed and was deleted
         """
         try:
-            self.vector_store.delete_document(doc_id)
+            collection = self.vector_store.collection_name
+            if self.registry.get(doc_id, collection=collection) is None:
+                return False
+            await run_in_threadpool(restore_linked_duplicates, self.vector_store, doc_id, self.registry)
+            await run_in_threadpool(self.vector_store.delete_document, doc_id)
+            self.registry.delete(doc_id, collection=collection)
+            logger.info("document_deleted", doc_id=doc_id)
             return True
         except Exception as e:
             logger.error("error_deleting_document", doc_id=doc_id, error=str(e), exc_info=True)
-            return False 
\ No newline at end of file
+            return False
+    
+    def list_documents(self, limit: int = 100, offset: int = 0) -> List[Dict[str, Any]]:
+        """List the documents ingested into the vector store.
+        
+        Args:
+            limit: Maximum number of documents to return
+            offset: Number of documents to skip
+            
+        Returns:
+            Document records (doc_id, source, content_hash, chunk_count, ingested_at)
+        """
+        return self.registry.list_documents(
+            collection=self.vector_store.collection_name,
+            limit=limit,
+            offset=offset
+        ) 
\ No newline at end of file
@@ -0,0 +1,261 @@
+"""On-demand sampling profiler for a running worker.
+
+A background thread snapshots the Python stack of every thread of the
+process (sys._current_frames) at a fixed interval and counts identical
+stacks. Nothing is instrumented and no tracing hook is installed, so the
+code being profiled runs unchanged; the cost is one stack walk per thread
+per interval, paid by the sampler thread and reported as overhead.
+
+Profiles are rendered as collapsed stacks ("thread;module.func;... count"
+per line), the input format of flamegraph.pl, speedscope and inferno. Only
+one profile runs at a time per process, its duration and interval are
+clamped by the PROFILER_* settings, and the number of distinct stacks kept
+is bounded.
+"""
+from typing import Any, ClassVar, Dict, List, Optional, Tuple
+from collections import Counter, OrderedDict
+import sys
+import threading
+import time
+import uuid
+
+from ...config.settings import settings
+from ...utils.logging import get_logger
+
+logger = get_logger(__name__)
+
+# Leaf frames of a thread that is blocked waiting rather than working
+IDLE_FRAMES = {
+    ("selectors", "select"),
+    ("threading", "wait"),
+    ("queue", "get"),
+    ("concurrent.futures.thread", "_worker"),
+}
+MAX_DEPTH = 128
+MAX_STACKS = 10000
+
+
+class ProfilerBusy(RuntimeError):
+    """Raised when a profile is requested while another one is running."""
+
+
+def frame_label(frame) -> str:
+    """Label a frame as module.qualified_name for a collapsed stack."""
+    code = frame.f_code
+    module = frame.f_globals.get("__name__", "?")
+    return f"{module}.{getattr(code, 'co_qualname', code.co_name)}".replace(";", ":").replace(" ", "_")
+
+
+class Profile:
+    """Stack samples collected by one profiling session."""
+
+    def __init__(self, interval: float, label: Optional[str] = None):
+        """Initialize an empty profile.
+
+        Args:
+            interval: Seconds between samples
+            label: What was profiled (e.g. "POST /query")
+        """
+        self.id = uuid.uuid4().hex
+        self.label = label
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self.idle_samples = 0
+        self.truncated = 0
+        self.sampling_seconds = 0.0
+        self.started_at = time.time()
+        self.seconds = 0.0
+
+    def add(self, stack: Tuple[str, ...], idle: bool) -> None:
+        """Count one sampled stack of one thread."""
+        self.samples += 1
+        if idle:
+            self.idle_samples += 1
+        if stack not in self.stacks and len(self.stacks) >= MAX_STACKS:
+            self.truncated += 1
+            stack = (stack[0], "[truncated]")
+        self.stacks[stack] += 1
+
+    def collapsed(self, include_idle: bool = False) -> str:
+        """Render the profile in collapsed-stack format, heaviest stacks first.
+
+        Args:
+            include_idle: Whether to keep the stacks of threads waiting idle
+
+        Returns:
+            One "frame;frame;... count" line per distinct stack, root first
+        """
+        return "".join(
+            f"{';'.join(stack)} {count}\n"
+            for stack, count in self.stacks.most_common()
+            if include_idle or stack[-1] != "[idle]"
+        )
+
+    def summary(self) -> Dict[str, Any]:
+        """Get the profile's metadata.
+
+        Returns:
+            Dictionary with the ID, label, duration, interval, sample counts,
+            distinct stacks and the share of wall time spent sampling
+        """
+        return {
+            "id": self.id,
+            "label": self.label,
+            "started_at": self.started_at,
+            "seconds": round(self.seconds, 3),
+            "interval_ms": round(self.interval * 1000, 3),
+            "samples": self.samples,
+            "idle_samples": self.idle_samples,
+            "stacks": len(self.stacks),
+            "truncated_samples": self.truncated,
+            "overhead_ratio": round(self.sampling_seconds / self.seconds, 4) if self.seconds else 0.0,
+        }
+
+
+class SamplingProfiler:
+    """Sample the stacks of all threads of the process, one session at a time.
+
+    Finished profiles are kept in a small ring buffer so a per-request
+    profile can be fetched after its response has been sent.
+    """
+
+    _instance: ClassVar[Optional["SamplingProfiler"]] = None
+
+    @classmethod
+    def get_instance(cls) -> "SamplingProfiler":
+        """Get the singleton instance of the profiler.
+
+        Returns:
+            Sampling profiler instance
+        """
+        if cls._instance is None:
+            cls._instance = cls()
+        return cls._instance
+
+    def __init__(self, keep: Optional[int] = None):
+        """Initialize the profiler.
+
+        Args:
+            keep: Finished profiles kept for retrieval. Defaults to settings.PROFILER_KEEP.
+        """
+        self.keep = keep or settings.PROFILER_KEEP
+        self._lock = threading.Lock()
+        self._active: Optional[Profile] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._deadline = 0.0
+        self._profiles: "OrderedDict[str, Profile]" = OrderedDict()
+
+    @property
+    def active(self) -> Optional[Profile]:
+        """Profile being collected, if any."""
+        return self._active
+
+    def start(
+        self,
+        seconds: Optional[float] = None,
+        interval_ms: Optional[float] = None,
+        label: Optional[str] = None
+    ) -> Profile:
+        """Start sampling in a background thread.
+
+        Args:
+            seconds: Maximum duration; sampling stops by itself after it.
+                Clamped to settings.PROFILER_MAX_SECONDS.
+            interval_ms: Milliseconds between samples. Defaults to
+                settings.PROFILER_INTERVAL_MS, and is at least 1.
+            label: What is being profiled
+
+        Returns:
+            The profile being collected
+
+        Raises:
+            ProfilerBusy: If a profile is already running
+        """
+        seconds = min(seconds or settings.PROFILER_MAX_SECONDS, settings.PROFILER_MAX_SECONDS)
+        interval = max(interval_ms or settings.PROFILER_INTERVAL_MS, 1.0) / 1000
+        with self._lock:
+            if self._active is not None:
+                raise ProfilerBusy(f"Profile {self._active.id} is already running")
+            profile = Profile(interval, label)
+            self._active = profile
+            self._stop.clear()
+            self._deadline = time.monotonic() + seconds
+            self._thread = threading.Thread(
+                target=self._sample,
+                args=(profile,),
+                name="sampling-profiler",
+                daemon=True
+            )
+            self._thread.start()
+        logger.info("profile_started", profile_id=profile.id, label=label, seconds=seconds, interval_ms=interval * 1000)
+        return profile
+
+    def stop(self) -> Profile:
+        """Stop sampling and keep the profile for retrieval.
+
+        Returns:
+            The finished profile
+
+        Raises:
+            RuntimeError: If no profile is running
+        """
+        with self._lock:
+            profile, thread = self._active, self._thread
+            if profile is None:
+                raise RuntimeError("No profile is running")
+            self._stop.set()
+        thread.join()
+        with self._lock:
+            self._active = None
+            self._thread = None
+            self._profiles[profile.id] = profile
+            while len(self._profiles) > self.keep:
+                self._profiles.popitem(last=False)
+        logger.info("profile_finished", **profile.summary())
+        return profile
+
+    def get(self, profile_id: str) -> Optional[Profile]:
+        """Get a finished profile by ID."""
+        with self._lock:
+            return self._profiles.get(profile_id)
+
+    def list(self) -> List[Dict[str, Any]]:
+        """Summaries of the finished profiles kept, newest first."""
+        with self._lock:
+            return [profile.summary() for profile in reversed(self._profiles.values())]
+
+    def _sample(self, profile: Profile) -> None:
+        """Sampler thread: snapshot every other thread's stack each interval."""
+        own_id = threading.get_ident()
+        started = time.perf_counter()
+        while not self._stop.is_set() and time.monotonic() < self._deadline:
+            tick = time.perf_counter()
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                leaf = (frame.f_globals.get("__name__"), frame.f_code.co_name)
+                labels = []
+                while frame is not None and len(labels) < MAX_DEPTH:
+                    labels.append(frame_label(frame))
+                    frame = frame.f_back
+                frame = None
+                labels.append(names.get(thread_id, f"thread-{thread_id}").replace(" ", "_").replace(";", ":"))
+                idle = leaf in IDLE_FRAMES
+                if idle:
+                    labels.insert(0, "[idle]")
+                profile.add(tuple(reversed(labels)), idle)
+            profile.sampling_seconds += time.perf_counter() - tick
+            self._stop.wait(max(0.0, profile.interval - (time.perf_counter() - tick)))
+        profile.seconds = time.perf_counter() - started
+
+
+def get_profiler() -> SamplingProfiler:
+    """Get the sampling profiler instance.
+
+    Returns:
+        Sampling profiler instance
+    """
+    return SamplingProfiler.get_instance()
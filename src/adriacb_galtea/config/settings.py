@@ -1,5 +1,5 @@
 """Settings module for the RAG application."""
-from typing import List
+from typing import List, Optional
 from pydantic_settings import BaseSettings, SettingsConfigDict
 from pydantic import Field
 
@@ -15,6 +15,16 @@ class Settings(BaseSettings):
     
     # OpenAI settings
     OPENAI_API_KEY: str = Field(..., env="OPENAI_API_KEY")
+    OPENAI_BASE_URL: Optional[str] = Field(None, env="OPENAI_BASE_URL")  # OpenAI-compatible endpoint (e.g. a local stub)
+    OPENAI_TIMEOUT_SECONDS: float = Field(60.0, env="OPENAI_TIMEOUT_SECONDS")  # Per-call read/write/pool timeout
+    OPENAI_CONNECT_TIMEOUT_SECONDS: float = Field(5.0, env="OPENAI_CONNECT_TIMEOUT_SECONDS")
+    OPENAI_MAX_RETRIES: int = Field(2, env="OPENAI_MAX_RETRIES")  # Retries per call on connection errors, 429 and 5xx
+    OPENAI_RETRY_BUDGET_RATIO: float = Field(0.1, env="OPENAI_RETRY_BUDGET_RATIO")  # Process-wide retries allowed per request sent in the window
+    OPENAI_RETRY_BUDGET_MIN_RETRIES: int = Field(10, env="OPENAI_RETRY_BUDGET_MIN_RETRIES")  # Retries always allowed per window, for low traffic
+    OPENAI_RETRY_BUDGET_WINDOW_SECONDS: float = Field(10.0, env="OPENAI_RETRY_BUDGET_WINDOW_SECONDS")
+    OPENAI_MAX_CONNECTIONS: int = Field(100, env="OPENAI_MAX_CONNECTIONS")  # Per pooled client (sync and async)
+    OPENAI_MAX_KEEPALIVE_CONNECTIONS: int = Field(20, env="OPENAI_MAX_KEEPALIVE_CONNECTIONS")
+    OPENAI_KEEPALIVE_EXPIRY_SECONDS: float = Field(30.0, env="OPENAI_KEEPALIVE_EXPIRY_SECONDS")
     
     # Vector store settings
     VECTOR_STORE_PATH: str = Field("vector_store", env="VECTOR_STORE_PATH")
@@ -30,6 +40,74 @@ class Settings(BaseSettings):
     openai_model: str = "gpt-4o-mini"
     openai_temperature: float = 0.0
 
+    # Conversation settings
+    CHECKPOINT_DB_PATH: str = Field("checkpoints.sqlite3", env="CHECKPOINT_DB_PATH")  # SQLite conversation checkpoints
+    HISTORY_MAX_TOKENS: int = Field(4000, env="HISTORY_MAX_TOKENS")  # Token budget of the history sent to the model
+
+    # Query coalescing settings
+    COALESCE_ENABLED: bool = Field(True, env="COALESCE_ENABLED")  # Share one graph run between identical queries
+    COALESCE_WINDOW_SECONDS: float = Field(0.5, env="COALESCE_WINDOW_SECONDS")  # Reuse a finished run for this long
+
+    # Speculative retrieval prefetch settings
+    PREFETCH_ENABLED: bool = Field(False, env="PREFETCH_ENABLED")  # Search for the question during the first model call
+    PREFETCH_MIN_SIMILARITY: float = Field(0.6, env="PREFETCH_MIN_SIMILARITY")  # Word-set cosine of tool query and question
+    PREFETCH_WORKERS: int = Field(8, env="PREFETCH_WORKERS")  # Concurrent prefetch searches
+
+    # Admission control settings (per endpoint class: concurrent requests, waiting requests, max wait)
+    ADMISSION_QUERY_CONCURRENCY: int = Field(16, env="ADMISSION_QUERY_CONCURRENCY")
+    ADMISSION_QUERY_QUEUE_SIZE: int = Field(64, env="ADMISSION_QUERY_QUEUE_SIZE")
+    ADMISSION_QUERY_TIMEOUT_SECONDS: float = Field(10.0, env="ADMISSION_QUERY_TIMEOUT_SECONDS")
+    ADMISSION_INGEST_CONCURRENCY: int = Field(2, env="ADMISSION_INGEST_CONCURRENCY")
+    ADMISSION_INGEST_QUEUE_SIZE: int = Field(8, env="ADMISSION_INGEST_QUEUE_SIZE")
+    ADMISSION_INGEST_TIMEOUT_SECONDS: float = Field(60.0, env="ADMISSION_INGEST_TIMEOUT_SECONDS")
+    ADMISSION_BATCH_CONCURRENCY: int = Field(2, env="ADMISSION_BATCH_CONCURRENCY")
+    ADMISSION_BATCH_QUEUE_SIZE: int = Field(4, env="ADMISSION_BATCH_QUEUE_SIZE")
+    ADMISSION_BATCH_TIMEOUT_SECONDS: float = Field(60.0, env="ADMISSION_BATCH_TIMEOUT_SECONDS")
+
+    # Batch query settings
+    QUERY_BATCH_MAX_QUESTIONS: int = Field(5000, env="QUERY_BATCH_MAX_QUESTIONS")  # Questions per /query/batch request
+    QUERY_BATCH_CONCURRENCY: int = Field(8, env="QUERY_BATCH_CONCURRENCY")  # Graph runs in flight per batch by default
+    QUERY_BATCH_MAX_CONCURRENCY: int = Field(32, env="QUERY_BATCH_MAX_CONCURRENCY")  # Cap on a request's concurrency
+
+    # Chunking settings
+    CHUNK_MAX_TOKENS: int = Field(512, env="CHUNK_MAX_TOKENS")
+    CHUNK_OVERLAP_TOKENS: int = Field(64, env="CHUNK_OVERLAP_TOKENS")
+    CHUNK_TOKEN_ENCODING: str = Field("cl100k_base", env="CHUNK_TOKEN_ENCODING")
+    INGEST_BATCH_SIZE: int = Field(128, env="INGEST_BATCH_SIZE")  # Chunks per embedding/upsert call
+    INGEST_QUEUE_SIZE: int = Field(4, env="INGEST_QUEUE_SIZE")  # Batches buffered between pipeline stages
+    INGEST_ALLOWED_ROOTS: str = Field("", env="INGEST_ALLOWED_ROOTS")  # Comma-separated directories for /inject/paths; empty disables it
+    INGEST_PATH_MAX_FILES: int = Field(1000, env="INGEST_PATH_MAX_FILES")  # Files per /inject/paths request
+
+    # Near-duplicate chunk detection settings
+    DEDUP_MODE: str = Field("off", env="DEDUP_MODE")  # off, skip (drop duplicates, recording those of other documents) or link (drop and record them all)
+    DEDUP_THRESHOLD: float = Field(0.9, env="DEDUP_THRESHOLD")  # Minimum estimated Jaccard similarity of word shingles
+    DEDUP_NUM_PERM: int = Field(128, env="DEDUP_NUM_PERM")  # MinHash signature length
+    DEDUP_BANDS: int = Field(16, env="DEDUP_BANDS")  # LSH bands; more bands find less similar candidates
+    DEDUP_SHINGLE_SIZE: int = Field(5, env="DEDUP_SHINGLE_SIZE")  # Words per shingle
+
+    # PDF conversion settings
+    PDF_PARALLEL_PAGE_THRESHOLD: int = Field(100, env="PDF_PARALLEL_PAGE_THRESHOLD")  # 0 disables page-range splitting
+    PDF_PAGES_PER_RANGE: int = Field(50, env="PDF_PAGES_PER_RANGE")
+    PDF_CONVERSION_WORKERS: int = Field(0, env="PDF_CONVERSION_WORKERS")  # 0 means one per CPU core
+    PDF_CONVERSION_PROFILE: str = Field("auto", env="PDF_CONVERSION_PROFILE")  # fast, tables, ocr or auto (per document)
+    PDF_CONVERSION_THREADS: int = Field(4, env="PDF_CONVERSION_THREADS")  # Docling model threads per converter
+    PDF_AUTO_SAMPLE_PAGES: int = Field(3, env="PDF_AUTO_SAMPLE_PAGES")  # Pages sampled to pick a profile
+    PDF_OCR_MIN_CHARS_PER_PAGE: int = Field(100, env="PDF_OCR_MIN_CHARS_PER_PAGE")  # Less text layer means a scan
+    PDF_TABLE_MIN_PATHS_PER_PAGE: int = Field(40, env="PDF_TABLE_MIN_PATHS_PER_PAGE")  # Ruling lines suggesting tables
+
+    # Admin and profiling settings
+    ADMIN_TOKEN: str = Field("", env="ADMIN_TOKEN")  # X-Admin-Token of the /admin endpoints and profiling; empty disables them
+    PROFILER_INTERVAL_MS: float = Field(10.0, env="PROFILER_INTERVAL_MS")  # Milliseconds between stack samples
+    PROFILER_MAX_SECONDS: float = Field(60.0, env="PROFILER_MAX_SECONDS")  # Longest profile, also for per-request profiles
+    PROFILER_KEEP: int = Field(20, env="PROFILER_KEEP")  # Finished profiles kept for retrieval
+
+    # Tracing settings
+    TRACE_ENABLED: bool = Field(False, env="TRACE_ENABLED")  # Record spans of request stages to TRACE_FILE
+    TRACE_FILE: str = Field("traces/traces.jsonl", env="TRACE_FILE")  # OTLP/JSON lines, rotated by size
+    TRACE_FILE_MAX_BYTES: int = Field(50_000_000, env="TRACE_FILE_MAX_BYTES")
+    TRACE_FILE_BACKUPS: int = Field(5, env="TRACE_FILE_BACKUPS")  # Rotated trace files kept
+    TRACE_SAMPLE_RATIO: float = Field(1.0, env="TRACE_SAMPLE_RATIO")  # Share of requests traced
+
     # Langfuse settings
     LANGFUSE_PUBLIC_KEY: str = Field("", env="LANGFUSE_PUBLIC_KEY")
     LANGFUSE_SECRET_KEY: str = Field("", env="LANGFUSE_SECRET_KEY")
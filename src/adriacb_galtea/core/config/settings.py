@@ -1,5 +1,5 @@
 """Settings module for the RAG application."""
-from typing import List
+from typing import List, Optional
 from pydantic_settings import BaseSettings, SettingsConfigDict
 from pydantic import Field
 import os
@@ -10,6 +10,40 @@ class Settings(BaseSettings):
     
     # Vector store settings
     VECTOR_STORE_PATH: str = Field(env="VECTOR_STORE_PATH")
+    VECTOR_STORE_BATCH_SIZE: int = Field(1000, env="VECTOR_STORE_BATCH_SIZE")  # Capped by Chroma's max batch size
+    VECTOR_STORE_WRITERS: int = Field(1, env="VECTOR_STORE_WRITERS")  # >1 only for backends with concurrent writes
+    VECTOR_STORE_DEFAULT_COLLECTION: str = Field("documents", env="VECTOR_STORE_DEFAULT_COLLECTION")
+    VECTOR_STORE_MAX_OPEN_COLLECTIONS: int = Field(32, env="VECTOR_STORE_MAX_OPEN_COLLECTIONS")  # LRU of open collection handles
+    VECTOR_STORE_MEMORY_LIMIT_BYTES: int = Field(0, env="VECTOR_STORE_MEMORY_LIMIT_BYTES")  # 0 = no limit on loaded indexes
+    VECTOR_STORE_SEARCH_WORKERS: int = Field(8, env="VECTOR_STORE_SEARCH_WORKERS")  # Fan-out search across collections
+    
+    # Snapshot and prewarm settings
+    SNAPSHOT_PAGE_SIZE: int = Field(5000, env="SNAPSHOT_PAGE_SIZE")  # Chunks read per page on export
+    PREWARM_ON_STARTUP: bool = Field(False, env="PREWARM_ON_STARTUP")
+    PREWARM_COLLECTIONS: str = Field("", env="PREWARM_COLLECTIONS")  # Comma-separated, default collection if empty
+    PREWARM_QUERIES: int = Field(32, env="PREWARM_QUERIES")  # Warm-up queries per collection
+    
+    # Reindex settings
+    REINDEX_BATCH_SIZE: int = Field(500, env="REINDEX_BATCH_SIZE")  # Chunks copied at a time
+    REINDEX_MAX_CHUNKS_PER_SECOND: float = Field(2000.0, env="REINDEX_MAX_CHUNKS_PER_SECOND")  # 0 = no limit
+    
+    # Index maintenance settings
+    MAINTENANCE_INTERVAL_SECONDS: float = Field(0.0, env="MAINTENANCE_INTERVAL_SECONDS")  # 0 = no scheduled compaction
+    MAINTENANCE_COLLECTIONS: str = Field("", env="MAINTENANCE_COLLECTIONS")  # Comma-separated, default collection if empty
+    MAINTENANCE_MAX_DELETED_RATIO: float = Field(0.2, env="MAINTENANCE_MAX_DELETED_RATIO")  # Share of deleted index entries that triggers a rebuild
+    MAINTENANCE_MIN_DELETED: int = Field(1000, env="MAINTENANCE_MIN_DELETED")  # Deleted entries below which no rebuild is worth it
+    MAINTENANCE_MAX_FREE_RATIO: float = Field(0.2, env="MAINTENANCE_MAX_FREE_RATIO")  # Share of free database pages that triggers a vacuum
+    MAINTENANCE_VACUUM_PAGES_PER_STEP: int = Field(1000, env="MAINTENANCE_VACUUM_PAGES_PER_STEP")  # Pages released per incremental vacuum step
+    MAINTENANCE_VACUUM_PAUSE_MS: float = Field(20.0, env="MAINTENANCE_VACUUM_PAUSE_MS")  # Pause between vacuum steps
+    MAINTENANCE_DROP_DELAY_SECONDS: float = Field(30.0, env="MAINTENANCE_DROP_DELAY_SECONDS")  # Grace period before the rebuilt-from collection is dropped
+    
+    # HNSW index settings (applied when a collection is created)
+    HNSW_SPACE: str = Field("cosine", env="HNSW_SPACE")
+    HNSW_CONSTRUCTION_EF: int = Field(100, env="HNSW_CONSTRUCTION_EF")
+    HNSW_SEARCH_EF: int = Field(10, env="HNSW_SEARCH_EF")
+    HNSW_M: int = Field(16, env="HNSW_M")
+    HNSW_BATCH_SIZE: int = Field(100, env="HNSW_BATCH_SIZE")
+    HNSW_SYNC_THRESHOLD: int = Field(1000, env="HNSW_SYNC_THRESHOLD")
     
     # API settings
     API_HOST: str = Field("0.0.0.0", env="API_HOST")
@@ -32,6 +66,7 @@ class Settings(BaseSettings):
     
     # Embedding settings
     EMBEDDING_MODEL: str = Field("sentence-transformers/all-MiniLM-L6-v2", env="EMBEDDING_MODEL")
+    EMBEDDING_DIMENSIONS: Optional[int] = Field(None, env="EMBEDDING_DIMENSIONS")  # New collections; None = full 1536
     
     model_config = SettingsConfigDict(env_file=".env", env_file_encoding="utf-8", extra="ignore")
 
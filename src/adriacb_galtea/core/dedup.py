@@ -0,0 +1,443 @@
+"""Near-duplicate chunk detection for the ingestion pipeline.
+
+Manuals repeat the same boilerplate (legal notices, safety warnings,
+headers and footers) across pages and editions. Each chunk gets a MinHash
+signature of its word shingles; signatures are split into LSH bands, and
+chunks sharing a band are candidates whose estimated Jaccard similarity is
+compared with the threshold. Duplicates are dropped before they are
+embedded, against both the chunks already seen in the document and the
+corpus stored in the collection.
+
+The LSH index of a collection is persisted in the document registry
+database, next to the vector store. A document's signatures are only
+written once it has been ingested, so a failed ingestion leaves no chunk
+that later documents would be deduplicated against; two documents
+ingested concurrently are not compared with each other.
+
+A duplicate dropped against another document's chunk is linked to that
+chunk. Before the chunks of a document are deleted or replaced,
+restore_linked_duplicates() stores a copy of each linked chunk for a
+document linking to it, so no document loses content.
+"""
+from typing import Any, ClassVar, Dict, List, Optional, Tuple
+import hashlib
+import re
+import threading
+
+import numpy as np
+
+from ..config.settings import settings
+from ..utils.logging import get_logger
+from .document_registry import DocumentRegistry, get_document_registry
+from .vector_store import ChromaVectorStore
+
+logger = get_logger(__name__)
+
+DEDUP_MODES = ("off", "skip", "link")
+
+# Mersenne prime of the universal hash family; hash values stay below 2**32
+_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+
+
+def shingles(text: str, size: int = 5) -> List[str]:
+    """Split a text into overlapping word shingles.
+
+    The text is case-folded and its whitespace collapsed, so layout
+    differences between copies of the same passage do not matter.
+
+    Args:
+        text: Text to split
+        size: Words per shingle
+
+    Returns:
+        Distinct shingles; a text shorter than size words is a single shingle
+    """
+    words = re.findall(r"\w+", text.casefold())
+    if len(words) <= size:
+        return [" ".join(words)]
+    return list({" ".join(words[i:i + size]) for i in range(len(words) - size + 1)})
+
+
+class MinHasher:
+    """MinHash signatures of word shingles, split into LSH bands."""
+
+    def __init__(self, num_perm: int = 128, bands: int = 16, shingle_size: int = 5, seed: int = 1):
+        """Initialize the hash functions.
+
+        Args:
+            num_perm: Number of hash functions (signature length)
+            bands: Number of LSH bands; num_perm must be a multiple of it
+            shingle_size: Words per shingle
+            seed: Seed of the hash functions, which must not change for a persisted index
+        """
+        if num_perm % bands:
+            raise ValueError(f"num_perm ({num_perm}) must be a multiple of bands ({bands})")
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.shingle_size = shingle_size
+        rng = np.random.default_rng(seed)
+        self._a = rng.integers(1, _MAX_HASH, size=num_perm, dtype=np.uint64)
+        self._b = rng.integers(0, _MAX_HASH, size=num_perm, dtype=np.uint64)
+
+    def signature(self, text: str) -> np.ndarray:
+        """Compute the MinHash signature of a text.
+
+        Args:
+            text: Text to sign
+
+        Returns:
+            Array of num_perm uint32 minimum hash values
+        """
+        hashes = np.array(
+            [
+                int.from_bytes(hashlib.blake2b(shingle.encode("utf-8"), digest_size=4).digest(), "little")
+                for shingle in shingles(text, self.shingle_size)
+            ],
+            dtype=np.uint64
+        )
+        # (a * h + b) stays below 2**64 because a, b and h are below 2**32
+        permuted = (np.outer(hashes, self._a) + self._b) % _PRIME & _MAX_HASH
+        return permuted.min(axis=0).astype(np.uint32)
+
+    def band_keys(self, signature: np.ndarray) -> List[int]:
+        """Hash each band of a signature to a signed 64-bit key.
+
+        Args:
+            signature: MinHash signature
+
+        Returns:
+            One key per band; equal keys mean an identical band
+        """
+        return [
+            int.from_bytes(
+                hashlib.blake2b(
+                    band.to_bytes(2, "little") + signature[band * self.rows:(band + 1) * self.rows].tobytes(),
+                    digest_size=8
+                ).digest(),
+                "little",
+                signed=True
+            )
+            for band in range(self.bands)
+        ]
+
+    @staticmethod
+    def similarity(a: np.ndarray, b: np.ndarray) -> float:
+        """Estimate the Jaccard similarity of two texts from their signatures."""
+        return float(np.mean(a == b))
+
+
+class DedupStats:
+    """Process-wide count of the chunks, bytes and embeddings saved."""
+
+    _instance: ClassVar[Optional["DedupStats"]] = None
+
+    @classmethod
+    def get_instance(cls) -> "DedupStats":
+        """Get the singleton instance of the stats.
+
+        Returns:
+            Dedup stats instance
+        """
+        if cls._instance is None:
+            cls._instance = cls()
+        return cls._instance
+
+    def __init__(self):
+        """Initialize the counters."""
+        self._lock = threading.Lock()
+        self.chunks = 0
+        self.duplicates = 0
+        self.bytes_saved = 0
+
+    def record(self, chunks: int, duplicates: int, bytes_saved: int) -> None:
+        """Add the outcome of one document's deduplication."""
+        with self._lock:
+            self.chunks += chunks
+            self.duplicates += duplicates
+            self.bytes_saved += bytes_saved
+
+    def stats(self) -> Dict[str, Any]:
+        """Get dedup metrics.
+
+        Returns:
+            Dictionary with the mode, the chunks checked, the duplicates skipped
+            (each one an embedding input saved), their bytes and their share
+        """
+        with self._lock:
+            return {
+                "mode": settings.DEDUP_MODE,
+                "threshold": settings.DEDUP_THRESHOLD,
+                "chunks": self.chunks,
+                "duplicates": self.duplicates,
+                "embeddings_saved": self.duplicates,
+                "bytes_saved": self.bytes_saved,
+                "duplicate_ratio": round(self.duplicates / self.chunks, 4) if self.chunks else 0.0,
+            }
+
+
+class DocumentDeduplicator:
+    """Drop the near-duplicate chunks of one document before they are embedded.
+
+    Call filter() on every batch of chunks, in order, then commit() once the
+    document's chunks have been stored.
+    """
+
+    def __init__(
+        self,
+        doc_id: str,
+        collection: str,
+        mode: Optional[str] = None,
+        threshold: Optional[float] = None,
+        hasher: Optional[MinHasher] = None,
+        registry: Optional[DocumentRegistry] = None,
+        stats: Optional[DedupStats] = None
+    ):
+        """Initialize the deduplicator.
+
+        Args:
+            doc_id: ID of the document being ingested; its previous version is
+                not treated as a duplicate of it
+            collection: Collection the document is ingested into
+            mode: "skip" drops duplicates, linking those of other documents' chunks
+                to them; "link" links every duplicate, including those within the
+                document; "off" keeps every chunk. Defaults to settings.DEDUP_MODE.
+            threshold: Minimum estimated Jaccard similarity of a duplicate.
+                Defaults to settings.DEDUP_THRESHOLD.
+            hasher: MinHash functions. Defaults to the shared hasher.
+            registry: Registry holding the LSH index. Defaults to the shared registry.
+            stats: Stats to record the outcome in
+        """
+        self.doc_id = doc_id
+        self.collection = collection
+        self.mode = mode or settings.DEDUP_MODE
+        if self.mode not in DEDUP_MODES:
+            raise ValueError(f"Invalid dedup mode {self.mode!r}; expected one of {DEDUP_MODES}")
+        self.threshold = settings.DEDUP_THRESHOLD if threshold is None else threshold
+        self.hasher = hasher or get_minhasher()
+        self.registry = registry or get_document_registry()
+        self.stats = stats or DedupStats.get_instance()
+        self.chunks = 0
+        self.within_document = 0
+        self.corpus = 0
+        self.bytes_saved = 0
+        self._signatures: List[Dict[str, Any]] = []
+        self._links: List[Dict[str, Any]] = []
+        # Band key -> (chunk ID, signature) of the chunks kept so far in this document
+        self._buckets: Dict[int, List[Tuple[str, np.ndarray]]] = {}
+
+    @property
+    def enabled(self) -> bool:
+        """Whether duplicates are detected."""
+        return self.mode != "off"
+
+    def filter(self, documents: List[Dict[str, Any]], position: int = 0) -> List[Dict[str, Any]]:
+        """Drop the near-duplicates from a batch of chunks ready for storage.
+
+        Args:
+            documents: Chunks with id, content and metadata
+            position: Position of the first chunk within the document
+
+        Returns:
+            The chunks to embed and store
+        """
+        if not self.enabled or not documents:
+            return documents
+        signed = [(document, self.hasher.signature(document["content"])) for document in documents]
+        keys = [self.hasher.band_keys(signature) for _, signature in signed]
+        stored: Dict[int, List[Dict[str, Any]]] = {}
+        for record in self.registry.find_similar_chunks(
+            sorted({key for chunk_keys in keys for key in chunk_keys}),
+            collection=self.collection,
+            exclude_doc_id=self.doc_id
+        ):
+            stored.setdefault(record["band_key"], []).append(record)
+
+        kept = []
+        for offset, ((document, signature), chunk_keys) in enumerate(zip(signed, keys)):
+            self.chunks += 1
+            match = self._best_match(signature, chunk_keys, stored)
+            if match is None:
+                kept.append(document)
+                self._signatures.append(
+                    {"chunk_id": document["id"], "signature": signature.tobytes(), "band_keys": chunk_keys}
+                )
+                for key in chunk_keys:
+                    self._buckets.setdefault(key, []).append((document["id"], signature))
+                continue
+
+            canonical_id, similarity, in_document = match
+            size = len(document["content"].encode("utf-8"))
+            self.bytes_saved += size
+            if in_document:
+                self.within_document += 1
+            else:
+                self.corpus += 1
+            # Links to other documents' chunks are needed to restore the
+            # duplicate when those chunks are deleted
+            if self.mode == "link" or not in_document:
+                self._links.append(
+                    {
+                        "position": position + offset,
+                        "canonical_id": canonical_id,
+                        "similarity": round(similarity, 4),
+                        "bytes": size,
+                    }
+                )
+        return kept
+
+    def _best_match(
+        self,
+        signature: np.ndarray,
+        keys: List[int],
+        stored: Dict[int, List[Dict[str, Any]]]
+    ) -> Optional[Tuple[str, float, bool]]:
+        """Find the most similar candidate above the threshold.
+
+        Returns:
+            Chunk ID, estimated similarity and whether it belongs to this
+            document, or None if the chunk is not a duplicate
+        """
+        best: Optional[Tuple[str, float, bool]] = None
+        seen = set()
+        for key in keys:
+            candidates = [(chunk_id, candidate, True) for chunk_id, candidate in self._buckets.get(key, [])]
+            candidates += [
+                (record["chunk_id"], np.frombuffer(record["signature"], dtype=np.uint32), False)
+                for record in stored.get(key, [])
+            ]
+            for chunk_id, candidate, in_document in candidates:
+                if chunk_id in seen:
+                    continue
+                seen.add(chunk_id)
+                similarity = self.hasher.similarity(signature, candidate)
+                if similarity >= self.threshold and (best is None or similarity > best[1]):
+                    best = (chunk_id, similarity, in_document)
+        return best
+
+    def commit(self) -> None:
+        """Persist the signatures of the stored chunks and record the outcome."""
+        if not self.enabled:
+            return
+        self.registry.replace_signatures(self.doc_id, self._signatures, self._links, collection=self.collection)
+        self.stats.record(self.chunks, self.duplicates, self.bytes_saved)
+        if self.duplicates:
+            logger.info("near_duplicates_skipped", doc_id=self.doc_id, **self.report())
+
+    @property
+    def duplicates(self) -> int:
+        """Number of chunks dropped as near-duplicates."""
+        return self.within_document + self.corpus
+
+    def report(self) -> Dict[str, Any]:
+        """Get the outcome of the deduplication of the document.
+
+        Returns:
+            Dictionary with the mode, chunks checked, duplicates within the
+            document and against the corpus, bytes and embeddings saved
+        """
+        return {
+            "mode": self.mode,
+            "chunks": self.chunks,
+            "duplicates": self.duplicates,
+            "within_document": self.within_document,
+            "corpus": self.corpus,
+            "bytes_saved": self.bytes_saved,
+            "embeddings_saved": self.duplicates,
+        }
+
+
+def restore_linked_duplicates(
+    store: ChromaVectorStore,
+    doc_id: str,
+    registry: Optional[DocumentRegistry] = None
+) -> int:
+    """Copy the chunks of a document that other documents' duplicates link to.
+
+    Call it before the document's chunks are deleted or replaced. For each
+    linked chunk, the first document linking to it gets a copy (text,
+    metadata and vector, attributed to that document) in place of its
+    duplicate, and the other links are pointed at the copy.
+
+    Args:
+        store: Vector store of the collection
+        doc_id: Document whose chunks are about to be removed
+        registry: Registry holding the links. Defaults to the shared registry.
+
+    Returns:
+        Number of chunks copied
+    """
+    registry = registry or get_document_registry()
+    collection = store.collection_name
+    links: Dict[str, Dict[str, Any]] = {}
+    for link in registry.linked_duplicates(doc_id, collection=collection):
+        links.setdefault(link["canonical_id"], link)
+    if not links:
+        return 0
+
+    stored = store._collection.get(ids=list(links), include=["embeddings", "documents", "metadatas"])
+    owners: Dict[str, Optional[Dict[str, Any]]] = {}
+    ids, texts, metadatas, embeddings, adoptions = [], [], [], [], []
+    for canonical_id, text, metadata, embedding in zip(
+        stored["ids"], stored["documents"], stored["metadatas"], stored["embeddings"]
+    ):
+        link = links[canonical_id]
+        if link["doc_id"] not in owners:
+            owners[link["doc_id"]] = registry.get(link["doc_id"], collection=collection)
+        owner = owners[link["doc_id"]]
+        if owner is None:
+            continue
+        # The ID the duplicate would have been stored under
+        chunk_id = f"{owner['doc_id']}:{owner['content_hash'][:16]}:{link['position']}"
+        ids.append(chunk_id)
+        texts.append(text)
+        metadatas.append({
+            **(metadata or {}),
+            "doc_id": owner["doc_id"],
+            "content_hash": owner["content_hash"],
+            "source_file": owner["source"],
+        })
+        embeddings.append(list(embedding))
+        adoptions.append({
+            "canonical_id": canonical_id,
+            "chunk_id": chunk_id,
+            "doc_id": owner["doc_id"],
+            "position": link["position"],
+        })
+    if not ids:
+        return 0
+
+    store.upsert_embedded(ids, texts, metadatas, embeddings)
+    store.mirror_upsert(ids, texts, metadatas, embeddings)
+    registry.adopt_canonical_chunks(adoptions, collection=collection)
+    logger.info("linked_duplicates_restored", doc_id=doc_id, collection=collection, chunks=len(ids))
+    return len(ids)
+
+
+_minhasher: Optional[MinHasher] = None
+
+
+def get_minhasher() -> MinHasher:
+    """Get the MinHash functions configured by the DEDUP_* settings.
+
+    Returns:
+        Shared MinHasher instance
+    """
+    global _minhasher
+    if _minhasher is None:
+        _minhasher = MinHasher(
+            num_perm=settings.DEDUP_NUM_PERM,
+            bands=settings.DEDUP_BANDS,
+            shingle_size=settings.DEDUP_SHINGLE_SIZE
+        )
+    return _minhasher
+
+
+def get_dedup_stats() -> DedupStats:
+    """Get the dedup stats instance.
+
+    Returns:
+        Dedup stats instance
+    """
+    return DedupStats.get_instance()
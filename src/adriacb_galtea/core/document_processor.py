@@ -1,8 +1,13 @@
 """Document processor module for the RAG application."""
 from abc import ABC, abstractmethod
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Callable, Optional, Iterator, Iterable, Tuple
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-from docling.document_converter import DocumentConverter
+from docling.backend.pypdfium2_backend import PyPdfiumDocumentBackend
+from docling.datamodel.base_models import InputFormat
+from docling.datamodel.pipeline_options import AcceleratorOptions, PdfPipelineOptions
+from docling.document_converter import DocumentConverter, PdfFormatOption
 from docling_core.types.doc import DoclingDocument
 from langchain_core.documents import Document as LangChainDocument
 from langchain_core.embeddings import Embeddings
@@ -10,10 +15,235 @@ from langchain_text_splitters import MarkdownHeaderTextSplitter, RecursiveCharac
 from pydantic import BaseModel, Field
 from typing import Dict, List, Optional, Union
 import os
+import re
+import math
+import time
 import logging
+import statistics
+import threading
+import multiprocessing
+from itertools import islice
+
+from ..config.settings import settings
+from ..utils.tracing import record_span, span
 
 logger = logging.getLogger(__name__)
 
+# Marker inserted between pages when a PDF is converted in page ranges
+PAGE_MARKER_PATTERN = re.compile(r"<!-- page: (\d+) -->")
+
+# Conversion profiles, cheapest first: text layer only, text layer with
+# table structure, and the full pipeline with OCR and page images
+CONVERSION_PROFILES = ("fast", "tables", "ocr")
+
+# pypdfium2 page object type of vector paths (lines and rectangles)
+_PDF_PAGE_OBJECT_PATH = 2
+
+_conversion_pools: Dict[int, ProcessPoolExecutor] = {}
+_conversion_pools_lock = threading.Lock()
+_converters: Dict[str, DocumentConverter] = {}
+_converters_lock = threading.Lock()
+
+
+def build_pipeline_options(profile: str) -> PdfPipelineOptions:
+    """Build the Docling PDF pipeline options of a conversion profile.
+    
+    Args:
+        profile: One of CONVERSION_PROFILES
+        
+    Returns:
+        PDF pipeline options
+        
+    Raises:
+        ValueError: If the profile is unknown
+    """
+    if profile not in CONVERSION_PROFILES:
+        raise ValueError(f"Unknown conversion profile {profile!r}; expected one of {CONVERSION_PROFILES}")
+    options = PdfPipelineOptions()
+    options.accelerator_options = AcceleratorOptions(num_threads=settings.PDF_CONVERSION_THREADS)
+    options.do_ocr = profile == "ocr"
+    options.do_table_structure = profile != "fast"
+    options.generate_page_images = profile == "ocr"
+    return options
+
+
+def get_converter(profile: str) -> DocumentConverter:
+    """Get the converter of a conversion profile, shared by the whole process.
+    
+    A converter keeps its loaded models, so reusing it avoids loading them
+    again for every document (and, in worker processes, every page range).
+    
+    Args:
+        profile: One of CONVERSION_PROFILES
+        
+    Returns:
+        Document converter
+    """
+    with _converters_lock:
+        if profile not in _converters:
+            # The pypdfium2 backend only reads the text layer, which is all the fast profile needs
+            pdf_option = PdfFormatOption(
+                pipeline_options=build_pipeline_options(profile),
+                **({"backend": PyPdfiumDocumentBackend} if profile == "fast" else {})
+            )
+            _converters[profile] = DocumentConverter(format_options={InputFormat.PDF: pdf_option})
+        return _converters[profile]
+
+
+def select_conversion_profile(document_path: str) -> str:
+    """Pick the cheapest adequate conversion profile for a PDF.
+    
+    The first settings.PDF_AUTO_SAMPLE_PAGES pages are sampled with pypdfium2
+    (milliseconds, no rendering). A page with less than
+    settings.PDF_OCR_MIN_CHARS_PER_PAGE characters of text layer, or with
+    more than 10% unmapped glyphs, is a scan; the document needs OCR if most
+    sampled pages are (so a sparse cover page does not). Otherwise pages
+    averaging at least settings.PDF_TABLE_MIN_PATHS_PER_PAGE vector paths
+    (ruled tables) need table structure, and anything else only needs its
+    text layer.
+    
+    Args:
+        document_path: Path to the PDF
+        
+    Returns:
+        One of CONVERSION_PROFILES ("ocr" if the PDF cannot be sampled)
+    """
+    try:
+        import pypdfium2
+        pdf = pypdfium2.PdfDocument(document_path)
+    except Exception as e:
+        logger.warning(f"Could not sample {document_path}, using the ocr profile: {str(e)}")
+        return "ocr"
+    try:
+        sampled = min(len(pdf), settings.PDF_AUTO_SAMPLE_PAGES)
+        scanned = paths = 0
+        for index in range(sampled):
+            page = pdf[index]
+            text = page.get_textpage().get_text_range()
+            chars = len(text.strip())
+            if chars < settings.PDF_OCR_MIN_CHARS_PER_PAGE or text.count("\ufffd") > chars / 10:
+                scanned += 1
+            paths += sum(1 for obj in page.get_objects() if obj.type == _PDF_PAGE_OBJECT_PATH)
+        if not sampled or scanned * 2 > sampled:
+            return "ocr"
+        if paths / sampled >= settings.PDF_TABLE_MIN_PATHS_PER_PAGE:
+            return "tables"
+        return "fast"
+    finally:
+        pdf.close()
+
+
+class MarkdownSegment(str):
+    """Markdown of (part of) a document, with how it was converted.
+    
+    iter_chunks copies the profile ("default" for a custom converter or a
+    non-PDF document) and seconds into the metadata of the chunks split
+    from the segment.
+    """
+    
+    profile: Optional[str] = None
+    seconds: Optional[float] = None
+    
+    @classmethod
+    def create(cls, markdown: str, profile: Optional[str], seconds: float) -> "MarkdownSegment":
+        """Wrap converted markdown with its conversion profile and time."""
+        segment = cls(markdown)
+        segment.profile = profile
+        segment.seconds = round(seconds, 3)
+        return segment
+
+
+def _get_conversion_pool(max_workers: int) -> ProcessPoolExecutor:
+    """Get the process pool of a worker count, shared for page-range conversion.
+    
+    Worker processes keep their converter between tasks, so the Docling
+    models are only loaded once per worker. Processors asking for different
+    worker counts get pools of their own size.
+    
+    Args:
+        max_workers: Number of worker processes
+        
+    Returns:
+        Process pool executor
+    """
+    with _conversion_pools_lock:
+        if max_workers not in _conversion_pools:
+            _conversion_pools[max_workers] = ProcessPoolExecutor(
+                max_workers=max_workers,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+        return _conversion_pools[max_workers]
+
+
+def _convert_page_range(
+    file_path: str,
+    start: int,
+    end: int,
+    profile: str = "ocr"
+) -> Tuple[List[Tuple[int, str]], float, int]:
+    """Convert a page range of a PDF in a worker process.
+    
+    Args:
+        file_path: Path to the PDF
+        start: First page to convert (1-based, inclusive)
+        end: Last page to convert (1-based, inclusive)
+        profile: Conversion profile
+        
+    Returns:
+        List of (page number, markdown) tuples in page order, the seconds
+        taken to convert the range and when it started (epoch nanoseconds)
+    """
+    started = time.perf_counter()
+    started_ns = time.time_ns()
+    document = get_converter(profile).convert(file_path, page_range=(start, end)).document
+    page_numbers = sorted(document.pages)
+    # Keep page numbers absolute even if the backend renumbers from 1
+    offset = start - page_numbers[0] if page_numbers and page_numbers[0] < start else 0
+    pages = [
+        (page_no + offset, document.export_to_markdown(page_no=page_no))
+        for page_no in page_numbers
+    ]
+    return pages, time.perf_counter() - started, started_ns
+
+
+class ChunkStats:
+    """Token-size distribution of the chunks produced for a single document.
+
+    The stats are filled in while the chunk generator is consumed, so they are
+    only complete once the generator has been exhausted.
+    """
+
+    def __init__(self):
+        """Initialize empty stats."""
+        self.sizes: List[int] = []
+
+    def add(self, token_count: int) -> None:
+        """Record the size of one chunk.
+
+        Args:
+            token_count: Number of tokens in the chunk
+        """
+        self.sizes.append(token_count)
+
+    def summary(self) -> Dict[str, Any]:
+        """Summarise the chunk-size distribution.
+
+        Returns:
+            Dictionary with count, total, min, max, mean, p50 and p95 token sizes
+        """
+        if not self.sizes:
+            return {"count": 0, "total_tokens": 0}
+        ordered = sorted(self.sizes)
+        return {
+            "count": len(ordered),
+            "total_tokens": sum(ordered),
+            "min_tokens": ordered[0],
+            "max_tokens": ordered[-1],
+            "mean_tokens": round(statistics.fmean(ordered), 1),
+            "p50_tokens": ordered[len(ordered) // 2],
+            "p95_tokens": ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))],
+        }
+
 
 class DocumentProcessor(ABC):
     """Abstract base class for document processing."""
@@ -58,27 +288,198 @@ class DocumentProcessor(ABC):
 class DoclingProcessor(DocumentProcessor):
     """Document processor implementation using Docling."""
     
-    def __init__(self, converter: Optional[DocumentConverter] = None):
+    def __init__(
+        self,
+        converter: Optional[DocumentConverter] = None,
+        max_tokens: Optional[int] = None,
+        overlap_tokens: Optional[int] = None,
+        profile: Optional[str] = None,
+        length_function: Optional[Callable[[str], int]] = None
+    ):
         """Initialize the DoclingProcessor.
 
         Args:
-            converter (Optional[DocumentConverter], optional): Document converter instance. 
-                If None, creates a new one with default settings. Defaults to None.
+            converter (Optional[DocumentConverter], optional): Document converter instance
+                used for every document. If None, the shared converter of each
+                document's conversion profile is used. Defaults to None.
+            max_tokens (Optional[int], optional): Maximum chunk size in tokens.
+                Defaults to settings.CHUNK_MAX_TOKENS.
+            overlap_tokens (Optional[int], optional): Token overlap between consecutive
+                chunks of the same section. Defaults to settings.CHUNK_OVERLAP_TOKENS.
+            profile (Optional[str], optional): Conversion profile ("fast", "tables",
+                "ocr" or "auto" to pick one per PDF). Defaults to settings.PDF_CONVERSION_PROFILE.
+            length_function (Optional[Callable[[str], int]], optional): Function measuring
+                the size of a text in tokens. Defaults to the settings.CHUNK_TOKEN_ENCODING
+                tiktoken encoding.
         """
-        if converter is None:
-            converter = DocumentConverter()
         self.converter = converter
+        self.profile = profile or settings.PDF_CONVERSION_PROFILE
+        if self.profile != "auto" and self.profile not in CONVERSION_PROFILES:
+            raise ValueError(f"Unknown conversion profile {self.profile!r}")
+        self.max_tokens = max_tokens or settings.CHUNK_MAX_TOKENS
+        self.overlap_tokens = settings.CHUNK_OVERLAP_TOKENS if overlap_tokens is None else overlap_tokens
+        self.length_function = length_function
+        self._encoding = None
+        self._token_splitter = None
+        self.conversion_workers = settings.PDF_CONVERSION_WORKERS or os.cpu_count() or 1
         
         # Initialize markdown splitter for headers
+        headers_to_split_on = [
+            ("#", "Header 1"),
+            ("##", "Header 2"),
+            # ("###", "Header 3"),
+            # ("####", "Header 4"),
+        ]
+        self.header_names = [name for _, name in headers_to_split_on]
         self.markdown_splitter = MarkdownHeaderTextSplitter(
-            headers_to_split_on=[
-                ("#", "Header 1"),
-                ("##", "Header 2"),
-                # ("###", "Header 3"),
-                # ("####", "Header 4"),
-            ]
+            headers_to_split_on=headers_to_split_on
         )
     
+    @property
+    def encoding(self):
+        """Tiktoken encoding used to measure chunk sizes (loaded lazily)."""
+        if self._encoding is None:
+            import tiktoken
+            self._encoding = tiktoken.get_encoding(settings.CHUNK_TOKEN_ENCODING)
+        return self._encoding
+
+    @property
+    def token_splitter(self) -> RecursiveCharacterTextSplitter:
+        """Token-bounded splitter applied to sections larger than max_tokens."""
+        if self._token_splitter is None and self.length_function is not None:
+            self._token_splitter = RecursiveCharacterTextSplitter(
+                chunk_size=self.max_tokens,
+                chunk_overlap=self.overlap_tokens,
+                length_function=self.length_function
+            )
+        elif self._token_splitter is None:
+            self._token_splitter = RecursiveCharacterTextSplitter.from_tiktoken_encoder(
+                encoding_name=settings.CHUNK_TOKEN_ENCODING,
+                chunk_size=self.max_tokens,
+                chunk_overlap=self.overlap_tokens
+            )
+        return self._token_splitter
+
+    def count_tokens(self, text: str) -> int:
+        """Count the tokens in a text.
+
+        Args:
+            text: Text to measure
+
+        Returns:
+            Number of tokens
+        """
+        if self.length_function is not None:
+            return self.length_function(text)
+        return len(self.encoding.encode(text, disallowed_special=()))
+
+    def iter_chunks(
+        self,
+        content: Union[str, Iterable[str]],
+        metadata: Dict[str, Any],
+        stats: Optional[ChunkStats] = None
+    ) -> Iterator[Dict[str, Any]]:
+        """Lazily split markdown content into size-bounded chunks.
+
+        Content is first split on headers so every chunk keeps its header
+        hierarchy as metadata; sections above max_tokens are then split again
+        with a token-aware splitter using the configured overlap. Page markers
+        left by page-range conversion are stripped and recorded as
+        page_start/page_end metadata, and the conversion profile and time of
+        MarkdownSegment content as conversion_profile/conversion_seconds.
+
+        Args:
+            content: Markdown content of the document, or an iterable of
+                consecutive markdown segments (as yielded by iter_markdown)
+            metadata: Document metadata copied into every chunk
+            stats: Optional accumulator for the chunk-size distribution
+
+        Yields:
+            Chunks with content and metadata (including token_count)
+        """
+        segments = [content] if isinstance(content, str) else content
+        current_page = None
+        for section in self._iter_sections(segments):
+            text = section.page_content
+            if self.count_tokens(text) > self.max_tokens:
+                pieces = self.token_splitter.split_text(text)
+            else:
+                pieces = [text]
+            
+            for piece in pieces:
+                piece, page_start, page_end, current_page = self._strip_page_markers(piece, current_page)
+                if not piece.strip():
+                    continue
+                token_count = self.count_tokens(piece)
+                if stats is not None:
+                    stats.add(token_count)
+                
+                chunk_metadata = {**metadata, **section.metadata, "token_count": token_count}
+                if page_start is not None:
+                    chunk_metadata["page_start"] = page_start
+                    chunk_metadata["page_end"] = page_end
+                yield {
+                    "content": piece,
+                    "metadata": chunk_metadata
+                }
+    
+    def _iter_sections(self, segments: Iterable[str]) -> Iterator[LangChainDocument]:
+        """Split markdown segments on headers, continuing sections across segments.
+        
+        A segment that starts in the middle of a section inherits the headers
+        in effect at the end of the previous segment.
+        
+        Args:
+            segments: Consecutive markdown segments of one document
+            
+        Yields:
+            Header sections with their header hierarchy as metadata
+        """
+        headers: Dict[str, str] = {}
+        for segment in segments:
+            conversion = {}
+            if getattr(segment, "seconds", None) is not None:
+                conversion = {"conversion_profile": segment.profile, "conversion_seconds": segment.seconds}
+            for section in self.markdown_splitter.split_text(segment):
+                present = [i for i, name in enumerate(self.header_names) if name in section.metadata]
+                depth = present[0] if present else len(self.header_names)
+                inherited = {name: headers[name] for name in self.header_names[:depth] if name in headers}
+                section.metadata = {**inherited, **section.metadata}
+                headers = section.metadata
+                section.metadata = {**section.metadata, **conversion}
+                yield section
+    
+    @staticmethod
+    def _strip_page_markers(
+        text: str,
+        current_page: Optional[int]
+    ) -> Tuple[str, Optional[int], Optional[int], Optional[int]]:
+        """Remove page markers from a chunk and work out the pages it spans.
+        
+        Args:
+            text: Chunk text, possibly containing page markers
+            current_page: Page the previous chunk ended on
+            
+        Returns:
+            Tuple of (clean text, first page, last page, page the chunk ends on)
+        """
+        parts = PAGE_MARKER_PATTERN.split(text)
+        if len(parts) == 1:
+            return text, current_page, current_page, current_page
+        
+        page = current_page
+        page_start = page_end = None
+        texts = []
+        for i, part in enumerate(parts):
+            if i % 2:
+                page = int(part)
+                continue
+            if part.strip():
+                page_start = page if page_start is None else page_start
+                page_end = page
+                texts.append(part.strip())
+        return "\n\n".join(texts), page_start, page_end, page
+
     def get_metadata(self, document_path: str) -> Dict[str, Any]:
         """Get metadata from a document.
         
@@ -100,7 +501,10 @@ class DoclingProcessor(DocumentProcessor):
             Dictionary containing:
             - content: The processed document content
             - metadata: Document metadata
-            - chunks: List of document chunks with header metadata
+            - chunks: Lazy iterator of size-bounded chunks with header metadata.
+              Chunking runs as it is consumed, so errors (e.g. a tokenizer that
+              cannot be loaded) are logged and raised by the iteration, not here.
+            - chunk_stats: ChunkStats filled in as the chunks are consumed
         """
         try:
             # Get document metadata
@@ -112,42 +516,187 @@ class DoclingProcessor(DocumentProcessor):
                 logger.error(f"Failed to extract text from {file_path}")
                 return None
             
-            # Split by headers to maintain document structure
-            chunks = []
-            header_chunks = self.markdown_splitter.split_text(content)
-            
-            for chunk in header_chunks:
-                chunks.append({
-                    "content": chunk.page_content,
-                    "metadata": {**metadata, **chunk.metadata}
-                })
+            # Split by headers and token size, lazily
+            chunk_stats = ChunkStats()
             
             return {
                 "content": content,
                 "metadata": metadata,
-                "chunks": chunks
+                "chunks": self._logged_chunks(file_path, self.iter_chunks(content, metadata, chunk_stats)),
+                "chunk_stats": chunk_stats
             }
             
         except Exception as e:
             logger.error(f"Error processing document {file_path}: {str(e)}")
             return None
     
+    @staticmethod
+    def _logged_chunks(file_path: str, chunks: Iterator[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+        """Log chunking errors of a document as process_document does, then raise them."""
+        try:
+            yield from chunks
+        except Exception as e:
+            logger.error(f"Error chunking document {file_path}: {str(e)}")
+            raise
+    
     def extract_text(self, document_path: str) -> str:
         """Extract text from a document using Docling.
         
         Args:
             document_path: Path to the document
             
+        PDFs with at least settings.PDF_PARALLEL_PAGE_THRESHOLD pages are split
+        into page ranges that are converted in parallel worker processes.
+        
         Returns:
             Extracted text in markdown format
         """
         try:
-            result = self.converter.convert(document_path)
-            return result.document.export_to_markdown()
+            return "\n\n".join(self.iter_markdown(document_path))
         except Exception as e:
             logger.error(f"Error extracting text from {document_path}: {str(e)}")
             return ""
     
+    def iter_markdown(self, document_path: str) -> Iterator[str]:
+        """Convert a document and yield its markdown in consecutive segments.
+        
+        Small documents are yielded as a single segment. Large PDFs yield one
+        segment per page range as soon as it (and every range before it) has
+        been converted, so downstream stages can start before conversion ends.
+        A custom converter cannot be shipped to the worker processes, so with
+        one every document is converted in this process as a single segment.
+        
+        PDFs are converted with the processor's conversion profile; in auto
+        mode the cheapest adequate profile is picked per document (see
+        select_conversion_profile).
+        
+        Args:
+            document_path: Path to the document
+            
+        Yields:
+            MarkdownSegment in document order
+        """
+        profile = self.conversion_profile(document_path)
+        page_count = self._count_pdf_pages(document_path)
+        threshold = settings.PDF_PARALLEL_PAGE_THRESHOLD
+        if self.converter is None and threshold and page_count >= threshold and self.conversion_workers > 1:
+            yield from self._iter_page_ranges(document_path, page_count, profile)
+            return
+        
+        started = time.perf_counter()
+        with span("docling.convert", profile=profile or "default", pages=page_count or None) as convert_span:
+            converter = self.converter or get_converter(profile or "ocr")
+            result = converter.convert(document_path)
+            markdown = result.document.export_to_markdown()
+            convert_span.set_attribute("markdown_bytes", len(markdown.encode("utf-8")))
+        seconds = time.perf_counter() - started
+        logger.info(f"Converted {document_path} with the {profile or 'default'} profile in {seconds:.2f}s")
+        yield MarkdownSegment.create(markdown, profile or "default", seconds)
+    
+    def conversion_profile(self, document_path: str) -> Optional[str]:
+        """Get the conversion profile used for a document.
+        
+        Args:
+            document_path: Path to the document
+            
+        Returns:
+            The profile for a PDF converted with the shared converters, or None
+            (a custom converter, or a format without PDF pipeline options)
+        """
+        if self.converter is not None or not document_path.lower().endswith(".pdf"):
+            return None
+        if self.profile == "auto":
+            return select_conversion_profile(document_path)
+        return self.profile
+    
+    def _count_pdf_pages(self, document_path: str) -> int:
+        """Count the pages of a PDF without converting it.
+        
+        Args:
+            document_path: Path to the document
+            
+        Returns:
+            Number of pages, or 0 if the document is not a readable PDF
+        """
+        if not document_path.lower().endswith(".pdf"):
+            return 0
+        try:
+            import pypdfium2
+            pdf = pypdfium2.PdfDocument(document_path)
+            try:
+                return len(pdf)
+            finally:
+                pdf.close()
+        except Exception as e:
+            logger.warning(f"Could not count pages of {document_path}: {str(e)}")
+            return 0
+    
+    def _page_ranges(self, page_count: int) -> List[Tuple[int, int]]:
+        """Split a page count into contiguous 1-based inclusive ranges.
+        
+        Ranges are small enough to give every worker at least one range and
+        never larger than settings.PDF_PAGES_PER_RANGE.
+        
+        Args:
+            page_count: Number of pages in the document
+            
+        Returns:
+            List of (start, end) page ranges
+        """
+        size = max(1, min(settings.PDF_PAGES_PER_RANGE, math.ceil(page_count / self.conversion_workers)))
+        return [(start, min(start + size - 1, page_count)) for start in range(1, page_count + 1, size)]
+    
+    def _iter_page_ranges(self, document_path: str, page_count: int, profile: Optional[str] = None) -> Iterator[str]:
+        """Convert a large PDF in parallel page ranges, yielding them in order.
+        
+        Each range is yielded with page markers between its pages, so header
+        sections continue across range boundaries and chunks keep their page
+        provenance. At most one range per worker (plus one) is in flight, which
+        bounds memory when the consumer is slower than conversion.
+        
+        Args:
+            document_path: Path to the PDF
+            page_count: Number of pages in the PDF
+            profile: Conversion profile
+            
+        Yields:
+            MarkdownSegment for each page range, with page markers
+        """
+        profile = profile or "ocr"
+        ranges = self._page_ranges(page_count)
+        logger.info(
+            f"Converting {document_path} ({page_count} pages) in {len(ranges)} ranges "
+            f"on {self.conversion_workers} workers with the {profile} profile"
+        )
+        pool = _get_conversion_pool(self.conversion_workers)
+        remaining = iter(ranges)
+        pending = deque(
+            pool.submit(_convert_page_range, document_path, start, end, profile)
+            for start, end in islice(remaining, self.conversion_workers + 1)
+        )
+        try:
+            while pending:
+                pages, seconds, started_ns = pending.popleft().result()
+                record_span(
+                    "docling.convert_range",
+                    started_ns,
+                    started_ns + int(seconds * 1e9),
+                    profile=profile,
+                    page_start=pages[0][0] if pages else None,
+                    pages=len(pages)
+                )
+                next_range = next(remaining, None)
+                if next_range is not None:
+                    pending.append(pool.submit(_convert_page_range, document_path, *next_range, profile))
+                yield MarkdownSegment.create(
+                    "\n\n".join(f"<!-- page: {page_no} -->\n\n{markdown}" for page_no, markdown in pages),
+                    profile,
+                    seconds
+                )
+        finally:
+            for future in pending:
+                future.cancel()
+    
     def _extract_metadata(self, file_path: str) -> Dict[str, Any]:
         """Extract metadata from a document.
         
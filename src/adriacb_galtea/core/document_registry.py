@@ -0,0 +1,801 @@
+"""Document registry for the RAG application.
+
+Keeps track of every ingested source document (content hash, chunk IDs,
+chunk count and ingest time) in a small SQLite database stored next to the
+vector store, so documents can be listed, skipped when unchanged, replaced
+and deleted as a whole.
+
+The same database holds the collection aliases resolved at query time and
+the collection mirrors used while a collection is reindexed: registry
+changes to a mirrored collection are applied to its mirrors in the same
+transaction. Alias and mirror lookups are cached in process; every change
+to them rewrites a version file next to the database, which invalidates
+the caches of all processes sharing it.
+
+It also persists the near-duplicate index of each collection: the MinHash
+signature and LSH band keys of every stored chunk (see dedup), and the
+links from skipped duplicate chunks to the chunk they duplicate.
+"""
+from typing import Any, Callable, ClassVar, Dict, Iterator, List, Optional, Tuple
+from contextlib import contextmanager
+from pathlib import Path
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from ..utils.logging import get_logger
+
+logger = get_logger(__name__)
+
+REGISTRY_FILENAME = "document_registry.sqlite3"
+
+
+def hash_file(file_path: str, block_size: int = 1024 * 1024) -> str:
+    """Compute the SHA-256 hash of a file's content.
+
+    Args:
+        file_path: Path to the file
+        block_size: Number of bytes read at a time
+
+    Returns:
+        Hex digest of the file content
+    """
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class DocumentRegistry:
+    """SQLite-backed registry of ingested documents."""
+
+    _instance: ClassVar[Optional["DocumentRegistry"]] = None
+
+    @classmethod
+    def get_instance(cls) -> "DocumentRegistry":
+        """Get the singleton instance of the registry.
+
+        Returns:
+            Document registry instance
+        """
+        if cls._instance is None:
+            from .vector_store import get_vector_store_path
+            cls._instance = cls(get_vector_store_path() / REGISTRY_FILENAME)
+        return cls._instance
+
+    def __init__(self, path: Path):
+        """Initialize the registry, creating its table if needed.
+
+        Args:
+            path: Path to the SQLite database file
+        """
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._routing_path = self.path.with_name(self.path.name + ".routing")
+        self._routing_cache: Dict[Tuple[str, str], Any] = {}
+        self._routing_version: Optional[Tuple[int, int]] = None
+        self._routing_lock = threading.Lock()
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS documents (
+                    collection TEXT NOT NULL,
+                    doc_id TEXT NOT NULL,
+                    source TEXT NOT NULL,
+                    content_hash TEXT NOT NULL,
+                    chunk_count INTEGER NOT NULL,
+                    chunk_ids TEXT NOT NULL,
+                    ingested_at REAL NOT NULL,
+                    PRIMARY KEY (collection, doc_id)
+                )
+                """
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS documents_content_hash ON documents (content_hash)"
+            )
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS collection_aliases (
+                    alias TEXT PRIMARY KEY,
+                    collection TEXT NOT NULL,
+                    previous TEXT,
+                    updated_at REAL NOT NULL
+                )
+                """
+            )
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS collection_mirrors (
+                    source TEXT NOT NULL,
+                    target TEXT NOT NULL,
+                    reembed INTEGER NOT NULL DEFAULT 0,
+                    PRIMARY KEY (source, target)
+                )
+                """
+            )
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS chunk_signatures (
+                    collection TEXT NOT NULL,
+                    chunk_id TEXT NOT NULL,
+                    doc_id TEXT NOT NULL,
+                    signature BLOB NOT NULL,
+                    PRIMARY KEY (collection, chunk_id)
+                )
+                """
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS chunk_signatures_doc ON chunk_signatures (collection, doc_id)"
+            )
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS chunk_bands (
+                    collection TEXT NOT NULL,
+                    band_key INTEGER NOT NULL,
+                    chunk_id TEXT NOT NULL
+                )
+                """
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS chunk_bands_key ON chunk_bands (collection, band_key)"
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS chunk_bands_chunk ON chunk_bands (collection, chunk_id)"
+            )
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS chunk_links (
+                    collection TEXT NOT NULL,
+                    doc_id TEXT NOT NULL,
+                    position INTEGER NOT NULL,
+                    canonical_id TEXT NOT NULL,
+                    similarity REAL NOT NULL,
+                    bytes INTEGER NOT NULL,
+                    PRIMARY KEY (collection, doc_id, position)
+                )
+                """
+            )
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        """Open a connection, committing on success."""
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    @staticmethod
+    def _to_record(row: sqlite3.Row, include_chunk_ids: bool = True) -> Dict[str, Any]:
+        """Convert a database row to a record dictionary."""
+        record = {
+            "collection": row["collection"],
+            "doc_id": row["doc_id"],
+            "source": row["source"],
+            "content_hash": row["content_hash"],
+            "chunk_count": row["chunk_count"],
+            "ingested_at": row["ingested_at"],
+        }
+        if include_chunk_ids:
+            record["chunk_ids"] = json.loads(row["chunk_ids"])
+        return record
+
+    def get(self, doc_id: str, collection: str = "documents") -> Optional[Dict[str, Any]]:
+        """Get the record of a document.
+
+        Args:
+            doc_id: Document ID
+            collection: Collection the document was ingested into
+
+        Returns:
+            Document record, or None if the document is not registered
+        """
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT * FROM documents WHERE collection = ? AND doc_id = ?",
+                (collection, doc_id)
+            ).fetchone()
+        return self._to_record(row) if row else None
+
+    def find_by_hash(self, content_hash: str, collection: str = "documents") -> Optional[Dict[str, Any]]:
+        """Find a document with the given content hash.
+
+        Args:
+            content_hash: SHA-256 of the document content
+            collection: Collection to look in
+
+        Returns:
+            Matching document record, or None
+        """
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT * FROM documents WHERE collection = ? AND content_hash = ? LIMIT 1",
+                (collection, content_hash)
+            ).fetchone()
+        return self._to_record(row, include_chunk_ids=False) if row else None
+
+    def upsert(
+        self,
+        doc_id: str,
+        source: str,
+        content_hash: str,
+        chunk_ids: List[str],
+        collection: str = "documents"
+    ) -> Dict[str, Any]:
+        """Register (or replace) an ingested document.
+
+        Args:
+            doc_id: Document ID
+            source: Original source name (filename or path)
+            content_hash: SHA-256 of the document content
+            chunk_ids: IDs of the chunks stored for the document
+            collection: Collection the document was ingested into
+
+        Returns:
+            The stored record
+        """
+        ingested_at = time.time()
+        with self._connect() as conn:
+            for target in [collection, *self._mirror_targets(conn, collection)]:
+                conn.execute(
+                    """
+                    INSERT INTO documents (collection, doc_id, source, content_hash, chunk_count, chunk_ids, ingested_at)
+                    VALUES (?, ?, ?, ?, ?, ?, ?)
+                    ON CONFLICT (collection, doc_id) DO UPDATE SET
+                        source = excluded.source,
+                        content_hash = excluded.content_hash,
+                        chunk_count = excluded.chunk_count,
+                        chunk_ids = excluded.chunk_ids,
+                        ingested_at = excluded.ingested_at
+                    """,
+                    (target, doc_id, source, content_hash, len(chunk_ids), json.dumps(chunk_ids), ingested_at)
+                )
+        logger.info("document_registered", doc_id=doc_id, collection=collection, chunk_count=len(chunk_ids))
+        return {
+            "collection": collection,
+            "doc_id": doc_id,
+            "source": source,
+            "content_hash": content_hash,
+            "chunk_count": len(chunk_ids),
+            "chunk_ids": chunk_ids,
+            "ingested_at": ingested_at,
+        }
+
+    def delete(self, doc_id: str, collection: str = "documents") -> bool:
+        """Remove a document from the registry.
+
+        Args:
+            doc_id: Document ID
+            collection: Collection the document was ingested into
+
+        Returns:
+            Whether the document was registered
+        """
+        with self._connect() as conn:
+            cursor = conn.execute(
+                "DELETE FROM documents WHERE collection = ? AND doc_id = ?",
+                (collection, doc_id)
+            )
+            deleted = cursor.rowcount > 0
+            for target in [collection, *self._mirror_targets(conn, collection)]:
+                conn.execute(
+                    "DELETE FROM documents WHERE collection = ? AND doc_id = ?",
+                    (target, doc_id)
+                )
+                self._delete_signatures(conn, target, doc_id)
+        return deleted
+
+    def list_documents(self, collection: str = "documents", limit: int = 100, offset: int = 0) -> List[Dict[str, Any]]:
+        """List registered documents, most recently ingested first.
+
+        Args:
+            collection: Collection to list
+            limit: Maximum number of records to return
+            offset: Number of records to skip
+
+        Returns:
+            Document records without their chunk IDs
+        """
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT * FROM documents WHERE collection = ? ORDER BY ingested_at DESC LIMIT ? OFFSET ?",
+                (collection, limit, offset)
+            ).fetchall()
+        return [self._to_record(row, include_chunk_ids=False) for row in rows]
+
+    def iter_documents(self, collection: str = "documents") -> Iterator[Dict[str, Any]]:
+        """Iterate over the full records of a collection, including chunk IDs.
+
+        Args:
+            collection: Collection to read
+
+        Yields:
+            Document records, in ingestion order
+        """
+        with self._connect() as conn:
+            for row in conn.execute(
+                "SELECT * FROM documents WHERE collection = ? ORDER BY ingested_at",
+                (collection,)
+            ):
+                yield self._to_record(row)
+
+    def count(self, collection: str = "documents") -> int:
+        """Count registered documents.
+
+        Args:
+            collection: Collection to count
+
+        Returns:
+            Number of registered documents
+        """
+        with self._connect() as conn:
+            return conn.execute(
+                "SELECT COUNT(*) FROM documents WHERE collection = ?",
+                (collection,)
+            ).fetchone()[0]
+
+    def _read_routing_version(self) -> Optional[Tuple[int, int]]:
+        """Stamp of the last alias or mirror change, from the version file."""
+        try:
+            stat = os.stat(self._routing_path)
+        except FileNotFoundError:
+            return None
+        return stat.st_ino, stat.st_mtime_ns
+
+    def _routing_changed(self) -> None:
+        """Invalidate the alias and mirror caches of every process.
+
+        The version file is replaced (a new inode) after the change is
+        committed, so a lookup that read the previous stamp is refreshed.
+        """
+        temp_path = self._routing_path.with_name(f"{self._routing_path.name}.{os.getpid()}.{threading.get_ident()}")
+        temp_path.write_text(str(time.time_ns()))
+        os.replace(temp_path, self._routing_path)
+        with self._routing_lock:
+            self._routing_cache.clear()
+
+    def _cached_routing(self, key: Tuple[str, str], load: Callable[[], Any]) -> Any:
+        """Look up an alias or mirror list, reloading it after any change."""
+        # Read the stamp before loading, so a change committed meanwhile
+        # is picked up by the next lookup
+        version = self._read_routing_version()
+        with self._routing_lock:
+            if version != self._routing_version:
+                self._routing_cache.clear()
+                self._routing_version = version
+            elif key in self._routing_cache:
+                return self._routing_cache[key]
+        value = load()
+        with self._routing_lock:
+            if version == self._routing_version:
+                self._routing_cache[key] = value
+        return value
+
+    @staticmethod
+    def _mirror_targets(conn: sqlite3.Connection, collection: str) -> List[str]:
+        """Collections mirroring the registry changes of a collection."""
+        return [
+            row["target"] for row in conn.execute(
+                "SELECT target FROM collection_mirrors WHERE source = ?",
+                (collection,)
+            )
+        ]
+
+    def resolve_alias(self, name: str) -> str:
+        """Resolve a collection alias.
+
+        Args:
+            name: Alias or collection name
+
+        Returns:
+            The collection the alias points to, or name if it is not an alias
+        """
+        def load() -> str:
+            with self._connect() as conn:
+                row = conn.execute(
+                    "SELECT collection FROM collection_aliases WHERE alias = ?",
+                    (name,)
+                ).fetchone()
+            return row["collection"] if row else name
+
+        return self._cached_routing(("alias", name), load)
+
+    def get_alias(self, alias: str) -> Optional[Dict[str, Any]]:
+        """Get an alias record.
+
+        Args:
+            alias: Alias name
+
+        Returns:
+            Record with the alias, its collection, the previous collection and
+            the time of the last switch, or None if the alias does not exist
+        """
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT * FROM collection_aliases WHERE alias = ?",
+                (alias,)
+            ).fetchone()
+        return dict(row) if row else None
+
+    def list_aliases(self) -> List[Dict[str, Any]]:
+        """List all collection aliases.
+
+        Returns:
+            Alias records (see get_alias)
+        """
+        with self._connect() as conn:
+            rows = conn.execute("SELECT * FROM collection_aliases ORDER BY alias").fetchall()
+        return [dict(row) for row in rows]
+
+    def set_alias(self, alias: str, collection: str) -> Dict[str, Any]:
+        """Point an alias at a collection, atomically.
+
+        The collection the alias pointed to (the alias name itself for a
+        plain collection) is kept as the previous collection, for rollback.
+
+        Args:
+            alias: Alias name
+            collection: Collection to point at
+
+        Returns:
+            The new alias record
+        """
+        updated_at = time.time()
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute(
+                "SELECT collection FROM collection_aliases WHERE alias = ?",
+                (alias,)
+            ).fetchone()
+            previous = row["collection"] if row else alias
+            conn.execute(
+                """
+                INSERT INTO collection_aliases (alias, collection, previous, updated_at)
+                VALUES (?, ?, ?, ?)
+                ON CONFLICT (alias) DO UPDATE SET
+                    collection = excluded.collection,
+                    previous = excluded.previous,
+                    updated_at = excluded.updated_at
+                """,
+                (alias, collection, previous, updated_at)
+            )
+        self._routing_changed()
+        logger.info("collection_alias_set", alias=alias, collection=collection, previous=previous)
+        return {"alias": alias, "collection": collection, "previous": previous, "updated_at": updated_at}
+
+    def add_mirror(self, source: str, target: str, reembed: bool = False) -> int:
+        """Mirror the changes of a collection into another one.
+
+        The source's registry records are copied to the target in the same
+        transaction, so every later change is mirrored and none is missed.
+
+        Args:
+            source: Collection whose changes are mirrored
+            target: Collection receiving them
+            reembed: Whether mirrored chunks must be embedded again for the
+                target instead of reusing (or shortening) their vectors
+
+        Returns:
+            Number of registry records copied
+        """
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute(
+                "INSERT OR REPLACE INTO collection_mirrors (source, target, reembed) VALUES (?, ?, ?)",
+                (source, target, int(reembed))
+            )
+            conn.execute("DELETE FROM documents WHERE collection = ?", (target,))
+            cursor = conn.execute(
+                """
+                INSERT INTO documents (collection, doc_id, source, content_hash, chunk_count, chunk_ids, ingested_at)
+                SELECT ?, doc_id, source, content_hash, chunk_count, chunk_ids, ingested_at
+                FROM documents WHERE collection = ?
+                """,
+                (target, source)
+            )
+            for table in ("chunk_signatures", "chunk_bands", "chunk_links"):
+                conn.execute(f"DELETE FROM {table} WHERE collection = ?", (target,))
+            conn.execute(
+                """
+                INSERT INTO chunk_signatures (collection, chunk_id, doc_id, signature)
+                SELECT ?, chunk_id, doc_id, signature FROM chunk_signatures WHERE collection = ?
+                """,
+                (target, source)
+            )
+            conn.execute(
+                "INSERT INTO chunk_bands (collection, band_key, chunk_id) SELECT ?, band_key, chunk_id FROM chunk_bands WHERE collection = ?",
+                (target, source)
+            )
+            conn.execute(
+                """
+                INSERT INTO chunk_links (collection, doc_id, position, canonical_id, similarity, bytes)
+                SELECT ?, doc_id, position, canonical_id, similarity, bytes FROM chunk_links WHERE collection = ?
+                """,
+                (target, source)
+            )
+        self._routing_changed()
+        logger.info("collection_mirror_added", source=source, target=target, documents=cursor.rowcount)
+        return cursor.rowcount
+
+    def remove_mirror(self, source: str, target: str) -> bool:
+        """Stop mirroring a collection into another one.
+
+        Args:
+            source: Mirrored collection
+            target: Collection receiving its changes
+
+        Returns:
+            Whether the mirror existed
+        """
+        with self._connect() as conn:
+            cursor = conn.execute(
+                "DELETE FROM collection_mirrors WHERE source = ? AND target = ?",
+                (source, target)
+            )
+        self._routing_changed()
+        return cursor.rowcount > 0
+
+    def mirrors(self, source: str) -> List[Dict[str, Any]]:
+        """List the mirrors of a collection.
+
+        Args:
+            source: Mirrored collection
+
+        Returns:
+            Records with the target collection and whether it re-embeds
+        """
+        def load() -> List[Dict[str, Any]]:
+            with self._connect() as conn:
+                rows = conn.execute(
+                    "SELECT target, reembed FROM collection_mirrors WHERE source = ?",
+                    (source,)
+                ).fetchall()
+            return [{"target": row["target"], "reembed": bool(row["reembed"])} for row in rows]
+
+        return [dict(mirror) for mirror in self._cached_routing(("mirrors", source), load)]
+
+    def delete_collection(self, collection: str) -> int:
+        """Remove all document records and mirrors of a collection.
+
+        Args:
+            collection: Collection to forget
+
+        Returns:
+            Number of document records removed
+        """
+        with self._connect() as conn:
+            cursor = conn.execute("DELETE FROM documents WHERE collection = ?", (collection,))
+            conn.execute(
+                "DELETE FROM collection_mirrors WHERE source = ? OR target = ?",
+                (collection, collection)
+            )
+            for table in ("chunk_signatures", "chunk_bands", "chunk_links"):
+                conn.execute(f"DELETE FROM {table} WHERE collection = ?", (collection,))
+        self._routing_changed()
+        return cursor.rowcount
+
+    @staticmethod
+    def _delete_signatures(conn: sqlite3.Connection, collection: str, doc_id: str) -> None:
+        """Remove the near-duplicate index entries and links of a document."""
+        conn.execute(
+            """
+            DELETE FROM chunk_bands WHERE collection = ? AND chunk_id IN (
+                SELECT chunk_id FROM chunk_signatures WHERE collection = ? AND doc_id = ?
+            )
+            """,
+            (collection, collection, doc_id)
+        )
+        conn.execute("DELETE FROM chunk_signatures WHERE collection = ? AND doc_id = ?", (collection, doc_id))
+        conn.execute("DELETE FROM chunk_links WHERE collection = ? AND doc_id = ?", (collection, doc_id))
+
+    def find_similar_chunks(
+        self,
+        band_keys: List[int],
+        collection: str = "documents",
+        exclude_doc_id: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """Find the stored chunks sharing at least one LSH band key.
+
+        Args:
+            band_keys: Band keys of the chunks being looked up
+            collection: Collection to search
+            exclude_doc_id: Document whose chunks are ignored (e.g. the one being replaced)
+
+        Returns:
+            Records with the band key, chunk ID, document ID and signature bytes
+        """
+        records = []
+        with self._connect() as conn:
+            # Stay under SQLite's bound parameter limit
+            for start in range(0, len(band_keys), 500):
+                keys = band_keys[start:start + 500]
+                rows = conn.execute(
+                    f"""
+                    SELECT b.band_key, s.chunk_id, s.doc_id, s.signature
+                    FROM chunk_bands b
+                    JOIN chunk_signatures s ON s.collection = b.collection AND s.chunk_id = b.chunk_id
+                    WHERE b.collection = ? AND b.band_key IN ({", ".join("?" * len(keys))})
+                    """,
+                    (collection, *keys)
+                ).fetchall()
+                records.extend(
+                    {
+                        "band_key": row["band_key"],
+                        "chunk_id": row["chunk_id"],
+                        "doc_id": row["doc_id"],
+                        "signature": row["signature"],
+                    }
+                    for row in rows
+                    if row["doc_id"] != exclude_doc_id
+                )
+        return records
+
+    def replace_signatures(
+        self,
+        doc_id: str,
+        signatures: List[Dict[str, Any]],
+        links: List[Dict[str, Any]],
+        collection: str = "documents"
+    ) -> None:
+        """Replace the near-duplicate index entries and links of a document.
+
+        Args:
+            doc_id: Document ID
+            signatures: Records with the chunk ID, signature bytes and band keys
+                of every stored chunk of the document
+            links: Records with the position, canonical chunk ID, similarity and
+                size in bytes of every skipped duplicate chunk
+            collection: Collection the document was ingested into
+        """
+        with self._connect() as conn:
+            for target in [collection, *self._mirror_targets(conn, collection)]:
+                self._delete_signatures(conn, target, doc_id)
+                conn.executemany(
+                    "INSERT OR REPLACE INTO chunk_signatures (collection, chunk_id, doc_id, signature) VALUES (?, ?, ?, ?)",
+                    [(target, entry["chunk_id"], doc_id, entry["signature"]) for entry in signatures]
+                )
+                conn.executemany(
+                    "INSERT INTO chunk_bands (collection, band_key, chunk_id) VALUES (?, ?, ?)",
+                    [
+                        (target, band_key, entry["chunk_id"])
+                        for entry in signatures
+                        for band_key in entry["band_keys"]
+                    ]
+                )
+                conn.executemany(
+                    """
+                    INSERT OR REPLACE INTO chunk_links (collection, doc_id, position, canonical_id, similarity, bytes)
+                    VALUES (?, ?, ?, ?, ?, ?)
+                    """,
+                    [
+                        (target, doc_id, link["position"], link["canonical_id"], link["similarity"], link["bytes"])
+                        for link in links
+                    ]
+                )
+
+    def linked_duplicates(self, doc_id: str, collection: str = "documents") -> List[Dict[str, Any]]:
+        """Find the duplicates of other documents linked to the chunks of a document.
+
+        Args:
+            doc_id: Document whose chunks are the canonical ones
+            collection: Collection name
+
+        Returns:
+            Link records with the linking document ID, position, canonical
+            chunk ID, similarity and bytes, in canonical chunk order
+        """
+        with self._connect() as conn:
+            rows = conn.execute(
+                """
+                SELECT l.doc_id, l.position, l.canonical_id, l.similarity, l.bytes FROM chunk_links l
+                JOIN chunk_signatures s ON s.collection = l.collection AND s.chunk_id = l.canonical_id
+                WHERE l.collection = ? AND s.doc_id = ? AND l.doc_id != ?
+                ORDER BY l.canonical_id, l.doc_id, l.position
+                """,
+                (collection, doc_id, doc_id)
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def adopt_canonical_chunks(self, adoptions: List[Dict[str, Any]], collection: str = "documents") -> None:
+        """Hand canonical chunks over to copies stored for documents linking to them.
+
+        Each copy takes the place of the linking document's duplicate: the
+        link is removed, the copy is indexed with the canonical chunk's
+        signature and added to the document's chunks, and the other links to
+        the canonical chunk are pointed at the copy.
+
+        Args:
+            adoptions: Records with the canonical chunk ID, the ID of its copy
+                and the document ID and position of the duplicate it replaces
+            collection: Collection name
+        """
+        with self._connect() as conn:
+            for target in [collection, *self._mirror_targets(conn, collection)]:
+                for adoption in adoptions:
+                    canonical = conn.execute(
+                        "SELECT doc_id, signature FROM chunk_signatures WHERE collection = ? AND chunk_id = ?",
+                        (target, adoption["canonical_id"])
+                    ).fetchone()
+                    if canonical is None:
+                        continue
+                    conn.execute(
+                        "DELETE FROM chunk_links WHERE collection = ? AND doc_id = ? AND position = ?",
+                        (target, adoption["doc_id"], adoption["position"])
+                    )
+                    conn.execute(
+                        "INSERT OR REPLACE INTO chunk_signatures (collection, chunk_id, doc_id, signature) VALUES (?, ?, ?, ?)",
+                        (target, adoption["chunk_id"], adoption["doc_id"], canonical["signature"])
+                    )
+                    conn.execute(
+                        """
+                        INSERT INTO chunk_bands (collection, band_key, chunk_id)
+                        SELECT collection, band_key, ? FROM chunk_bands WHERE collection = ? AND chunk_id = ?
+                        """,
+                        (adoption["chunk_id"], target, adoption["canonical_id"])
+                    )
+                    conn.execute(
+                        "UPDATE chunk_links SET canonical_id = ? WHERE collection = ? AND canonical_id = ? AND doc_id != ?",
+                        (adoption["chunk_id"], target, adoption["canonical_id"], canonical["doc_id"])
+                    )
+                    row = conn.execute(
+                        "SELECT chunk_ids FROM documents WHERE collection = ? AND doc_id = ?",
+                        (target, adoption["doc_id"])
+                    ).fetchone()
+                    if row is not None:
+                        chunk_ids = [*json.loads(row["chunk_ids"]), adoption["chunk_id"]]
+                        conn.execute(
+                            "UPDATE documents SET chunk_ids = ?, chunk_count = ? WHERE collection = ? AND doc_id = ?",
+                            (json.dumps(chunk_ids), len(chunk_ids), target, adoption["doc_id"])
+                        )
+
+    def duplicate_stats(self, collection: str = "documents") -> Dict[str, Any]:
+        """Summarize the near-duplicate index of a collection.
+
+        Args:
+            collection: Collection name
+
+        Returns:
+            Dictionary with the number of indexed chunks, linked duplicate
+            chunks, the bytes of text they would have added and the links whose
+            canonical chunk was since deleted or replaced
+        """
+        with self._connect() as conn:
+            indexed = conn.execute(
+                "SELECT COUNT(*) FROM chunk_signatures WHERE collection = ?",
+                (collection,)
+            ).fetchone()[0]
+            linked, linked_bytes = conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(bytes), 0) FROM chunk_links WHERE collection = ?",
+                (collection,)
+            ).fetchone()
+            dangling = conn.execute(
+                """
+                SELECT COUNT(*) FROM chunk_links l
+                LEFT JOIN chunk_signatures s ON s.collection = l.collection AND s.chunk_id = l.canonical_id
+                WHERE l.collection = ? AND s.chunk_id IS NULL
+                """,
+                (collection,)
+            ).fetchone()[0]
+        return {
+            "collection": collection,
+            "indexed_chunks": indexed,
+            "duplicate_chunks": linked,
+            "duplicate_bytes": linked_bytes,
+            "dangling_links": dangling,
+        }
+
+
+def get_document_registry() -> DocumentRegistry:
+    """Get the document registry instance.
+
+    Returns:
+        Document registry instance
+    """
+    return DocumentRegistry.get_instance()
@@ -1,31 +1,70 @@
 """Embeddings module for the RAG application."""
-from typing import Optional, ClassVar
+from typing import Dict, Optional, ClassVar, Sequence
 
 from langchain_openai import OpenAIEmbeddings
+import numpy as np
 
 from ..config.settings import settings
+from .http_client import get_http_clients
+
+# Embedding model and its full output dimension
+EMBEDDING_MODEL_NAME = "text-embedding-3-small"
+FULL_DIMENSIONS = 1536
+
+
+def truncate_embeddings(embeddings: Sequence[Sequence[float]], dimensions: int) -> np.ndarray:
+    """Shorten embeddings to their first dimensions and L2-normalise them again.
+    
+    text-embedding-3 vectors are trained so that a prefix is itself a good
+    embedding; this is what the API returns when asked for fewer dimensions,
+    so stored full vectors can be shortened without re-embedding.
+    
+    Args:
+        embeddings: Embeddings, one per row
+        dimensions: Number of dimensions to keep
+        
+    Returns:
+        float32 array of shape (len(embeddings), dimensions)
+    """
+    vectors = np.asarray(embeddings, dtype=np.float32)[:, :dimensions]
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.where(norms == 0, 1, norms)
+
 
 class OpenAIEmbeddingModel:
     """OpenAI embedding model implementation."""
     
-    _instance: ClassVar[Optional["OpenAIEmbeddingModel"]] = None
+    _instances: ClassVar[Dict[Optional[int], "OpenAIEmbeddingModel"]] = {}
     
     @classmethod
-    def get_instance(cls) -> "OpenAIEmbeddingModel":
-        """Get the singleton instance of the embedding model.
+    def get_instance(cls, dimensions: Optional[int] = None) -> "OpenAIEmbeddingModel":
+        """Get the shared instance of the embedding model for a dimension.
         
+        Args:
+            dimensions: Output dimensions, or None for the model's full dimension
+            
         Returns:
             Embedding model instance
         """
-        if cls._instance is None:
-            cls._instance = cls()
-        return cls._instance
+        if dimensions not in cls._instances:
+            cls._instances[dimensions] = cls(dimensions)
+        return cls._instances[dimensions]
     
-    def __init__(self):
-        """Initialize the embedding model."""
+    def __init__(self, dimensions: Optional[int] = None):
+        """Initialize the embedding model.
+        
+        Args:
+            dimensions: Output dimensions, or None for the model's full dimension.
+                The API shortens and renormalises the vectors.
+        """
+        if dimensions is not None and not 1 <= dimensions <= FULL_DIMENSIONS:
+            raise ValueError(f"Embedding dimensions must be between 1 and {FULL_DIMENSIONS}, got {dimensions}")
+        self.dimensions = dimensions or FULL_DIMENSIONS
         self._model = OpenAIEmbeddings(
-            model="text-embedding-3-small",
-            api_key=settings.OPENAI_API_KEY
+            model=EMBEDDING_MODEL_NAME,
+            dimensions=dimensions,
+            api_key=settings.OPENAI_API_KEY,
+            **get_http_clients().model_kwargs()
         )
     
     def embed_documents(self, documents: list[str]) -> list[list[float]]:
@@ -50,10 +89,13 @@ class OpenAIEmbeddingModel:
         """
         return self._model.embed_query(query)
 
-def get_embeddings() -> OpenAIEmbeddingModel:
+def get_embeddings(dimensions: Optional[int] = None) -> OpenAIEmbeddingModel:
     """Get the embeddings model instance.
     
+    Args:
+        dimensions: Output dimensions, or None for the model's full dimension
+        
     Returns:
         Embeddings model instance
     """
-    return OpenAIEmbeddingModel.get_instance() 
\ No newline at end of file
+    return OpenAIEmbeddingModel.get_instance(dimensions) 
\ No newline at end of file
@@ -1,30 +1,43 @@
 """Graph definition for the RAG application."""
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 from langchain_openai import ChatOpenAI
+from langgraph.checkpoint.base import BaseCheckpointSaver
 from langgraph.prebuilt import create_react_agent
 from langgraph.graph import Graph
 
 from ..config.settings import settings
+from .history import trim_history_hook
+from .http_client import get_http_clients
 from .tools import retrieve_documents
 
-def create_graph() -> Graph:
+def create_graph(checkpointer: Optional[BaseCheckpointSaver] = None) -> Graph:
     """Create the RAG graph using a prebuilt React agent.
     
     The graph uses a React agent with a retrieval tool to search for relevant documents
-    and generate responses based on the retrieved information.
+    and generate responses based on the retrieved information. Before each model call
+    the conversation is trimmed to settings.HISTORY_MAX_TOKENS (see core.history).
+    
+    Args:
+        checkpointer: Optional checkpointer persisting conversations by thread_id
     
     Returns:
         Graph: The configured RAG graph
     """
-    # Initialize the model with API key from settings
+    # Initialize the model with API key from settings, on the shared connection pool
     model = ChatOpenAI(
         model=settings.openai_model,
         temperature=settings.openai_temperature,
-        api_key=settings.OPENAI_API_KEY
+        api_key=settings.OPENAI_API_KEY,
+        **get_http_clients().model_kwargs()
     )
     
     # Create the React agent graph with our retrieval tool
-    graph = create_react_agent(model, tools=[retrieve_documents])
+    graph = create_react_agent(
+        model,
+        tools=[retrieve_documents],
+        pre_model_hook=trim_history_hook,
+        checkpointer=checkpointer
+    )
 
     return graph
 
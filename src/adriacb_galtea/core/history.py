@@ -0,0 +1,106 @@
+"""Conversation history management for the RAG application.
+
+Multi-turn conversations are checkpointed, so without a bound every model
+call would resend the whole history, including bulky retrieval results.
+The policy here keeps the per-turn cost constant:
+
+- tool outputs of previous turns are replaced by a short placeholder (the
+  tool call and its answer stay, so the history remains valid for the model)
+- older turns are dropped, whole turns at a time, to fit a token budget
+- the current turn (from the last user message on) is always kept
+"""
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+from langchain_core.messages import BaseMessage, HumanMessage, RemoveMessage, ToolMessage
+from langchain_core.messages.utils import count_tokens_approximately, trim_messages
+from langgraph.graph.message import REMOVE_ALL_MESSAGES
+
+from ..config.settings import settings
+from ..utils.logging import get_logger
+
+logger = get_logger(__name__)
+
+# Content of tool messages from previous turns
+STALE_TOOL_PLACEHOLDER = "[Tool output from a previous turn omitted]"
+
+
+def compact_tool_message(message: ToolMessage) -> ToolMessage:
+    """Replace the payload of a tool message by a placeholder.
+
+    Args:
+        message: Tool message from a previous turn
+
+    Returns:
+        Tool message answering the same tool call, without its payload
+    """
+    if message.content == STALE_TOOL_PLACEHOLDER:
+        return message
+    return ToolMessage(
+        content=STALE_TOOL_PLACEHOLDER,
+        tool_call_id=message.tool_call_id,
+        name=message.name,
+        id=message.id
+    )
+
+
+def trim_history(
+    messages: Sequence[BaseMessage],
+    max_tokens: Optional[int] = None,
+    token_counter: Callable[[Sequence[BaseMessage]], int] = count_tokens_approximately
+) -> List[BaseMessage]:
+    """Bound a conversation to a token budget.
+
+    Args:
+        messages: Conversation messages, oldest first
+        max_tokens: Token budget. Defaults to settings.HISTORY_MAX_TOKENS.
+        token_counter: Function counting the tokens of a list of messages
+
+    Returns:
+        The current turn, preceded by as many of the most recent previous
+        turns (with compacted tool outputs) as fit in the budget
+    """
+    max_tokens = max_tokens or settings.HISTORY_MAX_TOKENS
+    last_human = max(
+        (i for i, message in enumerate(messages) if isinstance(message, HumanMessage)),
+        default=0
+    )
+    current = list(messages[last_human:])
+    history = [
+        compact_tool_message(message) if isinstance(message, ToolMessage) else message
+        for message in messages[:last_human]
+    ]
+
+    budget = max_tokens - token_counter(current)
+    if not history or budget <= 0:
+        return current
+    history = trim_messages(
+        history,
+        max_tokens=budget,
+        token_counter=token_counter,
+        strategy="last",
+        start_on="human",
+        include_system=True,
+        allow_partial=False
+    )
+    return history + current
+
+
+def trim_history_hook(state: Dict[str, Any]) -> Dict[str, Any]:
+    """Pre-model hook bounding the conversation state before each model call.
+
+    The trimmed history replaces the stored messages, so the checkpointed
+    state stays bounded as well as the model input.
+
+    Args:
+        state: Agent state
+
+    Returns:
+        State update replacing the messages if they were trimmed
+    """
+    messages = state["messages"]
+    trimmed = trim_history(messages)
+    if len(trimmed) == len(messages) and all(a is b for a, b in zip(trimmed, messages)):
+        return {"llm_input_messages": messages}
+
+    logger.info("history_trimmed", messages_before=len(messages), messages_after=len(trimmed))
+    return {"messages": [RemoveMessage(id=REMOVE_ALL_MESSAGES), *trimmed]}
@@ -0,0 +1,300 @@
+"""Shared, pooled HTTP clients for all OpenAI traffic.
+
+The embedding and chat models share one process-wide connection pool, in
+sync (embeddings, thread pool work) and async (streamed graph runs)
+flavours, so bursts reuse warm keep-alive connections instead of paying a
+TCP and TLS handshake per client.
+
+Retries of all calls draw on one process-wide retry budget, so an outage
+or a rate limit does not multiply the load by the per-call max_retries.
+"""
+from collections import deque
+from typing import Any, ClassVar, Deque, Dict, Optional
+import threading
+import time
+
+import httpx
+import openai
+
+from ..config.settings import settings
+from ..utils.logging import get_logger
+
+logger = get_logger(__name__)
+
+# Statuses the OpenAI SDK retries, besides 5xx
+RETRYABLE_STATUS_CODES = {408, 409, 429}
+
+
+class RetryBudgetExhausted(openai.APIConnectionError):
+    """Raised instead of retrying a call after a connection error once the retry budget is spent."""
+
+
+class ConnectionMetrics:
+    """Thread-safe counters of requests, new connections and retries, and the retry budget.
+
+    Within the last retry_window seconds, at most retry_min retries plus
+    retry_ratio times the number of first attempts may be sent. The OpenAI
+    SDK marks retries with x-stainless-retry-count. An error response is
+    marked x-should-retry: false once the budget is spent, so the caller
+    gets the original error; a retry after a connection error or timeout
+    is refused with RetryBudgetExhausted instead.
+    """
+
+    def __init__(
+        self,
+        retry_ratio: Optional[float] = None,
+        retry_min: Optional[int] = None,
+        retry_window: Optional[float] = None
+    ):
+        """Initialize the counters.
+
+        Args:
+            retry_ratio: Retries allowed per first attempt in the window
+            retry_min: Retries always allowed in the window
+            retry_window: Seconds of traffic the budget is computed over
+        """
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.retries = 0
+        self.retries_denied = 0
+        self.connections_opened = 0
+        self.tls_handshakes = 0
+        self.retry_ratio = settings.OPENAI_RETRY_BUDGET_RATIO if retry_ratio is None else retry_ratio
+        self.retry_min = settings.OPENAI_RETRY_BUDGET_MIN_RETRIES if retry_min is None else retry_min
+        self.retry_window = retry_window or settings.OPENAI_RETRY_BUDGET_WINDOW_SECONDS
+        self._attempts: Deque[float] = deque()
+        self._budget_retries: Deque[float] = deque()
+        # Retries granted on an error response, by idempotency key and retry count
+        self._granted: Dict[str, float] = {}
+
+    def _add(self, name: str) -> None:
+        with self._lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    def _retry_budget(self, now: float) -> int:
+        """Retries left in the window; the caller holds the lock."""
+        horizon = now - self.retry_window
+        for times in (self._attempts, self._budget_retries):
+            while times and times[0] < horizon:
+                times.popleft()
+        for key in [key for key, granted_at in self._granted.items() if granted_at < horizon]:
+            del self._granted[key]
+        return max(0, int(self.retry_min + self.retry_ratio * len(self._attempts)) - len(self._budget_retries))
+
+    @staticmethod
+    def _retry_key(request: httpx.Request, retry_count: int) -> Optional[str]:
+        idempotency_key = request.headers.get("idempotency-key")
+        return f"{idempotency_key}:{retry_count}" if idempotency_key else None
+
+    def record_request(self, request: httpx.Request) -> None:
+        """Count a request, taking a retry from the budget unless it was granted on an error response.
+
+        Raises:
+            RetryBudgetExhausted: If the request is a retry and the budget is spent
+        """
+        retry_count = int(request.headers.get("x-stainless-retry-count", "0"))
+        now = time.monotonic()
+        with self._lock:
+            budget = self._retry_budget(now)
+            if retry_count:
+                key = self._retry_key(request, retry_count)
+                if key is None or self._granted.pop(key, None) is None:
+                    if not budget:
+                        self.retries_denied += 1
+                        raise RetryBudgetExhausted(message="Retry budget exhausted", request=request)
+                    self._budget_retries.append(now)
+                self.retries += 1
+            else:
+                self._attempts.append(now)
+            self.requests += 1
+
+    def record_response(self, response: httpx.Response) -> None:
+        """Grant the retry of a retryable error response, or forbid it once the budget is spent.
+
+        A granted retry is taken from the budget right away, so concurrent
+        failures cannot overdraw it while their retries are backing off.
+        """
+        status_code = response.status_code
+        if status_code < 500 and status_code not in RETRYABLE_STATUS_CODES:
+            return
+        if response.headers.get("x-should-retry") == "false":
+            return
+        now = time.monotonic()
+        with self._lock:
+            if not self._retry_budget(now):
+                self.retries_denied += 1
+                response.headers["x-should-retry"] = "false"
+                return
+            retry_count = int(response.request.headers.get("x-stainless-retry-count", "0")) + 1
+            key = self._retry_key(response.request, retry_count)
+            if key is not None:
+                self._budget_retries.append(now)
+                self._granted[key] = now
+
+    def record_trace(self, event_name: str) -> None:
+        """Count connection setup events reported by the transport."""
+        if event_name == "connection.connect_tcp.complete":
+            self._add("connections_opened")
+        elif event_name == "connection.start_tls.complete":
+            self._add("tls_handshakes")
+
+    def stats(self) -> Dict[str, Any]:
+        """Get the counters and the share of requests sent on a reused connection."""
+        with self._lock:
+            reused = max(0, self.requests - self.connections_opened)
+            return {
+                "requests": self.requests,
+                "retries": self.retries,
+                "retries_denied": self.retries_denied,
+                "retry_budget": self._retry_budget(time.monotonic()),
+                "connections_opened": self.connections_opened,
+                "tls_handshakes": self.tls_handshakes,
+                "reused_requests": reused,
+                "reuse_ratio": round(reused / self.requests, 4) if self.requests else 0.0,
+            }
+
+
+class OpenAIHttpClients:
+    """Process-wide pooled httpx clients shared by the OpenAI models."""
+
+    _instance: ClassVar[Optional["OpenAIHttpClients"]] = None
+
+    @classmethod
+    def get_instance(cls) -> "OpenAIHttpClients":
+        """Get the singleton instance of the clients.
+
+        Returns:
+            Shared HTTP clients
+        """
+        if cls._instance is None:
+            cls._instance = cls()
+        return cls._instance
+
+    def __init__(
+        self,
+        max_connections: Optional[int] = None,
+        max_keepalive_connections: Optional[int] = None,
+        keepalive_expiry: Optional[float] = None,
+        timeout: Optional[float] = None,
+        connect_timeout: Optional[float] = None
+    ):
+        """Initialize the clients.
+
+        Args:
+            max_connections: Maximum open connections per client
+            max_keepalive_connections: Maximum idle connections kept alive
+            keepalive_expiry: Seconds an idle connection is kept alive
+            timeout: Read/write/pool timeout of a call in seconds
+            connect_timeout: Connection timeout in seconds
+        """
+        self.limits = httpx.Limits(
+            max_connections=max_connections or settings.OPENAI_MAX_CONNECTIONS,
+            max_keepalive_connections=max_keepalive_connections or settings.OPENAI_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=keepalive_expiry or settings.OPENAI_KEEPALIVE_EXPIRY_SECONDS
+        )
+        self.timeout = httpx.Timeout(
+            timeout or settings.OPENAI_TIMEOUT_SECONDS,
+            connect=connect_timeout or settings.OPENAI_CONNECT_TIMEOUT_SECONDS
+        )
+        self.metrics = ConnectionMetrics()
+        self._sync: Optional[httpx.Client] = None
+        self._async: Optional[httpx.AsyncClient] = None
+        self._lock = threading.Lock()
+
+    def _trace(self, event_name: str, info: Dict[str, Any]) -> None:
+        self.metrics.record_trace(event_name)
+
+    async def _atrace(self, event_name: str, info: Dict[str, Any]) -> None:
+        self.metrics.record_trace(event_name)
+
+    def _on_request(self, request: httpx.Request) -> None:
+        self.metrics.record_request(request)
+        request.extensions["trace"] = self._trace
+
+    async def _aon_request(self, request: httpx.Request) -> None:
+        self.metrics.record_request(request)
+        request.extensions["trace"] = self._atrace
+
+    def _on_response(self, response: httpx.Response) -> None:
+        self.metrics.record_response(response)
+
+    async def _aon_response(self, response: httpx.Response) -> None:
+        self.metrics.record_response(response)
+
+    @property
+    def sync(self) -> httpx.Client:
+        """Shared synchronous client."""
+        with self._lock:
+            if self._sync is None:
+                self._sync = httpx.Client(
+                    limits=self.limits,
+                    timeout=self.timeout,
+                    event_hooks={"request": [self._on_request], "response": [self._on_response]}
+                )
+                logger.info("openai_http_client_created", flavour="sync", limits=str(self.limits))
+            return self._sync
+
+    @property
+    def async_(self) -> httpx.AsyncClient:
+        """Shared asynchronous client."""
+        with self._lock:
+            if self._async is None:
+                self._async = httpx.AsyncClient(
+                    limits=self.limits,
+                    timeout=self.timeout,
+                    event_hooks={"request": [self._aon_request], "response": [self._aon_response]}
+                )
+                logger.info("openai_http_client_created", flavour="async", limits=str(self.limits))
+            return self._async
+
+    def model_kwargs(self) -> Dict[str, Any]:
+        """Client arguments shared by OpenAIEmbeddings and ChatOpenAI.
+
+        Returns:
+            Keyword arguments with the shared clients, timeout, retries and base URL
+        """
+        kwargs = {
+            "http_client": self.sync,
+            "http_async_client": self.async_,
+            "timeout": self.timeout,
+            "max_retries": settings.OPENAI_MAX_RETRIES,
+        }
+        if settings.OPENAI_BASE_URL:
+            kwargs["base_url"] = settings.OPENAI_BASE_URL
+        return kwargs
+
+    async def aclose(self) -> None:
+        """Close both clients and their pooled connections."""
+        with self._lock:
+            sync_client, async_client = self._sync, self._async
+            self._sync = self._async = None
+        if sync_client is not None:
+            sync_client.close()
+        if async_client is not None:
+            await async_client.aclose()
+
+    def stats(self) -> Dict[str, Any]:
+        """Get connection reuse metrics.
+
+        Returns:
+            Request, connection and retry counters with the pool and retry budget configuration
+        """
+        return {
+            **self.metrics.stats(),
+            "max_connections": self.limits.max_connections,
+            "max_keepalive_connections": self.limits.max_keepalive_connections,
+            "keepalive_expiry_seconds": self.limits.keepalive_expiry,
+            "max_retries": settings.OPENAI_MAX_RETRIES,
+            "retry_budget_ratio": self.metrics.retry_ratio,
+            "retry_budget_min_retries": self.metrics.retry_min,
+            "retry_budget_window_seconds": self.metrics.retry_window,
+        }
+
+
+def get_http_clients() -> OpenAIHttpClients:
+    """Get the shared OpenAI HTTP clients.
+
+    Returns:
+        Shared HTTP clients
+    """
+    return OpenAIHttpClients.get_instance()
@@ -0,0 +1,522 @@
+"""Index maintenance: health reporting and compaction of collections.
+
+Deleting a chunk (delete_document, re-ingestion) only marks its entry in
+the HNSW index as deleted: the slot keeps its vector and links, new chunks
+are appended instead of reusing it, and searches still walk through it. The
+SQLite database keeps the pages freed by deletes and dropped collections.
+Over time the index and the database grow while the live data does not.
+
+Health compares the live chunk count of a collection with the element
+count in its persisted HNSW header (the deleted entries), and reports the
+index size and the free pages and journal of chroma.sqlite3. The header is
+decoded with hnswlib's layout and checked for consistency; a header that
+does not pass leaves the collection's health unknown, and it is not
+compacted unless forced.
+
+Compaction rebuilds the index with an online reindex into a collection with
+the same dimension and HNSW parameters (see core.reindex): queries keep
+hitting the current collection while only live chunks are copied, the new
+index is prewarmed, the alias is switched, and the previous collection is
+dropped after a grace period for in-flight queries. The database is then
+vacuumed incrementally, a few pages per short transaction, so readers are
+never blocked for long. Incremental vacuum needs auto_vacuum=INCREMENTAL,
+which a single full VACUUM (blocking, run once with full_vacuum) enables.
+
+Compaction runs on demand or, with MAINTENANCE_INTERVAL_SECONDS set, on a
+schedule for the collections that need it. A lock file in the vector store
+directory keeps API workers and the command line from compacting at once.
+
+Usage:
+    python -m adriacb_galtea.core.maintenance health [--collection NAME]
+    python -m adriacb_galtea.core.maintenance compact [--collection NAME] [--force] [--full-vacuum]
+    python -m adriacb_galtea.core.maintenance vacuum [--full]
+"""
+from typing import Any, ClassVar, Dict, Iterator, List, Optional
+from contextlib import contextmanager
+from pathlib import Path
+import argparse
+import fcntl
+import json
+import sqlite3
+import struct
+import threading
+import time
+
+from .config.settings import settings
+from .document_registry import DocumentRegistry, get_document_registry
+from .reindex import ReindexError, get_reindexer
+from .vector_store import ChromaVectorStore, CollectionNotFound, get_chroma_client, get_collection_cache, get_vector_store_path, resolve_collection
+from ..utils.logging import get_logger
+
+logger = get_logger(__name__)
+
+CHROMA_DATABASE_FILENAME = "chroma.sqlite3"
+LOCK_FILENAME = "maintenance.lock"
+# hnswlib index header (header.bin): offsetLevel0, max_elements, cur_element_count,
+# size_data_per_element, label_offset, offsetData, maxlevel, enterpoint_node,
+# maxM, maxM0, M, mult, ef_construction. Chroma 1.x prefixes it with a version.
+HNSW_HEADER = struct.Struct("<QQQQQQiIQQQdQ")
+HNSW_HEADER_VERSION = struct.Struct("<i")
+AUTO_VACUUM_MODES = {0: "none", 1: "full", 2: "incremental"}
+
+
+class MaintenanceBusy(RuntimeError):
+    """Raised when another process or thread is already compacting."""
+
+
+def read_hnsw_header(path: Path, dimensions: Optional[int] = None) -> Optional[Dict[str, Any]]:
+    """Read the header of a persisted HNSW index.
+
+    The fields are checked against each other (and against the expected
+    dimension) as hnswlib lays them out, so a header written with another
+    layout is rejected instead of being misread.
+
+    Args:
+        path: header.bin of a vector segment
+        dimensions: Expected dimension of the indexed vectors
+
+    Returns:
+        Dictionary with the element count (live and deleted), capacity,
+        bytes per element, dimension, M and ef_construction, or None if the
+        file is missing
+
+    Raises:
+        ValueError: If the file is not a consistent hnswlib header
+    """
+    try:
+        data = path.read_bytes()
+    except OSError:
+        return None
+    if len(data) == HNSW_HEADER.size + HNSW_HEADER_VERSION.size:
+        data = data[HNSW_HEADER_VERSION.size:]
+    if len(data) != HNSW_HEADER.size:
+        raise ValueError(f"{path} has {len(data)} bytes, expected an hnswlib header of {HNSW_HEADER.size}")
+    (_, max_elements, elements, bytes_per_element, label_offset, offset_data,
+     _, _, max_m, max_m0, m, _, construction_ef) = HNSW_HEADER.unpack(data)
+    # Level-0 links (maxM0 IDs and their count), then the vector, then the label
+    vector_bytes = label_offset - offset_data
+    checks = [
+        (elements <= max_elements, "element count above capacity"),
+        (m > 0 and max_m == m and max_m0 == 2 * m, "inconsistent M"),
+        (offset_data == max_m0 * 4 + 4, "unexpected link list size"),
+        (vector_bytes > 0 and vector_bytes % 4 == 0, "unexpected vector size"),
+        (bytes_per_element == label_offset + 8, "unexpected element size"),
+        (dimensions is None or vector_bytes == dimensions * 4,
+         f"{vector_bytes // 4} dimensions where the collection has {dimensions}"),
+    ]
+    failed = [reason for passed, reason in checks if not passed]
+    if failed:
+        raise ValueError(f"{path} is not a consistent hnswlib header: {', '.join(failed)}")
+    return {
+        "max_elements": max_elements,
+        "elements": elements,
+        "bytes_per_element": bytes_per_element,
+        "dimensions": vector_bytes // 4,
+        "M": m,
+        "construction_ef": construction_ef,
+    }
+
+
+def collection_health(store: ChromaVectorStore) -> Dict[str, Any]:
+    """Report how much of a collection's index is taken by deleted entries.
+
+    The index header is written when the index is persisted (every
+    HNSW_SYNC_THRESHOLD writes), so the counts lag the latest writes.
+
+    Args:
+        store: Vector store of the collection
+
+    Returns:
+        Dictionary with the live and deleted entry counts, the deleted
+        ratio, the index size on disk, the bytes held by deleted entries
+        and whether the collection needs compaction. If the index header
+        fails validation, health is "unknown", the deleted counts are None
+        and the collection does not need compaction.
+    """
+    live = store._collection.count()
+    segment_dir = store._vector_segment_dir()
+    index_disk_bytes = sum(f.stat().st_size for f in segment_dir.glob("*") if f.is_file()) if segment_dir else 0
+    try:
+        header = read_hnsw_header(segment_dir / "header.bin", store.embedding_dimensions) if segment_dir else None
+    except ValueError as e:
+        logger.warning("index_header_invalid", collection=store.collection_name, error=str(e))
+        return {
+            "collection": store.collection_name,
+            "health": "unknown",
+            "error": str(e),
+            "live": live,
+            "index_elements": None,
+            "deleted": None,
+            "deleted_ratio": None,
+            "index_disk_bytes": index_disk_bytes,
+            "deleted_bytes": None,
+            "needs_compaction": False,
+        }
+    elements = header["elements"] if header else live
+    deleted = max(elements - live, 0)
+    deleted_ratio = deleted / elements if elements else 0.0
+    return {
+        "collection": store.collection_name,
+        "health": "ok",
+        "live": live,
+        "index_elements": elements,
+        "deleted": deleted,
+        "deleted_ratio": round(deleted_ratio, 4),
+        "index_disk_bytes": index_disk_bytes,
+        "deleted_bytes": deleted * header["bytes_per_element"] if header else 0,
+        "needs_compaction": (
+            deleted >= settings.MAINTENANCE_MIN_DELETED
+            and deleted_ratio >= settings.MAINTENANCE_MAX_DELETED_RATIO
+        ),
+    }
+
+
+def _connect_database() -> sqlite3.Connection:
+    """Open chroma.sqlite3 next to the Chroma client's own connections."""
+    return sqlite3.connect(
+        get_vector_store_path() / CHROMA_DATABASE_FILENAME,
+        timeout=30,
+        isolation_level=None
+    )
+
+
+def storage_health() -> Dict[str, Any]:
+    """Report the free space and journal of the Chroma database.
+
+    Returns:
+        Dictionary with the database and journal sizes, the free pages and
+        their share of the file, the auto_vacuum mode, Chroma's pending
+        write-ahead log entries and whether a vacuum is due
+    """
+    path = get_vector_store_path() / CHROMA_DATABASE_FILENAME
+    if not path.exists():
+        return {"path": str(path), "exists": False, "needs_vacuum": False}
+    conn = _connect_database()
+    try:
+        page_size = conn.execute("PRAGMA page_size").fetchone()[0]
+        page_count = conn.execute("PRAGMA page_count").fetchone()[0]
+        free_pages = conn.execute("PRAGMA freelist_count").fetchone()[0]
+        auto_vacuum = conn.execute("PRAGMA auto_vacuum").fetchone()[0]
+        journal_mode = conn.execute("PRAGMA journal_mode").fetchone()[0]
+        try:
+            log_entries = conn.execute("SELECT COUNT(*) FROM embeddings_queue").fetchone()[0]
+        except sqlite3.Error:
+            log_entries = None
+    finally:
+        conn.close()
+    wal_path = path.with_name(path.name + "-wal")
+    free_ratio = free_pages / page_count if page_count else 0.0
+    return {
+        "path": str(path),
+        "exists": True,
+        "bytes": path.stat().st_size,
+        "wal_bytes": wal_path.stat().st_size if wal_path.exists() else 0,
+        "journal_mode": journal_mode,
+        "log_entries": log_entries,
+        "page_size": page_size,
+        "pages": page_count,
+        "free_pages": free_pages,
+        "free_bytes": free_pages * page_size,
+        "free_ratio": round(free_ratio, 4),
+        "auto_vacuum": AUTO_VACUUM_MODES.get(auto_vacuum, str(auto_vacuum)),
+        "needs_vacuum": free_ratio >= settings.MAINTENANCE_MAX_FREE_RATIO,
+    }
+
+
+def vacuum_storage(
+    full: bool = False,
+    pages_per_step: Optional[int] = None,
+    pause_ms: Optional[float] = None
+) -> Dict[str, Any]:
+    """Return the free pages of the Chroma database to the file system.
+
+    With auto_vacuum=INCREMENTAL, free pages are released pages_per_step at
+    a time, each step in its own short write transaction with a pause in
+    between, so queries and writes wait at most one step. Otherwise only a
+    full VACUUM can shrink the file; it locks the database while it rewrites
+    it, so it only runs with full=True, and also switches the database to
+    incremental auto_vacuum for the next runs.
+
+    Args:
+        full: Whether to run a full VACUUM if incremental vacuum is not enabled
+        pages_per_step: Pages released per step. Defaults to settings.MAINTENANCE_VACUUM_PAGES_PER_STEP.
+        pause_ms: Milliseconds between steps. Defaults to settings.MAINTENANCE_VACUUM_PAUSE_MS.
+
+    Returns:
+        Dictionary with the mode used, the steps run, the bytes reclaimed
+        and the seconds taken
+    """
+    pages_per_step = pages_per_step or settings.MAINTENANCE_VACUUM_PAGES_PER_STEP
+    pause = (settings.MAINTENANCE_VACUUM_PAUSE_MS if pause_ms is None else pause_ms) / 1000
+    before = storage_health()
+    if not before["exists"]:
+        return {"mode": "skipped", "reason": "no database", "steps": 0, "reclaimed_bytes": 0, "seconds": 0.0}
+
+    started = time.perf_counter()
+    steps = 0
+    conn = _connect_database()
+    try:
+        if before["auto_vacuum"] == "incremental":
+            mode = "incremental"
+            while conn.execute("PRAGMA freelist_count").fetchone()[0]:
+                conn.execute(f"PRAGMA incremental_vacuum({int(pages_per_step)})").fetchall()
+                steps += 1
+                time.sleep(pause)
+        elif full:
+            mode = "full"
+            conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+            conn.execute("VACUUM")
+            steps = 1
+        else:
+            mode = "skipped"
+        if before["journal_mode"] == "wal":
+            conn.execute("PRAGMA wal_checkpoint(TRUNCATE)").fetchall()
+    finally:
+        conn.close()
+
+    after = storage_health()
+    result = {
+        "mode": mode,
+        "steps": steps,
+        "reclaimed_bytes": before["bytes"] + before["wal_bytes"] - after["bytes"] - after["wal_bytes"],
+        "free_bytes": after["free_bytes"],
+        "seconds": round(time.perf_counter() - started, 3),
+    }
+    if mode == "skipped":
+        result["reason"] = "auto_vacuum is not incremental; run a full vacuum once to enable it"
+    logger.info("storage_vacuumed", **result)
+    return result
+
+
+class IndexMaintainer:
+    """Report collection health and compact collections, on demand or on a schedule."""
+
+    _instance: ClassVar[Optional["IndexMaintainer"]] = None
+
+    @classmethod
+    def get_instance(cls) -> "IndexMaintainer":
+        """Get the singleton instance of the maintainer.
+
+        Returns:
+            Index maintainer instance
+        """
+        if cls._instance is None:
+            cls._instance = cls()
+        return cls._instance
+
+    def __init__(self, registry: Optional[DocumentRegistry] = None):
+        """Initialize the maintainer.
+
+        Args:
+            registry: Registry holding the collection aliases. Defaults to the shared registry.
+        """
+        self.registry = registry or get_document_registry()
+        self.runs: Dict[str, Dict[str, Any]] = {}
+        self.compacting: Optional[str] = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._worker: Optional[threading.Thread] = None
+
+    def health(self, collections: Optional[List[str]] = None) -> Dict[str, Any]:
+        """Report the health of collections and of the database.
+
+        Args:
+            collections: Collection names or aliases. Defaults to every collection.
+
+        Returns:
+            Dictionary with the storage health, the health of each collection
+            (with the aliases pointing at it) and the last compaction runs
+
+        Raises:
+            CollectionNotFound: If a collection does not exist
+        """
+        aliases: Dict[str, List[str]] = {}
+        for record in self.registry.list_aliases():
+            aliases.setdefault(record["collection"], []).append(record["alias"])
+        if collections is None:
+            names = sorted(getattr(collection, "name", collection) for collection in get_chroma_client().list_collections())
+        else:
+            names = [resolve_collection(name) for name in collections]
+        reports = []
+        for name in names:
+            report = collection_health(get_collection_cache().get(name, create=False))
+            report["aliases"] = aliases.get(name, [])
+            reports.append(report)
+        return {"storage": storage_health(), "collections": reports, "runs": dict(self.runs)}
+
+    def compact(
+        self,
+        alias: Optional[str] = None,
+        force: bool = False,
+        full_vacuum: bool = False,
+        drop_delay: Optional[float] = None
+    ) -> Dict[str, Any]:
+        """Rebuild a collection's index without its deleted entries and vacuum the database.
+
+        Args:
+            alias: Alias or collection name. Defaults to the default collection.
+            force: Whether to rebuild even if the collection does not need compaction
+            full_vacuum: Whether to run a full VACUUM if incremental vacuum is not enabled
+            drop_delay: Seconds between the alias switch and dropping the previous
+                collection. Defaults to settings.MAINTENANCE_DROP_DELAY_SECONDS.
+
+        Returns:
+            Dictionary with the health before and after, the reindex job and the vacuum result
+
+        Raises:
+            MaintenanceBusy: If a compaction is already running
+            ReindexError: If the rebuild fails
+        """
+        alias = alias or settings.VECTOR_STORE_DEFAULT_COLLECTION
+        drop_delay = settings.MAINTENANCE_DROP_DELAY_SECONDS if drop_delay is None else drop_delay
+        with self._exclusive():
+            self.compacting = alias
+            started = time.perf_counter()
+            before = collection_health(get_collection_cache().get(resolve_collection(alias), create=False))
+            run: Dict[str, Any] = {"alias": alias, "started_at": time.time(), "before": before, "rebuilt": False}
+            if force or before["needs_compaction"]:
+                logger.info("compaction_started", alias=alias, **before)
+                job = get_reindexer().start(alias, background=False)
+                if job.state != "ready":
+                    raise ReindexError(f"Rebuild of {alias!r} {job.state}: {job.error}")
+                job.target.prewarm()
+                job.swap()
+                # Queries already holding the previous collection finish on it
+                self._stop.wait(drop_delay)
+                get_reindexer().finalize(alias, drop_previous=True)
+                run.update(rebuilt=True, job=job.stats())
+            storage = storage_health()
+            if run["rebuilt"] or storage["needs_vacuum"] or full_vacuum:
+                run["vacuum"] = vacuum_storage(full=full_vacuum)
+            run["after"] = collection_health(get_collection_cache().get(resolve_collection(alias), create=False))
+            run["seconds"] = round(time.perf_counter() - started, 3)
+        self.runs[alias] = run
+        logger.info(
+            "compaction_finished",
+            alias=alias,
+            rebuilt=run["rebuilt"],
+            deleted_before=before["deleted"],
+            deleted_after=run["after"]["deleted"],
+            seconds=run["seconds"]
+        )
+        return run
+
+    def start_compaction(self, alias: Optional[str] = None, force: bool = False, full_vacuum: bool = False) -> None:
+        """Compact a collection in a background thread; see compact() and runs.
+
+        Raises:
+            MaintenanceBusy: If a compaction is already running in this process
+        """
+        if self._lock.locked():
+            raise MaintenanceBusy("A compaction is already running")
+        self._worker = threading.Thread(
+            target=self._compact_logged,
+            args=(alias, force, full_vacuum),
+            name="index-compaction",
+            daemon=True
+        )
+        self._worker.start()
+
+    def _compact_logged(self, alias: Optional[str], force: bool = False, full_vacuum: bool = False) -> None:
+        """Compact a collection, recording failures instead of raising them."""
+        alias = alias or settings.VECTOR_STORE_DEFAULT_COLLECTION
+        try:
+            self.compact(alias, force=force, full_vacuum=full_vacuum)
+        except (MaintenanceBusy, CollectionNotFound) as e:
+            logger.info("compaction_skipped", alias=alias, reason=str(e))
+        except (ReindexError, ValueError, sqlite3.Error) as e:
+            self.runs[alias] = {"alias": alias, "started_at": time.time(), "error": str(e)}
+            logger.error("compaction_failed", alias=alias, error=str(e))
+
+    def start_schedule(self, interval: Optional[float] = None) -> None:
+        """Check and compact the configured collections periodically.
+
+        Args:
+            interval: Seconds between checks. Defaults to settings.MAINTENANCE_INTERVAL_SECONDS.
+        """
+        interval = interval or settings.MAINTENANCE_INTERVAL_SECONDS
+        if self._thread is not None or interval <= 0:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._schedule, args=(interval,), name="index-maintenance", daemon=True)
+        self._thread.start()
+        logger.info("maintenance_scheduled", interval=interval)
+
+    def stop(self) -> None:
+        """Stop the periodic checks and cancel the rebuild of a running compaction."""
+        self._stop.set()
+        job = get_reindexer().jobs.get(self.compacting) if self.compacting else None
+        if job is not None:
+            # A cancelled rebuild stops mirroring, so no write goes to a half-built collection
+            job.cancel()
+        for thread in (self._thread, self._worker):
+            if thread is not None:
+                thread.join()
+        self._thread = self._worker = None
+
+    def _schedule(self, interval: float) -> None:
+        """Scheduler thread: compact the configured collections that need it."""
+        aliases = [name.strip() for name in settings.MAINTENANCE_COLLECTIONS.split(",") if name.strip()]
+        while not self._stop.wait(interval):
+            for alias in aliases or [settings.VECTOR_STORE_DEFAULT_COLLECTION]:
+                if self._stop.is_set():
+                    break
+                self._compact_logged(alias)
+
+    @contextmanager
+    def _exclusive(self) -> Iterator[None]:
+        """Hold the maintenance lock of this process and of the vector store directory."""
+        if not self._lock.acquire(blocking=False):
+            raise MaintenanceBusy("A compaction is already running")
+        try:
+            with open(get_vector_store_path() / LOCK_FILENAME, "w") as lock_file:
+                try:
+                    fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except BlockingIOError:
+                    raise MaintenanceBusy("A compaction is already running in another process")
+                try:
+                    yield
+                finally:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+        finally:
+            self.compacting = None
+            self._lock.release()
+
+
+def get_index_maintainer() -> IndexMaintainer:
+    """Get the index maintainer instance.
+
+    Returns:
+        Index maintainer instance
+    """
+    return IndexMaintainer.get_instance()
+
+
+def main() -> None:
+    """Report health, compact collections or vacuum the database from the command line."""
+    parser = argparse.ArgumentParser(description="Vector store health and compaction")
+    parser.add_argument("command", choices=["health", "compact", "vacuum"])
+    parser.add_argument("--collection", action="append", help="Collection or alias (repeatable)")
+    parser.add_argument("--force", action="store_true", help="Rebuild even if the collection does not need it")
+    parser.add_argument("--full", "--full-vacuum", dest="full", action="store_true",
+                        help="Run a blocking full VACUUM if incremental vacuum is not enabled")
+    parser.add_argument("--drop-delay", type=float,
+                        help="Seconds before the previous collection is dropped (default: MAINTENANCE_DROP_DELAY_SECONDS)")
+    args = parser.parse_args()
+
+    maintainer = get_index_maintainer()
+    if args.command == "health":
+        result: Any = maintainer.health(args.collection)
+    elif args.command == "vacuum":
+        result = vacuum_storage(full=args.full)
+    else:
+        result = [
+            maintainer.compact(alias, force=args.force, full_vacuum=args.full, drop_delay=args.drop_delay)
+            for alias in args.collection or [None]
+        ]
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+"""Collection migration to a reduced embedding dimension.
+
+text-embedding-3 vectors can be shortened to a prefix of their dimensions
+and renormalised, which is exactly what the API returns when asked for
+fewer dimensions. A collection can therefore be migrated to a smaller
+dimension by copying its stored vectors, without converting or re-embedding
+any document. The target collection records the new dimension, so queries
+against it are embedded at that dimension.
+
+Measure the recall of candidate dimensions first with
+adriacb_galtea.evaluation.dimension_recall.
+
+Usage:
+    python -m adriacb_galtea.core.migration <source> <target> --dimensions 512
+"""
+from typing import Any, Dict, Optional
+import argparse
+import json
+import time
+
+from .config.settings import settings
+from .document_registry import DocumentRegistry, get_document_registry
+from .embeddings import truncate_embeddings
+from .vector_store import ChromaVectorStore
+from ..utils.logging import get_logger
+
+logger = get_logger(__name__)
+
+
+def migrate_collection(
+    source: ChromaVectorStore,
+    target: ChromaVectorStore,
+    page_size: Optional[int] = None,
+    registry: Optional[DocumentRegistry] = None
+) -> Dict[str, Any]:
+    """Copy a collection into another one, shortening its vectors to the target's dimension.
+
+    Args:
+        source: Vector store of the collection to copy
+        target: Vector store of the target collection. Its embedding dimension
+            must not exceed the source's.
+        page_size: Chunks read from the source at a time. Defaults to settings.SNAPSHOT_PAGE_SIZE.
+        registry: Document registry whose records are copied. Defaults to the shared registry.
+
+    Returns:
+        Dictionary with the source and target collections, their dimensions,
+        the chunk and document counts, seconds taken and write statistics
+
+    Raises:
+        ValueError: If the target dimension exceeds the source dimension
+    """
+    if target.embedding_dimensions > source.embedding_dimensions:
+        raise ValueError(
+            f"Cannot migrate {source.embedding_dimensions}-dimensional vectors of "
+            f"{source.collection_name!r} to {target.embedding_dimensions} dimensions"
+        )
+    started = time.perf_counter()
+    page_size = page_size or settings.SNAPSHOT_PAGE_SIZE
+    registry = registry or get_document_registry()
+    dimensions = target.embedding_dimensions
+
+    writer = target.writer()
+    chunks = 0
+    offset = 0
+    while True:
+        page = source._collection.get(
+            limit=page_size,
+            offset=offset,
+            include=["embeddings", "documents", "metadatas"]
+        )
+        if not page["ids"]:
+            break
+        writer.add(
+            [
+                {"id": chunk_id, "content": text, "metadata": metadata}
+                for chunk_id, text, metadata in zip(page["ids"], page["documents"], page["metadatas"])
+            ],
+            embeddings=truncate_embeddings(page["embeddings"], dimensions).tolist()
+        )
+        chunks += len(page["ids"])
+        offset += len(page["ids"])
+    write_stats = writer.close()
+
+    # Read all records before writing, so the registry is not locked by the read
+    records = list(registry.iter_documents(collection=source.collection_name))
+    for record in records:
+        registry.upsert(
+            record["doc_id"],
+            record["source"],
+            record["content_hash"],
+            record["chunk_ids"],
+            collection=target.collection_name
+        )
+
+    seconds = time.perf_counter() - started
+    logger.info(
+        "collection_migrated",
+        source=source.collection_name,
+        target=target.collection_name,
+        dimensions=dimensions,
+        chunks=chunks,
+        seconds=round(seconds, 3)
+    )
+    return {
+        "source": source.collection_name,
+        "target": target.collection_name,
+        "source_dimensions": source.embedding_dimensions,
+        "target_dimensions": dimensions,
+        "chunks": chunks,
+        "documents": len(records),
+        "seconds": round(seconds, 3),
+        "write": write_stats,
+    }
+
+
+def main() -> None:
+    """Migrate a collection to a reduced embedding dimension from the command line."""
+    parser = argparse.ArgumentParser(description="Migrate a collection to a reduced embedding dimension")
+    parser.add_argument("source", help="Collection to copy")
+    parser.add_argument("target", help="New collection, created with the given dimension")
+    parser.add_argument("--dimensions", type=int, required=True, help="Embedding dimension of the target")
+    parser.add_argument("--prewarm", action="store_true", help="Prewarm the target index after the migration")
+    args = parser.parse_args()
+
+    source = ChromaVectorStore(args.source)
+    # A new target is created with the HNSW parameters of the source
+    target = ChromaVectorStore(args.target, hnsw_params=source.hnsw_params, embedding_dimensions=args.dimensions)
+    if target.embedding_dimensions != args.dimensions:
+        parser.error(f"Collection {args.target!r} already exists with {target.embedding_dimensions} dimensions")
+    result = migrate_collection(source, target)
+    if args.prewarm:
+        result["prewarm"] = target.prewarm()
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,262 @@
+"""Speculative retrieval prefetch for the RAG application.
+
+In the ReAct flow the vector search only starts once the first model call
+returns a retrieve_documents tool call, whose query is nearly always close
+to the user question. A prefetch searches for the user question while that
+first model call runs; the tool then serves the prefetched results if its
+query is close enough to the question, taking the embedding and search
+time off the critical path, and searches normally otherwise.
+"""
+from typing import Any, ClassVar, Dict, List, Optional
+from concurrent.futures import Future, ThreadPoolExecutor
+import math
+import re
+import threading
+import time
+
+from ..config.settings import settings
+from ..utils.logging import get_logger
+from ..utils.tracing import bind_context, span
+from .vector_store import QueryResult, get_collection, search_collections
+
+logger = get_logger(__name__)
+
+# Number of results the retrieval tool asks for
+RETRIEVAL_K = 5
+
+_prefetch_executor: Optional[ThreadPoolExecutor] = None
+
+
+def run_search(
+    query: str,
+    collection: Optional[str] = None,
+    collections: Optional[List[str]] = None,
+    query_embeddings: Optional[Dict[int, List[float]]] = None
+) -> List[QueryResult]:
+    """Run the retrieval search of a query.
+
+    Args:
+        query: Search query
+        collection: Collection to search (the default collection if not given)
+        collections: Collections to fan out across, merging their top-k
+        query_embeddings: Embeddings of the query already computed, by dimension
+
+    Returns:
+        Search results
+
+    Raises:
+        CollectionNotFound: If a collection does not exist
+    """
+    if collections:
+        return search_collections(query, collections, k=RETRIEVAL_K, query_embeddings=query_embeddings)
+    store = get_collection(collection)
+    embedding = (query_embeddings or {}).get(store.embedding_dimensions)
+    if embedding is not None:
+        return store.search_by_vector(embedding, k=RETRIEVAL_K)
+    return store.search(query, k=RETRIEVAL_K)
+
+
+def embed_queries(
+    queries: List[str],
+    collection: Optional[str] = None,
+    collections: Optional[List[str]] = None
+) -> List[Dict[int, List[float]]]:
+    """Embed many queries for the collections they will search, in one call per dimension.
+
+    Args:
+        queries: Search queries
+        collection: Collection to search (the default collection if not given)
+        collections: Collections to fan out across
+
+    Returns:
+        Embeddings of each query by dimension, to pass to run_search()
+
+    Raises:
+        CollectionNotFound: If a collection does not exist
+    """
+    stores = [get_collection(name) for name in dict.fromkeys(collections or [collection])]
+    embedded: List[Dict[int, List[float]]] = [{} for _ in queries]
+    for store in stores:
+        if not queries or store.embedding_dimensions in embedded[0]:
+            continue
+        with span("embedding.batch", dimensions=store.embedding_dimensions, queries=len(queries)):
+            vectors = store.embeddings.embed_documents(queries)
+        for embeddings, vector in zip(embedded, vectors):
+            embeddings[store.embedding_dimensions] = vector
+    return embedded
+
+
+def query_similarity(a: str, b: str) -> float:
+    """Cosine similarity of the word sets of two queries (1.0 for identical queries).
+
+    Unlike Jaccard, a tool query that drops the question's filler words
+    ("ID.3 range" for "What is the ID.3 range?") still scores high.
+    """
+    words_a = set(re.findall(r"\w+", a.casefold()))
+    words_b = set(re.findall(r"\w+", b.casefold()))
+    if not words_a or not words_b:
+        return float(words_a == words_b)
+    return len(words_a & words_b) / math.sqrt(len(words_a) * len(words_b))
+
+
+class PrefetchStats:
+    """Process-wide prefetch hit rate and latency saved."""
+
+    _instance: ClassVar[Optional["PrefetchStats"]] = None
+
+    @classmethod
+    def get_instance(cls) -> "PrefetchStats":
+        """Get the singleton instance of the stats.
+
+        Returns:
+            Prefetch stats instance
+        """
+        if cls._instance is None:
+            cls._instance = cls()
+        return cls._instance
+
+    def __init__(self):
+        """Initialize the counters."""
+        self._lock = threading.Lock()
+        self.started = 0
+        self.hits = 0
+        self.misses = 0
+        self.unused = 0
+        self.saved_seconds = 0.0
+
+    def record(self, outcome: str, saved_seconds: float = 0.0) -> None:
+        """Record the outcome of a prefetch ("started", "hits", "misses" or "unused")."""
+        with self._lock:
+            setattr(self, outcome, getattr(self, outcome) + 1)
+            self.saved_seconds += saved_seconds
+
+    def stats(self) -> Dict[str, Any]:
+        """Get prefetch metrics.
+
+        Returns:
+            Dictionary with the number of prefetches, hits, misses, prefetches
+            the agent never used, the hit rate and the latency saved
+        """
+        with self._lock:
+            claimed = self.hits + self.misses
+            return {
+                "started": self.started,
+                "hits": self.hits,
+                "misses": self.misses,
+                "unused": self.unused,
+                "hit_rate": round(self.hits / claimed, 4) if claimed else 0.0,
+                "saved_seconds_total": round(self.saved_seconds, 3),
+                "saved_ms_per_hit": round(1000 * self.saved_seconds / self.hits, 1) if self.hits else 0.0,
+            }
+
+
+class RetrievalPrefetch:
+    """One speculative search for a user question, served to at most one tool call."""
+
+    def __init__(
+        self,
+        question: str,
+        collection: Optional[str] = None,
+        collections: Optional[List[str]] = None,
+        min_similarity: Optional[float] = None,
+        stats: Optional[PrefetchStats] = None,
+        query_embeddings: Optional[Dict[int, List[float]]] = None
+    ):
+        """Initialize the prefetch; call start() to run the search.
+
+        Args:
+            question: User question
+            collection: Collection to search
+            collections: Collections to fan out across
+            min_similarity: Minimum query_similarity for a tool query to be served
+            stats: Stats to record the outcome in
+            query_embeddings: Embeddings of the question already computed, by dimension
+        """
+        self.question = question
+        self.params = {"collection": collection, "collections": collections}
+        self.min_similarity = settings.PREFETCH_MIN_SIMILARITY if min_similarity is None else min_similarity
+        self.stats = stats or PrefetchStats.get_instance()
+        self.query_embeddings = query_embeddings
+        self.search_seconds: Optional[float] = None
+        self._future: Optional[Future] = None
+        self._claimed = False
+        self._lock = threading.Lock()
+
+    def _search(self) -> List[QueryResult]:
+        start = time.perf_counter()
+        try:
+            if self.query_embeddings is not None:
+                return run_search(self.question, query_embeddings=self.query_embeddings, **self.params)
+            return run_search(self.question, **self.params)
+        finally:
+            self.search_seconds = time.perf_counter() - start
+
+    def start(self) -> "RetrievalPrefetch":
+        """Start the search in the background.
+
+        Returns:
+            The prefetch itself
+        """
+        global _prefetch_executor
+        if _prefetch_executor is None:
+            _prefetch_executor = ThreadPoolExecutor(
+                max_workers=settings.PREFETCH_WORKERS,
+                thread_name_prefix="retrieval-prefetch"
+            )
+        self._future = _prefetch_executor.submit(bind_context(self._search))
+        self.stats.record("started")
+        return self
+
+    def claim(self, query: str, **params: Any) -> Optional[List[QueryResult]]:
+        """Get the prefetched results for a tool call, if they answer it.
+
+        Only the first tool call can claim the prefetch; it must use the same
+        retrieval parameters and a query close enough to the question.
+
+        Args:
+            query: Query of the tool call
+            **params: collection and collections of the tool call
+
+        Returns:
+            Prefetched results, or None if the tool must search itself
+        """
+        with self._lock:
+            if self._claimed or self._future is None:
+                return None
+            self._claimed = True
+
+        similarity = query_similarity(query, self.question)
+        if params != self.params or similarity < self.min_similarity:
+            self.stats.record("misses")
+            logger.info("prefetch_miss", similarity=round(similarity, 3))
+            return None
+
+        wait_start = time.perf_counter()
+        try:
+            results = self._future.result()
+        except Exception as e:
+            self.stats.record("misses")
+            logger.error("prefetch_failed", error=str(e))
+            return None
+        waited = time.perf_counter() - wait_start
+        saved = max(0.0, (self.search_seconds or 0.0) - waited)
+        self.stats.record("hits", saved)
+        logger.info("prefetch_hit", similarity=round(similarity, 3), saved_ms=round(1000 * saved, 1))
+        return results
+
+    def finish(self) -> None:
+        """Record the prefetch as unused if no tool call claimed it."""
+        with self._lock:
+            if self._claimed or self._future is None:
+                return
+            self._claimed = True
+        self.stats.record("unused")
+
+
+def get_prefetch_stats() -> PrefetchStats:
+    """Get the prefetch stats instance.
+
+    Returns:
+        Prefetch stats instance
+    """
+    return PrefetchStats.get_instance()
@@ -0,0 +1,440 @@
+"""Online reindex of a collection behind an alias.
+
+Changing the embedding dimension or the HNSW parameters of a collection
+means rebuilding its index. A reindex builds a new collection while the
+current one keeps serving queries:
+
+1. The new collection is registered as a mirror of the current one, so
+   every write and delete from then on is applied to both (dual-write),
+   and the document registry records are copied in the same transaction.
+2. The stored chunks are copied page by page at a bounded rate. Their
+   vectors are shortened when the new dimension is smaller and embedded
+   again from the stored texts when it is larger (or with reembed).
+3. A reconciliation pass removes chunks deleted from the current
+   collection during the copy and copies any chunk it missed.
+4. The alias (the name clients query) is switched to the new collection
+   in one SQLite transaction. The collections then mirror each other, so
+   rollback (switching the alias back) loses no write until finalize.
+
+Aliases and mirrors are stored in the document registry database, so a
+reindex run from the command line is seen by the API process.
+
+Usage:
+    python -m adriacb_galtea.core.reindex <alias> [--dimensions N] [--reembed]
+        [--max-chunks-per-second N] [--swap]
+"""
+from typing import Any, ClassVar, Dict, List, Optional
+import argparse
+import json
+import threading
+import time
+
+from .config.settings import settings
+from .document_registry import DocumentRegistry, get_document_registry
+from .vector_store import ChromaVectorStore, get_chroma_client, get_collection_cache, validate_collection_name
+from ..utils.logging import get_logger
+
+logger = get_logger(__name__)
+
+
+class ReindexError(Exception):
+    """Raised when a reindex cannot start or an alias cannot be switched."""
+
+
+class ReindexJob:
+    """Build of a new collection for an alias, copied from its current collection."""
+
+    def __init__(
+        self,
+        alias: str,
+        source: ChromaVectorStore,
+        target: ChromaVectorStore,
+        reembed: bool = False,
+        max_chunks_per_second: Optional[float] = None,
+        batch_size: Optional[int] = None,
+        auto_swap: bool = False,
+        registry: Optional[DocumentRegistry] = None
+    ):
+        """Initialize the job; call start() or run() to build the collection.
+
+        Args:
+            alias: Alias switched to the new collection
+            source: Vector store of the collection the alias points to
+            target: Vector store of the new collection
+            reembed: Whether to embed every chunk again instead of reusing its vector
+            max_chunks_per_second: Copy rate limit. Defaults to
+                settings.REINDEX_MAX_CHUNKS_PER_SECOND (0 for no limit).
+            batch_size: Chunks copied at a time. Defaults to settings.REINDEX_BATCH_SIZE.
+            auto_swap: Whether to switch the alias as soon as the build is ready
+            registry: Registry holding aliases and mirrors. Defaults to the shared registry.
+        """
+        self.alias = alias
+        self.source = source
+        self.target = target
+        self.reembed = reembed
+        self.max_chunks_per_second = (
+            settings.REINDEX_MAX_CHUNKS_PER_SECOND if max_chunks_per_second is None else max_chunks_per_second
+        )
+        self.batch_size = batch_size or settings.REINDEX_BATCH_SIZE
+        self.auto_swap = auto_swap
+        self.registry = registry or get_document_registry()
+        self.state = "pending"
+        self.error: Optional[str] = None
+        self.copied = 0
+        self.reconciled_added = 0
+        self.reconciled_removed = 0
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self._cancelled = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> "ReindexJob":
+        """Run the build in a background thread.
+
+        Returns:
+            The job itself
+        """
+        self._thread = threading.Thread(target=self.run, name=f"reindex-{self.alias}", daemon=True)
+        self._thread.start()
+        return self
+
+    def join(self, timeout: Optional[float] = None) -> None:
+        """Wait for a background build to finish."""
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def cancel(self) -> None:
+        """Stop the build; the partial collection is left for cleanup."""
+        self._cancelled.set()
+
+    def run(self) -> None:
+        """Build the new collection: mirror, copy, reconcile and optionally swap."""
+        self.started_at = time.time()
+        try:
+            self.state = "building"
+            self.registry.add_mirror(self.source.collection_name, self.target.collection_name, reembed=self.reembed)
+            logger.info(
+                "reindex_started",
+                alias=self.alias,
+                source=self.source.collection_name,
+                target=self.target.collection_name,
+                target_dimensions=self.target.embedding_dimensions
+            )
+            started = time.perf_counter()
+            for ids in self.source.iter_ids(self.batch_size):
+                self._check_cancelled()
+                self.copied += self._copy(ids)
+                self._throttle(started)
+
+            self.state = "reconciling"
+            self._reconcile()
+            self.state = "ready"
+            logger.info(
+                "reindex_ready",
+                alias=self.alias,
+                target=self.target.collection_name,
+                copied=self.copied,
+                reconciled_added=self.reconciled_added,
+                reconciled_removed=self.reconciled_removed,
+                seconds=round(time.perf_counter() - started, 3)
+            )
+            if self.auto_swap:
+                self.swap()
+        except Exception as e:
+            self.state = "cancelled" if self._cancelled.is_set() else "failed"
+            self.error = str(e)
+            self.registry.remove_mirror(self.source.collection_name, self.target.collection_name)
+            logger.error("reindex_failed", alias=self.alias, state=self.state, error=str(e))
+        finally:
+            self.finished_at = time.time()
+
+    def _check_cancelled(self) -> None:
+        if self._cancelled.is_set():
+            raise ReindexError("Reindex cancelled")
+
+    def _copy(self, ids: List[str]) -> int:
+        """Copy chunks by ID from the source to the target."""
+        page = self.source._collection.get(ids=ids, include=["embeddings", "documents", "metadatas"])
+        self.target.upsert_embedded(
+            page["ids"],
+            page["documents"],
+            page["metadatas"],
+            page["embeddings"],
+            reembed=self.reembed
+        )
+        return len(page["ids"])
+
+    def _throttle(self, started: float) -> None:
+        """Sleep so the copy stays under max_chunks_per_second."""
+        if self.max_chunks_per_second <= 0:
+            return
+        ahead = self.copied / self.max_chunks_per_second - (time.perf_counter() - started)
+        if ahead > 0:
+            self._cancelled.wait(ahead)
+
+    def _reconcile(self) -> None:
+        """Remove chunks deleted from the source during the copy and copy missed ones.
+
+        Deletes and upserts after the mirror was added are already applied to
+        the target; this catches a chunk copied from a page read just before
+        it was deleted, or replaced, in the source.
+        """
+        for ids in self.target.iter_ids(self.batch_size):
+            self._check_cancelled()
+            present = set(self.source._collection.get(ids=ids, include=[])["ids"])
+            stale = [chunk_id for chunk_id in ids if chunk_id not in present]
+            if stale:
+                self.target._collection.delete(ids=stale)
+                self.reconciled_removed += len(stale)
+        for ids in self.source.iter_ids(self.batch_size):
+            self._check_cancelled()
+            present = set(self.target._collection.get(ids=ids, include=[])["ids"])
+            missing = [chunk_id for chunk_id in ids if chunk_id not in present]
+            if missing:
+                self.reconciled_added += self._copy(missing)
+
+    def swap(self) -> Dict[str, Any]:
+        """Switch the alias to the new collection.
+
+        The new collection then also mirrors its changes back into the old
+        one, so a rollback loses no write until finalize().
+
+        Returns:
+            The new alias record
+
+        Raises:
+            ReindexError: If the build is not ready
+        """
+        if self.state != "ready":
+            raise ReindexError(f"Reindex of {self.alias!r} is {self.state}, not ready")
+        self.registry.add_mirror(self.target.collection_name, self.source.collection_name, reembed=self.reembed)
+        record = self.registry.set_alias(self.alias, self.target.collection_name)
+        self.state = "swapped"
+        logger.info("reindex_swapped", alias=self.alias, collection=self.target.collection_name)
+        return record
+
+    def stats(self) -> Dict[str, Any]:
+        """Get the progress of the job.
+
+        Returns:
+            Dictionary with the alias, collections, state, chunk counts and timing
+        """
+        elapsed = (self.finished_at or time.time()) - self.started_at if self.started_at else 0.0
+        return {
+            "alias": self.alias,
+            "source": self.source.collection_name,
+            "target": self.target.collection_name,
+            "target_dimensions": self.target.embedding_dimensions,
+            "reembed": self.reembed,
+            "state": self.state,
+            "error": self.error,
+            "copied": self.copied,
+            "reconciled_added": self.reconciled_added,
+            "reconciled_removed": self.reconciled_removed,
+            "max_chunks_per_second": self.max_chunks_per_second,
+            "seconds": round(elapsed, 3),
+            "chunks_per_second": round(self.copied / elapsed, 2) if elapsed else None,
+        }
+
+
+class Reindexer:
+    """Start reindex jobs and switch, roll back and finalize collection aliases."""
+
+    _instance: ClassVar[Optional["Reindexer"]] = None
+
+    @classmethod
+    def get_instance(cls) -> "Reindexer":
+        """Get the singleton instance of the reindexer.
+
+        Returns:
+            Reindexer instance
+        """
+        if cls._instance is None:
+            cls._instance = cls()
+        return cls._instance
+
+    def __init__(self, registry: Optional[DocumentRegistry] = None):
+        """Initialize the reindexer.
+
+        Args:
+            registry: Registry holding aliases and mirrors. Defaults to the shared registry.
+        """
+        self.registry = registry or get_document_registry()
+        self.jobs: Dict[str, ReindexJob] = {}
+        self._lock = threading.Lock()
+
+    def start(
+        self,
+        alias: str,
+        embedding_dimensions: Optional[int] = None,
+        hnsw_params: Optional[Dict[str, Any]] = None,
+        reembed: bool = False,
+        max_chunks_per_second: Optional[float] = None,
+        auto_swap: bool = False,
+        background: bool = True
+    ) -> ReindexJob:
+        """Build a new collection for an alias.
+
+        Args:
+            alias: Alias (or plain collection name) to reindex
+            embedding_dimensions: Embedding dimension of the new collection.
+                Defaults to the current collection's.
+            hnsw_params: HNSW parameters of the new collection. Defaults to the current collection's.
+            reembed: Whether to embed every chunk again instead of reusing its vector
+            max_chunks_per_second: Copy rate limit (see ReindexJob)
+            auto_swap: Whether to switch the alias as soon as the build is ready
+            background: Whether to build in a background thread
+
+        Returns:
+            The reindex job
+
+        Raises:
+            ReindexError: If a reindex of the alias is already running
+            CollectionNotFound: If the alias's collection does not exist
+        """
+        alias = validate_collection_name(alias)
+        with self._lock:
+            running = self.jobs.get(alias)
+            if running is not None and running.state in ("pending", "building", "reconciling"):
+                raise ReindexError(f"A reindex of {alias!r} is already {running.state}")
+
+            source = get_collection_cache().get(self.registry.resolve_alias(alias), create=False)
+            target_name = validate_collection_name(f"{alias}.r{time.strftime('%Y%m%d%H%M%S')}")
+            target = ChromaVectorStore(
+                target_name,
+                hnsw_params={**source.hnsw_params, **(hnsw_params or {})},
+                embedding_dimensions=embedding_dimensions or source.embedding_dimensions
+            )
+            if target.get_stats()["count"]:
+                raise ReindexError(f"Collection {target_name!r} already exists")
+            job = ReindexJob(
+                alias,
+                source,
+                target,
+                reembed=reembed,
+                max_chunks_per_second=max_chunks_per_second,
+                auto_swap=auto_swap,
+                registry=self.registry
+            )
+            self.jobs[alias] = job
+        if background:
+            job.start()
+        else:
+            job.run()
+        return job
+
+    def status(self, alias: str) -> Dict[str, Any]:
+        """Get the alias and the progress of its last reindex in this process.
+
+        Args:
+            alias: Alias name
+
+        Returns:
+            Dictionary with the alias record (None for a plain collection) and the job stats
+        """
+        job = self.jobs.get(alias)
+        return {
+            "alias": self.registry.get_alias(alias),
+            "job": job.stats() if job is not None else None,
+        }
+
+    def swap(self, alias: str) -> Dict[str, Any]:
+        """Switch an alias to the collection built by its reindex.
+
+        Args:
+            alias: Alias name
+
+        Returns:
+            The new alias record
+
+        Raises:
+            ReindexError: If no reindex of the alias is ready
+        """
+        job = self.jobs.get(alias)
+        if job is None:
+            raise ReindexError(f"No reindex of {alias!r} in this process")
+        return job.swap()
+
+    def rollback(self, alias: str) -> Dict[str, Any]:
+        """Switch an alias back to its previous collection.
+
+        Args:
+            alias: Alias name
+
+        Returns:
+            The new alias record
+
+        Raises:
+            ReindexError: If the alias has no previous collection
+        """
+        record = self.registry.get_alias(alias)
+        if record is None or not record["previous"] or record["previous"] == record["collection"]:
+            raise ReindexError(f"Alias {alias!r} has no previous collection")
+        record = self.registry.set_alias(alias, record["previous"])
+        job = self.jobs.get(alias)
+        if job is not None and job.state == "swapped":
+            job.state = "rolled_back"
+        logger.info("reindex_rolled_back", alias=alias, collection=record["collection"])
+        return record
+
+    def finalize(self, alias: str, drop_previous: bool = False) -> Dict[str, Any]:
+        """Stop mirroring between an alias's collection and its previous one.
+
+        Args:
+            alias: Alias name
+            drop_previous: Whether to delete the previous collection and its registry records
+
+        Returns:
+            Dictionary with the alias record and the dropped collection, if any
+
+        Raises:
+            ReindexError: If the alias does not exist
+        """
+        record = self.registry.get_alias(alias)
+        if record is None:
+            raise ReindexError(f"Alias {alias!r} does not exist")
+        current, previous = record["collection"], record["previous"]
+        self.registry.remove_mirror(current, previous)
+        self.registry.remove_mirror(previous, current)
+        dropped = None
+        if drop_previous and previous and previous != current:
+            self.registry.delete_collection(previous)
+            get_chroma_client().delete_collection(previous)
+            get_collection_cache().discard(previous)
+            dropped = previous
+        logger.info("reindex_finalized", alias=alias, collection=current, dropped=dropped)
+        return {"alias": record, "dropped": dropped}
+
+
+def get_reindexer() -> Reindexer:
+    """Get the reindexer instance.
+
+    Returns:
+        Reindexer instance
+    """
+    return Reindexer.get_instance()
+
+
+def main() -> None:
+    """Reindex a collection from the command line."""
+    parser = argparse.ArgumentParser(description="Online reindex of a collection behind an alias")
+    parser.add_argument("alias", help="Alias (or collection name) to reindex")
+    parser.add_argument("--dimensions", type=int, help="Embedding dimension of the new collection")
+    parser.add_argument("--reembed", action="store_true", help="Embed every chunk again from its text")
+    parser.add_argument("--max-chunks-per-second", type=float, help="Copy rate limit (0 for none)")
+    parser.add_argument("--swap", action="store_true", help="Switch the alias once the build is ready")
+    args = parser.parse_args()
+
+    job = get_reindexer().start(
+        args.alias,
+        embedding_dimensions=args.dimensions,
+        reembed=args.reembed,
+        max_chunks_per_second=args.max_chunks_per_second,
+        auto_swap=args.swap,
+        background=False
+    )
+    print(json.dumps(job.stats(), indent=2))
+
+
+if __name__ == "__main__":
+    main()
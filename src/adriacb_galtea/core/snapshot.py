@@ -0,0 +1,362 @@
+"""Snapshot export/import for the vector store.
+
+A snapshot is a directory holding one collection in columnar form:
+
+- ids.jsonl, texts.jsonl, metadatas.jsonl: one JSON value per chunk, in order
+- vectors.f32: the embeddings as a row-major little-endian float32 matrix
+- registry.jsonl: the document registry records of the collection
+- manifest.json: format version, collection, count, dimensions, HNSW
+  parameters and the SHA-256 checksum and size of every file
+
+Export streams the collection page by page, so memory stays bounded by the
+page size. Import verifies the checksums and upserts the stored vectors
+directly, skipping document conversion and re-embedding. The manifest is
+written last, so a directory without one is an incomplete snapshot.
+
+Usage:
+    python -m adriacb_galtea.core.snapshot export <dir> [--collection NAME]
+    python -m adriacb_galtea.core.snapshot import <dir> [--collection NAME] [--prewarm]
+    python -m adriacb_galtea.core.snapshot verify <dir>
+"""
+from typing import Any, BinaryIO, Dict, Iterator, Optional, TextIO
+from contextlib import ExitStack
+from itertools import islice
+from pathlib import Path
+import argparse
+import hashlib
+import json
+import os
+import time
+
+import numpy as np
+
+from .config.settings import settings
+from .document_registry import DocumentRegistry, get_document_registry
+from .vector_store import ChromaVectorStore
+from ..utils.logging import get_logger
+
+logger = get_logger(__name__)
+
+SNAPSHOT_FORMAT = "adriacb-galtea-snapshot"
+SNAPSHOT_VERSION = 1
+MANIFEST_FILENAME = "manifest.json"
+IDS_FILENAME = "ids.jsonl"
+TEXTS_FILENAME = "texts.jsonl"
+METADATAS_FILENAME = "metadatas.jsonl"
+VECTORS_FILENAME = "vectors.f32"
+REGISTRY_FILENAME = "registry.jsonl"
+SNAPSHOT_FILES = (IDS_FILENAME, TEXTS_FILENAME, METADATAS_FILENAME, VECTORS_FILENAME, REGISTRY_FILENAME)
+
+
+class SnapshotError(Exception):
+    """Raised when a snapshot is incomplete, corrupt or incompatible."""
+
+
+class _HashingWriter:
+    """File writer keeping a running SHA-256 and byte count."""
+
+    def __init__(self, f: BinaryIO):
+        """Wrap a file opened for binary writing."""
+        self._f = f
+        self._digest = hashlib.sha256()
+        self.bytes = 0
+
+    def write(self, data: bytes) -> None:
+        """Write bytes, updating the checksum."""
+        self._f.write(data)
+        self._digest.update(data)
+        self.bytes += len(data)
+
+    def write_line(self, value: Any) -> None:
+        """Write a value as one JSON line."""
+        self.write(json.dumps(value, ensure_ascii=False).encode("utf-8") + b"\n")
+
+    def checksum(self) -> Dict[str, Any]:
+        """SHA-256 and size of everything written so far."""
+        return {"sha256": self._digest.hexdigest(), "bytes": self.bytes}
+
+
+def _hash_file(path: Path, block_size: int = 4 * 1024 * 1024) -> str:
+    """Compute the SHA-256 of a file, reading it in blocks."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def export_snapshot(
+    store: ChromaVectorStore,
+    path: str,
+    page_size: Optional[int] = None,
+    registry: Optional[DocumentRegistry] = None
+) -> Dict[str, Any]:
+    """Export a collection to a snapshot directory.
+
+    Args:
+        store: Vector store of the collection to export
+        path: Snapshot directory, created if needed. Existing snapshot files are overwritten.
+        page_size: Chunks read from the collection at a time. Defaults to settings.SNAPSHOT_PAGE_SIZE.
+        registry: Document registry to export records from. Defaults to the shared registry.
+
+    Returns:
+        The snapshot manifest
+    """
+    started = time.perf_counter()
+    directory = Path(path)
+    directory.mkdir(parents=True, exist_ok=True)
+    # Invalidate any previous snapshot until the new manifest is written
+    (directory / MANIFEST_FILENAME).unlink(missing_ok=True)
+    page_size = page_size or settings.SNAPSHOT_PAGE_SIZE
+    registry = registry or get_document_registry()
+    collection = store._collection
+
+    count = 0
+    dimensions = 0
+    with ExitStack() as stack:
+        writers = {
+            name: _HashingWriter(stack.enter_context(open(directory / name, "wb")))
+            for name in SNAPSHOT_FILES
+        }
+        offset = 0
+        while True:
+            page = collection.get(
+                limit=page_size,
+                offset=offset,
+                include=["embeddings", "documents", "metadatas"]
+            )
+            ids = page["ids"]
+            if not ids:
+                break
+            vectors = np.asarray(page["embeddings"], dtype="<f4")
+            if not dimensions:
+                dimensions = vectors.shape[1]
+            elif vectors.shape[1] != dimensions:
+                raise SnapshotError(f"Inconsistent embedding dimensions: {vectors.shape[1]} != {dimensions}")
+
+            writers[VECTORS_FILENAME].write(np.ascontiguousarray(vectors).tobytes())
+            for chunk_id, text, metadata in zip(ids, page["documents"], page["metadatas"]):
+                writers[IDS_FILENAME].write_line(chunk_id)
+                writers[TEXTS_FILENAME].write_line(text)
+                writers[METADATAS_FILENAME].write_line(metadata)
+            count += len(ids)
+            offset += len(ids)
+            logger.info("snapshot_export_progress", collection=store.collection_name, chunks=count)
+
+        documents = 0
+        for record in registry.iter_documents(collection=store.collection_name):
+            writers[REGISTRY_FILENAME].write_line(record)
+            documents += 1
+
+        files = {name: writer.checksum() for name, writer in writers.items()}
+
+    manifest = {
+        "format": SNAPSHOT_FORMAT,
+        "version": SNAPSHOT_VERSION,
+        "collection": store.collection_name,
+        "count": count,
+        "documents": documents,
+        "dimensions": dimensions,
+        "dtype": "float32",
+        "hnsw": store.hnsw_params,
+        "created_at": time.time(),
+        "files": files,
+    }
+    temp_path = directory / f"{MANIFEST_FILENAME}.tmp"
+    temp_path.write_text(json.dumps(manifest, indent=2))
+    os.replace(temp_path, directory / MANIFEST_FILENAME)
+
+    logger.info(
+        "snapshot_exported",
+        collection=store.collection_name,
+        path=str(directory),
+        chunks=count,
+        documents=documents,
+        seconds=round(time.perf_counter() - started, 3)
+    )
+    return manifest
+
+
+def read_manifest(path: str) -> Dict[str, Any]:
+    """Read and check the manifest of a snapshot.
+
+    Args:
+        path: Snapshot directory
+
+    Returns:
+        The snapshot manifest
+
+    Raises:
+        SnapshotError: If the manifest is missing or of an unsupported format
+    """
+    manifest_path = Path(path) / MANIFEST_FILENAME
+    if not manifest_path.exists():
+        raise SnapshotError(f"No manifest in {path}: the snapshot is missing or incomplete")
+    manifest = json.loads(manifest_path.read_text())
+    if manifest.get("format") != SNAPSHOT_FORMAT or manifest.get("version") != SNAPSHOT_VERSION:
+        raise SnapshotError(
+            f"Unsupported snapshot format {manifest.get('format')!r} version {manifest.get('version')!r}"
+        )
+    return manifest
+
+
+def verify_snapshot(path: str) -> Dict[str, Any]:
+    """Verify the size and checksum of every snapshot file.
+
+    Args:
+        path: Snapshot directory
+
+    Returns:
+        The snapshot manifest
+
+    Raises:
+        SnapshotError: If a file is missing, truncated or corrupt
+    """
+    directory = Path(path)
+    manifest = read_manifest(path)
+    for name, expected in manifest["files"].items():
+        file_path = directory / name
+        if not file_path.exists():
+            raise SnapshotError(f"Missing snapshot file {name}")
+        if file_path.stat().st_size != expected["bytes"]:
+            raise SnapshotError(f"Snapshot file {name} has {file_path.stat().st_size} bytes, expected {expected['bytes']}")
+        if _hash_file(file_path) != expected["sha256"]:
+            raise SnapshotError(f"Checksum mismatch for snapshot file {name}")
+
+    vector_bytes = manifest["count"] * manifest["dimensions"] * 4
+    if manifest["files"][VECTORS_FILENAME]["bytes"] != vector_bytes:
+        raise SnapshotError(f"Vector file size does not match {manifest['count']} x {manifest['dimensions']} float32")
+    return manifest
+
+
+def _read_lines(f: TextIO) -> Iterator[Any]:
+    """Yield the JSON values of a JSON lines file."""
+    for line in f:
+        yield json.loads(line)
+
+
+def import_snapshot(
+    store: ChromaVectorStore,
+    path: str,
+    batch_size: Optional[int] = None,
+    registry: Optional[DocumentRegistry] = None,
+    verify: bool = True
+) -> Dict[str, Any]:
+    """Import a snapshot into a collection without re-embedding.
+
+    Chunks are upserted with their stored vectors, so importing into a
+    collection that already holds them is idempotent. Registry records are
+    imported into the target collection.
+
+    Args:
+        store: Vector store of the target collection
+        path: Snapshot directory
+        batch_size: Chunks per upsert. Defaults to the writer's batch size.
+        registry: Document registry to import records into. Defaults to the shared registry.
+        verify: Whether to verify file checksums before importing
+
+    Returns:
+        Dictionary with the collection, chunk and document counts, seconds
+        taken and write statistics
+
+    Raises:
+        SnapshotError: If the snapshot is invalid or its dimensions do not
+            match the existing collection
+    """
+    started = time.perf_counter()
+    directory = Path(path)
+    manifest = verify_snapshot(path) if verify else read_manifest(path)
+    count, dimensions = manifest["count"], manifest["dimensions"]
+    registry = registry or get_document_registry()
+
+    existing = store.get_stats()["dimensions"] or store.embedding_dimensions
+    if existing and count and existing != dimensions:
+        raise SnapshotError(
+            f"Snapshot has {dimensions}-dimensional vectors but collection "
+            f"{store.collection_name!r} has {existing}"
+        )
+
+    writer = store.writer(batch_size=batch_size)
+    if count:
+        vectors = np.memmap(directory / VECTORS_FILENAME, dtype="<f4", mode="r", shape=(count, dimensions))
+        with open(directory / IDS_FILENAME, encoding="utf-8") as ids_file, \
+                open(directory / TEXTS_FILENAME, encoding="utf-8") as texts_file, \
+                open(directory / METADATAS_FILENAME, encoding="utf-8") as metadatas_file:
+            rows = zip(_read_lines(ids_file), _read_lines(texts_file), _read_lines(metadatas_file))
+            start = 0
+            while start < count:
+                batch = list(islice(rows, writer.batch_size))
+                if not batch:
+                    raise SnapshotError(f"Snapshot columns hold fewer than {count} chunks")
+                writer.add(
+                    [
+                        {"id": chunk_id, "content": text, "metadata": metadata}
+                        for chunk_id, text, metadata in batch
+                    ],
+                    embeddings=vectors[start:start + len(batch)].tolist()
+                )
+                start += len(batch)
+    write_stats = writer.close()
+
+    documents = 0
+    with open(directory / REGISTRY_FILENAME, encoding="utf-8") as registry_file:
+        for record in _read_lines(registry_file):
+            registry.upsert(
+                record["doc_id"],
+                record["source"],
+                record["content_hash"],
+                record["chunk_ids"],
+                collection=store.collection_name
+            )
+            documents += 1
+
+    seconds = time.perf_counter() - started
+    logger.info(
+        "snapshot_imported",
+        collection=store.collection_name,
+        path=str(directory),
+        chunks=count,
+        documents=documents,
+        seconds=round(seconds, 3)
+    )
+    return {
+        "collection": store.collection_name,
+        "chunks": count,
+        "documents": documents,
+        "seconds": round(seconds, 3),
+        "write": write_stats,
+    }
+
+
+def main() -> None:
+    """Export, import or verify a snapshot from the command line."""
+    parser = argparse.ArgumentParser(description="Vector store snapshots")
+    parser.add_argument("command", choices=["export", "import", "verify"])
+    parser.add_argument("path", help="Snapshot directory")
+    parser.add_argument("--collection", help="Collection name (defaults to the snapshot's or the default collection)")
+    parser.add_argument("--no-verify", action="store_true", help="Skip checksum verification on import")
+    parser.add_argument("--prewarm", action="store_true", help="Prewarm the index after import")
+    args = parser.parse_args()
+
+    if args.command == "verify":
+        manifest = verify_snapshot(args.path)
+        print(json.dumps({key: value for key, value in manifest.items() if key != "files"}, indent=2))
+    elif args.command == "export":
+        manifest = export_snapshot(ChromaVectorStore(args.collection), args.path)
+        print(json.dumps({key: value for key, value in manifest.items() if key != "files"}, indent=2))
+    else:
+        manifest = read_manifest(args.path)
+        # A new collection is created with the HNSW parameters and embedding dimension of the snapshot
+        store = ChromaVectorStore(
+            args.collection or manifest["collection"],
+            hnsw_params=manifest["hnsw"],
+            embedding_dimensions=manifest["dimensions"] or None
+        )
+        result = import_snapshot(store, args.path, verify=not args.no_verify)
+        if args.prewarm:
+            result["prewarm"] = store.prewarm()
+        print(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,13 +1,14 @@
 """Tools for the RAG application."""
 from typing import List, Dict, Any
+from langchain_core.runnables import RunnableConfig
 from langchain_core.tools import tool
 from ..utils.logging import get_logger
-from .vector_store import get_vector_store
+from .prefetch import run_search
 
 logger = get_logger(__name__)
 
 @tool
-def retrieve_documents(query: str) -> List[Dict[str, Any]]:
+def retrieve_documents(query: str, config: RunnableConfig) -> List[Dict[str, Any]]:
     """Use it always to answer questions about VOLKSWAGEN.
 
     It returns the most similar documents along with their metadata and similarity scores.
@@ -18,15 +19,22 @@ def retrieve_documents(query: str) -> List[Dict[str, Any]]:
     Returns:
         List of relevant documents with their content, metadata, and similarity scores
     """
-    try:
-        # Get vector store instance
-        vector_store = get_vector_store()
-    except Exception as e:
-        logger.error(f"Error retrieving documents: {str(e)}")
-        return []
-        
-    # Search for documents
-    results = vector_store.search(query, k=5)
+    # Collection(s) selected by the request, if any
+    configurable = config.get("configurable", {}) if config else {}
+    params = {
+        "collection": configurable.get("collection"),
+        "collections": configurable.get("collections")
+    }
+    
+    # Serve the speculative search started with the request, if it answers this query
+    prefetch = configurable.get("prefetch")
+    results = prefetch.claim(query, **params) if prefetch is not None else None
+    if results is None:
+        try:
+            results = run_search(query, **params)
+        except ValueError as e:
+            logger.error(f"Error retrieving documents: {str(e)}")
+            return []
     logger.info(f"Results: {results}")
     # Format results for the agent
     return [
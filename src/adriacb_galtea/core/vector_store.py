@@ -1,7 +1,14 @@
 """Vector store module for the RAG application."""
 from abc import ABC, abstractmethod
-from typing import List, Dict, Any, Optional, Protocol, runtime_checkable, ClassVar, Callable
+from typing import List, Dict, Any, Iterator, Optional, Protocol, runtime_checkable, ClassVar, Callable, Tuple
+from collections import OrderedDict
+from contextlib import contextmanager
+from concurrent.futures import Future, ThreadPoolExecutor
 import os
+import re
+import sqlite3
+import threading
+import time
 from pathlib import Path
 import structlog
 
@@ -10,10 +17,13 @@ from langchain_core.documents import Document as LangChainDocument
 from langchain_chroma import Chroma
 from chromadb.config import Settings
 import chromadb
+from chromadb.errors import NotFoundError
 
 from .base import Document, QueryResult, VectorStore
-from .embeddings import get_embeddings
+from .document_registry import get_document_registry
+from .embeddings import FULL_DIMENSIONS, get_embeddings, truncate_embeddings
 from .config.settings import settings
+from ..utils.tracing import bind_context, span
 
 # Get the vector store path from settings
 VECTOR_STORE_PATH = settings.VECTOR_STORE_PATH
@@ -64,98 +74,646 @@ class VectorStore(ABC):
         pass
 
 
+# HNSW parameter names mapped to Chroma's legacy collection metadata keys
+# and to the keys of the collection configuration (chromadb >= 1.0)
+HNSW_METADATA_KEYS = {
+    "space": "hnsw:space",
+    "construction_ef": "hnsw:construction_ef",
+    "search_ef": "hnsw:search_ef",
+    "M": "hnsw:M",
+    "batch_size": "hnsw:batch_size",
+    "sync_threshold": "hnsw:sync_threshold",
+}
+HNSW_CONFIGURATION_KEYS = {
+    "space": "space",
+    "construction_ef": "ef_construction",
+    "search_ef": "ef_search",
+    "M": "max_neighbors",
+    "batch_size": "batch_size",
+    "sync_threshold": "sync_threshold",
+}
+
+# Collection metadata key recording the dimension of the collection's embeddings
+EMBEDDING_DIMENSIONS_METADATA_KEY = "embedding_dimensions"
+
+
+def default_hnsw_params() -> Dict[str, Any]:
+    """Get the HNSW parameters used for new collections.
+    
+    Returns:
+        Dictionary of HNSW parameters from settings
+    """
+    return {
+        "space": settings.HNSW_SPACE,
+        "construction_ef": settings.HNSW_CONSTRUCTION_EF,
+        "search_ef": settings.HNSW_SEARCH_EF,
+        "M": settings.HNSW_M,
+        "batch_size": settings.HNSW_BATCH_SIZE,
+        "sync_threshold": settings.HNSW_SYNC_THRESHOLD,
+    }
+
+
+def get_vector_store_path() -> Path:
+    """Get the directory holding the persistent vector store.
+    
+    Returns:
+        VECTOR_STORE_PATH resolved against the project root
+    """
+    # Get the project root directory (three levels up from src)
+    project_root = Path(__file__).parent.parent.parent.parent
+    return project_root / VECTOR_STORE_PATH
+
+
+# Chroma collection names: 3-512 characters from [a-zA-Z0-9._-], starting
+# and ending with an alphanumeric character
+COLLECTION_NAME_PATTERN = re.compile(r"^[a-zA-Z0-9][a-zA-Z0-9._-]{1,510}[a-zA-Z0-9]$")
+
+
+def validate_collection_name(name: str) -> str:
+    """Check that a collection name is valid.
+    
+    Args:
+        name: Collection name, e.g. a tenant or corpus identifier
+    
+    Returns:
+        The collection name
+    
+    Raises:
+        ValueError: If the name is not a valid collection name
+    """
+    if not COLLECTION_NAME_PATTERN.match(name):
+        raise ValueError(
+            f"Invalid collection name {name!r}: expected 3-512 characters from "
+            "[a-zA-Z0-9._-], starting and ending with a letter or digit"
+        )
+    return name
+
+
+class CollectionNotFound(LookupError):
+    """Raised when a read opens a collection that does not exist."""
+
+
+# Chroma's own database; segment locations and chunk row IDs are only
+# available from its private schema, read as laid out by these releases
+CHROMA_DATABASE_FILENAME = "chroma.sqlite3"
+CHROMA_SCHEMA_VERSIONS = ((0, 4), (2, 0))
+CHROMA_SCHEMA_COLUMNS = {
+    "segments": {"id", "collection", "scope"},
+    "embeddings": {"id", "segment_id", "embedding_id"},
+}
+
+
+class ChromaSchemaUnsupported(RuntimeError):
+    """Raised when chroma.sqlite3 does not have the layout read by read_chroma_database."""
+
+
+@contextmanager
+def read_chroma_database(path: Path) -> Iterator[sqlite3.Connection]:
+    """Open Chroma's database read-only, after checking it has the expected layout.
+    
+    This is the only place that reads Chroma's private schema; the chromadb
+    release must be in CHROMA_SCHEMA_VERSIONS and the tables must have the
+    columns of CHROMA_SCHEMA_COLUMNS.
+    
+    Args:
+        path: Vector store directory
+        
+    Yields:
+        Read-only connection to chroma.sqlite3
+        
+    Raises:
+        FileNotFoundError: If there is no local chroma.sqlite3
+        ChromaSchemaUnsupported: If the release or the schema is not the expected one
+    """
+    db_path = path / CHROMA_DATABASE_FILENAME
+    if not db_path.exists():
+        raise FileNotFoundError(db_path)
+    version = tuple(int(part) for part in re.findall(r"\d+", chromadb.__version__)[:2])
+    low, high = CHROMA_SCHEMA_VERSIONS
+    if not low <= version < high:
+        raise ChromaSchemaUnsupported(
+            f"chromadb {chromadb.__version__} is not supported for reading {CHROMA_DATABASE_FILENAME} "
+            f"(supported: {'.'.join(map(str, low))} to below {'.'.join(map(str, high))})"
+        )
+    conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+    try:
+        for table, columns in CHROMA_SCHEMA_COLUMNS.items():
+            found = {row[1] for row in conn.execute(f"PRAGMA table_info({table})")}
+            missing = columns - found
+            if missing:
+                raise ChromaSchemaUnsupported(
+                    f"{CHROMA_DATABASE_FILENAME} table {table!r} lacks columns {sorted(missing)} "
+                    f"with chromadb {chromadb.__version__}"
+                )
+        yield conn
+    finally:
+        conn.close()
+
+
+_client: Optional[Any] = None
+_client_lock = threading.Lock()
+
+
+def get_chroma_client() -> Any:
+    """Get the persistent Chroma client shared by all collections.
+    
+    Returns:
+        Chroma client for the vector store directory
+    """
+    global _client
+    with _client_lock:
+        if _client is None:
+            chroma_path = get_vector_store_path()
+            
+            # Log paths for debugging
+            logger.info(
+                "vector_store_paths",
+                project_root=str(chroma_path.parent.absolute()),
+                vector_store_path=VECTOR_STORE_PATH,
+                full_path=str(chroma_path.absolute()),
+                exists=chroma_path.exists()
+            )
+            
+            # Create the directory if it doesn't exist
+            if not chroma_path.exists():
+                logger.info("creating_vector_store_directory", path=str(chroma_path.absolute()))
+                chroma_path.mkdir(parents=True, exist_ok=True)
+            else:
+                logger.info("vector_store_directory_exists", path=str(chroma_path.absolute()))
+            
+            # Bound the memory of loaded indexes across all open collections
+            client_settings = Settings(anonymized_telemetry=False)
+            if settings.VECTOR_STORE_MEMORY_LIMIT_BYTES:
+                client_settings = Settings(
+                    anonymized_telemetry=False,
+                    chroma_segment_cache_policy="LRU",
+                    chroma_memory_limit_bytes=settings.VECTOR_STORE_MEMORY_LIMIT_BYTES
+                )
+            
+            logger.info("initializing_chromadb", path=str(chroma_path.absolute()))
+            _client = chromadb.PersistentClient(path=str(chroma_path), settings=client_settings)
+        return _client
+
+
+class VectorStoreWriter:
+    """Buffered writer that upserts into a ChromaVectorStore in batches.
+    
+    Documents are buffered by ID (so duplicate IDs are collapsed, last write
+    wins) and flushed in batches of batch_size, which lets many small
+    documents share one transaction and keeps large ones under Chroma's
+    maximum batch size. With more than one writer, batches are written
+    concurrently by a small thread pool.
+    """
+    
+    def __init__(self, store: "ChromaVectorStore", batch_size: int, writers: int = 1):
+        """Initialize the writer.
+        
+        Args:
+            store: Vector store to write to
+            batch_size: Number of documents per upsert call
+            writers: Number of concurrent writer threads
+        """
+        self._store = store
+        self.batch_size = batch_size
+        self._pending: Dict[str, Tuple[str, Dict[str, Any], Optional[List[float]]]] = {}
+        self._executor = ThreadPoolExecutor(max_workers=writers, thread_name_prefix="chroma-writer") if writers > 1 else None
+        self._futures: List[Future] = []
+        self._lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._started = time.perf_counter()
+        self.chunks_written = 0
+        self.batches_written = 0
+        self.duplicates_dropped = 0
+    
+    def add(self, documents: List[Dict[str, Any]], embeddings: Optional[List[List[float]]] = None) -> None:
+        """Buffer documents, writing full batches as they fill up.
+        
+        Args:
+            documents: Documents with id, content and metadata
+            embeddings: Optional precomputed embeddings, one per document
+        """
+        with self._lock:
+            for i, doc in enumerate(documents):
+                if doc["id"] in self._pending:
+                    self.duplicates_dropped += 1
+                self._pending[doc["id"]] = (
+                    doc["content"],
+                    doc["metadata"],
+                    embeddings[i] if embeddings is not None else None
+                )
+            while len(self._pending) >= self.batch_size:
+                self._submit(self._take(self.batch_size))
+    
+    def flush(self) -> Dict[str, Any]:
+        """Write everything still buffered and wait for in-flight batches.
+        
+        Returns:
+            Write statistics (see stats)
+        """
+        with self._lock:
+            if self._pending:
+                self._submit(self._take(len(self._pending)))
+            futures, self._futures = self._futures, []
+        for future in futures:
+            future.result()
+        return self.stats()
+    
+    def close(self) -> Dict[str, Any]:
+        """Flush and release the writer threads.
+        
+        Returns:
+            Write statistics (see stats)
+        """
+        try:
+            return self.flush()
+        finally:
+            if self._executor is not None:
+                self._executor.shutdown(wait=True)
+    
+    def stats(self) -> Dict[str, Any]:
+        """Get write statistics.
+        
+        Returns:
+            Dictionary with chunks/batches written, duplicates dropped and chunks per second
+        """
+        elapsed = time.perf_counter() - self._started
+        return {
+            "chunks_written": self.chunks_written,
+            "batches_written": self.batches_written,
+            "duplicates_dropped": self.duplicates_dropped,
+            "seconds": round(elapsed, 3),
+            "chunks_per_second": round(self.chunks_written / elapsed, 2) if elapsed else None
+        }
+    
+    def _take(self, count: int) -> List[Tuple[str, str, Dict[str, Any], Optional[List[float]]]]:
+        """Remove up to count buffered documents in insertion order."""
+        ids = list(self._pending)[:count]
+        return [(doc_id, *self._pending.pop(doc_id)) for doc_id in ids]
+    
+    def _submit(self, batch: List[Tuple[str, str, Dict[str, Any], Optional[List[float]]]]) -> None:
+        """Write a batch inline or on the writer pool."""
+        if self._executor is None:
+            self._write(batch)
+        else:
+            self._futures.append(self._executor.submit(bind_context(self._write), batch))
+    
+    def _write(self, batch: List[Tuple[str, str, Dict[str, Any], Optional[List[float]]]]) -> None:
+        """Upsert one batch, embedding any documents without embeddings."""
+        ids = [item[0] for item in batch]
+        texts = [item[1] for item in batch]
+        metadatas = [item[2] for item in batch]
+        embeddings = [item[3] for item in batch]
+        
+        missing = [i for i, embedding in enumerate(embeddings) if embedding is None]
+        if missing:
+            with span("embedding.batch", chunks=len(missing)):
+                computed = self._store._embeddings.embed_documents([texts[i] for i in missing])
+            for i, embedding in zip(missing, computed):
+                embeddings[i] = embedding
+        
+        with span("chroma.upsert", collection=self._store.collection_name, chunks=len(ids)):
+            self._store._collection.upsert(
+                ids=ids,
+                embeddings=embeddings,
+                documents=texts,
+                metadatas=metadatas
+            )
+            # Keep collections being rebuilt from this one up to date
+            self._store.mirror_upsert(ids, texts, metadatas, embeddings)
+        with self._stats_lock:
+            self.chunks_written += len(batch)
+            self.batches_written += 1
+
+
 @runtime_checkable
 class ChromaVectorStore(Protocol):
     """Vector store implementation using ChromaDB."""
     
-    _instance: ClassVar[Optional["ChromaVectorStore"]] = None
-    
     @classmethod
-    def get_instance(cls) -> "ChromaVectorStore":
-        """Get the singleton instance of the vector store.
+    def get_instance(cls, collection_name: Optional[str] = None, create: bool = True) -> "ChromaVectorStore":
+        """Get the open vector store of a collection.
+        
+        Handles are shared through the collection cache (see CollectionCache).
+        
+        Args:
+            collection_name: Collection to use. Defaults to settings.VECTOR_STORE_DEFAULT_COLLECTION.
+            create: Whether to create the collection if it does not exist
         
         Returns:
             Vector store instance
+        
+        Raises:
+            CollectionNotFound: If create is False and the collection does not exist
         """
-        if cls._instance is None:
-            cls._instance = cls()
-        return cls._instance
+        return get_collection_cache().get(resolve_collection(collection_name), create=create)
     
-    def __init__(self, collection_name: str = "documents"):
+    def __init__(
+        self,
+        collection_name: Optional[str] = None,
+        hnsw_params: Optional[Dict[str, Any]] = None,
+        embedding_dimensions: Optional[int] = None,
+        create: bool = True
+    ):
         """Initialize the vector store.
         
         Args:
-            collection_name: Name of the collection to use
-        """
-        # Get the project root directory (three levels up from src)
-        project_root = Path(__file__).parent.parent.parent.parent
-        chroma_path = project_root / VECTOR_STORE_PATH
-        
-        # Log paths for debugging
-        logger.info(
-            "vector_store_paths",
-            project_root=str(project_root.absolute()),
-            vector_store_path=VECTOR_STORE_PATH,
-            full_path=str(chroma_path.absolute()),
-            exists=chroma_path.exists()
-        )
-        
-        # Create the directory if it doesn't exist
-        if not chroma_path.exists():
-            logger.info("creating_vector_store_directory", path=str(chroma_path.absolute()))
-            chroma_path.mkdir(parents=True, exist_ok=True)
-        else:
-            logger.info("vector_store_directory_exists", path=str(chroma_path.absolute()))
+            collection_name: Name of the collection to use. Defaults to
+                settings.VECTOR_STORE_DEFAULT_COLLECTION.
+            hnsw_params: HNSW parameters overriding the settings defaults (space,
+                construction_ef, search_ef, M, batch_size, sync_threshold). They
+                only apply when the collection is created.
+            embedding_dimensions: Embedding dimension of a new collection. Defaults
+                to settings.EMBEDDING_DIMENSIONS. Existing collections keep the
+                dimension recorded in their metadata.
+            create: Whether to create the collection if it does not exist
         
-        # Log the vector store location
-        logger.info("initializing_chromadb", path=str(chroma_path.absolute()))
+        Raises:
+            CollectionNotFound: If create is False and the collection does not exist
+        """
+        collection_name = validate_collection_name(collection_name or settings.VECTOR_STORE_DEFAULT_COLLECTION)
         
-        self._client = chromadb.PersistentClient(path=str(chroma_path))
+        self._client = get_chroma_client()
+        self._path = get_vector_store_path()
         self._collection_name = collection_name
-        self._embeddings = get_embeddings()
         
         # Create or get collection
-        self._collection = self._client.get_or_create_collection(
-            name=collection_name,
-            metadata={"hnsw:space": "cosine"}
+        params = {**default_hnsw_params(), **(hnsw_params or {})}
+        metadata = {HNSW_METADATA_KEYS[key]: value for key, value in params.items()}
+        metadata[EMBEDDING_DIMENSIONS_METADATA_KEY] = (
+            embedding_dimensions or settings.EMBEDDING_DIMENSIONS or FULL_DIMENSIONS
+        )
+        if create:
+            self._collection = self._client.get_or_create_collection(
+                name=collection_name,
+                metadata=metadata
+            )
+        else:
+            try:
+                self._collection = self._client.get_collection(name=collection_name)
+            except (NotFoundError, ValueError):
+                # chromadb < 1.0 raises ValueError for a missing collection
+                raise CollectionNotFound(f"Collection {collection_name!r} does not exist")
+        
+        # Queries and writes are embedded at the collection's dimension;
+        # collections created before it was recorded hold full vectors
+        self._embedding_dimensions = int(
+            (self._collection.metadata or {}).get(EMBEDDING_DIMENSIONS_METADATA_KEY) or FULL_DIMENSIONS
+        )
+        self._embeddings = get_embeddings(
+            self._embedding_dimensions if self._embedding_dimensions != FULL_DIMENSIONS else None
         )
         
         # Initialize LangChain Chroma
         self._store = Chroma(
             client=self._client,
             collection_name=collection_name,
-            embedding_function=self._embeddings
+            embedding_function=self._embeddings,
+            create_collection_if_not_exists=create
         )
         
         # Log successful initialization
         logger.info(
             "chromadb_initialized",
             collection_name=collection_name,
-            path=str(chroma_path.absolute())
+            path=str(self._path.absolute()),
+            embedding_dimensions=self._embedding_dimensions,
+            **self.hnsw_params
         )
     
-    def add_documents(self, documents: List[Dict[str, Any]]) -> None:
+    @property
+    def collection_name(self) -> str:
+        """Name of the collection this store reads and writes."""
+        return self._collection_name
+    
+    @property
+    def embedding_dimensions(self) -> int:
+        """Dimension of the collection's embeddings."""
+        return self._embedding_dimensions
+    
+    @property
+    def embeddings(self) -> Embeddings:
+        """Embedding model producing vectors of the collection's dimension."""
+        return self._embeddings
+    
+    @property
+    def hnsw_params(self) -> Dict[str, Any]:
+        """HNSW parameters in effect for the collection."""
+        configuration = getattr(self._collection, "configuration", None)
+        hnsw = configuration.get("hnsw") if isinstance(configuration, dict) else None
+        if hnsw:
+            return {
+                key: hnsw.get(config_key)
+                for key, config_key in HNSW_CONFIGURATION_KEYS.items()
+                if hnsw.get(config_key) is not None
+            }
+        
+        metadata = self._collection.metadata or {}
+        defaults = default_hnsw_params()
+        return {
+            key: metadata.get(metadata_key, defaults[key])
+            for key, metadata_key in HNSW_METADATA_KEYS.items()
+        }
+    
+    def set_search_ef(self, search_ef: int) -> None:
+        """Change the search_ef persisted for this collection.
+        
+        Chroma reads search_ef when a process loads the collection's index,
+        so the new value applies to processes (and workers) that open the
+        collection afterwards, not to an index this process already loaded.
+        
+        Args:
+            search_ef: Size of the dynamic candidate list used at query time
+        """
+        if self.hnsw_params.get("search_ef") == search_ef:
+            return
+        if isinstance(getattr(self._collection, "configuration", None), dict):
+            self._collection.modify(configuration={"hnsw": {"ef_search": search_ef}})
+        else:
+            # chromadb < 1.0 keeps HNSW settings in the collection metadata;
+            # the distance function cannot be modified once set
+            metadata = {
+                key: value for key, value in (self._collection.metadata or {}).items()
+                if key != HNSW_METADATA_KEYS["space"]
+            }
+            self._collection.modify(metadata={**metadata, HNSW_METADATA_KEYS["search_ef"]: search_ef})
+        logger.info("search_ef_changed", collection_name=self._collection_name, search_ef=search_ef)
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Get statistics about the collection and its HNSW index.
+        
+        The memory footprint is estimated from the hnswlib layout (vectors,
+        level-0 and upper-level links, labels); the disk size is measured
+        from the collection's vector segment directory.
+        
+        Returns:
+            Dictionary with the collection name, count, dimensions, HNSW
+            parameters in effect and index memory/disk size in bytes
+        """
+        count = self._collection.count()
+        params = self.hnsw_params
+        dimensions = 0
+        if count:
+            sample = self._collection.get(limit=1, include=["embeddings"])
+            embeddings = sample.get("embeddings")
+            if embeddings is not None and len(embeddings):
+                dimensions = len(embeddings[0])
+        
+        m = int(params.get("M") or 16)
+        bytes_per_element = (
+            dimensions * 4          # float32 vector
+            + 2 * m * 4 + 4         # level-0 links and link count
+            + 8                     # label
+            + (m * 4 + 4) / max(m - 1, 1)  # expected upper-level links
+        )
+        segment_dir = self._vector_segment_dir()
+        disk_bytes = sum(f.stat().st_size for f in segment_dir.glob("*") if f.is_file()) if segment_dir else 0
+        
+        return {
+            "collection": self._collection_name,
+            "count": count,
+            "dimensions": dimensions,
+            "embedding_dimensions": self._embedding_dimensions,
+            "hnsw": params,
+            "index_memory_bytes": int(count * bytes_per_element),
+            "index_disk_bytes": disk_bytes,
+        }
+    
+    def prewarm(self, queries: Optional[int] = None) -> Dict[str, Any]:
+        """Load the collection's index before it serves traffic.
+        
+        Reads the HNSW segment files so they are in the page cache, then
+        runs a few queries with stored vectors so Chroma loads the index
+        into memory and the first real queries do not pay for it.
+        
+        Args:
+            queries: Number of warm-up queries. Defaults to settings.PREWARM_QUERIES.
+            
+        Returns:
+            Dictionary with the collection, bytes read, warm-up queries run and seconds taken
+        """
+        started = time.perf_counter()
+        queries = settings.PREWARM_QUERIES if queries is None else queries
+        
+        bytes_read = 0
+        segment_dir = self._vector_segment_dir()
+        if segment_dir:
+            for file in segment_dir.glob("*"):
+                if file.is_file():
+                    with open(file, "rb") as f:
+                        for block in iter(lambda: f.read(4 * 1024 * 1024), b""):
+                            bytes_read += len(block)
+        
+        queries_run = 0
+        count = self._collection.count()
+        if count and queries:
+            sample = self._collection.get(limit=queries, include=["embeddings"])
+            embeddings = sample.get("embeddings")
+            if embeddings is not None and len(embeddings):
+                self._collection.query(query_embeddings=embeddings, n_results=min(5, count), include=["distances"])
+                queries_run = len(embeddings)
+        
+        seconds = time.perf_counter() - started
+        logger.info(
+            "collection_prewarmed",
+            collection_name=self._collection_name,
+            bytes_read=bytes_read,
+            queries=queries_run,
+            seconds=round(seconds, 3)
+        )
+        return {
+            "collection": self._collection_name,
+            "bytes_read": bytes_read,
+            "queries": queries_run,
+            "seconds": round(seconds, 3),
+        }
+    
+    def save(self, path: str) -> Dict[str, Any]:
+        """Export the collection to a snapshot directory (see core.snapshot).
+        
+        Args:
+            path: Snapshot directory
+            
+        Returns:
+            The snapshot manifest
+        """
+        from .snapshot import export_snapshot
+        return export_snapshot(self, path)
+    
+    def load(self, path: str) -> Dict[str, Any]:
+        """Import a snapshot into the collection without re-embedding.
+        
+        Args:
+            path: Snapshot directory
+            
+        Returns:
+            Import statistics
+        """
+        from .snapshot import import_snapshot
+        return import_snapshot(self, path)
+    
+    def _vector_segment_dir(self) -> Optional[Path]:
+        """Locate the on-disk directory of the collection's HNSW segment.
+        
+        Returns:
+            The segment directory, or None if it cannot be located
+        """
+        try:
+            with read_chroma_database(self._path) as conn:
+                row = conn.execute(
+                    "SELECT id FROM segments WHERE collection = ? AND scope = 'VECTOR'",
+                    (str(self._collection.id),)
+                ).fetchone()
+        except FileNotFoundError:
+            return None
+        except (ChromaSchemaUnsupported, sqlite3.Error) as e:
+            logger.warning("vector_segment_unavailable", collection_name=self._collection_name, error=str(e))
+            return None
+        if row is None:
+            return None
+        segment_dir = self._path / row[0]
+        return segment_dir if segment_dir.is_dir() else None
+    
+    def writer(self, batch_size: Optional[int] = None, writers: Optional[int] = None) -> VectorStoreWriter:
+        """Create a batched writer for this collection.
+        
+        Use one writer across many documents to group their upserts; call
+        close() (or flush()) when done.
+        
+        Args:
+            batch_size: Documents per upsert. Defaults to settings.VECTOR_STORE_BATCH_SIZE,
+                capped by the client's maximum batch size.
+            writers: Concurrent writer threads. Defaults to settings.VECTOR_STORE_WRITERS.
+            
+        Returns:
+            Vector store writer
+        """
+        batch_size = batch_size or settings.VECTOR_STORE_BATCH_SIZE
+        get_max_batch_size = getattr(self._client, "get_max_batch_size", None)
+        if get_max_batch_size is not None:
+            batch_size = min(batch_size, get_max_batch_size())
+        return VectorStoreWriter(self, batch_size, writers or settings.VECTOR_STORE_WRITERS)
+    
+    def add_documents(
+        self,
+        documents: List[Dict[str, Any]],
+        embeddings: Optional[List[List[float]]] = None
+    ) -> Dict[str, Any]:
         """Add documents to the vector store.
         
+        Documents are deduplicated by ID and upserted in batches no larger
+        than the backend allows.
+        
         Args:
             documents: List of documents to add
+            embeddings: Optional precomputed embeddings, one per document.
+                When given, documents are written directly without re-embedding.
+                
+        Returns:
+            Write statistics, including chunks per second
         """
-        # Convert documents to LangChain format
-        texts = []
-        metadatas = []
-        ids = []
-        
-        for doc in documents:
-            texts.append(doc["content"])
-            metadatas.append(doc["metadata"])
-            ids.append(doc["id"])
-        
-        # Add documents to vector store
-        self._store.add_texts(
-            texts=texts,
-            metadatas=metadatas,
-            ids=ids
-        )
+        writer = self.writer()
+        writer.add(documents, embeddings)
+        return writer.close()
     
     def search(self, query: str, k: int = 5) -> List[QueryResult]:
         """Search for documents in the vector store.
@@ -167,8 +725,33 @@ class ChromaVectorStore(Protocol):
         Returns:
             List of search results
         """
+        with span("embedding.query", collection=self._collection_name):
+            embedding = self._embeddings.embed_query(query)
+        return self.search_by_vector(embedding, k=k)
+    
+    def search_by_vector(self, embedding: List[float], k: int = 5) -> List[QueryResult]:
+        """Search for documents similar to a query embedding.
+        
+        Args:
+            embedding: Query embedding
+            k: Number of results to return
+            
+        Returns:
+            List of search results, most similar (lowest distance) first
+            
+        Raises:
+            ValueError: If the embedding does not have the collection's dimension
+        """
+        if len(embedding) != self._embedding_dimensions:
+            raise ValueError(
+                f"Query embedding has {len(embedding)} dimensions but collection "
+                f"{self._collection_name!r} stores {self._embedding_dimensions}"
+            )
+        
         # Search using LangChain Chroma
-        results = self._store.similarity_search_with_score(query, k=k)
+        with span("chroma.search", collection=self._collection_name, k=k) as search_span:
+            results = self._store.similarity_search_by_vector_with_relevance_scores(embedding, k=k)
+            search_span.set_attribute("results", len(results))
         
         # Convert to SearchResult format
         search_results = []
@@ -183,19 +766,376 @@ class ChromaVectorStore(Protocol):
         
         return search_results
     
-    def delete_document(self, document_id: str) -> None:
-        """Delete a document from the vector store.
+    def delete_document(self, document_id: str, keep_content_hash: Optional[str] = None) -> None:
+        """Delete all chunks of a source document in one bulk operation.
+        
+        Args:
+            document_id: ID of the source document (the doc_id chunk metadata field)
+            keep_content_hash: If given, chunks of this version of the document are
+                kept, so a replaced document can be cleaned up after its new
+                version has been written.
+        """
+        where: Dict[str, Any] = {"doc_id": document_id}
+        if keep_content_hash is not None:
+            where = {"$and": [where, {"content_hash": {"$ne": keep_content_hash}}]}
+        self._collection.delete(where=where)
+        for target, _ in self._mirrors():
+            target._collection.delete(where=where)
+    
+    def upsert_embedded(
+        self,
+        ids: List[str],
+        texts: List[str],
+        metadatas: List[Dict[str, Any]],
+        embeddings: Any,
+        reembed: bool = False
+    ) -> None:
+        """Upsert chunks carrying vectors of another collection, without mirroring.
+        
+        Longer vectors are shortened to this collection's dimension (see
+        truncate_embeddings); shorter ones, or all of them with reembed,
+        are embedded again from their texts.
+        
+        Args:
+            ids: Chunk IDs
+            texts: Chunk texts
+            metadatas: Chunk metadata
+            embeddings: Vectors of the other collection, one per chunk
+            reembed: Whether to embed the texts again regardless of dimensions
+        """
+        if not len(ids):
+            return
+        dimensions = len(embeddings[0]) if embeddings is not None and len(embeddings) else 0
+        if reembed or dimensions < self._embedding_dimensions:
+            embeddings = self._embeddings.embed_documents(list(texts))
+        elif dimensions > self._embedding_dimensions:
+            embeddings = truncate_embeddings(embeddings, self._embedding_dimensions).tolist()
+        self._collection.upsert(ids=ids, embeddings=embeddings, documents=texts, metadatas=metadatas)
+    
+    def _mirrors(self) -> List[Tuple["ChromaVectorStore", bool]]:
+        """Open the collections mirroring this one, with their reembed flag."""
+        return [
+            (get_collection_cache().get(mirror["target"]), mirror["reembed"])
+            for mirror in get_document_registry().mirrors(self._collection_name)
+        ]
+    
+    def mirror_upsert(
+        self,
+        ids: List[str],
+        texts: List[str],
+        metadatas: List[Dict[str, Any]],
+        embeddings: List[List[float]]
+    ) -> None:
+        """Apply an upsert of this collection to the collections mirroring it.
+        
+        Args:
+            ids: Chunk IDs
+            texts: Chunk texts
+            metadatas: Chunk metadata
+            embeddings: Vectors written to this collection
+        """
+        for target, reembed in self._mirrors():
+            target.upsert_embedded(ids, texts, metadatas, embeddings, reembed=reembed)
+    
+    def iter_ids(self, page_size: int = 1000) -> Iterator[List[str]]:
+        """Iterate over the chunk IDs of the collection, page by page.
+        
+        Pages are read from Chroma's metadata segment by row ID (keyset
+        pagination), so reading a page costs the same wherever it is and
+        chunks added during the iteration come last. Without a local
+        chroma.sqlite3, the collection is paged by offset instead.
+        
+        Args:
+            page_size: Number of IDs per page
+            
+        Yields:
+            Lists of chunk IDs
+            
+        Raises:
+            ChromaSchemaUnsupported: If chroma.sqlite3 does not have the expected layout
+        """
+        if not (self._path / CHROMA_DATABASE_FILENAME).exists():
+            offset = 0
+            while True:
+                ids = self._collection.get(limit=page_size, offset=offset, include=[])["ids"]
+                if not ids:
+                    return
+                offset += len(ids)
+                yield ids
+        
+        with read_chroma_database(self._path) as conn:
+            last = 0
+            while True:
+                rows = conn.execute(
+                    """
+                    SELECT e.id, e.embedding_id FROM embeddings e
+                    JOIN segments s ON e.segment_id = s.id
+                    WHERE s.collection = ? AND s.scope = 'METADATA' AND e.id > ?
+                    ORDER BY e.id LIMIT ?
+                    """,
+                    (str(self._collection.id), last, page_size)
+                ).fetchall()
+                if not rows:
+                    return
+                last = rows[-1][0]
+                yield [row[1] for row in rows]
+
+
+class CollectionCache:
+    """Bounded LRU cache of open collection handles.
+    
+    Collections (one per tenant or corpus) are opened lazily on first use.
+    When more than max_open collections are open, the least recently used
+    handle is dropped; it is transparently reopened on its next use.
+    """
+    
+    _instance: ClassVar[Optional["CollectionCache"]] = None
+    
+    @classmethod
+    def get_instance(cls) -> "CollectionCache":
+        """Get the singleton instance of the cache.
+        
+        Returns:
+            Collection cache instance
+        """
+        if cls._instance is None:
+            cls._instance = cls(settings.VECTOR_STORE_MAX_OPEN_COLLECTIONS)
+        return cls._instance
+    
+    def __init__(self, max_open: int, factory: Callable[..., ChromaVectorStore] = ChromaVectorStore):
+        """Initialize the cache.
+        
+        Args:
+            max_open: Maximum number of open collection handles
+            factory: Callable opening the vector store of a collection, called
+                with the collection name and the create keyword
+        """
+        self.max_open = max(1, max_open)
+        self._factory = factory
+        self._stores: "OrderedDict[str, ChromaVectorStore]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._opening: Dict[str, threading.Lock] = {}
+        self.opened = 0
+        self.evicted = 0
+    
+    def _cached(self, name: str) -> Optional[ChromaVectorStore]:
+        """Get an open handle, marking it as most recently used; the caller holds the lock."""
+        store = self._stores.get(name)
+        if store is not None:
+            self._stores.move_to_end(name)
+        return store
+    
+    def get(self, collection_name: Optional[str] = None, create: bool = True) -> ChromaVectorStore:
+        """Get the vector store of a collection, opening it if needed.
+        
+        A collection is opened outside the cache lock, so opening one does not
+        hold up requests for collections that are already open; concurrent
+        requests for the same collection wait for a single open.
+        
+        Args:
+            collection_name: Collection name. Defaults to settings.VECTOR_STORE_DEFAULT_COLLECTION.
+            create: Whether to create the collection if it does not exist
+            
+        Returns:
+            Vector store bound to the collection
+            
+        Raises:
+            ValueError: If the collection name is invalid
+            CollectionNotFound: If create is False and the collection does not exist
+        """
+        name = validate_collection_name(collection_name or settings.VECTOR_STORE_DEFAULT_COLLECTION)
+        with self._lock:
+            store = self._cached(name)
+            if store is not None:
+                return store
+            opening = self._opening.setdefault(name, threading.Lock())
+        
+        with opening:
+            with self._lock:
+                store = self._cached(name)
+                if store is not None:
+                    return store
+            try:
+                store = self._factory(name, create=create)
+            finally:
+                with self._lock:
+                    if self._opening.get(name) is opening:
+                        del self._opening[name]
+            
+            with self._lock:
+                self._stores[name] = store
+                self.opened += 1
+                while len(self._stores) > self.max_open:
+                    evicted, _ = self._stores.popitem(last=False)
+                    self.evicted += 1
+                    logger.info("collection_evicted", collection_name=evicted)
+            return store
+    
+    def discard(self, collection_name: str) -> None:
+        """Forget the handle of a collection, e.g. after deleting it.
         
         Args:
-            document_id: ID of the document to delete.
+            collection_name: Collection name
         """
-        # Delete from ChromaDB
-        self._store.delete(ids=[document_id])
+        with self._lock:
+            self._stores.pop(collection_name, None)
+    
+    def open_collections(self) -> List[str]:
+        """Names of the open collections, least recently used first."""
+        with self._lock:
+            return list(self._stores)
+    
+    def stats(self) -> Dict[str, Any]:
+        """Get cache statistics.
+        
+        Returns:
+            Dictionary with the open collections, capacity and open/evict counters
+        """
+        with self._lock:
+            return {
+                "open": list(self._stores),
+                "max_open": self.max_open,
+                "opened": self.opened,
+                "evicted": self.evicted,
+            }
+
+
+def get_collection_cache() -> CollectionCache:
+    """Get the collection cache instance.
+    
+    Returns:
+        Collection cache instance
+    """
+    return CollectionCache.get_instance()
+
+
+_search_executor: Optional[ThreadPoolExecutor] = None
 
-def get_vector_store() -> ChromaVectorStore:
-    """Get the vector store instance.
+
+def search_collections(
+    query: str,
+    collections: List[str],
+    k: int = 5,
+    query_embeddings: Optional[Dict[int, List[float]]] = None
+) -> List[QueryResult]:
+    """Search several collections in parallel and merge their top-k.
+    
+    The query is embedded once per embedding dimension and each collection is
+    searched concurrently in its own index, so the cost depends on the
+    searched collections only.
+    Distances are only comparable between collections using the same space.
+    
+    Args:
+        query: Search query
+        collections: Names of the collections to search
+        k: Number of merged results to return
+        query_embeddings: Embeddings of the query already computed, by dimension
+        
+    Returns:
+        Merged search results, most similar first. The metadata of each
+        result includes the collection it came from.
+        
+    Raises:
+        CollectionNotFound: If a collection does not exist
+    """
+    global _search_executor
+    if _search_executor is None:
+        _search_executor = ThreadPoolExecutor(
+            max_workers=settings.VECTOR_STORE_SEARCH_WORKERS,
+            thread_name_prefix="collection-search"
+        )
+    
+    cache = get_collection_cache()
+    names = list(dict.fromkeys(collections))
+    stores = [cache.get(resolve_collection(name), create=False) for name in names]
+    if not stores:
+        return []
+    embeddings: Dict[int, List[float]] = dict(query_embeddings or {})
+    for store in stores:
+        if store.embedding_dimensions not in embeddings:
+            with span("embedding.query", dimensions=store.embedding_dimensions):
+                embeddings[store.embedding_dimensions] = store.embeddings.embed_query(query)
+    
+    futures = [
+        _search_executor.submit(bind_context(store.search_by_vector), embeddings[store.embedding_dimensions], k)
+        for store in stores
+    ]
+    merged: List[QueryResult] = []
+    for name, future in zip(names, futures):
+        for result in future.result():
+            result["document"]["metadata"] = {
+                **(result["document"]["metadata"] or {}),
+                "collection": name
+            }
+            merged.append(result)
+    merged.sort(key=lambda result: result["score"])
+    return merged[:k]
+
+
+def prewarm_collections(collections: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+    """Prewarm the indexes of several collections.
+    
+    Collections that do not exist yet are skipped.
+    
+    Args:
+        collections: Collection names. Defaults to settings.PREWARM_COLLECTIONS,
+            or the default collection if that is empty.
+        
+    Returns:
+        Prewarm statistics of each existing collection
+    """
+    if collections is None:
+        collections = [name.strip() for name in settings.PREWARM_COLLECTIONS.split(",") if name.strip()]
+    stats = []
+    for name in collections or [None]:
+        try:
+            stats.append(get_collection(name).prewarm())
+        except CollectionNotFound as e:
+            logger.warning("prewarm_skipped", collection_name=name, error=str(e))
+    return stats
+
+
+def resolve_collection(name: Optional[str] = None) -> str:
+    """Resolve a collection name or alias to the collection to open.
+    
+    Aliases are switched atomically by a reindex (see core.reindex), so
+    they are resolved on every call, from the registry's in-process cache.
+    
+    Args:
+        name: Collection name or alias. Defaults to settings.VECTOR_STORE_DEFAULT_COLLECTION.
+        
+    Returns:
+        Name of the collection
+        
+    Raises:
+        ValueError: If the name is not a valid collection name
+    """
+    name = validate_collection_name(name or settings.VECTOR_STORE_DEFAULT_COLLECTION)
+    return get_document_registry().resolve_alias(name)
+
+
+def get_vector_store(collection: Optional[str] = None) -> ChromaVectorStore:
+    """Get the vector store of a collection to write to, creating the collection if needed.
+    
+    Args:
+        collection: Collection name. Defaults to settings.VECTOR_STORE_DEFAULT_COLLECTION.
     
     Returns:
         Vector store instance
     """
-    return ChromaVectorStore.get_instance() 
\ No newline at end of file
+    return ChromaVectorStore.get_instance(collection)
+
+
+def get_collection(collection: Optional[str] = None) -> ChromaVectorStore:
+    """Get the vector store of an existing collection to read from.
+    
+    Args:
+        collection: Collection name or alias. Defaults to settings.VECTOR_STORE_DEFAULT_COLLECTION.
+    
+    Returns:
+        Vector store instance
+    
+    Raises:
+        CollectionNotFound: If the collection does not exist
+    """
+    return ChromaVectorStore.get_instance(collection, create=False) 
\ No newline at end of file
@@ -0,0 +1 @@
+"""Evaluation tools for the RAG application."""
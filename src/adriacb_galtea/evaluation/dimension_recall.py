@@ -0,0 +1,196 @@
+"""Recall@k versus embedding dimension, measured on a collection's own data.
+
+For each candidate dimension the stored vectors and the queries are
+shortened and renormalised (as the API does for reduced dimensions), and
+their exact top-k is compared with the top-k at the collection's full
+dimension. Queries are either embedded from a file of questions or, by
+default, held-out stored chunks. With --hnsw the shortened vectors are
+also indexed in an in-memory Chroma collection to measure HNSW search
+latency and recall.
+
+Usage:
+    python -m adriacb_galtea.evaluation.dimension_recall [--collection NAME]
+        [--dimensions 256,512,1024] [--k 5] [--sample 5000] [--queries FILE] [--hnsw]
+"""
+from typing import Any, Dict, List, Optional, Sequence
+import argparse
+import json
+import time
+import uuid
+
+import numpy as np
+
+from ..core.embeddings import truncate_embeddings
+from ..core.vector_store import ChromaVectorStore
+from ..utils.logging import get_logger
+
+logger = get_logger(__name__)
+
+DEFAULT_DIMENSIONS = (64, 128, 256, 384, 512, 768, 1024, 1536)
+
+
+def load_vectors(store: ChromaVectorStore, limit: int, page_size: int = 1000) -> np.ndarray:
+    """Read up to limit stored vectors of a collection.
+
+    Args:
+        store: Vector store of the collection
+        limit: Maximum number of vectors
+        page_size: Vectors read at a time
+
+    Returns:
+        float32 array with one vector per row
+    """
+    pages = []
+    offset = 0
+    while offset < limit:
+        page = store._collection.get(limit=min(page_size, limit - offset), offset=offset, include=["embeddings"])
+        if not len(page["ids"]):
+            break
+        pages.append(np.asarray(page["embeddings"], dtype=np.float32))
+        offset += len(page["ids"])
+    return np.concatenate(pages) if pages else np.zeros((0, store.embedding_dimensions), dtype=np.float32)
+
+
+def exact_top_k(corpus: np.ndarray, queries: np.ndarray, k: int) -> np.ndarray:
+    """Indices of the k most cosine-similar corpus vectors of each (normalised) query.
+
+    Args:
+        corpus: Normalised corpus vectors, one per row
+        queries: Normalised query vectors, one per row
+        k: Number of neighbours
+
+    Returns:
+        Array of shape (len(queries), k)
+    """
+    k = min(k, len(corpus))
+    scores = queries @ corpus.T
+    return np.argpartition(-scores, k - 1, axis=1)[:, :k]
+
+
+def recall_at_k(truth: np.ndarray, found: np.ndarray) -> float:
+    """Mean share of the true top-k found, over all queries."""
+    hits = sum(len(set(t) & set(f)) for t, f in zip(truth.tolist(), found.tolist()))
+    return hits / truth.size if truth.size else 0.0
+
+
+def _hnsw_search(corpus: np.ndarray, queries: np.ndarray, k: int, hnsw_params: Dict[str, Any]) -> Dict[str, Any]:
+    """Index vectors in an in-memory Chroma collection and time its searches."""
+    import chromadb
+    from chromadb.config import Settings
+
+    client = chromadb.EphemeralClient(Settings(anonymized_telemetry=False))
+    collection = client.create_collection(
+        f"dimension-recall-{uuid.uuid4().hex[:8]}",
+        metadata={f"hnsw:{key}": value for key, value in hnsw_params.items()}
+    )
+    batch_size = client.get_max_batch_size()
+    for start in range(0, len(corpus), batch_size):
+        batch = corpus[start:start + batch_size]
+        collection.add(ids=[str(i) for i in range(start, start + len(batch))], embeddings=batch.tolist())
+
+    found = []
+    started = time.perf_counter()
+    for query in queries:
+        result = collection.query(query_embeddings=[query.tolist()], n_results=k, include=[])
+        found.append([int(i) for i in result["ids"][0]])
+    seconds = time.perf_counter() - started
+    client.delete_collection(collection.name)
+    return {"found": np.asarray(found), "ms_per_query": 1000 * seconds / max(len(queries), 1)}
+
+
+def evaluate_dimensions(
+    corpus: np.ndarray,
+    queries: np.ndarray,
+    dimensions: Sequence[int],
+    k: int = 5,
+    hnsw_params: Optional[Dict[str, Any]] = None
+) -> List[Dict[str, Any]]:
+    """Measure recall@k and search cost of each candidate dimension.
+
+    Args:
+        corpus: Full-dimension corpus vectors, one per row
+        queries: Full-dimension query vectors, one per row
+        dimensions: Candidate dimensions (larger than the full dimension are skipped)
+        k: Number of neighbours
+        hnsw_params: If given, also index each dimension in an in-memory HNSW
+            index with these parameters (hnsw metadata keys without the prefix)
+
+    Returns:
+        One result per dimension with recall@k against the full-dimension
+        exact top-k, vector memory and search latency
+    """
+    full = corpus.shape[1]
+    truth = exact_top_k(truncate_embeddings(corpus, full), truncate_embeddings(queries, full), k)
+    results = []
+    for d in sorted(d for d in set(dimensions) if d <= full):
+        shortened, shortened_queries = truncate_embeddings(corpus, d), truncate_embeddings(queries, d)
+        started = time.perf_counter()
+        found = exact_top_k(shortened, shortened_queries, k)
+        seconds = time.perf_counter() - started
+        result = {
+            "dimensions": d,
+            f"recall@{k}": round(recall_at_k(truth, found), 4),
+            "vector_bytes": int(shortened.nbytes),
+            "memory_reduction": round(full / d, 2),
+            "exact_ms_per_query": round(1000 * seconds / max(len(queries), 1), 4),
+        }
+        if hnsw_params is not None:
+            hnsw = _hnsw_search(shortened, shortened_queries, k, hnsw_params)
+            result[f"hnsw_recall@{k}"] = round(recall_at_k(truth, hnsw["found"]), 4)
+            result["hnsw_ms_per_query"] = round(hnsw["ms_per_query"], 4)
+        results.append(result)
+        logger.info("dimension_evaluated", **result)
+    return results
+
+
+def main() -> None:
+    """Print recall@k versus dimension for a collection."""
+    parser = argparse.ArgumentParser(description="Recall@k versus embedding dimension")
+    parser.add_argument("--collection", help="Collection to evaluate (defaults to the default collection)")
+    parser.add_argument(
+        "--dimensions",
+        default=",".join(str(d) for d in DEFAULT_DIMENSIONS),
+        help="Comma-separated candidate dimensions"
+    )
+    parser.add_argument("--k", type=int, default=5, help="Number of neighbours")
+    parser.add_argument("--sample", type=int, default=5000, help="Maximum stored vectors to read")
+    parser.add_argument("--num-queries", type=int, default=200, help="Held-out chunks used as queries")
+    parser.add_argument("--queries", help="File with one question per line, embedded at full dimension")
+    parser.add_argument("--hnsw", action="store_true", help="Also measure an in-memory HNSW index")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    store = ChromaVectorStore(args.collection)
+    vectors = load_vectors(store, args.sample)
+    if args.queries:
+        with open(args.queries, encoding="utf-8") as f:
+            questions = [line.strip() for line in f if line.strip()]
+        corpus = vectors
+        queries = np.asarray(store.embeddings.embed_documents(questions), dtype=np.float32)
+    else:
+        # Held-out chunks stand in for queries
+        order = np.random.default_rng(args.seed).permutation(len(vectors))
+        held_out = min(args.num_queries, len(vectors) // 10 or 1)
+        queries, corpus = vectors[order[:held_out]], vectors[order[held_out:]]
+    if not len(corpus) or not len(queries):
+        parser.error(f"Collection {store.collection_name!r} holds too few vectors")
+
+    dimensions = [int(d) for d in args.dimensions.split(",") if d.strip()]
+    results = evaluate_dimensions(
+        corpus,
+        queries,
+        dimensions,
+        k=args.k,
+        hnsw_params=store.hnsw_params if args.hnsw else None
+    )
+    print(json.dumps({
+        "collection": store.collection_name,
+        "full_dimensions": int(corpus.shape[1]),
+        "corpus": len(corpus),
+        "queries": len(queries),
+        "results": results,
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
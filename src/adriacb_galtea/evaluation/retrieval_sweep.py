@@ -0,0 +1,450 @@
+"""Retrieval quality versus latency and cost over a grid of configurations.
+
+A labelled query set is run against the real retrieval stack: documents
+are chunked with DoclingProcessor, chunks and questions are embedded with
+the OpenAI embedding model, and each configuration is indexed in its own
+temporary ChromaVectorStore collection and searched with search_by_vector.
+Chroma reads search_ef when it loads an index, so every search_ef is
+indexed in its own collection created with that value.
+Documents are converted once and each chunking is embedded once at full
+dimension; smaller dimensions are shortened from those vectors (see
+truncate_embeddings), so the embedding cost of the sweep does not grow
+with the grid.
+
+Each configuration (chunk size, overlap, dimension, HNSW M,
+construction_ef and search_ef) reports recall@k, MRR, the context tokens
+sent to the model, search latency percentiles, index size and the
+embedding cost of indexing the documents. Given a quality bar, the
+cheapest configuration meeting it is selected.
+
+The query set is a JSONL file, one query per line:
+
+    {"question": "What is the range of the ID.3?",
+     "relevant": [{"contains": "up to 426 km"}, {"filename": "id3.pdf", "page": 12}]}
+
+A retrieved chunk is relevant to a label if it matches all of the label's
+fields: `contains` (text in the chunk, ignoring case and whitespace),
+`filename`, and `page` (within the chunk's page_start/page_end, recorded
+for PDFs converted in page ranges). A plain string stands for `contains`.
+Recall@k is the share of a query's labels matched by its top-k chunks.
+
+Usage:
+    python -m adriacb_galtea.evaluation.retrieval_sweep --documents DIR --queries FILE
+        [--chunk-tokens 256,512] [--overlap-tokens 0,64] [--dimensions 512,1536]
+        [--m 16] [--construction-ef 100] [--search-ef 10,50] [--k 1,3,5,10]
+        [--min-recall 0.9 --at-k 5] [--max-p99-ms 50] [--cheapest-by context] [--output FILE]
+"""
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from pathlib import Path
+import argparse
+import itertools
+import json
+import sys
+import time
+import uuid
+
+import numpy as np
+
+from ..core.document_processor import DoclingProcessor
+from ..core.embeddings import get_embeddings, truncate_embeddings
+from ..core.vector_store import ChromaVectorStore, get_chroma_client
+from ..loadtest.load_generator import latency_summary
+from ..utils.logging import get_logger
+
+logger = get_logger(__name__)
+
+# text-embedding-3-small list price per million tokens
+DEFAULT_EMBEDDING_PRICE_PER_MILLION = 0.02
+
+# Metric minimised by select_cheapest for each --cheapest-by choice
+CHEAPEST_BY = {
+    "context": "context_tokens@{k}",
+    "memory": "index_memory_bytes",
+    "embedding": "embedding_cost_usd",
+    "latency": "search_p99_ms",
+}
+
+TEXT_SUFFIXES = (".md", ".txt")
+
+
+def parse_ints(value: str) -> List[int]:
+    """Parse a comma-separated list of integers, e.g. "256,512"."""
+    return [int(item) for item in value.split(",") if item.strip()]
+
+
+def load_query_set(path: str) -> List[Dict[str, Any]]:
+    """Read a labelled query set.
+
+    Args:
+        path: JSONL file with a question and its relevant labels per line
+
+    Returns:
+        Queries with their labels as dictionaries
+
+    Raises:
+        ValueError: If a query has no question or no labels
+    """
+    queries = []
+    with open(path, encoding="utf-8") as f:
+        for number, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            query = json.loads(line)
+            labels = [
+                {"contains": label} if isinstance(label, str) else label
+                for label in query.get("relevant") or []
+            ]
+            if not query.get("question") or not labels:
+                raise ValueError(f"{path}:{number}: expected a question and at least one relevant label")
+            queries.append({"question": query["question"], "relevant": labels})
+    return queries
+
+
+def _normalize(text: str) -> str:
+    return " ".join(text.casefold().split())
+
+
+def matches(chunk: Dict[str, Any], label: Dict[str, Any]) -> bool:
+    """Whether a chunk matches all fields of a relevance label.
+
+    Args:
+        chunk: Chunk with content and metadata
+        label: Label with any of contains, filename and page
+
+    Returns:
+        True if the chunk is relevant to the label
+    """
+    metadata = chunk.get("metadata") or {}
+    if "contains" in label and _normalize(label["contains"]) not in _normalize(chunk["content"]):
+        return False
+    if "filename" in label and metadata.get("filename") != label["filename"]:
+        return False
+    if "page" in label:
+        start, end = metadata.get("page_start"), metadata.get("page_end")
+        if start is None or not start <= label["page"] <= (end if end is not None else start):
+            return False
+    return True
+
+
+def score_retrieval(
+    queries: List[Dict[str, Any]],
+    retrieved: List[List[Dict[str, Any]]],
+    ks: Sequence[int]
+) -> Dict[str, float]:
+    """Measure recall@k, MRR and context size of the retrieved chunks.
+
+    Args:
+        queries: Labelled queries
+        retrieved: Chunks retrieved for each query, most similar first
+        ks: Cut-offs to report
+
+    Returns:
+        Mean recall@k and context_tokens@k for each k, and the mean
+        reciprocal rank of the first relevant chunk (0 when none is found)
+    """
+    scores: Dict[str, float] = {}
+    for k in ks:
+        recalls, context = [], []
+        for query, chunks in zip(queries, retrieved):
+            top = chunks[:k]
+            found = sum(any(matches(chunk, label) for chunk in top) for label in query["relevant"])
+            recalls.append(found / len(query["relevant"]))
+            context.append(sum((chunk.get("metadata") or {}).get("token_count", 0) for chunk in top))
+        scores[f"recall@{k}"] = round(float(np.mean(recalls)), 4) if recalls else 0.0
+        scores[f"context_tokens@{k}"] = round(float(np.mean(context)), 1) if context else 0.0
+
+    reciprocal_ranks = []
+    for query, chunks in zip(queries, retrieved):
+        rank = next(
+            (i for i, chunk in enumerate(chunks, 1) if any(matches(chunk, label) for label in query["relevant"])),
+            None
+        )
+        reciprocal_ranks.append(1 / rank if rank else 0.0)
+    scores["mrr"] = round(float(np.mean(reciprocal_ranks)), 4) if reciprocal_ranks else 0.0
+    return scores
+
+
+def convert_documents(paths: Sequence[Path], processor: DoclingProcessor) -> List[Tuple[Dict[str, Any], List[str]]]:
+    """Convert documents to markdown once, for every chunking of the sweep.
+
+    Markdown and text files are read as they are; other files are converted
+    with Docling.
+
+    Args:
+        paths: Document paths
+        processor: Processor converting the documents
+
+    Returns:
+        Metadata and markdown segments of each document
+    """
+    documents = []
+    for path in paths:
+        metadata = processor.get_metadata(str(path))
+        if path.suffix.lower() in TEXT_SUFFIXES:
+            segments = [path.read_text(encoding="utf-8")]
+        else:
+            segments = list(processor.iter_markdown(str(path)))
+        documents.append((metadata, segments))
+        logger.info("sweep_document_converted", filename=metadata["filename"], segments=len(segments))
+    return documents
+
+
+def chunk_documents(
+    documents: List[Tuple[Dict[str, Any], List[str]]],
+    max_tokens: int,
+    overlap_tokens: int
+) -> List[Dict[str, Any]]:
+    """Chunk converted documents as ingestion would with a chunk size and overlap.
+
+    Returns:
+        Chunks with an id, content and metadata
+    """
+    processor = DoclingProcessor(max_tokens=max_tokens, overlap_tokens=overlap_tokens)
+    chunks = []
+    for metadata, segments in documents:
+        for i, chunk in enumerate(processor.iter_chunks(segments, metadata)):
+            chunks.append({"id": f"{metadata['filename']}-{i}", **chunk})
+    return chunks
+
+
+def search_index(
+    store: ChromaVectorStore,
+    query_vectors: np.ndarray,
+    k: int
+) -> Tuple[List[List[Dict[str, Any]]], List[float]]:
+    """Search an index with every query, timing each search.
+
+    Returns:
+        Chunks retrieved for each query and the search durations in seconds
+    """
+    retrieved, durations = [], []
+    for vector in query_vectors.tolist():
+        started = time.perf_counter()
+        results = store.search_by_vector(vector, k=k)
+        durations.append(time.perf_counter() - started)
+        retrieved.append([result["document"] for result in results])
+    return retrieved, durations
+
+
+def run_sweep(
+    documents: List[Tuple[Dict[str, Any], List[str]]],
+    queries: List[Dict[str, Any]],
+    chunk_tokens: Sequence[int],
+    overlap_tokens: Sequence[int],
+    dimensions: Sequence[int],
+    ms: Sequence[int],
+    construction_efs: Sequence[int],
+    search_efs: Sequence[int],
+    ks: Sequence[int] = (1, 3, 5, 10),
+    embeddings=None,
+    price_per_million: float = DEFAULT_EMBEDDING_PRICE_PER_MILLION
+) -> Dict[str, Any]:
+    """Measure retrieval quality, latency and cost of every configuration of a grid.
+
+    Args:
+        documents: Converted documents (see convert_documents)
+        queries: Labelled queries (see load_query_set)
+        chunk_tokens: Candidate chunk sizes in tokens
+        overlap_tokens: Candidate overlaps (at least the chunk size are skipped)
+        dimensions: Candidate embedding dimensions (above the full dimension are skipped)
+        ms: Candidate HNSW M
+        construction_efs: Candidate HNSW construction_ef
+        search_efs: Candidate HNSW search_ef
+        ks: Cut-offs of recall@k; the largest is retrieved
+        embeddings: Embedding model at full dimension. Defaults to get_embeddings().
+        price_per_million: Embedding price per million tokens
+
+    Returns:
+        Report with the query embedding latency and one result per configuration
+    """
+    embeddings = embeddings or get_embeddings()
+    k_max = max(ks)
+    run_id = uuid.uuid4().hex[:8]
+
+    # Questions are embedded one by one, as the retrieval tool does
+    query_vectors, query_durations = [], []
+    for query in queries:
+        started = time.perf_counter()
+        query_vectors.append(embeddings.embed_query(query["question"]))
+        query_durations.append(time.perf_counter() - started)
+    query_vectors = np.asarray(query_vectors, dtype=np.float32)
+    full = query_vectors.shape[1]
+
+    results = []
+    for max_tokens, overlap in itertools.product(sorted(set(chunk_tokens)), sorted(set(overlap_tokens))):
+        if overlap >= max_tokens:
+            continue
+        chunks = chunk_documents(documents, max_tokens, overlap)
+        if not chunks:
+            continue
+        tokens = sum(chunk["metadata"]["token_count"] for chunk in chunks)
+        started = time.perf_counter()
+        vectors = np.asarray(embeddings.embed_documents([chunk["content"] for chunk in chunks]), dtype=np.float32)
+        embedding_seconds = time.perf_counter() - started
+
+        for d, m, construction_ef, search_ef in itertools.product(
+            sorted(d for d in set(dimensions) if d <= full),
+            sorted(set(ms)),
+            sorted(set(construction_efs)),
+            sorted(set(search_efs))
+        ):
+            name = f"retrieval-sweep-{run_id}-{len(results)}"
+            hnsw_params = {"M": m, "construction_ef": construction_ef, "search_ef": search_ef}
+            started = time.perf_counter()
+            store = ChromaVectorStore(name, hnsw_params=hnsw_params, embedding_dimensions=d)
+            try:
+                store.add_documents(chunks, truncate_embeddings(vectors, d).tolist())
+                build_seconds = time.perf_counter() - started
+                stats = store.get_stats()
+                retrieved, durations = search_index(store, truncate_embeddings(query_vectors, d), k_max)
+                latency = latency_summary(durations)
+                result = {
+                    "chunk_tokens": max_tokens,
+                    "overlap_tokens": overlap,
+                    "dimensions": d,
+                    "M": m,
+                    "construction_ef": construction_ef,
+                    "search_ef": search_ef,
+                    "chunks": len(chunks),
+                    **score_retrieval(queries, retrieved, ks),
+                    "search_ms": latency,
+                    "search_p99_ms": latency["p99"],
+                    "index_memory_bytes": stats["index_memory_bytes"],
+                    "index_disk_bytes": stats["index_disk_bytes"],
+                    "build_seconds": round(build_seconds, 3),
+                    "embedding_tokens": tokens,
+                    "embedding_seconds": round(embedding_seconds, 3),
+                    "embedding_cost_usd": round(tokens * price_per_million / 1e6, 6),
+                }
+                results.append(result)
+                logger.info("sweep_configuration_evaluated", **{
+                    key: value for key, value in result.items() if not isinstance(value, dict)
+                })
+            finally:
+                get_chroma_client().delete_collection(name)
+
+    return {
+        "documents": len(documents),
+        "queries": len(queries),
+        "full_dimensions": int(full),
+        "query_embedding_ms": latency_summary(query_durations),
+        "results": results,
+    }
+
+
+def select_cheapest(
+    results: List[Dict[str, Any]],
+    min_recall: float,
+    k: int,
+    max_p99_ms: Optional[float] = None,
+    cheapest_by: str = "context"
+) -> Optional[Dict[str, Any]]:
+    """Pick the cheapest configuration meeting a quality bar.
+
+    Args:
+        results: Results of run_sweep
+        min_recall: Minimum recall@k
+        k: Cut-off of the recall bar
+        max_p99_ms: Optional maximum p99 search latency
+        cheapest_by: Cost to minimise, a key of CHEAPEST_BY; ties go to the lowest p99
+
+    Returns:
+        The cheapest qualifying result, or None if none meets the bar
+    """
+    cost = CHEAPEST_BY[cheapest_by].format(k=k)
+    candidates = [
+        result for result in results
+        if result[f"recall@{k}"] >= min_recall
+        and (max_p99_ms is None or result["search_p99_ms"] <= max_p99_ms)
+    ]
+    if not candidates:
+        return None
+    return min(candidates, key=lambda result: (result[cost], result["search_p99_ms"]))
+
+
+def print_table(results: List[Dict[str, Any]], ks: Sequence[int]) -> None:
+    """Print one line per configuration to stderr."""
+    recall_columns = "".join(f"{f'R@{k}':>7}" for k in ks)
+    print(
+        f"{'chunk':>6} {'ovl':>4} {'dims':>5} {'M':>3} {'c_ef':>5} {'s_ef':>5} {'chunks':>7}"
+        f"{recall_columns} {'MRR':>6} {'p50 ms':>7} {'p99 ms':>7} {'ctx@k':>7} {'mem MB':>7} {'embed $':>8}",
+        file=sys.stderr
+    )
+    for result in results:
+        recalls = "".join(f"{result[f'recall@{k}']:>7.3f}" for k in ks)
+        print(
+            f"{result['chunk_tokens']:>6} {result['overlap_tokens']:>4} {result['dimensions']:>5} "
+            f"{result['M']:>3} {result['construction_ef']:>5} {result['search_ef']:>5} {result['chunks']:>7}"
+            f"{recalls} {result['mrr']:>6.3f} {result['search_ms']['p50'] or 0:>7.1f} "
+            f"{result['search_p99_ms'] or 0:>7.1f} {result[f'context_tokens@{max(ks)}']:>7.0f} "
+            f"{result['index_memory_bytes'] / 1e6:>7.2f} {result['embedding_cost_usd']:>8.4f}",
+            file=sys.stderr
+        )
+
+
+def main() -> None:
+    """Run a retrieval sweep from the command line."""
+    parser = argparse.ArgumentParser(description="Retrieval quality versus latency and cost")
+    parser.add_argument("--documents", required=True, help="Directory of documents (pdf, md, txt) or a single file")
+    parser.add_argument("--queries", required=True, help="JSONL file of labelled questions")
+    parser.add_argument("--chunk-tokens", default="256,512", help="Comma-separated chunk sizes in tokens")
+    parser.add_argument("--overlap-tokens", default="0,64", help="Comma-separated chunk overlaps in tokens")
+    parser.add_argument("--dimensions", default="512,1536", help="Comma-separated embedding dimensions")
+    parser.add_argument("--m", default="16", help="Comma-separated HNSW M")
+    parser.add_argument("--construction-ef", default="100", help="Comma-separated HNSW construction_ef")
+    parser.add_argument("--search-ef", default="10,50", help="Comma-separated HNSW search_ef")
+    parser.add_argument("--k", default="1,3,5,10", help="Comma-separated recall@k cut-offs")
+    parser.add_argument("--min-recall", type=float, help="Quality bar: minimum recall@k of the selected configuration")
+    parser.add_argument("--at-k", type=int, default=5, help="k of the quality bar")
+    parser.add_argument("--max-p99-ms", type=float, help="Quality bar: maximum p99 search latency")
+    parser.add_argument("--cheapest-by", choices=sorted(CHEAPEST_BY), default="context", help="Cost to minimise")
+    parser.add_argument(
+        "--embedding-price",
+        type=float,
+        default=DEFAULT_EMBEDDING_PRICE_PER_MILLION,
+        help="Embedding price in USD per million tokens"
+    )
+    parser.add_argument("--output", help="Also write the JSON report to this file")
+    args = parser.parse_args()
+
+    ks = parse_ints(args.k)
+    if args.min_recall is not None and args.at_k not in ks:
+        parser.error(f"--at-k {args.at_k} must be one of --k {args.k}")
+    documents_path = Path(args.documents)
+    paths = [documents_path] if documents_path.is_file() else sorted(
+        path for path in documents_path.iterdir() if path.suffix.lower() in (".pdf", *TEXT_SUFFIXES)
+    )
+    if not paths:
+        parser.error(f"No documents in {args.documents}")
+    try:
+        queries = load_query_set(args.queries)
+    except ValueError as e:
+        parser.error(str(e))
+
+    documents = convert_documents(paths, DoclingProcessor())
+    report = run_sweep(
+        documents,
+        queries,
+        chunk_tokens=parse_ints(args.chunk_tokens),
+        overlap_tokens=parse_ints(args.overlap_tokens),
+        dimensions=parse_ints(args.dimensions),
+        ms=parse_ints(args.m),
+        construction_efs=parse_ints(args.construction_ef),
+        search_efs=parse_ints(args.search_ef),
+        ks=ks,
+        price_per_million=args.embedding_price
+    )
+    print_table(report["results"], ks)
+    if args.min_recall is not None:
+        report["selected"] = select_cheapest(
+            report["results"], args.min_recall, args.at_k, args.max_p99_ms, args.cheapest_by
+        )
+        print(f"selected: {json.dumps(report['selected'])}", file=sys.stderr)
+    print(json.dumps(report, indent=2))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
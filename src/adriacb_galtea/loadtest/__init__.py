@@ -0,0 +1 @@
+"""Load-testing tools: a local OpenAI-compatible stub and a load generator."""
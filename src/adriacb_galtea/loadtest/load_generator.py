@@ -0,0 +1,453 @@
+"""Open-loop load generator for the API.
+
+Sends /query and /inject requests at a target rate (Poisson or constant
+arrivals) with a configurable mix, independently of how fast the API
+answers, so queueing shows up as latency and shed requests instead of
+silently lowering the offered load. Every /query stream is consumed to the
+end. The report gives throughput, time to first byte and p50/p95/p99
+latency per request kind.
+
+A sweep runs several rates in turn and reports the saturation point: the
+highest rate the worker sustains with at most 1% errors, a throughput
+within 95% of the sending rate and, if given, a p99 latency within the
+SLO. Run it against a single API worker whose OPENAI_BASE_URL points at
+the stub (adriacb_galtea.loadtest.openai_stub) to measure the worker,
+not OpenAI.
+
+Usage:
+    python -m adriacb_galtea.loadtest.load_generator [--url http://localhost:8000]
+        [--rate 10 | --sweep 5,10,20,40] [--duration 60] [--mix query=0.9,inject=0.1]
+        [--questions FILE] [--inject-files DIR] [--slo-p99-ms 5000] [--output FILE]
+"""
+from typing import Any, Dict, List, Optional, Sequence
+from collections import Counter
+from pathlib import Path
+import argparse
+import asyncio
+import itertools
+import json
+import logging
+import random
+import sys
+import time
+import uuid
+
+import httpx
+import numpy as np
+
+from ..utils.logging import get_logger
+
+logger = get_logger(__name__)
+
+DEFAULT_QUESTIONS = (
+    "What is the range of the vehicle with the large battery?",
+    "How long does DC fast charging take from 10 to 80 percent?",
+    "How do I reset the tyre pressure monitoring system?",
+    "What does the yellow battery warning light mean?",
+    "How do I connect my phone over Bluetooth?",
+    "What is the recommended tyre pressure with a full load?",
+    "How do I update the infotainment software?",
+    "Can I charge the car from a household socket?",
+)
+REQUEST_KINDS = ("query", "inject")
+# Status codes of requests shed by admission control
+SHED_STATUSES = (429, 503)
+
+
+def parse_mix(mix: str) -> Dict[str, float]:
+    """Parse a traffic mix such as "query=0.9,inject=0.1".
+
+    Args:
+        mix: Comma-separated kind=weight pairs
+
+    Returns:
+        Weights normalised to sum to 1
+
+    Raises:
+        ValueError: If a kind is unknown or no weight is positive
+    """
+    weights: Dict[str, float] = {}
+    for part in mix.split(","):
+        kind, _, weight = part.partition("=")
+        kind = kind.strip()
+        if kind not in REQUEST_KINDS:
+            raise ValueError(f"Unknown request kind {kind!r}; expected one of {REQUEST_KINDS}")
+        weights[kind] = float(weight or 1)
+    total = sum(weights.values())
+    if total <= 0:
+        raise ValueError(f"The mix {mix!r} has no positive weight")
+    return {kind: weight / total for kind, weight in weights.items() if weight > 0}
+
+
+def latency_summary(values: Sequence[float]) -> Dict[str, Optional[float]]:
+    """Summarize durations in seconds as milliseconds.
+
+    Returns:
+        Dictionary with mean, p50, p95, p99 and max in milliseconds (None if empty)
+    """
+    if not len(values):
+        return {"mean": None, "p50": None, "p95": None, "p99": None, "max": None}
+    array = np.asarray(values) * 1000
+    p50, p95, p99 = np.percentile(array, [50, 95, 99])
+    return {
+        "mean": round(float(array.mean()), 1),
+        "p50": round(float(p50), 1),
+        "p95": round(float(p95), 1),
+        "p99": round(float(p99), 1),
+        "max": round(float(array.max()), 1),
+    }
+
+
+def summarize(
+    results: List[Dict[str, Any]],
+    duration: float,
+    seconds: float,
+    rate: float,
+    dropped: int = 0
+) -> Dict[str, Any]:
+    """Aggregate request results into a report.
+
+    Args:
+        results: One result per request sent (see LoadGenerator)
+        duration: Seconds during which requests were started
+        seconds: Seconds until the last request finished
+        rate: Offered requests per second
+        dropped: Requests not sent because max_in_flight was reached
+
+    Returns:
+        Report with the totals and, per request kind, the requests sent,
+        succeeded, shed (429/503) and failed, the throughput and the time
+        to first byte and latency percentiles of successful requests
+    """
+    # Requests still running when the arrivals stop lengthen the run
+    seconds = max(seconds, duration)
+    report: Dict[str, Any] = {
+        "offered_rate": rate,
+        "sent_rate": round((len(results) + dropped) / duration, 2),
+        "seconds": round(seconds, 3),
+        "sent": len(results),
+        "dropped": dropped,
+    }
+    for kind in (None, *REQUEST_KINDS):
+        selected = [result for result in results if kind is None or result["kind"] == kind]
+        if kind is not None and not selected:
+            continue
+        ok = [result for result in selected if result["ok"]]
+        shed = sum(result["status"] in SHED_STATUSES for result in selected)
+        errors = Counter(str(result["error"] or result["status"]) for result in selected if not result["ok"])
+        summary = {
+            "sent": len(selected),
+            "ok": len(ok),
+            "shed": shed,
+            "failed": len(selected) - len(ok) - shed,
+            "error_ratio": round(1 - len(ok) / len(selected), 4) if selected else 0.0,
+            "throughput": round(len(ok) / seconds, 2) if seconds else None,
+            "ttfb_ms": latency_summary([result["ttfb"] for result in ok if result["ttfb"] is not None]),
+            "latency_ms": latency_summary([result["latency"] for result in ok]),
+            "errors": dict(errors),
+        }
+        if kind is None:
+            report.update(summary)
+        else:
+            report.setdefault("kinds", {})[kind] = summary
+    return report
+
+
+def find_saturation(
+    steps: List[Dict[str, Any]],
+    slo_p99_ms: Optional[float] = None,
+    max_error_ratio: float = 0.01,
+    min_throughput_ratio: float = 0.95
+) -> Optional[float]:
+    """Find the highest offered rate a sweep sustained.
+
+    A rate is sustained if its error ratio (including shed requests) is at
+    most max_error_ratio, no request was dropped, its successful throughput
+    is at least min_throughput_ratio of the rate requests were sent at and,
+    with an SLO, its p99 latency is within slo_p99_ms. Throughput falls
+    behind the sending rate once requests queue up, as the last ones finish
+    well after the arrivals stop.
+
+    Args:
+        steps: Reports of the sweep, in increasing rate order
+        slo_p99_ms: Optional p99 latency objective in milliseconds
+        max_error_ratio: Highest error ratio of a sustained rate
+        min_throughput_ratio: Lowest share of the sending rate that must succeed
+
+    Returns:
+        The saturation rate, or None if no rate was sustained
+    """
+    sustained = None
+    for step in steps:
+        p99 = step["latency_ms"]["p99"]
+        if (
+            step["error_ratio"] <= max_error_ratio
+            and step["dropped"] == 0
+            and (step["throughput"] or 0) >= min_throughput_ratio * step["sent_rate"]
+            and (slo_p99_ms is None or (p99 is not None and p99 <= slo_p99_ms))
+        ):
+            sustained = step["offered_rate"]
+        else:
+            break
+    return sustained
+
+
+class LoadGenerator:
+    """Drive a mix of /query and /inject requests against the API."""
+
+    def __init__(
+        self,
+        base_url: str,
+        mix: Dict[str, float],
+        questions: Sequence[str] = DEFAULT_QUESTIONS,
+        inject_files: Sequence[Path] = (),
+        collection: Optional[str] = None,
+        max_in_flight: int = 256,
+        timeout: float = 120.0,
+        unique_inject: bool = True,
+        seed: Optional[int] = None,
+        transport: Optional[httpx.AsyncBaseTransport] = None
+    ):
+        """Initialize the generator.
+
+        Args:
+            base_url: API base URL (e.g. http://localhost:8000)
+            mix: Weight of each request kind (see parse_mix)
+            questions: Questions sent to /query, picked at random
+            inject_files: Documents sent to /inject, in turn
+            collection: Collection queried and injected into. Defaults to the API's default.
+            max_in_flight: Requests in flight above which new ones are dropped
+                (counted, not sent) so the generator itself cannot fall behind
+            timeout: Seconds before a request is failed
+            unique_inject: Whether to append a unique comment to every injected
+                file, so the API ingests it instead of skipping unchanged content
+            seed: Seed of the arrivals, mix and questions
+            transport: Optional httpx transport (e.g. to drive an ASGI app in-process)
+        """
+        if mix.get("inject") and not inject_files:
+            raise ValueError("The mix includes inject but no inject files were given")
+        self.base_url = base_url
+        self.mix = mix
+        self.questions = list(questions)
+        self.inject_files = itertools.cycle([(Path(path).name, Path(path).read_bytes()) for path in inject_files])
+        self.params = {"collection": collection} if collection else {}
+        self.max_in_flight = max_in_flight
+        self.timeout = timeout
+        self.unique_inject = unique_inject
+        self.random = random.Random(seed)
+        self.transport = transport
+
+    async def query(self, client: httpx.AsyncClient) -> Dict[str, Any]:
+        """Send one /query and read its SSE stream to the end."""
+        result = {"kind": "query", "status": None, "ok": False, "ttfb": None, "error": None, "events": 0}
+        started = time.perf_counter()
+        body = {"query": self.random.choice(self.questions)}
+        async with client.stream("POST", "/api/v1/query", json=body, params=self.params) as response:
+            result["status"] = response.status_code
+            buffer = b""
+            async for data in response.aiter_raw():
+                if result["ttfb"] is None:
+                    result["ttfb"] = time.perf_counter() - started
+                buffer += data
+            if response.status_code == 200:
+                for line in buffer.decode("utf-8", errors="replace").splitlines():
+                    if not line.startswith("data: "):
+                        continue
+                    result["events"] += 1
+                    if "error" in json.loads(line[len("data: "):]):
+                        result["error"] = "stream_error"
+        result["latency"] = time.perf_counter() - started
+        result["ok"] = result["status"] == 200 and result["error"] is None and result["events"] > 0
+        if result["status"] == 200 and not result["events"]:
+            result["error"] = "empty_stream"
+        return result
+
+    async def inject(self, client: httpx.AsyncClient) -> Dict[str, Any]:
+        """Send one /inject with the next document."""
+        result = {"kind": "inject", "status": None, "ok": False, "ttfb": None, "error": None}
+        name, content = next(self.inject_files)
+        if self.unique_inject:
+            # Trailing comments are ignored by PDF readers but change the content hash
+            content += f"\n% load-test {uuid.uuid4().hex}\n".encode()
+        started = time.perf_counter()
+        response = await client.post(
+            "/api/v1/inject",
+            files={"file": (name, content, "application/octet-stream")},
+            params=self.params
+        )
+        result["latency"] = time.perf_counter() - started
+        result["status"] = response.status_code
+        if response.status_code == 200 and not response.json().get("success"):
+            result["error"] = "inject_failed"
+        result["ok"] = response.status_code == 200 and result["error"] is None
+        return result
+
+    async def _send(self, client: httpx.AsyncClient, kind: str) -> Dict[str, Any]:
+        """Send one request, turning transport errors into failed results."""
+        started = time.perf_counter()
+        try:
+            return await (self.query(client) if kind == "query" else self.inject(client))
+        except (httpx.HTTPError, ValueError) as e:
+            return {
+                "kind": kind,
+                "status": None,
+                "ok": False,
+                "ttfb": None,
+                "latency": time.perf_counter() - started,
+                "error": type(e).__name__,
+            }
+
+    async def run(self, rate: float, duration: float, arrival: str = "poisson") -> Dict[str, Any]:
+        """Offer rate requests per second for duration seconds, then wait for them.
+
+        Args:
+            rate: Requests per second
+            duration: Seconds during which requests are started
+            arrival: "poisson" (exponential gaps) or "constant" gaps
+
+        Returns:
+            Report of the run (see summarize)
+        """
+        kinds, weights = zip(*self.mix.items())
+        results: List[Dict[str, Any]] = []
+        tasks: set = set()
+        dropped = 0
+        limits = httpx.Limits(max_connections=self.max_in_flight, max_keepalive_connections=self.max_in_flight)
+        async with httpx.AsyncClient(
+            base_url=self.base_url,
+            timeout=self.timeout,
+            limits=limits,
+            transport=self.transport
+        ) as client:
+            started = time.perf_counter()
+            next_at = 0.0
+            while next_at < duration:
+                delay = started + next_at - time.perf_counter()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                if len(tasks) >= self.max_in_flight:
+                    dropped += 1
+                else:
+                    task = asyncio.create_task(self._send(client, self.random.choices(kinds, weights)[0]))
+                    task.add_done_callback(lambda done: (tasks.discard(done), results.append(done.result())))
+                    tasks.add(task)
+                next_at += self.random.expovariate(rate) if arrival == "poisson" else 1 / rate
+            if tasks:
+                await asyncio.wait(set(tasks))
+            seconds = time.perf_counter() - started
+        report = summarize(results, duration, seconds, rate, dropped)
+        logger.info(
+            "load_step_finished",
+            rate=rate,
+            sent=report["sent"],
+            throughput=report["throughput"],
+            error_ratio=report["error_ratio"],
+            p99_ms=report["latency_ms"]["p99"]
+        )
+        return report
+
+    async def sweep(
+        self,
+        rates: Sequence[float],
+        duration: float,
+        arrival: str = "poisson",
+        pause: float = 5.0,
+        slo_p99_ms: Optional[float] = None
+    ) -> Dict[str, Any]:
+        """Run increasing rates in turn and find the saturation point.
+
+        The sweep stops after the first rate that is not sustained.
+
+        Args:
+            rates: Requests per second of each step
+            duration: Seconds of each step
+            arrival: Arrival process (see run)
+            pause: Seconds between steps, to let queues drain
+            slo_p99_ms: Optional p99 latency objective in milliseconds
+
+        Returns:
+            Dictionary with the report of each step and the saturation rate
+        """
+        steps = []
+        for i, rate in enumerate(sorted(rates)):
+            if i:
+                await asyncio.sleep(pause)
+            steps.append(await self.run(rate, duration, arrival))
+            if find_saturation(steps, slo_p99_ms) != rate:
+                break
+        return {"steps": steps, "saturation_rate": find_saturation(steps, slo_p99_ms), "slo_p99_ms": slo_p99_ms}
+
+
+def print_table(steps: List[Dict[str, Any]]) -> None:
+    """Print one line per step to stderr."""
+    print(f"{'rate':>8} {'sent':>6} {'ok/s':>8} {'errors':>7} {'ttfb p50':>9} {'p50':>8} {'p95':>8} {'p99':>8}", file=sys.stderr)
+    for step in steps:
+        ttfb, latency = step["ttfb_ms"], step["latency_ms"]
+        print(
+            f"{step['offered_rate']:>8g} {step['sent']:>6} {step['throughput'] or 0:>8.2f} "
+            f"{step['error_ratio']:>7.2%} {ttfb['p50'] or 0:>9.0f} {latency['p50'] or 0:>8.0f} "
+            f"{latency['p95'] or 0:>8.0f} {latency['p99'] or 0:>8.0f}",
+            file=sys.stderr
+        )
+
+
+def main() -> None:
+    """Run a load test from the command line."""
+    parser = argparse.ArgumentParser(description="Open-loop load generator for the API")
+    parser.add_argument("--url", default="http://localhost:8000", help="API base URL")
+    rates = parser.add_mutually_exclusive_group()
+    rates.add_argument("--rate", type=float, default=5.0, help="Requests per second")
+    rates.add_argument("--sweep", help="Comma-separated rates to find the saturation point, e.g. 5,10,20,40")
+    parser.add_argument("--duration", type=float, default=60.0, help="Seconds per rate")
+    parser.add_argument("--mix", default="query=1", help='Request mix, e.g. "query=0.9,inject=0.1"')
+    parser.add_argument("--arrival", choices=("poisson", "constant"), default="poisson")
+    parser.add_argument("--questions", help="File with one question per line")
+    parser.add_argument("--inject-files", help="Directory of documents to inject (*.pdf)")
+    parser.add_argument("--collection", help="Collection to query and inject into")
+    parser.add_argument("--max-in-flight", type=int, default=256, help="Requests in flight before dropping")
+    parser.add_argument("--timeout", type=float, default=120.0, help="Seconds before a request fails")
+    parser.add_argument("--slo-p99-ms", type=float, help="p99 latency objective of the saturation search")
+    parser.add_argument("--pause", type=float, default=5.0, help="Seconds between sweep steps")
+    parser.add_argument("--seed", type=int, help="Seed of the arrivals and the mix")
+    parser.add_argument("--output", help="Also write the JSON report to this file")
+    args = parser.parse_args()
+    # One log line per request would swamp the report
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+
+    questions = DEFAULT_QUESTIONS
+    if args.questions:
+        with open(args.questions, encoding="utf-8") as f:
+            questions = [line.strip() for line in f if line.strip()]
+    inject_files = sorted(Path(args.inject_files).glob("*.pdf")) if args.inject_files else []
+    try:
+        generator = LoadGenerator(
+            args.url,
+            parse_mix(args.mix),
+            questions=questions,
+            inject_files=inject_files,
+            collection=args.collection,
+            max_in_flight=args.max_in_flight,
+            timeout=args.timeout,
+            seed=args.seed
+        )
+    except ValueError as e:
+        parser.error(str(e))
+
+    if args.sweep:
+        sweep_rates = [float(rate) for rate in args.sweep.split(",")]
+        report = asyncio.run(
+            generator.sweep(sweep_rates, args.duration, args.arrival, args.pause, args.slo_p99_ms)
+        )
+        print_table(report["steps"])
+        print(f"saturation rate: {report['saturation_rate']} requests/s", file=sys.stderr)
+    else:
+        report = asyncio.run(generator.run(args.rate, args.duration, args.arrival))
+        print_table([report])
+    print(json.dumps(report, indent=2))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
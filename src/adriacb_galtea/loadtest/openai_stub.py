@@ -0,0 +1,349 @@
+"""Local OpenAI-compatible stub server for load tests.
+
+Serves /v1/chat/completions (plain and streamed, with tool calls) and
+/v1/embeddings with configurable latency, so the API can be load-tested
+without spending tokens or hitting OpenAI rate limits. Point the API at it
+with OPENAI_BASE_URL=http://localhost:8001/v1.
+
+Chat follows the shape of a ReAct turn: while the conversation has no tool
+result yet and tools are offered, the model calls the first tool with the
+last user message as its query; once a tool result is present it answers
+with answer_tokens words. Embeddings are deterministic pseudo-random unit
+vectors seeded by the input, honouring the dimensions parameter. A share of
+requests can be answered with 429 to exercise the client retries.
+
+Usage:
+    python -m adriacb_galtea.loadtest.openai_stub [--port 8001] [--chat-latency-ms 400]
+        [--token-latency-ms 15] [--embedding-latency-ms 50] [--error-rate 0.0]
+"""
+from typing import Any, AsyncIterator, Dict, List, Optional, Union
+import argparse
+import asyncio
+import base64
+import hashlib
+import json
+import random
+import threading
+import time
+import uuid
+
+import numpy as np
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+# Dimensions of text-embedding-3-small; the stub imports nothing from the API so it runs without its settings
+FULL_DIMENSIONS = 1536
+WORDS = (
+    "the vehicle battery charges at up to 120 kW on a DC fast charger and the range depends on "
+    "temperature speed and the use of climate control according to the manual"
+).split()
+
+
+class StubConfig:
+    """Latency and behaviour of the stub."""
+
+    def __init__(
+        self,
+        chat_latency_ms: float = 400.0,
+        token_latency_ms: float = 15.0,
+        answer_tokens: int = 60,
+        embedding_latency_ms: float = 50.0,
+        embedding_latency_per_input_ms: float = 0.5,
+        jitter: float = 0.2,
+        error_rate: float = 0.0,
+        seed: Optional[int] = None
+    ):
+        """Initialize the configuration.
+
+        Args:
+            chat_latency_ms: Time to the first token of a chat completion
+            token_latency_ms: Time between streamed tokens (and per token of a
+                non-streamed completion)
+            answer_tokens: Words in a final answer
+            embedding_latency_ms: Fixed latency of an embeddings request
+            embedding_latency_per_input_ms: Additional latency per embedded input
+            jitter: Relative random variation of every latency (0.2 is ±20%)
+            error_rate: Share of requests answered with 429 Too Many Requests
+            seed: Seed of the latency jitter and errors
+        """
+        self.chat_latency_ms = chat_latency_ms
+        self.token_latency_ms = token_latency_ms
+        self.answer_tokens = answer_tokens
+        self.embedding_latency_ms = embedding_latency_ms
+        self.embedding_latency_per_input_ms = embedding_latency_per_input_ms
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.seed = seed
+
+
+class StubStats:
+    """Counters of the requests served by the stub."""
+
+    def __init__(self):
+        """Initialize the counters."""
+        self._lock = threading.Lock()
+        self.counts: Dict[str, int] = {
+            "chat": 0,
+            "chat_streamed": 0,
+            "tool_calls": 0,
+            "embeddings": 0,
+            "embedded_inputs": 0,
+            "rate_limited": 0,
+        }
+
+    def add(self, name: str, count: int = 1) -> None:
+        """Increment a counter."""
+        with self._lock:
+            self.counts[name] += count
+
+    def stats(self) -> Dict[str, int]:
+        """Get the counters."""
+        with self._lock:
+            return dict(self.counts)
+
+
+def embed_text(value: Union[str, List[int]], dimensions: int, encoding_format: str = "float") -> Union[List[float], str]:
+    """Deterministic unit vector for an input (text or token IDs).
+
+    Args:
+        value: Text, or token IDs as sent by clients that tokenize first
+        dimensions: Vector length
+        encoding_format: "float" for a list, or "base64" for little-endian
+            float32 bytes (what the OpenAI SDK requests by default)
+
+    Returns:
+        Normalised vector; equal inputs always get equal vectors
+    """
+    raw = value if isinstance(value, str) else json.dumps(value)
+    seed = int.from_bytes(hashlib.blake2b(raw.encode("utf-8"), digest_size=8).digest(), "little")
+    vector = np.random.default_rng(seed).standard_normal(dimensions).astype(np.float32)
+    vector /= np.linalg.norm(vector)
+    if encoding_format == "base64":
+        return base64.b64encode(vector.astype("<f4").tobytes()).decode("ascii")
+    return vector.round(6).tolist()
+
+
+def plan_reply(messages: List[Dict[str, Any]], tools: List[Dict[str, Any]], answer_tokens: int) -> Dict[str, Any]:
+    """Decide the stub model's reply to a conversation.
+
+    Args:
+        messages: Chat messages of the request
+        tools: Tools offered to the model
+        answer_tokens: Words in a final answer
+
+    Returns:
+        Either {"tool_call": {"id", "name", "arguments"}} or {"content": text}
+    """
+    last_user = next((m for m in reversed(messages) if m.get("role") == "user"), {})
+    question = last_user.get("content") or ""
+    if isinstance(question, list):
+        question = " ".join(part.get("text", "") for part in question if isinstance(part, dict))
+    # A tool result after the last user message means the search has been done
+    user_index = max((i for i, m in enumerate(messages) if m.get("role") == "user"), default=-1)
+    searched = any(m.get("role") == "tool" for m in messages[user_index + 1:])
+    if tools and not searched:
+        function = tools[0].get("function", tools[0])
+        parameters = list(function.get("parameters", {}).get("properties", {})) or ["query"]
+        return {
+            "tool_call": {
+                "id": f"call_{uuid.uuid4().hex[:24]}",
+                "name": function["name"],
+                "arguments": json.dumps({parameters[0]: question}),
+            }
+        }
+    words = [WORDS[i % len(WORDS)] for i in range(answer_tokens)]
+    return {"content": " ".join(words).capitalize() + "."}
+
+
+def create_app(config: Optional[StubConfig] = None) -> FastAPI:
+    """Create the stub server application.
+
+    Args:
+        config: Latency and behaviour. Defaults to StubConfig().
+
+    Returns:
+        FastAPI application serving the OpenAI routes under /v1
+    """
+    config = config or StubConfig()
+    stats = StubStats()
+    rng = random.Random(config.seed)
+    app = FastAPI(title="OpenAI stub")
+    app.state.stats = stats
+
+    async def pause(milliseconds: float) -> None:
+        if milliseconds > 0:
+            await asyncio.sleep(milliseconds * rng.uniform(1 - config.jitter, 1 + config.jitter) / 1000)
+
+    def rate_limited() -> Optional[JSONResponse]:
+        if config.error_rate and rng.random() < config.error_rate:
+            stats.add("rate_limited")
+            return JSONResponse(
+                status_code=429,
+                content={"error": {"message": "Rate limit reached (stub)", "type": "requests", "code": "rate_limit_exceeded"}},
+                headers={"retry-after-ms": "100"}
+            )
+        return None
+
+    @app.get("/v1/models")
+    async def models() -> dict:
+        return {"object": "list", "data": [{"id": "stub", "object": "model", "owned_by": "stub"}]}
+
+    @app.get("/stub/stats")
+    async def stub_stats() -> dict:
+        return stats.stats()
+
+    @app.post("/v1/embeddings")
+    async def embeddings(request: Request):
+        body = await request.json()
+        limited = rate_limited()
+        if limited is not None:
+            return limited
+        inputs = body["input"]
+        # A single text or a single list of token IDs is one input
+        if isinstance(inputs, str) or (inputs and isinstance(inputs[0], int)):
+            inputs = [inputs]
+        dimensions = body.get("dimensions") or FULL_DIMENSIONS
+        encoding_format = body.get("encoding_format") or "float"
+        stats.add("embeddings")
+        stats.add("embedded_inputs", len(inputs))
+        await pause(config.embedding_latency_ms + config.embedding_latency_per_input_ms * len(inputs))
+        tokens = sum(len(value.split()) if isinstance(value, str) else len(value) for value in inputs)
+        return {
+            "object": "list",
+            "model": body.get("model", "stub"),
+            "data": [
+                {"object": "embedding", "index": i, "embedding": embed_text(value, dimensions, encoding_format)}
+                for i, value in enumerate(inputs)
+            ],
+            "usage": {"prompt_tokens": tokens, "total_tokens": tokens},
+        }
+
+    @app.post("/v1/chat/completions")
+    async def chat_completions(request: Request):
+        body = await request.json()
+        limited = rate_limited()
+        if limited is not None:
+            return limited
+        reply = plan_reply(body.get("messages", []), body.get("tools") or [], config.answer_tokens)
+        model = body.get("model", "stub")
+        completion_id = f"chatcmpl-{uuid.uuid4().hex[:24]}"
+        created = int(time.time())
+        prompt_tokens = sum(len(str(m.get("content") or "").split()) for m in body.get("messages", []))
+        completion_tokens = len(reply["content"].split()) if "content" in reply else 1
+        usage = {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens,
+        }
+        stats.add("chat")
+        if "tool_call" in reply:
+            stats.add("tool_calls")
+
+        if not body.get("stream"):
+            await pause(config.chat_latency_ms + config.token_latency_ms * completion_tokens)
+            if "tool_call" in reply:
+                call = reply["tool_call"]
+                message = {
+                    "role": "assistant",
+                    "content": None,
+                    "tool_calls": [
+                        {"id": call["id"], "type": "function", "function": {"name": call["name"], "arguments": call["arguments"]}}
+                    ],
+                }
+                finish_reason = "tool_calls"
+            else:
+                message = {"role": "assistant", "content": reply["content"]}
+                finish_reason = "stop"
+            return {
+                "id": completion_id,
+                "object": "chat.completion",
+                "created": created,
+                "model": model,
+                "choices": [{"index": 0, "message": message, "finish_reason": finish_reason, "logprobs": None}],
+                "usage": usage,
+            }
+
+        stats.add("chat_streamed")
+        include_usage = (body.get("stream_options") or {}).get("include_usage", False)
+
+        def chunk(delta: Dict[str, Any], finish_reason: Optional[str] = None, **extra: Any) -> str:
+            payload = {
+                "id": completion_id,
+                "object": "chat.completion.chunk",
+                "created": created,
+                "model": model,
+                "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason, "logprobs": None}],
+                **extra,
+            }
+            return f"data: {json.dumps(payload)}\n\n"
+
+        async def events() -> AsyncIterator[str]:
+            await pause(config.chat_latency_ms)
+            if "tool_call" in reply:
+                call = reply["tool_call"]
+                yield chunk({
+                    "role": "assistant",
+                    "content": None,
+                    "tool_calls": [
+                        {"index": 0, "id": call["id"], "type": "function", "function": {"name": call["name"], "arguments": ""}}
+                    ],
+                })
+                arguments = call["arguments"]
+                for start in range(0, len(arguments), 16):
+                    await pause(config.token_latency_ms)
+                    yield chunk({"tool_calls": [{"index": 0, "function": {"arguments": arguments[start:start + 16]}}]})
+                yield chunk({}, "tool_calls")
+            else:
+                yield chunk({"role": "assistant", "content": ""})
+                for i, word in enumerate(reply["content"].split()):
+                    await pause(config.token_latency_ms)
+                    yield chunk({"content": word if i == 0 else f" {word}"})
+                yield chunk({}, "stop")
+            if include_usage:
+                payload = {
+                    "id": completion_id,
+                    "object": "chat.completion.chunk",
+                    "created": created,
+                    "model": model,
+                    "choices": [],
+                    "usage": usage,
+                }
+                yield f"data: {json.dumps(payload)}\n\n"
+            yield "data: [DONE]\n\n"
+
+        return StreamingResponse(events(), media_type="text/event-stream")
+
+    return app
+
+
+def main() -> None:
+    """Run the stub server from the command line."""
+    parser = argparse.ArgumentParser(description="Local OpenAI-compatible stub server for load tests")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8001)
+    parser.add_argument("--chat-latency-ms", type=float, default=400.0, help="Time to the first chat token")
+    parser.add_argument("--token-latency-ms", type=float, default=15.0, help="Time between chat tokens")
+    parser.add_argument("--answer-tokens", type=int, default=60, help="Words in a final answer")
+    parser.add_argument("--embedding-latency-ms", type=float, default=50.0, help="Latency of an embeddings request")
+    parser.add_argument("--embedding-latency-per-input-ms", type=float, default=0.5, help="Added latency per input")
+    parser.add_argument("--jitter", type=float, default=0.2, help="Relative latency variation")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Share of requests answered with 429")
+    parser.add_argument("--seed", type=int, help="Seed of the jitter and errors")
+    args = parser.parse_args()
+
+    import uvicorn
+    config = StubConfig(
+        chat_latency_ms=args.chat_latency_ms,
+        token_latency_ms=args.token_latency_ms,
+        answer_tokens=args.answer_tokens,
+        embedding_latency_ms=args.embedding_latency_ms,
+        embedding_latency_per_input_ms=args.embedding_latency_per_input_ms,
+        jitter=args.jitter,
+        error_rate=args.error_rate,
+        seed=args.seed
+    )
+    uvicorn.run(create_app(config), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,244 @@
+"""In-process tracing of request stages, exported to a local file.
+
+Langfuse only sees LangChain callbacks; these OpenTelemetry spans cover the
+rest of a request (upload, Docling conversion, splitting, embedding
+batches, Chroma upserts and searches, SSE serialisation), so the timeline
+of one slow request shows which stage made it slow.
+
+Spans are written as OTLP/JSON, one ExportTraceServiceRequest per line (the
+format of the OpenTelemetry Collector's file exporter and otlpjsonfile
+receiver), to a size-rotated file. The tracer provider is private to the
+application, so it does not interfere with Chroma's own telemetry.
+
+The current span follows asyncio tasks and run_in_threadpool calls by
+itself (both copy context variables); work handed to other threads or
+thread pools must be wrapped with bind_context. Unless
+settings.TRACE_ENABLED is set, tracing is off and span() is a no-op.
+"""
+from typing import Any, Callable, Dict, Optional, Sequence, TypeVar
+from contextlib import AbstractContextManager
+import base64
+import json
+import logging
+import logging.handlers
+import threading
+from pathlib import Path
+
+from google.protobuf.json_format import MessageToDict
+from opentelemetry import context as otel_context, trace
+from opentelemetry.exporter.otlp.proto.common.trace_encoder import encode_spans
+from opentelemetry.propagate import extract
+from opentelemetry.sdk.resources import Resource
+from opentelemetry.sdk.trace import ReadableSpan, TracerProvider
+from opentelemetry.sdk.trace.export import BatchSpanProcessor, SpanExporter, SpanExportResult
+from opentelemetry.sdk.trace.sampling import ParentBased, TraceIdRatioBased
+
+from ..config.settings import settings
+
+T = TypeVar("T")
+
+SERVICE_NAME = "adriacb-galtea"
+# OTLP/JSON encodes these IDs as hex strings, protobuf JSON as base64
+_ID_FIELDS = ("traceId", "spanId", "parentSpanId")
+
+
+class OTLPJsonFileExporter(SpanExporter):
+    """Write finished spans as OTLP/JSON lines to a size-rotated file."""
+
+    def __init__(self, path: str, max_bytes: int, backups: int):
+        """Open the trace file.
+
+        Args:
+            path: Trace file; rotated copies get a .1, .2, ... suffix
+            max_bytes: Size at which the file is rotated
+            backups: Rotated files kept
+        """
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._handler = logging.handlers.RotatingFileHandler(
+            path,
+            maxBytes=max_bytes,
+            backupCount=backups,
+            encoding="utf-8"
+        )
+        self._handler.setFormatter(logging.Formatter("%(message)s"))
+
+    def export(self, spans: Sequence[ReadableSpan]) -> SpanExportResult:
+        """Append one line holding a batch of spans."""
+        try:
+            request = MessageToDict(encode_spans(spans), use_integers_for_enums=True)
+            for resource_spans in request.get("resourceSpans", []):
+                for scope_spans in resource_spans.get("scopeSpans", []):
+                    for record in scope_spans.get("spans", []):
+                        _hex_ids(record)
+                        for link in record.get("links", []):
+                            _hex_ids(link)
+            self._handler.emit(
+                logging.makeLogRecord({"msg": json.dumps(request, separators=(",", ":")), "args": None})
+            )
+            return SpanExportResult.SUCCESS
+        except Exception:
+            return SpanExportResult.FAILURE
+
+    def shutdown(self) -> None:
+        """Close the trace file."""
+        self._handler.close()
+
+
+def _hex_ids(record: Dict[str, Any]) -> None:
+    """Re-encode the base64 trace and span IDs of a span or link as hex."""
+    for field in _ID_FIELDS:
+        if field in record:
+            record[field] = base64.b64decode(record[field]).hex()
+
+
+_provider: Optional[TracerProvider] = None
+_provider_lock = threading.Lock()
+
+
+def get_tracer() -> trace.Tracer:
+    """Get the application tracer.
+
+    Returns:
+        Tracer exporting to settings.TRACE_FILE, or a no-op tracer if
+        tracing is disabled
+    """
+    global _provider
+    if not settings.TRACE_ENABLED:
+        return trace.NoOpTracer()
+    if _provider is None:
+        with _provider_lock:
+            if _provider is None:
+                provider = TracerProvider(
+                    resource=Resource.create({"service.name": SERVICE_NAME}),
+                    sampler=ParentBased(TraceIdRatioBased(settings.TRACE_SAMPLE_RATIO))
+                )
+                provider.add_span_processor(
+                    BatchSpanProcessor(
+                        OTLPJsonFileExporter(
+                            settings.TRACE_FILE,
+                            settings.TRACE_FILE_MAX_BYTES,
+                            settings.TRACE_FILE_BACKUPS
+                        )
+                    )
+                )
+                _provider = provider
+    return _provider.get_tracer(__name__)
+
+
+def span(name: str, kind: trace.SpanKind = trace.SpanKind.INTERNAL, **attributes: Any) -> AbstractContextManager:
+    """Start a span as a child of the current one, for a with block.
+
+    Exceptions leaving the block are recorded on the span and mark it as
+    failed. Attributes set to None are omitted.
+
+    Args:
+        name: Span name, e.g. "chroma.upsert"
+        kind: Span kind
+        **attributes: Span attributes (e.g. chunks, bytes, k)
+
+    Returns:
+        Context manager yielding the span
+    """
+    return get_tracer().start_as_current_span(
+        name,
+        kind=kind,
+        attributes={key: value for key, value in attributes.items() if value is not None}
+    )
+
+
+def record_span(name: str, start_ns: int, end_ns: int, **attributes: Any) -> None:
+    """Record a span measured elsewhere, such as in a worker process.
+
+    Args:
+        name: Span name
+        start_ns: Start time (nanoseconds since the epoch)
+        end_ns: End time (nanoseconds since the epoch)
+        **attributes: Span attributes
+    """
+    recorded = get_tracer().start_span(
+        name,
+        start_time=start_ns,
+        attributes={key: value for key, value in attributes.items() if value is not None}
+    )
+    recorded.end(end_time=end_ns)
+
+
+def bind_context(func: Callable[..., T]) -> Callable[..., T]:
+    """Carry the current span into a function run by another thread.
+
+    Args:
+        func: Function to submit to a thread or thread pool
+
+    Returns:
+        Function running func with the caller's tracing context
+    """
+    if not settings.TRACE_ENABLED:
+        return func
+    captured = otel_context.get_current()
+
+    def bound(*args: Any, **kwargs: Any) -> T:
+        token = otel_context.attach(captured)
+        try:
+            return func(*args, **kwargs)
+        finally:
+            otel_context.detach(token)
+
+    return bound
+
+
+class TracingMiddleware:
+    """ASGI middleware opening a server span around each HTTP request.
+
+    The span lasts until the last byte of the response has been sent, so
+    streamed responses are timed in full. An incoming W3C traceparent
+    header is continued, and the trace ID is returned in X-Trace-Id.
+    """
+
+    def __init__(self, app: Any):
+        """Wrap an ASGI application."""
+        self.app = app
+
+    async def __call__(self, scope: Dict[str, Any], receive: Callable, send: Callable) -> None:
+        """Handle one ASGI connection."""
+        if scope["type"] != "http" or not settings.TRACE_ENABLED:
+            await self.app(scope, receive, send)
+            return
+
+        headers = {key.decode("latin-1"): value.decode("latin-1") for key, value in scope.get("headers", [])}
+        response_bytes = 0
+        request_span = get_tracer().start_span(
+            f"{scope['method']} {scope['path']}",
+            context=extract(headers),
+            kind=trace.SpanKind.SERVER,
+            attributes={"http.request.method": scope["method"], "url.path": scope["path"]}
+        )
+
+        async def traced_send(message: Dict[str, Any]) -> None:
+            nonlocal response_bytes
+            if message["type"] == "http.response.start":
+                request_span.set_attribute("http.response.status_code", message["status"])
+                trace_id = format(request_span.get_span_context().trace_id, "032x")
+                message = {**message, "headers": [*message.get("headers", []), (b"x-trace-id", trace_id.encode())]}
+            elif message["type"] == "http.response.body":
+                response_bytes += len(message.get("body", b""))
+            await send(message)
+
+        token = otel_context.attach(trace.set_span_in_context(request_span))
+        try:
+            await self.app(scope, receive, traced_send)
+        except Exception as e:
+            request_span.record_exception(e)
+            request_span.set_status(trace.Status(trace.StatusCode.ERROR, str(e)))
+            raise
+        finally:
+            otel_context.detach(token)
+            request_span.set_attribute("http.response.body.size", response_bytes)
+            request_span.end()
+
+
+def shutdown_tracing() -> None:
+    """Export the spans still buffered and close the trace file."""
+    global _provider
+    if _provider is not None:
+        _provider.shutdown()
+        _provider = None
@@ -0,0 +1,77 @@
+"""Tests for the endpoints restricted to the admin token."""
+from unittest.mock import MagicMock
+
+import chromadb
+import pytest
+from chromadb.config import Settings
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from adriacb_galtea.api import routes
+from adriacb_galtea.config.settings import settings
+from adriacb_galtea.core import vector_store
+from adriacb_galtea.core.document_registry import DocumentRegistry
+from adriacb_galtea.core.maintenance import IndexMaintainer
+from adriacb_galtea.core.vector_store import CollectionCache
+
+ADMIN_ENDPOINTS = [
+    ("post", "/collections/documents/reindex", {}),
+    ("delete", "/collections/documents/reindex", None),
+    ("post", "/collections/documents/swap", None),
+    ("post", "/collections/documents/rollback", None),
+    ("post", "/collections/documents/finalize", None),
+]
+
+
+@pytest.fixture
+def reindexer(monkeypatch):
+    """Fixture to mock the reindexer behind the alias endpoints."""
+    reindexer = MagicMock()
+    reindexer.swap.return_value = {"alias": "documents", "collection": "documents.r1"}
+    monkeypatch.setattr(routes, "get_reindexer", lambda: reindexer)
+    monkeypatch.setattr(settings, "ADMIN_TOKEN", "secret")
+    return reindexer
+
+
+@pytest.fixture
+def client():
+    """Fixture to serve the API routes without the app's startup work."""
+    app = FastAPI()
+    app.include_router(routes.router, prefix="/api/v1")
+    return TestClient(app)
+
+
+@pytest.mark.parametrize("method,path,body", ADMIN_ENDPOINTS)
+def test_alias_endpoints_require_admin_token(client, reindexer, method, path, body):
+    """Test that reindex and alias changes are rejected without the admin token."""
+    kwargs = {"json": body} if body is not None else {}
+    assert client.request(method, f"/api/v1{path}", **kwargs).status_code == 401
+    response = client.request(method, f"/api/v1{path}", headers={"X-Admin-Token": "wrong"}, **kwargs)
+    assert response.status_code == 401
+    assert not reindexer.method_calls
+    assert not reindexer.jobs.get.called
+
+
+def test_alias_endpoints_accept_admin_token(client, reindexer):
+    """Test that an admin can swap an alias."""
+    response = client.post("/api/v1/collections/documents/swap", headers={"X-Admin-Token": "secret"})
+
+    assert response.status_code == 200
+    reindexer.swap.assert_called_once_with("documents")
+
+
+def test_compaction_requires_admin_token_and_an_existing_collection(client, tmp_path, monkeypatch):
+    """Test that compaction is admin only and that an unknown alias is not created."""
+    chroma = chromadb.PersistentClient(path=str(tmp_path), settings=Settings(anonymized_telemetry=False))
+    monkeypatch.setattr(vector_store, "_client", chroma)
+    monkeypatch.setattr(vector_store, "get_vector_store_path", lambda: tmp_path)
+    monkeypatch.setattr(DocumentRegistry, "_instance", None)
+    monkeypatch.setattr(CollectionCache, "_instance", CollectionCache(2))
+    monkeypatch.setattr(IndexMaintainer, "_instance", None)
+    monkeypatch.setattr(settings, "ADMIN_TOKEN", "secret")
+
+    assert client.post("/api/v1/collections/tenant-a/compact").status_code == 401
+    response = client.post("/api/v1/collections/tenant-a/compact", headers={"X-Admin-Token": "secret"})
+
+    assert response.status_code == 404
+    assert chroma.list_collections() == []
@@ -0,0 +1,146 @@
+"""Tests for admission control and load shedding."""
+import asyncio
+import pytest
+
+from adriacb_galtea.api import routes
+from adriacb_galtea.api.services.admission import AdmissionController, AdmissionRejected, EndpointClass
+from adriacb_galtea.api.services.coalescing import QueryCoalescer
+from adriacb_galtea.config.settings import settings
+
+
+def make_controller(query_limit=1, query_queue=2, ingest_limit=1, ingest_queue=2, timeout=1.0):
+    """Build a controller with a high priority query class and a low priority ingest class."""
+    return AdmissionController([
+        EndpointClass("query", query_limit, query_queue, timeout, priority=1),
+        EndpointClass("ingest", ingest_limit, ingest_queue, timeout, priority=0),
+    ])
+
+
+@pytest.mark.asyncio
+async def test_full_queue_is_rejected_with_429():
+    """Test that a request is shed immediately once the wait queue is full."""
+    controller = make_controller(query_queue=1)
+    acquired_at = await controller.acquire("query")
+    waiter = asyncio.create_task(controller.acquire("query"))
+    await asyncio.sleep(0)
+
+    with pytest.raises(AdmissionRejected) as error:
+        await controller.acquire("query")
+    assert error.value.status_code == 429
+    assert error.value.retry_after >= 1
+
+    await controller.release("query", acquired_at)
+    await controller.release("query", await waiter)
+    stats = controller.stats()["query"]
+    assert stats["admitted"] == 2
+    assert stats["rejected_queue_full"] == 1
+    assert stats["active"] == 0 and stats["waiting"] == 0
+
+
+@pytest.mark.asyncio
+async def test_deadline_is_rejected_with_503():
+    """Test that a request that cannot start before its deadline is shed."""
+    controller = make_controller()
+    acquired_at = await controller.acquire("query")
+
+    with pytest.raises(AdmissionRejected) as error:
+        await controller.acquire("query", timeout=0.05)
+    assert error.value.status_code == 503
+    assert controller.stats()["query"]["rejected_deadline"] == 1
+    assert controller.stats()["query"]["waiting"] == 0
+
+    await controller.release("query", acquired_at)
+    async with controller.slot("query"):
+        assert controller.stats()["query"]["active"] == 1
+    assert controller.stats()["query"]["active"] == 0
+
+
+@pytest.mark.asyncio
+async def test_waiting_queries_start_before_ingestion():
+    """Test that ingestion does not take a free slot while queries are waiting."""
+    controller = make_controller(ingest_limit=2)
+    started = []
+    query_at = await controller.acquire("query")
+    ingest_at = await controller.acquire("ingest")
+
+    async def run(name):
+        acquired_at = await controller.acquire(name)
+        started.append(name)
+        return acquired_at
+
+    waiting_query = asyncio.create_task(run("query"))
+    await asyncio.sleep(0)
+    waiting_ingest = asyncio.create_task(run("ingest"))
+    await asyncio.sleep(0.01)
+    # The ingest class has a free slot, but a query is waiting
+    assert started == []
+
+    await controller.release("query", query_at)
+    await controller.release("query", await waiting_query)
+    await controller.release("ingest", await waiting_ingest)
+    await controller.release("ingest", ingest_at)
+    assert started == ["query", "ingest"]
+
+
+@pytest.fixture
+def query_route(monkeypatch):
+    """Fixture to run /query with a graph streaming two events once released."""
+    controller = make_controller()
+    release = asyncio.Event()
+    runs = []
+
+    async def no_check(*args):
+        return None
+
+    async def stream_response(graph, query, **params):
+        runs.append(query)
+        yield "data: first\n\n"
+        await release.wait()
+        yield "data: second\n\n"
+
+    monkeypatch.setattr(AdmissionController, "_instance", controller)
+    monkeypatch.setattr(QueryCoalescer, "_instance", QueryCoalescer())
+    monkeypatch.setattr(settings, "COALESCE_ENABLED", True)
+    monkeypatch.setattr(routes, "check_collections", no_check)
+    monkeypatch.setattr(routes, "stream_response", stream_response)
+    return controller, release, runs
+
+
+async def wait_until(condition):
+    """Yield to the event loop until a condition holds."""
+    for _ in range(100):
+        if condition():
+            return
+        await asyncio.sleep(0.01)
+    raise AssertionError("condition not reached")
+
+
+@pytest.mark.asyncio
+async def test_query_slot_is_released_when_client_leaves_before_the_body(query_route):
+    """Test that a response that is never read still releases its slot when the run ends."""
+    controller, release, runs = query_route
+
+    await routes.query(routes.QueryRequest(query="range"), False, None, None)
+    assert controller.stats()["query"]["active"] == 1
+
+    release.set()
+    await wait_until(lambda: controller.stats()["query"]["active"] == 0)
+    assert runs == ["range"]
+
+
+@pytest.mark.asyncio
+async def test_query_slot_is_held_by_the_run_after_its_leader_leaves(query_route):
+    """Test that the slot stays with the run when the leader disconnects and a joiner is still reading."""
+    controller, release, runs = query_route
+
+    leader = (await routes.query(routes.QueryRequest(query="range"), False, None, None)).body_iterator
+    assert await leader.__anext__() == "data: first\n\n"
+    await leader.aclose()
+    joiner = await routes.query(routes.QueryRequest(query="Range"), False, None, None)
+    assert controller.stats()["query"]["active"] == 1
+
+    release.set()
+    assert [event async for event in joiner.body_iterator] == ["data: first\n\n", "data: second\n\n"]
+    await wait_until(lambda: controller.stats()["query"]["active"] == 0)
+    assert runs == ["range"]
+    assert controller.stats()["query"]["admitted"] == 1
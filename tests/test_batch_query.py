@@ -0,0 +1,100 @@
+"""Tests for batch query execution."""
+import asyncio
+import json
+from unittest.mock import MagicMock
+
+import pytest
+from langchain_core.messages import AIMessage, ToolMessage
+
+from adriacb_galtea.api.services import batch_query
+from adriacb_galtea.api.services.batch_query import QueryBatch, QueryBatchRegistry
+from adriacb_galtea.core import prefetch
+
+
+class FakeGraph:
+    """Graph answering after a delay and recording how many runs overlap."""
+
+    def __init__(self, delay: float = 0.01, fail: str = None):
+        self.delay = delay
+        self.fail = fail
+        self.running = 0
+        self.max_running = 0
+        self.configs = []
+
+    async def ainvoke(self, state, config=None):
+        question = state["messages"][0][1]
+        self.configs.append(config)
+        self.running += 1
+        self.max_running = max(self.max_running, self.running)
+        try:
+            await asyncio.sleep(self.delay)
+        finally:
+            self.running -= 1
+        if question == self.fail:
+            raise RuntimeError("rate limited")
+        tool_result = [{"content": "420 km", "metadata": {"source": "id3.pdf"}, "score": 0.1}]
+        return {"messages": [
+            AIMessage(content="", usage_metadata={"input_tokens": 10, "output_tokens": 2, "total_tokens": 12}),
+            ToolMessage(content=json.dumps(tool_result), tool_call_id="call-1"),
+            AIMessage(content=f"Answer to {question}"),
+        ]}
+
+
+@pytest.fixture
+def store(monkeypatch):
+    """Fixture to mock the vector store searched by the batch."""
+    store = MagicMock(embedding_dimensions=3)
+    store.embeddings.embed_documents.side_effect = lambda texts: [[float(i), 0.0, 1.0] for i in range(len(texts))]
+    monkeypatch.setattr(prefetch, "get_collection", lambda collection=None: store)
+    monkeypatch.setattr(batch_query, "get_langfuse_callback", lambda settings: None)
+    return store
+
+
+async def read(lines):
+    return [json.loads(line) async for line in lines]
+
+
+@pytest.mark.asyncio
+async def test_batch_embeds_once_and_bounds_concurrency(store):
+    """Test that questions are embedded in one call and at most `concurrency` runs overlap."""
+    graph = FakeGraph(fail="q3")
+    questions = [f"q{i}" for i in range(10)]
+    batch = QueryBatch(graph, questions, concurrency=3, collection="cars")
+
+    lines = await read(batch.run())
+
+    store.embeddings.embed_documents.assert_called_once_with(questions)
+    assert graph.max_running == 3
+    results, summary = lines[:-1], lines[-1]
+    assert sorted(result["index"] for result in results) == list(range(10))
+    answered = next(result for result in results if result["index"] == 5)
+    assert answered["answer"] == "Answer to q5"
+    assert answered["sources"] == [{"metadata": {"source": "id3.pdf"}, "score": 0.1}]
+    assert answered["usage"] == {"model_calls": 2, "input_tokens": 10, "output_tokens": 2}
+    assert set(answered["timings"]) == {"started_ms", "run_ms"}
+    assert next(result for result in results if result["index"] == 3)["error"] == "rate limited"
+    assert summary["done"] and summary["completed"] == 9 and summary["failed"] == 1
+
+    # Each run searches with its precomputed question embedding
+    prefetched = graph.configs[5]["configurable"]["prefetch"]
+    assert prefetched.query_embeddings == {3: [5.0, 0.0, 1.0]}
+
+
+@pytest.mark.asyncio
+async def test_cancelled_batch_stops_and_reports_remaining(store):
+    """Test that cancelling a batch stops its runs and ends the stream with a summary."""
+    graph = FakeGraph(delay=0.05)
+    registry = QueryBatchRegistry()
+    batch = QueryBatch(graph, [f"q{i}" for i in range(20)], concurrency=2)
+    lines = registry.stream(batch)
+    assert registry.get(batch.id) is batch
+
+    first = json.loads(await lines.__anext__())
+    registry.get(batch.id).cancel()
+    rest = await read(lines)
+
+    summary = rest[-1]
+    assert first["index"] in (0, 1)
+    assert summary["cancelled"] and summary["not_run"] >= 16
+    assert graph.running == 0
+    assert registry.get(batch.id) is None
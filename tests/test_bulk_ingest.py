@@ -0,0 +1,122 @@
+"""Tests for the bulk ingestion command."""
+import json
+import time
+from unittest.mock import MagicMock
+
+import pytest
+
+from adriacb_galtea.api.bulk_ingest import BulkIngester, Checkpoint, iter_directory, iter_manifest, iter_paths
+from adriacb_galtea.core.document_registry import DocumentRegistry, hash_file
+
+
+@pytest.fixture
+def corpus(tmp_path):
+    """Fixture to create a directory of three PDFs, two of them identical."""
+    root = tmp_path / "corpus"
+    (root / "2023").mkdir(parents=True)
+    (root / "2023" / "id3.pdf").write_bytes(b"id3 manual")
+    (root / "2023" / "id4.pdf").write_bytes(b"id4 manual")
+    (root / "id3-copy.pdf").write_bytes(b"id3 manual")
+    (root / "notes.txt").write_bytes(b"not ingested")
+    return root
+
+
+@pytest.fixture
+def service(tmp_path):
+    """Fixture to mock an injection service registering what it ingests."""
+    service = MagicMock()
+    service.vector_store.collection_name = "documents"
+    service.registry = DocumentRegistry(tmp_path / "registry.sqlite3")
+
+    def inject_document(path, max_chunks=None, doc_id=None, source=None):
+        service.registry.upsert(doc_id, source, hash_file(path), ["c0", "c1"])
+        return {"success": True, "doc_id": doc_id, "chunks_processed": 2}
+
+    service.inject_document.side_effect = inject_document
+    return service
+
+
+def test_iter_directory_and_manifest(corpus, tmp_path):
+    """Test listing a directory tree and parsing manifest lines."""
+    entries = list(iter_directory(corpus, ["*.pdf"]))
+
+    assert [entry["doc_id"] for entry in entries] == ["id3-copy.pdf", "2023/id3.pdf", "2023/id4.pdf"]
+
+    manifest = ["# initial load", "", "2023/id3.pdf", json.dumps({"path": "/data/id4.pdf", "doc_id": "id4"})]
+    entries = list(iter_manifest(manifest, base=corpus))
+
+    assert entries == [
+        {"path": str(corpus / "2023/id3.pdf"), "doc_id": "2023/id3.pdf"},
+        {"path": "/data/id4.pdf", "doc_id": "id4"},
+    ]
+
+
+def test_files_given_directly_keep_their_path_as_id(corpus):
+    """Test that same-named files from different directories get distinct IDs."""
+    (corpus / "2024").mkdir()
+    (corpus / "2024" / "id3.pdf").write_bytes(b"id3 revision")
+
+    entries = list(iter_paths([corpus / "2023" / "id3.pdf", corpus / "2024" / "id3.pdf"], ["*.pdf"]))
+
+    assert [entry["doc_id"] for entry in entries] == [
+        (corpus / "2023" / "id3.pdf").as_posix(),
+        (corpus / "2024" / "id3.pdf").as_posix(),
+    ]
+
+
+def test_identical_files_in_flight_are_ingested_once(corpus, service):
+    """Test that two copies ingested concurrently are not both stored."""
+    inject_document = service.inject_document.side_effect
+
+    def slow_inject_document(*args, **kwargs):
+        time.sleep(0.2)
+        return inject_document(*args, **kwargs)
+
+    service.inject_document.side_effect = slow_inject_document
+    entries = [
+        {"path": str(corpus / "2023" / "id3.pdf"), "doc_id": "2023/id3.pdf"},
+        {"path": str(corpus / "id3-copy.pdf"), "doc_id": "id3-copy.pdf"},
+    ]
+
+    summary = BulkIngester(service, workers=2).run(entries)
+
+    assert summary["documents"]["ingested"] == 1
+    assert summary["documents"]["duplicate"] == 1
+    assert service.inject_document.call_count == 1
+
+
+def test_duplicate_content_is_skipped(corpus, service):
+    """Test that a file whose content is already ingested under another ID is skipped."""
+    ingester = BulkIngester(service, workers=1)
+
+    summary = ingester.run(iter_directory(corpus, ["*.pdf"]))
+
+    assert summary["documents"]["ingested"] == 2
+    assert summary["documents"]["duplicate"] == 1
+    assert summary["chunks"] == 4
+    assert service.inject_document.call_count == 2
+
+
+def test_checkpoint_resumes_interrupted_run(corpus, service, tmp_path):
+    """Test that a run with the same checkpoint skips the documents already done."""
+    checkpoint_path = tmp_path / "run.checkpoint"
+    entries = list(iter_directory(corpus, ["*.pdf"]))
+    service.inject_document.side_effect = [
+        {"success": True, "chunks_processed": 2},
+        {"success": False, "message": "conversion failed"},
+        {"success": True, "chunks_processed": 3},
+        {"success": True, "chunks_processed": 4},
+    ]
+
+    first = BulkIngester(service, workers=1, checkpoint=Checkpoint(checkpoint_path)).run(entries)
+    assert first["documents"]["failed"] == 1
+    with open(checkpoint_path, "a") as f:
+        f.write('{"doc_id": "trunc')
+
+    second = BulkIngester(service, workers=2, checkpoint=Checkpoint(checkpoint_path)).run(entries)
+
+    assert second["documents"]["resumed"] == 2
+    assert second["documents"]["ingested"] == 1
+    assert second["chunks"] == 4
+    assert service.inject_document.call_args.kwargs["doc_id"] == "2023/id3.pdf"
+    assert len(Checkpoint(checkpoint_path).done) == 3
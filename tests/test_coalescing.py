@@ -0,0 +1,82 @@
+"""Tests for single-flight query coalescing."""
+import asyncio
+import pytest
+
+from adriacb_galtea.api.services.coalescing import QueryCoalescer
+
+
+def make_run(calls, release):
+    """Build a run factory streaming two events once released."""
+    def run():
+        calls.append(1)
+
+        async def events():
+            yield "data: first\n\n"
+            await release.wait()
+            yield "data: second\n\n"
+        return events()
+    return run
+
+
+async def collect(stream):
+    """Collect all events of a stream."""
+    return [event async for event in stream]
+
+
+def test_key_normalises_question():
+    """Test that case and whitespace do not change the key, but parameters do."""
+    assert QueryCoalescer.key("What is  the ID.3 range?") == QueryCoalescer.key(" what is the id.3 RANGE? ")
+    assert QueryCoalescer.key("range", collection="a") != QueryCoalescer.key("range", collection="b")
+    assert QueryCoalescer.key("range", search_ef=None) == QueryCoalescer.key("range")
+
+
+@pytest.mark.asyncio
+async def test_concurrent_requests_share_one_run():
+    """Test that identical in-flight requests attach to one run and get the same events."""
+    coalescer = QueryCoalescer()
+    calls, release = [], asyncio.Event()
+    key = coalescer.key("question")
+
+    tasks = [asyncio.create_task(collect(coalescer.stream(key, make_run(calls, release)))) for _ in range(10)]
+    await asyncio.sleep(0.01)
+    release.set()
+    results = await asyncio.gather(*tasks)
+
+    assert calls == [1]
+    assert all(result == ["data: first\n\n", "data: second\n\n"] for result in results)
+    stats = coalescer.stats()
+    assert stats["requests"] == 10
+    assert stats["runs"] == 1
+    assert stats["coalesced"] == 9
+    assert stats["in_flight"] == 0
+
+
+@pytest.mark.asyncio
+async def test_finished_run_is_not_reused_without_window():
+    """Test that a new run starts once the previous one finished and no window is set."""
+    coalescer = QueryCoalescer(window_seconds=0)
+    calls, release = [], asyncio.Event()
+    release.set()
+    key = coalescer.key("question")
+
+    await collect(coalescer.stream(key, make_run(calls, release)))
+    await asyncio.sleep(0)
+    await collect(coalescer.stream(key, make_run(calls, release)))
+
+    assert len(calls) == 2
+    assert coalescer.stats()["coalesced"] == 0
+
+
+@pytest.mark.asyncio
+async def test_finished_run_is_reused_within_window():
+    """Test that a finished run serves identical requests during the window."""
+    coalescer = QueryCoalescer(window_seconds=60)
+    calls, release = [], asyncio.Event()
+    release.set()
+    key = coalescer.key("question")
+
+    first = await collect(coalescer.stream(key, make_run(calls, release)))
+    second = await collect(coalescer.stream(key, make_run(calls, release)))
+
+    assert calls == [1]
+    assert first == second
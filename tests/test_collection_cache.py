@@ -0,0 +1,120 @@
+"""Tests for the LRU cache of open collection handles."""
+import threading
+
+import chromadb
+import pytest
+from chromadb.config import Settings
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from unittest.mock import MagicMock
+
+from adriacb_galtea.api import routes
+from adriacb_galtea.core import vector_store
+from adriacb_galtea.core.document_registry import DocumentRegistry
+from adriacb_galtea.core.vector_store import (
+    CollectionCache,
+    CollectionNotFound,
+    get_collection,
+    get_vector_store,
+    validate_collection_name,
+)
+
+
+@pytest.fixture
+def cache():
+    """Fixture to create a cache of two handles opening mock stores."""
+    return CollectionCache(2, factory=lambda name, create=True: MagicMock(collection_name=name))
+
+
+def test_lazy_open_and_reuse(cache):
+    """Test that a collection is opened once and then reused."""
+    store = cache.get("tenant-a")
+
+    assert store.collection_name == "tenant-a"
+    assert cache.get("tenant-a") is store
+    assert cache.stats()["opened"] == 1
+
+
+def test_least_recently_used_is_evicted(cache):
+    """Test that the least recently used handle is dropped when full."""
+    first = cache.get("tenant-a")
+    cache.get("tenant-b")
+    cache.get("tenant-a")
+    cache.get("tenant-c")
+
+    assert cache.open_collections() == ["tenant-a", "tenant-c"]
+    assert cache.stats()["evicted"] == 1
+    assert cache.get("tenant-a") is first
+
+    # An evicted collection is transparently reopened
+    assert cache.get("tenant-b").collection_name == "tenant-b"
+    assert cache.stats()["opened"] == 4
+
+
+@pytest.mark.parametrize("name", ["ab", "-tenant", "tenant/a", "tenant a", "tenant."])
+def test_invalid_collection_names(cache, name):
+    """Test that invalid collection names are rejected."""
+    with pytest.raises(ValueError):
+        validate_collection_name(name)
+    with pytest.raises(ValueError):
+        cache.get(name)
+
+
+def test_open_does_not_block_other_collections():
+    """Test that a slow open only holds up requests for the same collection."""
+    release = threading.Event()
+    opens = []
+
+    def factory(name, create=True):
+        opens.append(name)
+        if name == "slow-tenant":
+            release.wait(5)
+        return MagicMock(collection_name=name)
+
+    cache = CollectionCache(4, factory=factory)
+    cache.get("tenant-a")
+    slow = [threading.Thread(target=cache.get, args=("slow-tenant",)) for _ in range(3)]
+    for thread in slow:
+        thread.start()
+
+    assert cache.get("tenant-a").collection_name == "tenant-a"
+    assert cache.get("tenant-b").collection_name == "tenant-b"
+    release.set()
+    for thread in slow:
+        thread.join()
+    assert opens.count("slow-tenant") == 1
+
+
+def test_reads_do_not_create_collections(tmp_path, monkeypatch):
+    """Test that opening a missing collection for reading fails without creating it."""
+    client = chromadb.PersistentClient(path=str(tmp_path), settings=Settings(anonymized_telemetry=False))
+    monkeypatch.setattr(vector_store, "_client", client)
+    monkeypatch.setattr(vector_store, "get_vector_store_path", lambda: tmp_path)
+    monkeypatch.setattr(DocumentRegistry, "_instance", None)
+    monkeypatch.setattr(CollectionCache, "_instance", CollectionCache(2))
+
+    with pytest.raises(CollectionNotFound):
+        get_collection("tenant-a")
+    with pytest.raises(CollectionNotFound):
+        vector_store.search_collections("range", ["tenant-a"])
+    assert client.list_collections() == []
+
+    store = get_vector_store("tenant-a")
+    assert get_collection("tenant-a") is store
+    assert [collection.name for collection in client.list_collections()] == ["tenant-a"]
+
+
+def test_document_routes_do_not_create_collections(tmp_path, monkeypatch):
+    """Test that listing or deleting documents of a missing collection is a 404 that creates nothing."""
+    client = chromadb.PersistentClient(path=str(tmp_path), settings=Settings(anonymized_telemetry=False))
+    monkeypatch.setattr(vector_store, "_client", client)
+    monkeypatch.setattr(vector_store, "get_vector_store_path", lambda: tmp_path)
+    monkeypatch.setattr(DocumentRegistry, "_instance", None)
+    monkeypatch.setattr(CollectionCache, "_instance", CollectionCache(2))
+    app = FastAPI()
+    app.include_router(routes.router, prefix="/api/v1")
+    api = TestClient(app)
+
+    assert api.get("/api/v1/documents", params={"collection": "tenant-a"}).status_code == 404
+    assert api.delete("/api/v1/documents/manual.pdf", params={"collection": "tenant-a"}).status_code == 404
+    assert client.list_collections() == []
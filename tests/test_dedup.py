@@ -0,0 +1,148 @@
+"""Tests for near-duplicate chunk detection."""
+import chromadb
+import pytest
+from chromadb.config import Settings
+
+from adriacb_galtea.core import vector_store
+from adriacb_galtea.core.dedup import (
+    DedupStats,
+    DocumentDeduplicator,
+    MinHasher,
+    restore_linked_duplicates,
+    shingles,
+)
+from adriacb_galtea.core.document_registry import DocumentRegistry
+from adriacb_galtea.core.vector_store import ChromaVectorStore
+
+WARNING = (
+    "Warning: do not operate the vehicle while the charging cable is connected. Doing so may cause "
+    "serious injury and damage the high-voltage system. Always disconnect the cable and close the "
+    "charging flap before driving, and have the system inspected by an authorised workshop if the "
+    "cable or the socket shows any sign of damage, overheating or discolouration."
+)
+RANGE = "The ID.3 has a range of 420 km with the 58 kWh battery and supports DC charging at up to 120 kW."
+
+
+@pytest.fixture
+def registry(tmp_path):
+    """Fixture to create a registry in a temporary directory."""
+    return DocumentRegistry(tmp_path / "registry.sqlite3")
+
+
+def make_deduplicator(doc_id, registry, mode="skip"):
+    """Create a deduplicator with its own stats."""
+    return DocumentDeduplicator(doc_id, "documents", mode=mode, threshold=0.8, registry=registry, stats=DedupStats())
+
+
+def test_signature_similarity():
+    """Test that MinHash estimates high similarity for near-identical texts only."""
+    hasher = MinHasher()
+    edited = WARNING.replace("serious", "severe")
+
+    assert hasher.similarity(hasher.signature(WARNING), hasher.signature(edited)) > 0.8
+    assert hasher.similarity(hasher.signature(WARNING), hasher.signature(RANGE)) < 0.2
+    assert shingles("Hello,   WORLD", size=5) == ["hello world"]
+    with pytest.raises(ValueError):
+        MinHasher(num_perm=100, bands=16)
+
+
+def test_duplicates_within_document_and_corpus(registry):
+    """Test that duplicates are dropped against the document and the stored corpus."""
+    first = make_deduplicator("manual-2023.pdf", registry, mode="link")
+    kept = first.filter([
+        {"id": "a0", "content": WARNING},
+        {"id": "a1", "content": RANGE},
+        {"id": "a2", "content": WARNING},
+    ])
+    first.commit()
+
+    assert [document["id"] for document in kept] == ["a0", "a1"]
+    assert first.report()["within_document"] == 1
+    assert first.report()["bytes_saved"] == len(WARNING.encode())
+
+    second = make_deduplicator("manual-2024.pdf", registry)
+    kept = second.filter([
+        {"id": "b0", "content": WARNING.replace("serious", "severe")},
+        {"id": "b1", "content": "The warranty covers the battery for eight years or 160000 km."},
+    ])
+
+    assert [document["id"] for document in kept] == ["b1"]
+    assert second.report()["corpus"] == 1
+    assert registry.duplicate_stats("documents")["duplicate_chunks"] == 1
+
+
+def test_replaced_document_is_not_its_own_duplicate(registry):
+    """Test that a new version of a document is not deduplicated against the old one."""
+    first = make_deduplicator("manual.pdf", registry)
+    first.filter([{"id": "v1:0", "content": WARNING}])
+    first.commit()
+
+    second = make_deduplicator("manual.pdf", registry)
+    kept = second.filter([{"id": "v2:0", "content": WARNING}])
+    second.commit()
+
+    assert [document["id"] for document in kept] == ["v2:0"]
+    assert registry.duplicate_stats("documents")["indexed_chunks"] == 1
+
+    registry.delete("manual.pdf", collection="documents")
+    assert registry.duplicate_stats("documents")["indexed_chunks"] == 0
+
+
+def test_off_mode_keeps_everything(registry):
+    """Test that no chunk is dropped or indexed when detection is off."""
+    deduplicator = make_deduplicator("manual.pdf", registry, mode="off")
+    documents = [{"id": "a0", "content": WARNING}, {"id": "a1", "content": WARNING}]
+
+    assert deduplicator.filter(documents) == documents
+    deduplicator.commit()
+    assert registry.duplicate_stats("documents")["indexed_chunks"] == 0
+
+
+def test_deleted_canonical_chunk_is_restored_for_linked_documents(registry, tmp_path, monkeypatch):
+    """Test that deleting a document copies its linked chunks to the documents that dropped them."""
+    client = chromadb.PersistentClient(path=str(tmp_path / "chroma"), settings=Settings(anonymized_telemetry=False))
+    monkeypatch.setattr(vector_store, "_client", client)
+    monkeypatch.setattr(vector_store, "get_vector_store_path", lambda: tmp_path)
+    monkeypatch.setattr(DocumentRegistry, "_instance", registry)
+    store = ChromaVectorStore("documents", embedding_dimensions=2)
+
+    def ingest(doc_id, contents):
+        content_hash = doc_id[0] * 64
+        deduplicator = make_deduplicator(doc_id, registry)
+        kept = deduplicator.filter([
+            {"id": f"{doc_id}:{content_hash[:16]}:{i}", "content": content, "metadata": {"doc_id": doc_id, "page": i}}
+            for i, content in enumerate(contents)
+        ])
+        if kept:
+            store._collection.add(
+                ids=[document["id"] for document in kept],
+                documents=[document["content"] for document in kept],
+                metadatas=[document["metadata"] for document in kept],
+                embeddings=[[1.0, float(i)] for i in range(len(kept))]
+            )
+        registry.upsert(doc_id, doc_id, content_hash, [document["id"] for document in kept])
+        deduplicator.commit()
+
+    def delete(doc_id):
+        restored = restore_linked_duplicates(store, doc_id, registry=registry)
+        store.delete_document(doc_id)
+        registry.delete(doc_id)
+        return restored
+
+    ingest("a.pdf", [RANGE, WARNING])
+    ingest("b.pdf", [WARNING.replace("serious", "severe")])
+    ingest("c.pdf", ["The warranty covers the battery for eight years.", WARNING])
+    assert store._collection.count() == 3
+
+    assert delete("a.pdf") == 1
+    copy = store._collection.get(ids=["b.pdf:bbbbbbbbbbbbbbbb:0"], include=["documents", "metadatas"])
+    assert copy["documents"] == [WARNING]
+    assert copy["metadatas"][0]["doc_id"] == "b.pdf"
+    assert registry.get("b.pdf")["chunk_ids"] == ["b.pdf:bbbbbbbbbbbbbbbb:0"]
+    stats = registry.duplicate_stats("documents")
+    assert stats["duplicate_chunks"] == 1 and stats["dangling_links"] == 0
+
+    # The remaining link now points at the copy, so deleting its owner restores it again
+    assert delete("b.pdf") == 1
+    assert store._collection.get(where={"doc_id": "c.pdf"})["ids"] == ["c.pdf:cccccccccccccccc:0", "c.pdf:cccccccccccccccc:1"]
+    assert registry.duplicate_stats("documents")["duplicate_chunks"] == 0
@@ -0,0 +1,80 @@
+"""Tests for reduced-dimension embeddings and collection migration."""
+from unittest.mock import MagicMock
+
+import numpy as np
+import pytest
+
+from adriacb_galtea.core.document_registry import DocumentRegistry
+from adriacb_galtea.core.embeddings import truncate_embeddings
+from adriacb_galtea.core.migration import migrate_collection
+from adriacb_galtea.evaluation.dimension_recall import evaluate_dimensions
+
+
+def test_truncate_embeddings_renormalises():
+    """Test that shortened vectors keep their prefix direction and have unit norm."""
+    vectors = truncate_embeddings([[3.0, 4.0, 12.0], [0.0, 0.0, 1.0]], 2)
+
+    assert vectors.shape == (2, 2)
+    np.testing.assert_allclose(vectors[0], [0.6, 0.8], rtol=1e-6)
+    np.testing.assert_allclose(vectors[1], [0.0, 0.0])
+
+
+def test_recall_grows_with_dimension():
+    """Test recall@k on vectors whose information is concentrated in the first dimensions."""
+    rng = np.random.default_rng(0)
+    scale = 1 / np.arange(1, 257)
+    corpus = rng.normal(size=(500, 256)) * scale
+    queries = corpus[:20] + rng.normal(size=(20, 256)) * scale * 0.1
+
+    results = evaluate_dimensions(corpus, queries, [16, 64, 256, 512], k=5)
+
+    assert [result["dimensions"] for result in results] == [16, 64, 256]
+    recalls = [result["recall@5"] for result in results]
+    assert recalls[-1] == 1.0
+    assert recalls[0] <= recalls[1] <= recalls[2]
+    assert results[0]["memory_reduction"] == 16.0
+
+
+@pytest.fixture
+def registry(tmp_path):
+    """Fixture to create a registry holding one document of the source collection."""
+    registry = DocumentRegistry(tmp_path / "registry.sqlite3")
+    registry.upsert("manual.pdf", "manual.pdf", "abc", ["c0", "c1", "c2"], collection="documents")
+    return registry
+
+
+def make_store(name, dimensions):
+    """Mock a vector store whose collection is read page by page."""
+    vectors = [[1.0, 1.0, 0.0, 5.0], [0.0, 2.0, 0.0, 5.0], [3.0, 4.0, 1.0, 5.0]]
+
+    def get(limit, offset, include):
+        return {
+            "ids": [f"c{i}" for i in range(offset, min(offset + limit, 3))],
+            "documents": [f"chunk {i}" for i in range(offset, min(offset + limit, 3))],
+            "metadatas": [{"doc_id": "manual.pdf"} for _ in range(offset, min(offset + limit, 3))],
+            "embeddings": vectors[offset:offset + limit],
+        }
+
+    store = MagicMock(collection_name=name, embedding_dimensions=dimensions)
+    store._collection.get.side_effect = get
+    return store
+
+
+def test_migrate_collection_shortens_vectors(registry):
+    """Test that a migration copies chunks with shortened vectors and the registry records."""
+    source, target = make_store("documents", 4), make_store("documents-2", 2)
+
+    result = migrate_collection(source, target, page_size=2, registry=registry)
+
+    assert result["chunks"] == 3 and result["documents"] == 1
+    calls = target.writer.return_value.add.call_args_list
+    assert [len(call.args[0]) for call in calls] == [2, 1]
+    vectors = [vector for call in calls for vector in call.kwargs["embeddings"]]
+    np.testing.assert_allclose(vectors, [[0.7071068, 0.7071068], [0.0, 1.0], [0.6, 0.8]], rtol=1e-6)
+    assert registry.get("manual.pdf", collection="documents-2")["chunk_count"] == 3
+
+
+def test_migrate_collection_rejects_larger_dimension(registry):
+    """Test that vectors cannot be migrated to more dimensions than they have."""
+    with pytest.raises(ValueError, match="Cannot migrate"):
+        migrate_collection(make_store("small", 2), make_store("large", 4), registry=registry)
@@ -6,7 +6,13 @@ from io import BytesIO
 
 from docling.document_converter import DocumentConverter
 from docling_core.types.doc import DoclingDocument
-from adriacb_galtea.core.document_processor import DoclingProcessor
+from adriacb_galtea.core import document_processor as document_processor_module
+from adriacb_galtea.core.document_processor import (
+    DoclingProcessor,
+    ChunkStats,
+    build_pipeline_options,
+    select_conversion_profile
+)
 from docling_core.utils.file import resolve_source_to_stream
 
 
@@ -54,6 +60,11 @@ def mock_resolve_source_to_stream():
         yield mock_resolve
 
 
+def count_words(text):
+    """Word count standing in for the tiktoken encoding, which is downloaded on first use."""
+    return len(text.split())
+
+
 @pytest.fixture
 def document_processor(mock_docling_converter):
     """Fixture to create a document processor instance."""
@@ -129,4 +140,137 @@ def test_chunk_splitting(document_processor):
     assert len(chunks) == 3  # Update expected number of chunks
     assert "First paragraph" in chunks[0]
     assert "Second paragraph" in chunks[1]  # Update chunk index
-    assert "Third paragraph" in chunks[2]  # Update chunk index 
\ No newline at end of file
+    assert "Third paragraph" in chunks[2]  # Update chunk index 
+
+def test_iter_chunks_bounds_token_size(mock_docling_converter):
+    """Test that long sections are split into token-bounded chunks with header metadata."""
+    processor = DoclingProcessor(
+        converter=mock_docling_converter, max_tokens=20, overlap_tokens=5, length_function=count_words
+    )
+    paragraph = " ".join(f"word{i}" for i in range(200))
+    text = f"# Manual\n\n## Brakes\n\n{paragraph}\n"
+    
+    stats = ChunkStats()
+    chunks = processor.iter_chunks(text, {"filename": "manual.pdf"}, stats)
+    
+    # Chunks are produced lazily
+    assert not isinstance(chunks, list)
+    chunks = list(chunks)
+    
+    assert len(chunks) > 1
+    assert all(chunk["metadata"]["token_count"] <= 20 for chunk in chunks)
+    assert all(chunk["metadata"]["Header 2"] == "Brakes" for chunk in chunks)
+    assert all(chunk["metadata"]["filename"] == "manual.pdf" for chunk in chunks)
+    
+    summary = stats.summary()
+    assert summary["count"] == len(chunks)
+    assert summary["max_tokens"] <= 20
+
+
+def test_iter_chunks_keeps_page_provenance(mock_docling_converter):
+    """Test that page markers from page-range conversion become chunk metadata."""
+    processor = DoclingProcessor(converter=mock_docling_converter, length_function=count_words)
+    text = (
+        "<!-- page: 1 -->\n\n# Engine\n\nOil change interval\n\n"
+        "<!-- page: 2 -->\n\nContinued on the next range\n\n"
+        "<!-- page: 3 -->\n\n# Brakes\n\nPad replacement"
+    )
+    
+    chunks = list(processor.iter_chunks(text, {}))
+    
+    assert chunks[0]["metadata"]["Header 1"] == "Engine"
+    assert chunks[0]["metadata"]["page_start"] == 1
+    assert chunks[0]["metadata"]["page_end"] == 2
+    assert "<!--" not in chunks[0]["content"]
+    assert chunks[1]["metadata"]["Header 1"] == "Brakes"
+    assert chunks[1]["metadata"]["page_start"] == 3
+
+
+def test_process_document_chunking_errors_are_raised_by_iteration(document_processor, tmp_path, caplog):
+    """Test that lazy chunking errors surface, logged, where the chunks are consumed."""
+    document = tmp_path / "manual.pdf"
+    document.write_bytes(b"%PDF-1.4")
+    document_processor.length_function = MagicMock(side_effect=RuntimeError("no tokenizer"))
+    with patch.object(document_processor, "extract_text", return_value="# Manual\n\nText"):
+        result = document_processor.process_document(str(document))
+    
+    with pytest.raises(RuntimeError, match="no tokenizer"):
+        list(result["chunks"])
+    assert f"Error chunking document {document}" in caplog.text
+
+
+def test_page_ranges(mock_docling_converter):
+    """Test splitting a page count into contiguous ranges."""
+    processor = DoclingProcessor(converter=mock_docling_converter)
+    processor.conversion_workers = 4
+    
+    ranges = processor._page_ranges(10)
+    
+    assert ranges[0][0] == 1
+    assert ranges[-1][1] == 10
+    assert all(b[0] == a[1] + 1 for a, b in zip(ranges, ranges[1:]))
+    assert len(ranges) == 4
+
+
+def test_custom_converter_converts_large_pdfs_itself(mock_docling_converter, monkeypatch):
+    """Test that a large PDF is not sent to the worker pool when a custom converter is set."""
+    processor = DoclingProcessor(converter=mock_docling_converter)
+    processor.conversion_workers = 4
+    monkeypatch.setattr(processor, "_count_pdf_pages", lambda path: 1000)
+    monkeypatch.setattr(processor, "_iter_page_ranges", MagicMock(side_effect=AssertionError("pool used")))
+
+    segments = list(processor.iter_markdown("manual.pdf"))
+
+    assert segments == ["Test content\n\nMore content"]
+    mock_docling_converter.convert.assert_called_once_with("manual.pdf")
+
+
+def test_conversion_pools_are_kept_per_worker_count(monkeypatch):
+    """Test that processors with different worker counts do not share a pool."""
+    monkeypatch.setattr(document_processor_module, "_conversion_pools", {})
+
+    two = document_processor_module._get_conversion_pool(2)
+    try:
+        assert document_processor_module._get_conversion_pool(2) is two
+        three = document_processor_module._get_conversion_pool(3)
+        assert three is not two and three._max_workers == 3
+    finally:
+        for pool in document_processor_module._conversion_pools.values():
+            pool.shutdown()
+
+
+def mock_pdf(pages):
+    """Mock a pypdfium2 document from (text, path object count) pages."""
+    mock_pages = []
+    for text, paths in pages:
+        page = MagicMock()
+        page.get_textpage.return_value.get_text_range.return_value = text
+        page.get_objects.return_value = [MagicMock(type=2) for _ in range(paths)] + [MagicMock(type=1)]
+        mock_pages.append(page)
+    pdf = MagicMock()
+    pdf.__len__.return_value = len(mock_pages)
+    pdf.__getitem__.side_effect = mock_pages.__getitem__
+    return pdf
+
+
+@pytest.mark.parametrize("pages, profile", [
+    ([("Cover", 0), ("Text " * 50, 2), ("Text " * 50, 0)], "fast"),
+    ([("Text " * 50, 60), ("Text " * 50, 50)], "tables"),
+    ([("", 0), ("", 0), ("Text " * 50, 0)], "ocr"),
+    ([("�" * 300, 0), ("�" * 300, 0)], "ocr"),
+])
+def test_select_conversion_profile(pages, profile):
+    """Test picking the cheapest adequate profile from sampled pages."""
+    with patch("pypdfium2.PdfDocument", return_value=mock_pdf(pages)):
+        assert select_conversion_profile("manual.pdf") == profile
+
+
+def test_conversion_profile_options():
+    """Test that only the ocr profile runs OCR and the fast one skips table structure."""
+    fast, tables, ocr = (build_pipeline_options(profile) for profile in ("fast", "tables", "ocr"))
+
+    assert (fast.do_ocr, fast.do_table_structure) == (False, False)
+    assert (tables.do_ocr, tables.do_table_structure) == (False, True)
+    assert (ocr.do_ocr, ocr.do_table_structure, ocr.generate_page_images) == (True, True, True)
+    with pytest.raises(ValueError):
+        build_pipeline_options("vlm")
@@ -0,0 +1,60 @@
+"""Tests for the document registry."""
+import pytest
+
+from adriacb_galtea.core.document_registry import DocumentRegistry, hash_file
+
+
+@pytest.fixture
+def registry(tmp_path):
+    """Fixture to create a registry in a temporary directory."""
+    return DocumentRegistry(tmp_path / "registry.sqlite3")
+
+
+def test_upsert_and_get(registry):
+    """Test registering a document and reading it back."""
+    registry.upsert("manual.pdf", "manual.pdf", "abc", ["manual.pdf:abc:0", "manual.pdf:abc:1"])
+
+    record = registry.get("manual.pdf")
+
+    assert record["content_hash"] == "abc"
+    assert record["chunk_count"] == 2
+    assert record["chunk_ids"] == ["manual.pdf:abc:0", "manual.pdf:abc:1"]
+    assert registry.get("manual.pdf", collection="other") is None
+
+
+def test_replace_document(registry):
+    """Test that re-registering a document replaces its record."""
+    registry.upsert("manual.pdf", "manual.pdf", "abc", ["a"])
+    registry.upsert("manual.pdf", "manual.pdf", "def", ["b", "c"])
+
+    record = registry.get("manual.pdf")
+
+    assert record["content_hash"] == "def"
+    assert record["chunk_count"] == 2
+    assert registry.count() == 1
+    assert registry.find_by_hash("def")["doc_id"] == "manual.pdf"
+    assert registry.find_by_hash("abc") is None
+
+
+def test_list_and_delete(registry):
+    """Test listing and deleting documents."""
+    registry.upsert("a.pdf", "a.pdf", "1", ["a"])
+    registry.upsert("b.pdf", "b.pdf", "2", ["b"])
+
+    assert {record["doc_id"] for record in registry.list_documents()} == {"a.pdf", "b.pdf"}
+    assert "chunk_ids" not in registry.list_documents()[0]
+
+    assert registry.delete("a.pdf") is True
+    assert registry.delete("a.pdf") is False
+    assert [record["doc_id"] for record in registry.list_documents()] == ["b.pdf"]
+
+
+def test_hash_file(tmp_path):
+    """Test hashing file content."""
+    first = tmp_path / "first.txt"
+    second = tmp_path / "second.txt"
+    first.write_bytes(b"same content")
+    second.write_bytes(b"same content")
+
+    assert hash_file(str(first)) == hash_file(str(second))
+    assert len(hash_file(str(first))) == 64
@@ -0,0 +1,50 @@
+"""Tests for conversation history trimming."""
+from langchain_core.messages import AIMessage, HumanMessage, RemoveMessage, ToolMessage
+
+from adriacb_galtea.core.history import STALE_TOOL_PLACEHOLDER, trim_history, trim_history_hook
+
+
+def make_turn(n, payload="payload " * 200):
+    """Build one question / tool call / tool output / answer turn."""
+    return [
+        HumanMessage(f"question {n}", id=f"h{n}"),
+        AIMessage("", tool_calls=[{"name": "retrieve_documents", "args": {"query": "q"}, "id": f"c{n}"}], id=f"a{n}"),
+        ToolMessage(payload, tool_call_id=f"c{n}", name="retrieve_documents", id=f"t{n}"),
+        AIMessage(f"answer {n}", id=f"r{n}"),
+    ]
+
+
+def test_stale_tool_outputs_are_compacted():
+    """Test that tool outputs of previous turns are replaced, but not the current one."""
+    messages = make_turn(1) + make_turn(2)[:3]
+
+    trimmed = trim_history(messages, max_tokens=10_000)
+
+    assert [message.id for message in trimmed] == [message.id for message in messages]
+    assert trimmed[2].content == STALE_TOOL_PLACEHOLDER
+    assert trimmed[2].tool_call_id == "c1"
+    assert trimmed[-1].content == messages[-1].content
+
+
+def test_history_is_bounded_by_whole_turns():
+    """Test that old turns are dropped to fit the budget and the current turn is kept."""
+    messages = [message for n in range(20) for message in make_turn(n)] + [HumanMessage("last", id="last")]
+
+    trimmed = trim_history(messages, max_tokens=200)
+
+    assert trimmed[-1].id == "last"
+    assert isinstance(trimmed[0], HumanMessage)
+    assert len(trimmed) < len(messages)
+    # The trimmed size does not depend on the conversation length
+    longer = [message for n in range(40) for message in make_turn(n)] + [HumanMessage("last", id="last")]
+    assert len(trim_history(longer, max_tokens=200)) == len(trimmed)
+
+
+def test_hook_replaces_state_only_when_trimmed():
+    """Test that the hook leaves short conversations untouched."""
+    short = make_turn(1)[:1]
+    assert trim_history_hook({"messages": short}) == {"llm_input_messages": short}
+
+    update = trim_history_hook({"messages": make_turn(1) + make_turn(2)[:1]})
+    assert isinstance(update["messages"][0], RemoveMessage)
+    assert update["messages"][3].content == STALE_TOOL_PLACEHOLDER
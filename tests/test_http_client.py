@@ -0,0 +1,146 @@
+"""Tests for the shared OpenAI HTTP clients against a local OpenAI-compatible stub."""
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import asyncio
+import json
+import threading
+import time
+
+import httpx
+import openai
+import pytest
+
+from adriacb_galtea.core.http_client import ConnectionMetrics, OpenAIHttpClients, RetryBudgetExhausted
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    """Answer /v1/embeddings with keep-alive, failing the first `failures` requests."""
+
+    protocol_version = "HTTP/1.1"
+    failures = 0
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        if StubHandler.failures:
+            StubHandler.failures -= 1
+            status, payload = 500, {"error": {"message": "boom"}}
+        else:
+            inputs = body["input"] if isinstance(body["input"], list) else [body["input"]]
+            status, payload = 200, {
+                "object": "list",
+                "data": [{"object": "embedding", "index": i, "embedding": [0.1, 0.2]} for i in range(len(inputs))],
+                "model": body["model"],
+                "usage": {"prompt_tokens": 1, "total_tokens": 1},
+            }
+        data = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def stub_url():
+    """Run the stub server for one test."""
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}/v1"
+    server.shutdown()
+    server.server_close()
+    StubHandler.failures = 0
+
+
+def test_sync_client_reuses_connection(stub_url):
+    """Test that sequential calls share one keep-alive connection."""
+    clients = OpenAIHttpClients(max_connections=4, max_keepalive_connections=4)
+    client = openai.OpenAI(api_key="test", base_url=stub_url, http_client=clients.sync)
+
+    for _ in range(5):
+        client.embeddings.create(model="text-embedding-3-small", input="hello")
+
+    stats = clients.stats()
+    assert stats["requests"] == 5
+    assert stats["connections_opened"] == 1
+    assert stats["reused_requests"] == 4
+    assert stats["tls_handshakes"] == 0
+    clients.sync.close()
+
+
+def test_retries_are_counted(stub_url):
+    """Test that SDK retries go through the shared pool and are counted."""
+    StubHandler.failures = 1
+    clients = OpenAIHttpClients()
+    client = openai.OpenAI(api_key="test", base_url=stub_url, http_client=clients.sync, max_retries=2)
+
+    client.embeddings.create(model="text-embedding-3-small", input="hello")
+
+    stats = clients.stats()
+    assert stats["requests"] == 2
+    assert stats["retries"] == 1
+    clients.sync.close()
+
+
+@pytest.mark.asyncio
+async def test_async_client_bounds_connections(stub_url):
+    """Test that a burst of async calls opens at most max_connections connections."""
+    clients = OpenAIHttpClients(max_connections=2, max_keepalive_connections=2)
+    client = openai.AsyncOpenAI(api_key="test", base_url=stub_url, http_client=clients.async_)
+
+    await asyncio.gather(*[
+        client.embeddings.create(model="text-embedding-3-small", input=f"hello {i}") for i in range(10)
+    ])
+
+    stats = clients.stats()
+    assert stats["requests"] == 10
+    assert 1 <= stats["connections_opened"] <= 2
+    await clients.aclose()
+
+
+def test_retry_budget_stops_retries_of_error_responses(stub_url):
+    """Test that error responses are not retried once the process-wide retry budget is spent."""
+    StubHandler.failures = 100
+    clients = OpenAIHttpClients()
+    clients.metrics = ConnectionMetrics(retry_ratio=0.0, retry_min=1)
+    client = openai.OpenAI(api_key="test", base_url=stub_url, http_client=clients.sync, max_retries=3)
+
+    for _ in range(2):
+        with pytest.raises(openai.InternalServerError):
+            client.embeddings.create(model="text-embedding-3-small", input="hello")
+
+    stats = clients.stats()
+    assert stats["requests"] == 3
+    assert stats["retries"] == 1
+    assert stats["retries_denied"] == 2
+    assert stats["retry_budget"] == 0
+    clients.sync.close()
+
+
+def test_retry_budget_stops_retries_after_connection_errors():
+    """Test that a connection error is not retried once the budget is spent."""
+    clients = OpenAIHttpClients()
+    clients.metrics = ConnectionMetrics(retry_ratio=0.0, retry_min=1)
+    # Nothing listens on the discard port
+    client = openai.OpenAI(api_key="test", base_url="http://127.0.0.1:9/v1", http_client=clients.sync, max_retries=3)
+
+    with pytest.raises(RetryBudgetExhausted):
+        client.embeddings.create(model="text-embedding-3-small", input="hello")
+
+    stats = clients.stats()
+    assert stats["retries"] == 1
+    assert stats["retries_denied"] == 1
+    clients.sync.close()
+
+
+def test_retry_budget_grows_with_requests():
+    """Test that the budget allows a share of the recent first attempts and forgets old traffic."""
+    metrics = ConnectionMetrics(retry_ratio=0.5, retry_min=0, retry_window=0.2)
+    for _ in range(4):
+        metrics.record_request(httpx.Request("POST", "http://test/v1/embeddings"))
+
+    assert metrics.stats()["retry_budget"] == 2
+    time.sleep(0.25)
+    assert metrics.stats()["retry_budget"] == 0
@@ -0,0 +1,131 @@
+"""Tests for the streaming ingestion pipeline."""
+import pytest
+from unittest.mock import MagicMock
+
+from adriacb_galtea.api.services.ingestion_pipeline import IngestionPipeline
+
+
+@pytest.fixture
+def mock_processor():
+    """Fixture to mock a processor yielding two markdown segments."""
+    mock = MagicMock()
+    mock.iter_markdown.return_value = iter(["segment 1", "segment 2"])
+
+    def iter_chunks(segments, metadata, stats=None):
+        for segment in segments:
+            for i in range(5):
+                if stats is not None:
+                    stats.add(3)
+                yield {"content": f"{segment} chunk {i}", "metadata": dict(metadata)}
+
+    mock.iter_chunks.side_effect = iter_chunks
+    return mock
+
+
+@pytest.fixture
+def mock_embeddings():
+    """Fixture to mock the embedding model."""
+    mock = MagicMock()
+    mock.embed_documents.side_effect = lambda texts: [[0.1, 0.2] for _ in texts]
+    return mock
+
+
+@pytest.fixture
+def mock_vector_store():
+    """Fixture to mock the vector store."""
+    return MagicMock()
+
+
+def prepare_batch(chunks, offset):
+    """Assign sequential ids to a batch of chunks."""
+    return [
+        {"id": f"doc_{offset + i}", "content": chunk["content"], "metadata": chunk["metadata"]}
+        for i, chunk in enumerate(chunks)
+    ]
+
+
+def test_pipeline_streams_all_chunks(mock_processor, mock_embeddings, mock_vector_store):
+    """Test that every chunk is embedded and upserted in batches, in order."""
+    pipeline = IngestionPipeline(mock_processor, mock_embeddings, mock_vector_store, batch_size=4, queue_size=1)
+
+    result = pipeline.run("manual.pdf", {"filename": "manual.pdf"}, prepare_batch)
+
+    assert result["chunks_processed"] == 10
+    assert result["chunk_stats"]["count"] == 10
+    assert set(result["stages"]) == {"convert", "split", "embed", "upsert"}
+    assert result["stages"]["convert"]["items"] == 2
+    assert result["bottleneck"] in result["stages"]
+
+    # Batches of at most 4 chunks, with precomputed embeddings
+    writer = mock_vector_store.writer.return_value
+    writer.close.assert_called_once()
+    calls = writer.add.call_args_list
+    assert [len(call.args[0]) for call in calls] == [4, 4, 2]
+    assert all(len(call.kwargs["embeddings"]) == len(call.args[0]) for call in calls)
+    ids = [doc["id"] for call in calls for doc in call.args[0]]
+    assert ids == [f"doc_{i}" for i in range(10)]
+
+
+def test_pipeline_max_chunks(mock_processor, mock_embeddings, mock_vector_store):
+    """Test limiting the number of stored chunks."""
+    pipeline = IngestionPipeline(mock_processor, mock_embeddings, mock_vector_store, batch_size=4)
+
+    result = pipeline.run("manual.pdf", {}, prepare_batch, max_chunks=3)
+
+    assert result["chunks_processed"] == 3
+
+
+def test_pipeline_max_chunks_stops_conversion(mock_processor, mock_embeddings, mock_vector_store):
+    """Test that reaching max_chunks stops a conversion blocked on a full segment queue."""
+    converted = []
+
+    def iter_markdown(file_path):
+        for i in range(20):
+            converted.append(i)
+            yield f"segment {i}"
+
+    mock_processor.iter_markdown.side_effect = iter_markdown
+    pipeline = IngestionPipeline(mock_processor, mock_embeddings, mock_vector_store, batch_size=4, queue_size=2)
+
+    result = pipeline.run("manual.pdf", {}, prepare_batch, max_chunks=1)
+
+    assert result["chunks_processed"] == 1
+    assert len(converted) < 20
+
+
+def test_pipeline_propagates_stage_errors(mock_processor, mock_embeddings, mock_vector_store):
+    """Test that a failing stage stops the pipeline and re-raises its error."""
+    mock_embeddings.embed_documents.side_effect = RuntimeError("rate limited")
+    pipeline = IngestionPipeline(mock_processor, mock_embeddings, mock_vector_store, batch_size=2, queue_size=1)
+
+    with pytest.raises(RuntimeError, match="rate limited"):
+        pipeline.run("manual.pdf", {}, prepare_batch)
+
+    mock_vector_store.writer.return_value.add.assert_not_called()
+
+
+def test_pipeline_shared_writer_is_not_closed(mock_processor, mock_embeddings, mock_vector_store):
+    """Test that a caller-provided writer is left open for the next document."""
+    writer = MagicMock()
+    pipeline = IngestionPipeline(mock_processor, mock_embeddings, mock_vector_store)
+
+    pipeline.run("manual.pdf", {}, prepare_batch, writer=writer)
+
+    assert writer.add.called
+    writer.close.assert_not_called()
+    mock_vector_store.writer.assert_not_called()
+
+
+def test_pipeline_skips_dropped_chunks(mock_processor, mock_embeddings, mock_vector_store):
+    """Test that chunks dropped by prepare_batch are not embedded and keep their positions."""
+    def drop_odd(chunks, offset):
+        return [doc for doc in prepare_batch(chunks, offset) if int(doc["id"].split("_")[1]) % 2 == 0]
+
+    pipeline = IngestionPipeline(mock_processor, mock_embeddings, mock_vector_store, batch_size=1)
+
+    result = pipeline.run("manual.pdf", {}, drop_odd)
+
+    assert result["chunks_processed"] == 5
+    assert mock_embeddings.embed_documents.call_count == 5
+    ids = [doc["id"] for call in mock_vector_store.writer.return_value.add.call_args_list for doc in call.args[0]]
+    assert ids == [f"doc_{i}" for i in range(0, 10, 2)]
@@ -0,0 +1,117 @@
+"""Tests for the load-test stub and load generator."""
+import base64
+import json
+
+import httpx
+import numpy as np
+import pytest
+from fastapi import FastAPI
+from fastapi.responses import JSONResponse, StreamingResponse
+from fastapi.testclient import TestClient
+
+from adriacb_galtea.loadtest.load_generator import LoadGenerator, find_saturation, parse_mix
+from adriacb_galtea.loadtest.openai_stub import StubConfig, create_app
+
+TOOLS = [{"type": "function", "function": {"name": "search_documents", "parameters": {"type": "object"}}}]
+
+
+@pytest.fixture
+def stub():
+    """Fixture to create a stub client answering without latency."""
+    config = StubConfig(chat_latency_ms=0, token_latency_ms=0, embedding_latency_ms=0, answer_tokens=5)
+    return TestClient(create_app(config))
+
+
+def test_stub_chat_calls_tool_then_answers(stub):
+    """Test that the stub calls a tool first, answers after its result and streams."""
+    messages = [{"role": "user", "content": "What is the range?"}]
+    first = stub.post("/v1/chat/completions", json={"model": "gpt-4o-mini", "messages": messages, "tools": TOOLS})
+    tool_call = first.json()["choices"][0]["message"]["tool_calls"][0]
+
+    assert tool_call["function"]["name"] == "search_documents"
+    assert json.loads(tool_call["function"]["arguments"]) == {"query": "What is the range?"}
+
+    messages += [
+        first.json()["choices"][0]["message"],
+        {"role": "tool", "tool_call_id": tool_call["id"], "content": "420 km"},
+    ]
+    streamed = stub.post(
+        "/v1/chat/completions",
+        json={"model": "gpt-4o-mini", "messages": messages, "tools": TOOLS, "stream": True}
+    )
+    lines = [line[len("data: "):] for line in streamed.text.splitlines() if line.startswith("data: ")]
+    chunks = [json.loads(line) for line in lines[:-1]]
+
+    assert lines[-1] == "[DONE]"
+    assert len("".join(chunk["choices"][0]["delta"].get("content") or "" for chunk in chunks).split()) == 5
+    assert chunks[-1]["choices"][0]["finish_reason"] == "stop"
+
+
+def test_stub_embeddings_are_deterministic(stub):
+    """Test that embeddings depend only on the input and honour dimensions and base64."""
+    body = {"model": "text-embedding-3-small", "input": ["a", "b", "a"], "dimensions": 256}
+    data = stub.post("/v1/embeddings", json=body).json()["data"]
+    vectors = [np.array(item["embedding"]) for item in data]
+
+    assert [len(vector) for vector in vectors] == [256, 256, 256]
+    assert np.allclose(vectors[0], vectors[2]) and not np.allclose(vectors[0], vectors[1])
+    assert np.isclose(np.linalg.norm(vectors[0]), 1.0)
+
+    encoded = stub.post("/v1/embeddings", json={**body, "encoding_format": "base64"}).json()["data"][0]["embedding"]
+
+    assert np.allclose(np.frombuffer(base64.b64decode(encoded), dtype=np.float32), vectors[0], atol=1e-6)
+
+
+@pytest.mark.asyncio
+async def test_load_generator_reports_streams_and_shed_requests(tmp_path):
+    """Test that queries are read to the end and rejected injections are counted as shed."""
+    app = FastAPI()
+
+    @app.post("/api/v1/query")
+    async def query():
+        async def events():
+            yield 'data: {"content": "420 km"}\n\n'
+            yield 'data: {"done": true}\n\n'
+        return StreamingResponse(events(), media_type="text/event-stream")
+
+    @app.post("/api/v1/inject")
+    async def inject():
+        return JSONResponse({"detail": "Too many concurrent ingestions"}, status_code=429)
+
+    document = tmp_path / "manual.pdf"
+    document.write_bytes(b"%PDF-1.4")
+    generator = LoadGenerator(
+        "http://api",
+        parse_mix("query=0.5,inject=0.5"),
+        inject_files=[document],
+        seed=0,
+        transport=httpx.ASGITransport(app=app)
+    )
+
+    report = await generator.run(rate=200, duration=0.2, arrival="constant")
+
+    assert report["sent"] == 40
+    assert report["kinds"]["query"]["ok"] == report["kinds"]["query"]["sent"] > 0
+    assert report["kinds"]["query"]["latency_ms"]["p99"] is not None
+    assert report["kinds"]["inject"]["shed"] == report["kinds"]["inject"]["sent"] > 0
+    assert report["kinds"]["inject"]["errors"] == {"429": report["kinds"]["inject"]["sent"]}
+
+
+def test_find_saturation_stops_at_first_unsustained_rate():
+    """Test that the saturation rate is the last rate before errors, lag or an SLO breach."""
+    def step(rate, throughput, error_ratio=0.0, p99=100.0):
+        return {
+            "offered_rate": rate,
+            "sent_rate": rate,
+            "dropped": 0,
+            "throughput": throughput,
+            "error_ratio": error_ratio,
+            "latency_ms": {"p99": p99},
+        }
+
+    steps = [step(5, 5.0), step(10, 9.9), step(20, 15.0), step(40, 40.0)]
+
+    assert find_saturation(steps) == 10
+    assert find_saturation([step(5, 5.0), step(10, 10.0, error_ratio=0.05)]) == 5
+    assert find_saturation([step(5, 5.0, p99=900.0), step(10, 10.0, p99=2500.0)], slo_p99_ms=1000) == 5
+    assert find_saturation([step(5, 4.0)]) is None
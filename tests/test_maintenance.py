@@ -0,0 +1,149 @@
+"""Tests for index health reporting and compaction."""
+import sqlite3
+from unittest.mock import MagicMock
+
+import chromadb
+import numpy as np
+import pytest
+from chromadb.config import Settings
+
+from adriacb_galtea.core import maintenance
+from adriacb_galtea.core.maintenance import (
+    IndexMaintainer,
+    MaintenanceBusy,
+    collection_health,
+    storage_health,
+    vacuum_storage,
+)
+
+
+@pytest.fixture
+def vector_store_path(tmp_path, monkeypatch):
+    """Fixture to point the maintenance module at a temporary vector store directory."""
+    monkeypatch.setattr(maintenance, "get_vector_store_path", lambda: tmp_path)
+    return tmp_path
+
+
+def test_collection_health_counts_deleted_entries(tmp_path, monkeypatch):
+    """Test that deleted chunks are reported from the persisted HNSW header."""
+    monkeypatch.setattr(maintenance.settings, "MAINTENANCE_MIN_DELETED", 100)
+    client = chromadb.PersistentClient(path=str(tmp_path), settings=Settings(anonymized_telemetry=False))
+    collection = client.create_collection("documents", metadata={"hnsw:sync_threshold": 100})
+    vectors = np.random.default_rng(0).random((600, 16)).astype("float32")
+    collection.add(ids=[f"c{i}" for i in range(600)], embeddings=vectors)
+    collection.delete(ids=[f"c{i}" for i in range(0, 600, 2)])
+    store = MagicMock(collection_name="documents", _collection=collection, embedding_dimensions=16)
+    store._vector_segment_dir.return_value = next(tmp_path.glob("*/header.bin")).parent
+
+    health = collection_health(store)
+
+    assert health["health"] == "ok"
+    assert health["live"] == 300
+    assert health["index_elements"] == 600
+    assert health["deleted"] == 300
+    assert health["deleted_ratio"] == 0.5
+    assert health["deleted_bytes"] > 300 * 16 * 4
+    assert health["needs_compaction"]
+
+
+def test_collection_health_is_unknown_for_an_unexpected_header(tmp_path, monkeypatch):
+    """Test that a header that does not match the collection is not used to decide compaction."""
+    monkeypatch.setattr(maintenance.settings, "MAINTENANCE_MIN_DELETED", 100)
+    client = chromadb.PersistentClient(path=str(tmp_path), settings=Settings(anonymized_telemetry=False))
+    collection = client.create_collection("documents", metadata={"hnsw:sync_threshold": 100})
+    vectors = np.random.default_rng(0).random((600, 16)).astype("float32")
+    collection.add(ids=[f"c{i}" for i in range(600)], embeddings=vectors)
+    collection.delete(ids=[f"c{i}" for i in range(0, 600, 2)])
+    segment_dir = next(tmp_path.glob("*/header.bin")).parent
+    store = MagicMock(collection_name="documents", _collection=collection, embedding_dimensions=32)
+    store._vector_segment_dir.return_value = segment_dir
+
+    health = collection_health(store)
+
+    assert health["health"] == "unknown"
+    assert "dimensions" in health["error"]
+    assert health["deleted"] is None
+    assert not health["needs_compaction"]
+
+    store.embedding_dimensions = 16
+    header = segment_dir / "header.bin"
+    data = bytearray(header.read_bytes())
+    # Element count (third field after the version) above the capacity
+    data[20:28] = (10 ** 9).to_bytes(8, "little")
+    header.write_bytes(bytes(data))
+
+    health = collection_health(store)
+
+    assert health["health"] == "unknown"
+    assert "capacity" in health["error"]
+    assert not health["needs_compaction"]
+
+
+def test_vacuum_storage_enables_then_runs_incremental_vacuum(vector_store_path):
+    """Test that free pages are only reclaimed with a full vacuum until incremental vacuum is on."""
+    conn = sqlite3.connect(vector_store_path / "chroma.sqlite3", isolation_level=None)
+    conn.execute("CREATE TABLE embeddings (id INTEGER PRIMARY KEY, document TEXT)")
+
+    def churn():
+        conn.executemany("INSERT INTO embeddings (document) VALUES (?)", [("x" * 2000,)] * 500)
+        conn.execute("DELETE FROM embeddings")
+
+    churn()
+    assert storage_health()["free_pages"] > 0
+    assert vacuum_storage()["mode"] == "skipped"
+
+    result = vacuum_storage(full=True)
+
+    assert result["mode"] == "full"
+    assert result["reclaimed_bytes"] > 0
+    assert storage_health()["auto_vacuum"] == "incremental"
+
+    churn()
+    result = vacuum_storage(pages_per_step=50, pause_ms=0)
+
+    assert result["mode"] == "incremental"
+    assert result["steps"] > 1
+    assert storage_health()["free_pages"] == 0
+
+
+def test_compact_rebuilds_only_collections_that_need_it(vector_store_path, monkeypatch):
+    """Test that a compaction rebuilds, prewarms, swaps and drops only when entries are deleted."""
+    healths = iter([
+        {"deleted": 5000, "needs_compaction": True},
+        {"deleted": 0, "needs_compaction": False},
+        {"deleted": 0, "needs_compaction": False},
+        {"deleted": 0, "needs_compaction": False},
+    ])
+    reindexer = MagicMock()
+    reindexer.start.return_value.state = "ready"
+    vacuum = MagicMock(return_value={"mode": "incremental"})
+    monkeypatch.setattr(maintenance, "collection_health", lambda store: next(healths))
+    monkeypatch.setattr(maintenance, "resolve_collection", lambda name: name)
+    monkeypatch.setattr(maintenance, "get_collection_cache", MagicMock())
+    monkeypatch.setattr(maintenance, "get_reindexer", lambda: reindexer)
+    monkeypatch.setattr(maintenance, "storage_health", lambda: {"needs_vacuum": False})
+    monkeypatch.setattr(maintenance, "vacuum_storage", vacuum)
+    maintainer = IndexMaintainer(registry=MagicMock())
+
+    run = maintainer.compact("documents", drop_delay=0)
+
+    assert run["rebuilt"] and run["vacuum"] == {"mode": "incremental"}
+    job = reindexer.start.return_value
+    job.target.prewarm.assert_called_once()
+    job.swap.assert_called_once()
+    reindexer.finalize.assert_called_once_with("documents", drop_previous=True)
+
+    run = maintainer.compact("documents", drop_delay=0)
+
+    assert not run["rebuilt"] and "vacuum" not in run
+    assert reindexer.start.call_count == 1
+
+    healths = iter([{"health": "unknown", "deleted": None, "needs_compaction": False}] * 2)
+    run = maintainer.compact("documents", drop_delay=0)
+
+    assert not run["rebuilt"]
+    assert reindexer.start.call_count == 1
+
+    with maintainer._lock:
+        with pytest.raises(MaintenanceBusy):
+            maintainer.compact("documents")
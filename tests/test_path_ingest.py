@@ -0,0 +1,99 @@
+"""Tests for in-place ingestion of server-side paths."""
+import os
+from unittest.mock import MagicMock
+
+import pytest
+
+from adriacb_galtea.api.services.injection_service import InjectionService, PathNotAllowed, resolve_ingest_paths
+
+
+@pytest.fixture
+def volume(tmp_path):
+    """Fixture to create an allowed root with manuals and a file outside it."""
+    root = tmp_path / "manuals"
+    (root / "2023").mkdir(parents=True)
+    (root / "2023" / "id3.pdf").write_bytes(b"id3 manual")
+    (root / "2023" / "id4.pdf").write_bytes(b"id4 manual")
+    (root / "index.pdf").write_bytes(b"index")
+    (tmp_path / "secret.pdf").write_bytes(b"secret")
+    return root
+
+
+def test_patterns_expand_under_root(volume):
+    """Test that relative and absolute patterns expand to files with root-relative IDs."""
+    files, unmatched = resolve_ingest_paths(
+        ["2023/*.pdf", str(volume / "index.pdf"), "**/id3.pdf", "2024/*.pdf"],
+        roots=[volume]
+    )
+
+    assert [doc_id for _, doc_id in files] == ["2023/id3.pdf", "2023/id4.pdf", "index.pdf"]
+    assert files[0][0] == str(volume / "2023" / "id3.pdf")
+    assert unmatched == [str(volume / "2024/*.pdf")]
+
+    with pytest.raises(ValueError):
+        resolve_ingest_paths(["**/*.pdf"], roots=[volume], max_files=2)
+
+
+def test_paths_outside_roots_are_rejected(volume, tmp_path):
+    """Test that traversal, absolute paths and symlinks cannot leave the roots."""
+    os.symlink(tmp_path / "secret.pdf", volume / "link.pdf")
+
+    for pattern in ["../secret.pdf", str(tmp_path / "*.pdf"), "link.pdf", "*.pdf"]:
+        with pytest.raises(PathNotAllowed):
+            resolve_ingest_paths([pattern], roots=[volume])
+    with pytest.raises(PathNotAllowed):
+        resolve_ingest_paths(["index.pdf"], roots=[])
+
+
+@pytest.mark.asyncio
+async def test_inject_paths_reads_files_in_place(volume, monkeypatch):
+    """Test that each file is injected from its own path with one shared writer."""
+    monkeypatch.setattr(
+        "adriacb_galtea.api.services.injection_service.get_allowed_roots",
+        lambda: [volume]
+    )
+    service = InjectionService.__new__(InjectionService)
+    service.vector_store = MagicMock()
+    service.vector_store.writer.return_value.close.return_value = {"chunks": 2}
+    service.inject_document = MagicMock(return_value={"success": True, "chunks_processed": 1})
+
+    results = await service.inject_paths(["2023/*.pdf", "missing.pdf"])
+
+    assert [result["success"] for result in results] == [False, True, True]
+    assert service.inject_document.call_args.args == (str(volume / "2023" / "id4.pdf"),)
+    assert service.inject_document.call_args.kwargs["doc_id"] == "2023/id4.pdf"
+    assert service.vector_store.writer.call_count == 1
+
+
+def test_document_is_registered_after_shared_writer_flush(volume, monkeypatch):
+    """Test that a document sharing a writer is registered only once its chunks are written."""
+    pipeline = MagicMock()
+    pipeline.return_value.run.return_value = {"chunks_processed": 1, "chunk_stats": {}, "bottleneck": "embed"}
+    monkeypatch.setattr("adriacb_galtea.api.services.injection_service.IngestionPipeline", pipeline)
+    deduplicator = MagicMock(enabled=False, duplicates=[])
+    monkeypatch.setattr(
+        "adriacb_galtea.api.services.injection_service.DocumentDeduplicator",
+        lambda doc_id, collection: deduplicator
+    )
+    service = InjectionService.__new__(InjectionService)
+    service.processor = MagicMock()
+    service.vector_store = MagicMock(collection_name="documents")
+    service.registry = MagicMock()
+    service.registry.get.return_value = None
+    calls = MagicMock()
+    calls.attach_mock(service.registry.upsert, "upsert")
+    calls.attach_mock(deduplicator.commit, "commit")
+    writer = MagicMock()
+    calls.attach_mock(writer.flush, "flush")
+
+    result = service.inject_document(str(volume / "index.pdf"), writer=writer)
+
+    assert result["success"]
+    assert [call[0] for call in calls.mock_calls] == ["flush", "upsert", "commit"]
+
+    writer.flush.side_effect = RuntimeError("upsert failed")
+    service.registry.upsert.reset_mock()
+    result = service.inject_document(str(volume / "2023" / "id3.pdf"), writer=writer)
+
+    assert not result["success"]
+    service.registry.upsert.assert_not_called()
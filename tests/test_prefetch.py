@@ -0,0 +1,66 @@
+"""Tests for speculative retrieval prefetch."""
+import threading
+from unittest.mock import patch
+
+from adriacb_galtea.core.prefetch import PrefetchStats, RetrievalPrefetch, query_similarity
+
+RESULTS = [{"document": {"content": "ID.3 range", "metadata": {}}, "score": 0.1}]
+
+
+def test_query_similarity():
+    """Test the word overlap between tool queries and questions."""
+    assert query_similarity("What is the ID.3 range?", "what is the id.3 range") == 1.0
+    assert query_similarity("ID.3 range", "What is the ID.3 range?") > 0.6
+    assert query_similarity("range", "What is the ID.3 range?") < 0.6
+    assert query_similarity("Golf price", "What is the ID.3 range?") == 0.0
+
+
+def test_close_query_is_served_from_prefetch():
+    """Test that the first close tool query gets the prefetched results, once."""
+    stats = PrefetchStats()
+    with patch("adriacb_galtea.core.prefetch.run_search", return_value=RESULTS) as search:
+        prefetch = RetrievalPrefetch("What is the ID.3 range?", collection="cars", stats=stats).start()
+        assert prefetch.claim("what is the ID.3 range", collection="cars", collections=None) == RESULTS
+        assert prefetch.claim("what is the ID.3 range", collection="cars", collections=None) is None
+        prefetch.finish()
+
+    search.assert_called_once_with("What is the ID.3 range?", collection="cars", collections=None)
+    assert stats.stats()["hits"] == 1
+    assert stats.stats()["unused"] == 0
+
+
+def test_different_query_or_parameters_miss():
+    """Test that a distant query or other retrieval parameters fall back to a normal search."""
+    stats = PrefetchStats()
+    with patch("adriacb_galtea.core.prefetch.run_search", return_value=RESULTS):
+        distant = RetrievalPrefetch("What is the ID.3 range?", stats=stats).start()
+        assert distant.claim("Golf price list", collection=None, collections=None) is None
+        other_collection = RetrievalPrefetch("What is the ID.3 range?", stats=stats).start()
+        assert other_collection.claim("What is the ID.3 range?", collection="b", collections=None) is None
+        unused = RetrievalPrefetch("What is the ID.3 range?", stats=stats).start()
+        unused.finish()
+        for prefetch in (distant, other_collection, unused):
+            prefetch._future.result()
+
+    assert stats.stats() == {
+        "started": 3, "hits": 0, "misses": 2, "unused": 1,
+        "hit_rate": 0.0, "saved_seconds_total": 0.0, "saved_ms_per_hit": 0.0,
+    }
+
+
+def test_hit_waits_for_running_search_and_counts_saved_time():
+    """Test that a tool call arriving mid-search waits for it and saves the time already spent."""
+    stats = PrefetchStats()
+    release = threading.Event()
+
+    def slow_search(*args, **kwargs):
+        release.wait(1)
+        return RESULTS
+
+    with patch("adriacb_galtea.core.prefetch.run_search", side_effect=slow_search):
+        prefetch = RetrievalPrefetch("ID.3 range", stats=stats).start()
+        threading.Timer(0.1, release.set).start()
+        assert prefetch.claim("ID.3 range", collection=None, collections=None) == RESULTS
+
+    assert stats.stats()["hits"] == 1
+    assert 0.0 <= stats.stats()["saved_seconds_total"] < 0.1
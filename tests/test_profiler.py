@@ -0,0 +1,76 @@
+"""Tests for the on-demand sampling profiler."""
+import threading
+import time
+
+import pytest
+
+from adriacb_galtea.api.services.profiler import ProfilerBusy, SamplingProfiler
+
+
+def spin(stop):
+    """Keep a thread busy until stop is set."""
+    while not stop.is_set():
+        sum(i * i for i in range(1000))
+
+
+@pytest.fixture
+def busy_thread():
+    """Fixture to run a CPU-bound thread and an idle one during a test."""
+    stop = threading.Event()
+    threads = [
+        threading.Thread(target=spin, args=(stop,), name="busy worker"),
+        threading.Thread(target=stop.wait, name="idle"),
+    ]
+    for thread in threads:
+        thread.start()
+    yield
+    stop.set()
+    for thread in threads:
+        thread.join()
+
+
+def test_profile_collapses_busy_stacks(busy_thread):
+    """Test that the busy thread's stacks are counted and idle threads are hidden."""
+    profiler = SamplingProfiler(keep=5)
+    profile = profiler.start(seconds=5, interval_ms=2, label="test")
+    time.sleep(0.2)
+    profiler.stop()
+
+    lines = profile.collapsed().splitlines()
+    stack, count = lines[0].rsplit(" ", 1)
+    assert stack.startswith("busy_worker;threading.Thread._bootstrap")
+    assert "test_profiler.spin" in stack
+    assert int(count) > 10
+    assert not any(line.startswith("idle;") for line in lines)
+    assert any(line.startswith("idle;") for line in profile.collapsed(include_idle=True).splitlines())
+    assert profile.summary()["idle_samples"] > 0
+    assert profile.summary()["overhead_ratio"] < 0.5
+
+
+def test_one_profile_at_a_time_and_ring_buffer():
+    """Test that a second profile is refused while one runs and old profiles are evicted."""
+    profiler = SamplingProfiler(keep=2)
+    ids = []
+    for _ in range(3):
+        profile = profiler.start(seconds=1, interval_ms=1)
+        with pytest.raises(ProfilerBusy):
+            profiler.start()
+        ids.append(profiler.stop().id)
+
+    assert profiler.get(ids[0]) is None
+    assert [summary["id"] for summary in profiler.list()] == [ids[2], ids[1]]
+    with pytest.raises(RuntimeError):
+        profiler.stop()
+
+
+def test_profile_stops_at_deadline():
+    """Test that sampling ends by itself after the requested duration."""
+    profiler = SamplingProfiler()
+    profile = profiler.start(seconds=0.05, interval_ms=1)
+    time.sleep(0.2)
+
+    samples = profile.samples
+    time.sleep(0.05)
+    assert profile.samples == samples
+    assert profiler.stop() is profile
+    assert profile.seconds < 0.2
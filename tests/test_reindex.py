@@ -0,0 +1,162 @@
+"""Tests for online reindexing behind collection aliases."""
+from unittest.mock import MagicMock
+
+import chromadb
+import pytest
+from chromadb.config import Settings
+
+from adriacb_galtea.core import vector_store
+from adriacb_galtea.core.document_registry import DocumentRegistry
+from adriacb_galtea.core.reindex import ReindexError, ReindexJob, Reindexer
+from adriacb_galtea.core.vector_store import ChromaSchemaUnsupported, ChromaVectorStore
+
+
+@pytest.fixture
+def registry(tmp_path):
+    """Fixture to create a registry holding one document of the documents collection."""
+    registry = DocumentRegistry(tmp_path / "registry.sqlite3")
+    registry.upsert("manual.pdf", "manual.pdf", "abc", ["c0", "c1", "c2"], collection="documents")
+    return registry
+
+
+def make_store(name, dimensions, chunks):
+    """Mock a vector store over a dict of chunk ID to (text, vector)."""
+    store = MagicMock(collection_name=name, embedding_dimensions=dimensions)
+    store.chunks = chunks
+
+    def get(ids, include):
+        found = [chunk_id for chunk_id in ids if chunk_id in chunks]
+        return {
+            "ids": found,
+            "documents": [chunks[chunk_id][0] for chunk_id in found],
+            "metadatas": [{"doc_id": "manual.pdf"} for _ in found],
+            "embeddings": [chunks[chunk_id][1] for chunk_id in found],
+        }
+
+    def delete(ids):
+        for chunk_id in ids:
+            chunks.pop(chunk_id, None)
+
+    def upsert_embedded(ids, texts, metadatas, embeddings, reembed=False):
+        for chunk_id, text, vector in zip(ids, texts, embeddings):
+            chunks[chunk_id] = (text, list(vector)[:dimensions])
+
+    store.iter_ids.side_effect = lambda page_size: iter(
+        [sorted(chunks)[i:i + page_size] for i in range(0, len(chunks), page_size)]
+    )
+    store._collection.get.side_effect = get
+    store._collection.delete.side_effect = delete
+    store.upsert_embedded.side_effect = upsert_embedded
+    return store
+
+
+def test_registry_aliases_and_mirrors(registry):
+    """Test alias switching and mirroring of registry records."""
+    assert registry.resolve_alias("documents") == "documents"
+
+    assert registry.add_mirror("documents", "documents.r1") == 1
+    assert registry.get("manual.pdf", collection="documents.r1")["chunk_ids"] == ["c0", "c1", "c2"]
+    registry.upsert("guide.pdf", "guide.pdf", "def", ["g0"], collection="documents")
+    registry.delete("manual.pdf", collection="documents")
+    assert registry.count("documents.r1") == 1
+    assert registry.get("guide.pdf", collection="documents.r1") is not None
+
+    record = registry.set_alias("documents", "documents.r1")
+    assert record["previous"] == "documents"
+    assert registry.resolve_alias("documents") == "documents.r1"
+
+    assert registry.remove_mirror("documents", "documents.r1")
+    assert registry.mirrors("documents") == []
+
+
+def test_alias_and_mirror_lookups_are_cached_until_changed(registry, monkeypatch):
+    """Test that lookups skip SQLite until an alias or mirror changes, in any process."""
+    other = DocumentRegistry(registry.path)
+    connect = registry._connect
+    connections = []
+    monkeypatch.setattr(registry, "_connect", lambda: connections.append(1) or connect())
+
+    for _ in range(3):
+        assert registry.resolve_alias("documents") == "documents"
+        assert registry.mirrors("documents") == []
+    assert len(connections) == 2
+
+    # Another process sharing the registry switches the alias and adds a mirror
+    other.set_alias("documents", "documents.r1")
+    other.add_mirror("documents", "documents.r2")
+    assert registry.resolve_alias("documents") == "documents.r1"
+    assert registry.mirrors("documents") == [{"target": "documents.r2", "reembed": False}]
+
+    registry.remove_mirror("documents", "documents.r2")
+    assert other.mirrors("documents") == []
+
+
+def test_iter_ids_rejects_unknown_chroma_release(tmp_path, monkeypatch):
+    """Test that Chroma's private schema is only read for the releases it is known for."""
+    client = chromadb.PersistentClient(path=str(tmp_path), settings=Settings(anonymized_telemetry=False))
+    monkeypatch.setattr(vector_store, "_client", client)
+    monkeypatch.setattr(vector_store, "get_vector_store_path", lambda: tmp_path)
+    store = ChromaVectorStore("ids-paging", embedding_dimensions=4)
+    store._collection.add(ids=["a", "b", "c"], embeddings=[[1.0, 0.0, 0.0, 0.0]] * 3)
+
+    assert [chunk_id for page in store.iter_ids(page_size=2) for chunk_id in page] == ["a", "b", "c"]
+
+    monkeypatch.setattr(chromadb, "__version__", "2.0.0")
+    with pytest.raises(ChromaSchemaUnsupported, match="2.0.0"):
+        list(store.iter_ids())
+    assert store._vector_segment_dir() is None
+
+
+def test_reindex_copies_reconciles_and_swaps(registry):
+    """Test that a build shortens vectors, drops stale chunks and switches the alias."""
+    source = make_store("documents", 4, {f"c{i}": (f"chunk {i}", [i, 1, 2, 3]) for i in range(5)})
+    target = make_store("documents.r1", 2, {"stale": ("gone", [0, 0])})
+    job = ReindexJob("documents", source, target, max_chunks_per_second=0, batch_size=2, registry=registry)
+
+    job.run()
+
+    assert job.state == "ready"
+    assert job.copied == 5
+    assert job.reconciled_removed == 1
+    assert target.chunks == {f"c{i}": (f"chunk {i}", [i, 1]) for i in range(5)}
+    assert registry.mirrors("documents") == [{"target": "documents.r1", "reembed": False}]
+
+    job.swap()
+    assert job.state == "swapped"
+    assert registry.resolve_alias("documents") == "documents.r1"
+    # Writes to the new collection reach the previous one until finalize
+    assert [mirror["target"] for mirror in registry.mirrors("documents.r1")] == ["documents"]
+
+
+def test_swap_requires_ready_build(registry):
+    """Test that a failed build cannot be swapped and stops mirroring."""
+    source = make_store("documents", 4, {"c0": ("chunk 0", [0, 1, 2, 3])})
+    target = make_store("documents.r1", 2, {})
+    target.upsert_embedded.side_effect = RuntimeError("disk full")
+    job = ReindexJob("documents", source, target, max_chunks_per_second=0, registry=registry)
+
+    job.run()
+
+    assert job.state == "failed"
+    assert job.error == "disk full"
+    assert registry.mirrors("documents") == []
+    with pytest.raises(ReindexError):
+        job.swap()
+
+
+def test_rollback_and_finalize(registry):
+    """Test switching an alias back and then stopping the mirrors."""
+    registry.add_mirror("documents", "documents.r1")
+    registry.add_mirror("documents.r1", "documents")
+    registry.set_alias("documents", "documents.r1")
+    reindexer = Reindexer(registry=registry)
+
+    record = reindexer.rollback("documents")
+
+    assert record["collection"] == "documents"
+    assert registry.resolve_alias("documents") == "documents"
+
+    result = reindexer.finalize("documents")
+    assert result["dropped"] is None
+    assert registry.mirrors("documents") == []
+    assert registry.mirrors("documents.r1") == []
@@ -0,0 +1,153 @@
+"""Tests for the retrieval quality versus latency sweep."""
+import re
+import zlib
+
+import chromadb
+import numpy as np
+import pytest
+from chromadb.config import Settings
+
+from adriacb_galtea.core import vector_store
+from adriacb_galtea.core.document_processor import DoclingProcessor
+from adriacb_galtea.core.document_registry import DocumentRegistry
+from adriacb_galtea.evaluation.retrieval_sweep import (
+    convert_documents,
+    run_sweep,
+    score_retrieval,
+    select_cheapest,
+)
+
+
+class WordEmbeddings:
+    """Bag-of-words embeddings hashing each word to one of 32 dimensions."""
+
+    def embed_documents(self, texts):
+        return [self.embed_query(text) for text in texts]
+
+    def embed_query(self, text):
+        vector = np.zeros(32)
+        for word in re.findall(r"\w+", text.casefold()):
+            vector[zlib.crc32(word.encode()) % 32] += 1
+        return vector.tolist()
+
+
+class RandomEmbeddings:
+    """Embeddings drawing a random 64-dimensional vector seeded by the text."""
+
+    def embed_documents(self, texts):
+        return [self.embed_query(text) for text in texts]
+
+    def embed_query(self, text):
+        return np.random.default_rng(zlib.crc32(text.encode())).normal(size=64).tolist()
+
+
+@pytest.fixture
+def chroma(tmp_path, monkeypatch):
+    """Fixture to point the vector store and document registry at a temporary directory."""
+    client = chromadb.PersistentClient(path=str(tmp_path), settings=Settings(anonymized_telemetry=False))
+    monkeypatch.setattr(vector_store, "_client", client)
+    monkeypatch.setattr(vector_store, "get_vector_store_path", lambda: tmp_path)
+    monkeypatch.setattr(DocumentRegistry, "_instance", None)
+    # Word counts stand in for the tiktoken encoding
+    monkeypatch.setattr(DoclingProcessor, "count_tokens", lambda self, text: len(text.split()))
+    return client
+
+
+def test_score_retrieval_recall_mrr_and_context():
+    """Test that recall counts matched labels and MRR the rank of the first relevant chunk."""
+    queries = [
+        {"question": "range", "relevant": [{"contains": "426  KM"}, {"filename": "id3.pdf", "page": 4}]},
+        {"question": "price", "relevant": [{"contains": "30000 euros"}]},
+    ]
+    retrieved = [
+        [
+            {"content": "Charging takes 30 minutes", "metadata": {"token_count": 10}},
+            {"content": "Up to 426 km", "metadata": {"filename": "id3.pdf", "page_start": 2, "page_end": 3, "token_count": 20}},
+            {"content": "Battery", "metadata": {"filename": "id3.pdf", "page_start": 4, "page_end": 5, "token_count": 30}},
+        ],
+        [{"content": "The Golf", "metadata": {"token_count": 5}}],
+    ]
+
+    scores = score_retrieval(queries, retrieved, ks=(1, 3))
+
+    assert scores["recall@1"] == 0.0
+    assert scores["recall@3"] == 0.5
+    assert scores["mrr"] == 0.25
+    assert scores["context_tokens@3"] == 32.5
+
+
+def test_sweep_evaluates_every_configuration_and_selects_cheapest(tmp_path, chroma):
+    """Test that the grid is indexed with the real store, scored, cleaned up and the cheapest pick meets the bar."""
+    (tmp_path / "id3.md").write_text(
+        "# ID.3\n\n## Range\n\nThe ID.3 reaches up to 426 km of range.\n\n"
+        "## Charging\n\nThe ID.3 charges from 5 to 80 percent in 30 minutes.\n"
+    )
+    (tmp_path / "golf.md").write_text("# Golf\n\n## Price\n\nThe Golf starts at 30000 euros.\n")
+    queries = [
+        {"question": "ID.3 range km", "relevant": [{"contains": "426 km"}]},
+        {"question": "Golf price euros", "relevant": [{"contains": "30000 euros", "filename": "golf.md"}]},
+        {"question": "ID.3 charging minutes", "relevant": ["80 percent in 30 minutes"]},
+    ]
+    documents = convert_documents(sorted(tmp_path.glob("*.md")), DoclingProcessor())
+
+    report = run_sweep(
+        documents,
+        queries,
+        chunk_tokens=[32, 64],
+        overlap_tokens=[0, 32],
+        dimensions=[16, 32, 64],
+        ms=[8],
+        construction_efs=[50],
+        search_efs=[10, 20],
+        ks=(1, 3),
+        embeddings=WordEmbeddings()
+    )
+
+    results = report["results"]
+    # (32, 32) is skipped and 64 is above the full dimension
+    assert len(results) == 3 * 2 * 2
+    assert report["full_dimensions"] == 32
+    full = [result for result in results if result["dimensions"] == 32 and result["chunk_tokens"] == 64]
+    assert all(result["recall@1"] == 1.0 and result["mrr"] == 1.0 for result in full)
+    assert all(result["embedding_tokens"] > 0 and result["index_memory_bytes"] > 0 for result in results)
+    assert results[0]["search_ms"]["p99"] is not None
+    assert chroma.list_collections() == []
+
+    selected = select_cheapest(results, min_recall=1.0, k=1, cheapest_by="memory")
+    assert selected["recall@1"] == 1.0
+    assert selected["index_memory_bytes"] == min(
+        result["index_memory_bytes"] for result in results if result["recall@1"] == 1.0
+    )
+    assert select_cheapest(results, min_recall=1.0, k=1, max_p99_ms=0.0) is None
+
+
+def test_sweep_recall_depends_on_search_ef(chroma):
+    """Test that each search_ef is searched in an index loaded with it, on an index of low recall."""
+    embeddings = RandomEmbeddings()
+    texts = [f"item {i:04d}" for i in range(2000)]
+    documents = [({"filename": f"item{i}.md"}, [text]) for i, text in enumerate(texts)]
+    chunks = np.asarray(embeddings.embed_documents(texts))
+    chunks /= np.linalg.norm(chunks, axis=1, keepdims=True)
+    queries = []
+    for i in range(100):
+        question = f"question {i}"
+        nearest = int(np.argmax(chunks @ np.asarray(embeddings.embed_query(question))))
+        queries.append({"question": question, "relevant": [{"contains": texts[nearest]}]})
+
+    report = run_sweep(
+        documents,
+        queries,
+        chunk_tokens=[8],
+        overlap_tokens=[0],
+        dimensions=[64],
+        ms=[4],
+        construction_efs=[4],
+        search_efs=[1, 500],
+        ks=(1,),
+        embeddings=embeddings
+    )
+
+    narrow, wide = report["results"]
+    assert (narrow["search_ef"], wide["search_ef"]) == (1, 500)
+    assert narrow["recall@1"] < 0.8
+    assert wide["recall@1"] > narrow["recall@1"] + 0.2
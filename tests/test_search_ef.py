@@ -0,0 +1,37 @@
+"""Tests for the HNSW search_ef setting of a collection."""
+import asyncio
+
+import chromadb
+import pytest
+from chromadb.config import Settings
+from fastapi import HTTPException
+
+from adriacb_galtea.api.routes import check_collections
+from adriacb_galtea.core import vector_store
+from adriacb_galtea.core.vector_store import ChromaVectorStore
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    """Fixture to create a four-dimensional collection in a temporary directory."""
+    client = chromadb.PersistentClient(path=str(tmp_path), settings=Settings(anonymized_telemetry=False))
+    monkeypatch.setattr(vector_store, "_client", client)
+    monkeypatch.setattr(vector_store, "get_vector_store_path", lambda: tmp_path)
+    return ChromaVectorStore("search-ef", hnsw_params={"search_ef": 10}, embedding_dimensions=4)
+
+
+def test_set_search_ef_is_persisted(store):
+    """Test that set_search_ef records the new value for processes opening the collection."""
+    store.set_search_ef(20)
+
+    assert store.hnsw_params["search_ef"] == 20
+    reopened = ChromaVectorStore("search-ef", create=False)
+    assert reopened.hnsw_params["search_ef"] == 20
+
+
+def test_query_search_ef_is_rejected():
+    """Test that a query cannot choose its own search_ef."""
+    with pytest.raises(HTTPException) as error:
+        asyncio.run(check_collections(None, None, search_ef=60))
+
+    assert error.value.status_code == 400
@@ -0,0 +1,102 @@
+"""Tests for vector store snapshots."""
+import pytest
+from unittest.mock import MagicMock
+
+from adriacb_galtea.core.document_registry import DocumentRegistry
+from adriacb_galtea.core.snapshot import SnapshotError, export_snapshot, import_snapshot, verify_snapshot
+
+CHUNKS = [
+    {"id": f"manual.pdf:abc:{i}", "text": f"chunk {i}", "metadata": {"doc_id": "manual.pdf", "page": i}, "vector": [i, 0.5, -1.0]}
+    for i in range(5)
+]
+
+
+@pytest.fixture
+def registry(tmp_path):
+    """Fixture to create a registry holding one document."""
+    registry = DocumentRegistry(tmp_path / "registry.sqlite3")
+    registry.upsert("manual.pdf", "manual.pdf", "abc", [chunk["id"] for chunk in CHUNKS], collection="tenant-a")
+    return registry
+
+
+@pytest.fixture
+def source_store():
+    """Fixture to mock a vector store whose collection is read page by page."""
+    def get(limit, offset, include):
+        page = CHUNKS[offset:offset + limit]
+        return {
+            "ids": [chunk["id"] for chunk in page],
+            "documents": [chunk["text"] for chunk in page],
+            "metadatas": [chunk["metadata"] for chunk in page],
+            "embeddings": [chunk["vector"] for chunk in page],
+        }
+
+    store = MagicMock(collection_name="tenant-a", hnsw_params={"space": "cosine", "M": 16})
+    store._collection.get.side_effect = get
+    return store
+
+
+@pytest.fixture
+def target_store():
+    """Fixture to mock an empty vector store with a batched writer."""
+    store = MagicMock(collection_name="tenant-b", embedding_dimensions=3)
+    store.get_stats.return_value = {"dimensions": 0}
+    store.writer.return_value.batch_size = 2
+    return store
+
+
+def test_export_import_roundtrip(tmp_path, registry, source_store, target_store):
+    """Test that a snapshot restores chunks, vectors and registry records without re-embedding."""
+    manifest = export_snapshot(source_store, tmp_path / "snapshot", page_size=2, registry=registry)
+
+    assert manifest["count"] == 5
+    assert manifest["dimensions"] == 3
+    assert manifest["documents"] == 1
+
+    result = import_snapshot(target_store, tmp_path / "snapshot", registry=registry)
+
+    assert result["chunks"] == 5
+    calls = target_store.writer.return_value.add.call_args_list
+    assert [len(call.args[0]) for call in calls] == [2, 2, 1]
+    documents = [doc for call in calls for doc in call.args[0]]
+    vectors = [vector for call in calls for vector in call.kwargs["embeddings"]]
+    assert [doc["id"] for doc in documents] == [chunk["id"] for chunk in CHUNKS]
+    assert documents[3]["metadata"] == {"doc_id": "manual.pdf", "page": 3}
+    assert vectors == [chunk["vector"] for chunk in CHUNKS]
+    assert registry.get("manual.pdf", collection="tenant-b")["chunk_count"] == 5
+
+
+def test_corrupt_snapshot_is_rejected(tmp_path, registry, source_store, target_store):
+    """Test that checksum verification catches a modified file."""
+    export_snapshot(source_store, tmp_path / "snapshot", registry=registry)
+    texts = tmp_path / "snapshot" / "texts.jsonl"
+    texts.write_bytes(texts.read_bytes().replace(b"chunk 1", b"chunk 9"))
+
+    with pytest.raises(SnapshotError, match="Checksum"):
+        verify_snapshot(tmp_path / "snapshot")
+    with pytest.raises(SnapshotError):
+        import_snapshot(target_store, tmp_path / "snapshot", registry=registry)
+    target_store.writer.return_value.add.assert_not_called()
+
+
+def test_incomplete_snapshot_is_rejected(tmp_path, target_store):
+    """Test that a directory without a manifest is not imported."""
+    (tmp_path / "snapshot").mkdir()
+
+    with pytest.raises(SnapshotError, match="manifest"):
+        import_snapshot(target_store, tmp_path / "snapshot")
+
+
+def test_dimension_mismatch_is_rejected(tmp_path, registry, source_store, target_store):
+    """Test that vectors are not mixed into a collection of another dimension."""
+    export_snapshot(source_store, tmp_path / "snapshot", registry=registry)
+    target_store.get_stats.return_value = {"dimensions": 1536}
+
+    with pytest.raises(SnapshotError, match="dimensional"):
+        import_snapshot(target_store, tmp_path / "snapshot", registry=registry)
+
+    # An empty collection is bound to the embedding dimension recorded at creation
+    target_store.get_stats.return_value = {"dimensions": 0}
+    target_store.embedding_dimensions = 256
+    with pytest.raises(SnapshotError, match="dimensional"):
+        import_snapshot(target_store, tmp_path / "snapshot", registry=registry)
@@ -0,0 +1,88 @@
+"""Tests for request stage tracing."""
+import json
+import threading
+from unittest.mock import MagicMock
+
+import pytest
+
+from adriacb_galtea.api.services.ingestion_pipeline import IngestionPipeline
+from adriacb_galtea.config.settings import settings
+from adriacb_galtea.utils import tracing
+
+
+@pytest.fixture
+def trace_file(tmp_path, monkeypatch):
+    """Fixture to enable tracing into a temporary file, read back as a list of spans."""
+    path = tmp_path / "traces.jsonl"
+    monkeypatch.setattr(settings, "TRACE_ENABLED", True)
+    monkeypatch.setattr(settings, "TRACE_FILE", str(path))
+    monkeypatch.setattr(settings, "TRACE_SAMPLE_RATIO", 1.0)
+
+    def read():
+        tracing.shutdown_tracing()
+        spans = []
+        for line in path.read_text().splitlines():
+            for resource_spans in json.loads(line)["resourceSpans"]:
+                for scope_spans in resource_spans["scopeSpans"]:
+                    spans.extend(scope_spans["spans"])
+        return {span["name"]: span for span in spans}
+
+    yield read
+    tracing.shutdown_tracing()
+
+
+def attributes(span):
+    """Flatten the OTLP/JSON attributes of a span."""
+    return {item["key"]: next(iter(item["value"].values())) for item in span.get("attributes", [])}
+
+
+def test_spans_follow_threads_as_otlp_json(trace_file):
+    """Test that a bound function's span is a child of the caller's, with hex IDs."""
+    def work():
+        with tracing.span("child", k=5, skipped=None):
+            pass
+
+    with tracing.span("parent"):
+        thread = threading.Thread(target=tracing.bind_context(work))
+        thread.start()
+        thread.join()
+    spans = trace_file()
+
+    assert spans["child"]["parentSpanId"] == spans["parent"]["spanId"]
+    assert spans["child"]["traceId"] == spans["parent"]["traceId"]
+    assert len(spans["parent"]["traceId"]) == 32
+    assert attributes(spans["child"]) == {"k": "5"}
+
+
+def test_pipeline_stages_are_traced(trace_file):
+    """Test that every pipeline stage and embedding batch gets a span under the document."""
+    processor = MagicMock()
+    processor.iter_markdown.return_value = iter(["segment 1", "segment 2"])
+    processor.iter_chunks.side_effect = lambda segments, metadata, stats: (
+        {"content": segment, "metadata": {}} for segment in segments
+    )
+    embeddings = MagicMock()
+    embeddings.embed_documents.side_effect = lambda texts: [[0.0] for _ in texts]
+    pipeline = IngestionPipeline(processor, embeddings, MagicMock(), batch_size=2)
+
+    with tracing.span("ingest.document"):
+        pipeline.run("manual.pdf", {}, prepare_batch=lambda chunks, offset: chunks)
+    spans = trace_file()
+
+    document_id = spans["ingest.document"]["spanId"]
+    for stage in IngestionPipeline.STAGES:
+        assert spans[f"ingest.{stage}"]["parentSpanId"] == document_id
+    assert attributes(spans["ingest.embed"])["items"] == "2"
+    assert spans["embedding.batch"]["parentSpanId"] == spans["ingest.embed"]["spanId"]
+    assert attributes(spans["embedding.batch"]) == {"chunks": "2", "bytes": "18"}
+
+
+def test_disabled_tracing_writes_nothing(tmp_path, monkeypatch):
+    """Test that spans are no-ops and functions are not wrapped when tracing is off."""
+    monkeypatch.setattr(settings, "TRACE_ENABLED", False)
+    monkeypatch.setattr(settings, "TRACE_FILE", str(tmp_path / "traces.jsonl"))
+
+    with tracing.span("ignored") as span:
+        assert not span.is_recording()
+    assert tracing.bind_context(len) is len
+    assert not (tmp_path / "traces.jsonl").exists()